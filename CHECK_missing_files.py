@@ -7,7 +7,6 @@ Supports full analysis or specific date range processing
 import os
 import sys
 import django
-import glob
 from collections import defaultdict
 import re
 from datetime import datetime
@@ -17,30 +16,43 @@ import argparse
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gwportal.settings')
 django.setup()
 
-from survey.models import ScienceFrame, BiasFrame, DarkFrame, FlatFrame
+from survey.models import FrameIndex, ArchiveFolder, ArchiveFile
+
+ARCHIVE_BASE_PATH = '/lyman/data1/obsdata'
+
+def refresh_inventory():
+    """Bring the archive inventory up to date (only changed directories are listed)"""
+    print("🗂️  Refreshing archive inventory...")
+    result = ArchiveFolder.refresh_inventory(ARCHIVE_BASE_PATH)
+    print(f"   {result['folders_checked']:,} folders checked, {result['folders_listed']:,} listed, "
+          f"+{result['files_added']:,}/-{result['files_removed']:,} files ({result['elapsed']:.1f}s)")
+    return result
+
+# Patterns to exclude (case-insensitive substrings)
+EXCLUDE_PATTERNS = [
+    'focus', 'test', 'master', 'calib', 'lamp', 'twilight', 
+    'snapshot', 'corsub', 'sub_', 'autofocus', 'af_',
+    'defocus_test',  # Defocus_test is test data, so exclude
+]
+
+# Special filenames (exact match)
+SPECIAL_EXCLUDES = [
+    'bias.fits', 'mask60.fits', 'snapshot'
+]
+
+# Science-file filter, applied in SQL by the inventory queries
+SCIENCE_FILTER = {'exclude_patterns': EXCLUDE_PATTERNS, 'exclude_names': SPECIAL_EXCLUDES}
 
 def is_science_file(filename):
     """Check if the file is actual science observation data"""
     filename_lower = filename.lower()
     
-    # Patterns to exclude
-    exclude_patterns = [
-        'focus', 'test', 'master', 'calib', 'lamp', 'twilight', 
-        'snapshot', 'corsub', 'sub_', 'autofocus', 'af_',
-        'defocus_test',  # Defocus_test is test data, so exclude
-    ]
-    
-    # Special filenames (exact match)
-    special_excludes = [
-        'bias.fits', 'mask60.fits', 'snapshot'
-    ]
-    
     # Check exact match
-    if filename_lower in special_excludes:
+    if filename_lower in SPECIAL_EXCLUDES:
         return False
     
     # Check pattern inclusion
-    for pattern in exclude_patterns:
+    for pattern in EXCLUDE_PATTERNS:
         if pattern in filename_lower:
             return False
     
@@ -63,81 +75,6 @@ def get_filename_pattern(filename):
         return '_'.join(pattern_parts)
     return filename
 
-def get_files_by_date_range(start_date=None, end_date=None, specific_dates=None):
-    """
-    Get FITS files filtered by date range or specific dates
-    Handles both filename dates and folder dates for proper filtering
-    
-    Args:
-        start_date (str): Start date in YYYY-MM-DD format
-        end_date (str): End date in YYYY-MM-DD format  
-        specific_dates (list): List of specific dates in YYYY-MM-DD format
-    
-    Returns:
-        tuple: (all_fits_files, filtered_fits_files, file_date_info)
-    """
-    # Get all FITS files
-    all_fits_files = [f for f in glob.glob('/lyman/data1/obsdata/7DT*/*/*.fits')]
-    
-    # Extract date information for each file
-    file_date_info = {}
-    
-    for file_path in all_fits_files:
-        filename = os.path.basename(file_path)
-        folder_path = os.path.dirname(file_path)
-        folder_name = os.path.basename(folder_path)
-        
-        # Extract date from filename (7DT*_YYYYMMDD_* pattern)
-        filename_match = re.search(r'7DT\d+_(\d{8})_', filename)
-        filename_date = None
-        if filename_match:
-            date_str = filename_match.group(1)
-            filename_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
-        
-        # Extract date from folder name (YYYY-MM-DD_* pattern)
-        folder_match = re.search(r'(\d{4}-\d{2}-\d{2})', folder_name)
-        folder_date = folder_match.group(1) if folder_match else None
-        
-        file_date_info[file_path] = {
-            'filename': filename,
-            'filename_date': filename_date,
-            'folder_date': folder_date,
-            'folder_name': folder_name
-        }
-    
-    if not start_date and not end_date and not specific_dates:
-        # Return all files if no filtering specified
-        return all_fits_files, all_fits_files, file_date_info
-    
-    filtered_files = []
-    
-    for file_path in all_fits_files:
-        info = file_date_info[file_path]
-        filename_date = info['filename_date']
-        folder_date = info['folder_date']
-        
-        # Use filename date for filtering (primary), fallback to folder date
-        filter_date = filename_date if filename_date else folder_date
-        
-        if not filter_date:
-            continue
-        
-        # Filter by specific dates
-        if specific_dates:
-            if filter_date in specific_dates:
-                filtered_files.append(file_path)
-        # Filter by date range
-        elif start_date or end_date:
-            include_file = True
-            if start_date and filter_date < start_date:
-                include_file = False
-            if end_date and filter_date > end_date:
-                include_file = False
-            if include_file:
-                filtered_files.append(file_path)
-    
-    return all_fits_files, filtered_files, file_date_info
-
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -194,6 +131,9 @@ Examples:
     parser.add_argument('--list-missing-folders', action='store_true',
                        help='List only folders with missing files (quick overview)')
     
+    parser.add_argument('--list-orphans', action='store_true',
+                       help='List DB frames whose file is no longer in the archive (by night date)')
+    
     return parser.parse_args()
 
 def analyze_and_save_missing_files(start_date=None, end_date=None, specific_dates=None, 
@@ -245,49 +185,39 @@ def analyze_and_save_missing_files(start_date=None, end_date=None, specific_date
     # 1. Data collection with filtering
     print("📊 Collecting data...")
     
-    # Get database files
-    db_files = set(ScienceFrame.objects.values_list('original_filename', flat=True)) | \
-               set(BiasFrame.objects.values_list('original_filename', flat=True)) | \
-               set(DarkFrame.objects.values_list('original_filename', flat=True)) | \
-               set(FlatFrame.objects.values_list('original_filename', flat=True))
-    
-    # Get filtered FITS files
-    all_fits_files, filtered_fits_files, file_date_info = get_files_by_date_range(start_date, end_date, specific_dates)
-    all_filenames = [os.path.basename(f) for f in all_fits_files]
-    filtered_filenames = [os.path.basename(f) for f in filtered_fits_files]
+    # Counts per folder from the inventory, science filter and frame index
+    # anti-join all run in the database (scoped by filename date)
+    scope = dict(start_date=start_date, end_date=end_date, dates=specific_dates, by_filename_date=True)
+    folder_counts = ArchiveFile.folder_summary(**scope, **SCIENCE_FILTER)
+    total_all = ArchiveFile.objects.filter(folder__depth=1, name__endswith='.fits').count()
+    total_filtered = sum(folder['total_files'] for folder in folder_counts)
+    total_science = sum(folder['science_files'] for folder in folder_counts)
+    total_excluded = total_filtered - total_science
+    db_count = FrameIndex.objects.count()
     
     # Analyze date mismatches
-    date_mismatches = []
-    for file_path in filtered_fits_files:
-        info = file_date_info[file_path]
-        if info['filename_date'] and info['folder_date']:
-            if info['filename_date'] != info['folder_date']:
-                date_mismatches.append({
-                    'filename': info['filename'],
-                    'filename_date': info['filename_date'],
-                    'folder_date': info['folder_date'],
-                    'folder_name': info['folder_name'],
-                    'full_path': file_path
-                })
-    
-    # Filter science observation files only
-    science_files = set()
-    excluded_files = set()
-    
-    for filename in filtered_filenames:
-        if is_science_file(filename):
-            science_files.add(filename)
-        else:
-            excluded_files.add(filename)
+    date_mismatches = [
+        {
+            'filename': filename,
+            'filename_date': filename_date,
+            'folder_date': folder_date,
+            'folder_name': folder_name,
+            'full_path': os.path.join(folder_path, filename)
+        }
+        for filename, filename_date, folder_date, folder_name, folder_path
+        in ArchiveFile.date_mismatches(start_date, end_date, specific_dates)
+    ]
     
-    fits_files = science_files
-    missing_files = fits_files - db_files
+    # Missing science files, streamed folder by folder
+    missing_files = []
+    for folder in ArchiveFile.missing_by_folder(**scope, **SCIENCE_FILTER):
+        missing_files.extend(folder['missing'])
     
-    print(f"   Total FITS files (all): {len(all_filenames):,}")
-    print(f"   Filtered FITS files: {len(filtered_filenames):,}")
-    print(f"   Excluded by filtering: {len(excluded_files):,}")
-    print(f"   Science observation files: {len(fits_files):,}")
-    print(f"   DB registered files: {len(db_files):,}")
+    print(f"   Total FITS files (all): {total_all:,}")
+    print(f"   Filtered FITS files: {total_filtered:,}")
+    print(f"   Excluded by filtering: {total_excluded:,}")
+    print(f"   Science observation files: {total_science:,}")
+    print(f"   DB registered files: {db_count:,}")
     print(f"   Missing files: {len(missing_files):,}")
     
     # Show date mismatch information
@@ -370,11 +300,11 @@ def analyze_and_save_missing_files(start_date=None, end_date=None, specific_date
         
         # Overall summary
         log_file.write("📊 Overall Summary:\n")
-        log_file.write(f"   • Total FITS files (all): {len(all_filenames):,}\n")
-        log_file.write(f"   • Filtered FITS files: {len(filtered_filenames):,}\n")
-        log_file.write(f"   • Excluded by filtering: {len(excluded_files):,}\n")
-        log_file.write(f"   • Science observation files: {len(fits_files):,}\n")
-        log_file.write(f"   • DB registered files: {len(db_files):,}\n")
+        log_file.write(f"   • Total FITS files (all): {total_all:,}\n")
+        log_file.write(f"   • Filtered FITS files: {total_filtered:,}\n")
+        log_file.write(f"   • Excluded by filtering: {total_excluded:,}\n")
+        log_file.write(f"   • Science observation files: {total_science:,}\n")
+        log_file.write(f"   • DB registered files: {db_count:,}\n")
         log_file.write(f"   • Missing files: {len(missing_files):,}\n")
         log_file.write(f"   • Missing dates count: {len(valid_dates)}\n")
         
@@ -498,15 +428,17 @@ def analyze_date_mismatches():
     print("Analyzing files where filename date ≠ folder date...")
     print("=" * 80)
     
-    # Get all files with date information
-    all_fits_files, _, file_date_info = get_files_by_date_range()
-    
-    # Find mismatches
-    mismatches = []
-    for file_path, info in file_date_info.items():
-        if info['filename_date'] and info['folder_date']:
-            if info['filename_date'] != info['folder_date']:
-                mismatches.append(info)
+    # Find mismatches in the archive inventory (compared in the database)
+    total_files = ArchiveFile.objects.filter(folder__depth=1, name__endswith='.fits').count()
+    mismatches = [
+        {
+            'filename': filename,
+            'filename_date': filename_date,
+            'folder_date': folder_date,
+            'folder_name': folder_name
+        }
+        for filename, filename_date, folder_date, folder_name, _ in ArchiveFile.date_mismatches()
+    ]
     
     if not mismatches:
         print("✅ No date mismatches found!")
@@ -550,7 +482,7 @@ def analyze_date_mismatches():
         f.write("=" * 100 + "\n\n")
         
         f.write(f"📊 Summary:\n")
-        f.write(f"   • Total files analyzed: {len(file_date_info):,}\n")
+        f.write(f"   • Total files analyzed: {total_files:,}\n")
         f.write(f"   • Files with date mismatches: {len(mismatches):,}\n")
         f.write(f"   • Unique mismatch patterns: {len(patterns)}\n\n")
         
@@ -619,84 +551,46 @@ def analyze_by_folders(start_date=None, end_date=None, specific_dates=None,
     print(f"🔍 Filter: {filter_desc}")
     print("=" * 80)
     
-    # 1. Get database files
+    # 1. Registered files
     print("📊 Collecting database files...")
-    db_files = set(ScienceFrame.objects.values_list('original_filename', flat=True)) | \
-               set(BiasFrame.objects.values_list('original_filename', flat=True)) | \
-               set(DarkFrame.objects.values_list('original_filename', flat=True)) | \
-               set(FlatFrame.objects.values_list('original_filename', flat=True))
-    
-    print(f"   DB registered files: {len(db_files):,}")
+    print(f"   DB registered files: {FrameIndex.objects.count():,}")
     
-    # 2. Analyze folders
+    # 2. Analyze folders: counts per folder and the missing files (streamed per
+    # folder) come from an anti-join of the inventory against the frame index
     print("📊 Analyzing folder structure...")
     
-    # Get all observation folders
-    base_path = '/lyman/data1/obsdata'
-    telescope_dirs = glob.glob(f'{base_path}/7DT*')
+    scope = dict(start_date=start_date, end_date=end_date, dates=specific_dates)
+    missing_lists = {
+        folder['folder_path']: folder['missing']
+        for folder in ArchiveFile.missing_by_folder(**scope, **SCIENCE_FILTER)
+    }
     
     folder_analysis = {}
     total_files = 0
     total_science_files = 0
     total_missing = 0
     
-    for telescope_dir in sorted(telescope_dirs):
-        telescope_name = os.path.basename(telescope_dir)
-        date_folders = glob.glob(f'{telescope_dir}/*')
+    for folder in ArchiveFile.folder_summary(**scope, **SCIENCE_FILTER):
+        missing_filenames = missing_lists.get(folder['folder_path'], [])
+        
+        # Store analysis results
+        folder_key = f"{folder['unit']}/{folder['folder_name']}"
+        folder_analysis[folder_key] = {
+            'telescope': folder['unit'],
+            'folder_name': folder['folder_name'],
+            'folder_date': folder['folder_date'].isoformat(),
+            'folder_path': folder['folder_path'],
+            'total_files': folder['total_files'],
+            'science_files': folder['science_files'],
+            'excluded_files': folder['total_files'] - folder['science_files'],
+            'registered_files': folder['science_files'] - folder['missing_files'],
+            'missing_files': folder['missing_files'],
+            'missing_list': missing_filenames
+        }
         
-        for folder_path in sorted(date_folders):
-            if not os.path.isdir(folder_path):
-                continue
-                
-            folder_name = os.path.basename(folder_path)
-            
-            # Extract folder date
-            folder_match = re.search(r'(\d{4}-\d{2}-\d{2})', folder_name)
-            if not folder_match:
-                continue
-                
-            folder_date = folder_match.group(1)
-            
-            # Apply date filtering
-            if specific_dates and folder_date not in specific_dates:
-                continue
-            if start_date and folder_date < start_date:
-                continue
-            if end_date and folder_date > end_date:
-                continue
-            
-            # Get all FITS files in this folder
-            fits_files = glob.glob(f'{folder_path}/*.fits')
-            all_filenames = [os.path.basename(f) for f in fits_files]
-            
-            # Filter science files
-            science_filenames = [f for f in all_filenames if is_science_file(f)]
-            excluded_filenames = [f for f in all_filenames if not is_science_file(f)]
-            
-            # Check which science files are missing from DB
-            missing_filenames = [f for f in science_filenames if f not in db_files]
-            registered_filenames = [f for f in science_filenames if f in db_files]
-            
-            # Store analysis results
-            folder_key = f"{telescope_name}/{folder_name}"
-            folder_analysis[folder_key] = {
-                'telescope': telescope_name,
-                'folder_name': folder_name,
-                'folder_date': folder_date,
-                'folder_path': folder_path,
-                'total_files': len(all_filenames),
-                'science_files': len(science_filenames),
-                'excluded_files': len(excluded_filenames),
-                'registered_files': len(registered_filenames),
-                'missing_files': len(missing_filenames),
-                'missing_list': missing_filenames,
-                'registered_list': registered_filenames,
-                'excluded_list': excluded_filenames
-            }
-            
-            total_files += len(all_filenames)
-            total_science_files += len(science_filenames)
-            total_missing += len(missing_filenames)
+        total_files += folder['total_files']
+        total_science_files += folder['science_files']
+        total_missing += folder['missing_files']
     
     print(f"   Total folders analyzed: {len(folder_analysis)}")
     print(f"   Total FITS files: {total_files:,}")
@@ -843,71 +737,33 @@ def list_missing_folders_only(start_date=None, end_date=None, specific_dates=Non
     print(f"🔍 Filter: {filter_desc}")
     print("=" * 80)
     
-    # Get database files
+    # Registered files
     print("📊 Collecting database files...")
-    db_files = set(ScienceFrame.objects.values_list('original_filename', flat=True)) | \
-               set(BiasFrame.objects.values_list('original_filename', flat=True)) | \
-               set(DarkFrame.objects.values_list('original_filename', flat=True)) | \
-               set(FlatFrame.objects.values_list('original_filename', flat=True))
+    print(f"   DB registered files: {FrameIndex.objects.count():,}")
     
-    print(f"   DB registered files: {len(db_files):,}")
-    
-    # Analyze folders quickly
+    # Per-folder counts in one query (anti-join of the inventory against the frame index)
     print("📊 Scanning folders...")
     
-    base_path = '/lyman/data1/obsdata'
-    telescope_dirs = glob.glob(f'{base_path}/7DT*')
+    folder_counts = ArchiveFile.folder_summary(
+        start_date=start_date, end_date=end_date, dates=specific_dates, **SCIENCE_FILTER
+    )
+    total_folders = len(folder_counts)
     
     missing_folders = []
-    total_folders = 0
-    
-    for telescope_dir in sorted(telescope_dirs):
-        telescope_name = os.path.basename(telescope_dir)
-        date_folders = glob.glob(f'{telescope_dir}/*')
-        
-        for folder_path in sorted(date_folders):
-            if not os.path.isdir(folder_path):
-                continue
-                
-            folder_name = os.path.basename(folder_path)
-            
-            # Extract folder date
-            folder_match = re.search(r'(\d{4}-\d{2}-\d{2})', folder_name)
-            if not folder_match:
-                continue
-                
-            folder_date = folder_match.group(1)
-            
-            # Apply date filtering
-            if specific_dates and folder_date not in specific_dates:
-                continue
-            if start_date and folder_date < start_date:
-                continue
-            if end_date and folder_date > end_date:
-                continue
-            
-            total_folders += 1
-            
-            # Get science files in this folder
-            fits_files = glob.glob(f'{folder_path}/*.fits')
-            all_filenames = [os.path.basename(f) for f in fits_files]
-            science_filenames = [f for f in all_filenames if is_science_file(f)]
-            
-            # Check for missing files
-            missing_count = len([f for f in science_filenames if f not in db_files])
-            
-            if missing_count > 0:
-                missing_folders.append({
-                    'folder_key': f"{telescope_name}/{folder_name}",
-                    'telescope': telescope_name,
-                    'folder_name': folder_name,
-                    'folder_date': folder_date,
-                    'folder_path': folder_path,
-                    'total_files': len(all_filenames),
-                    'science_files': len(science_filenames),
-                    'missing_files': missing_count,
-                    'missing_pct': (missing_count / len(science_filenames) * 100) if science_filenames else 0
-                })
+    for folder in folder_counts:
+        missing_count = folder['missing_files']
+        if missing_count > 0:
+            missing_folders.append({
+                'folder_key': f"{folder['unit']}/{folder['folder_name']}",
+                'telescope': folder['unit'],
+                'folder_name': folder['folder_name'],
+                'folder_date': folder['folder_date'].isoformat(),
+                'folder_path': folder['folder_path'],
+                'total_files': folder['total_files'],
+                'science_files': folder['science_files'],
+                'missing_files': missing_count,
+                'missing_pct': (missing_count / folder['science_files'] * 100) if folder['science_files'] else 0
+            })
     
     # Sort by missing file count (descending)
     missing_folders.sort(key=lambda x: x['missing_files'], reverse=True)
@@ -962,6 +818,38 @@ def list_missing_folders_only(start_date=None, end_date=None, specific_dates=Non
     print(f"\n💡 Tip: Use --by-folders with --dates to analyze specific folders in detail")
     print(f"   Example: python {sys.argv[0]} --by-folders --dates {' '.join([f['folder_date'] for f in missing_folders[:3]])}")
 
+def list_orphaned_frames(start_date=None, end_date=None, specific_dates=None):
+    """
+    List registered frames whose file no longer exists in the archive inventory
+    (streamed from an anti-join, grouped per night and unit)
+    """
+    print("👻 Orphaned Frames (in DB, not in archive)")
+    print("=" * 80)
+    
+    def report(group, count, examples):
+        print(f"   {group[0]} {group[1]}: {count} frames")
+        for frame_type, filename in examples:
+            print(f"      {frame_type:<8} {filename}")
+    
+    total = 0
+    current, count, examples = None, 0, []
+    for night_date, unit_name, frame_type, filename in ArchiveFile.orphaned_frames(start_date, end_date, specific_dates):
+        if (night_date, unit_name) != current:
+            if current:
+                report(current, count, examples)
+            current, count, examples = (night_date, unit_name), 0, []
+        count += 1
+        total += 1
+        if len(examples) < 3:
+            examples.append((frame_type, filename))
+    if current:
+        report(current, count, examples)
+    
+    if total:
+        print(f"\n⚠️  {total:,} orphaned frames")
+    else:
+        print("✅ Every registered frame has its file in the archive")
+
 if __name__ == "__main__":
     try:
         # Parse command line arguments
@@ -972,11 +860,23 @@ if __name__ == "__main__":
             extract_dates_from_previous_run()
             sys.exit(0)
         
+        # All analyses below read the archive inventory instead of globbing
+        refresh_inventory()
+        
         # Analyze date mismatches if requested
         if args.analyze_date_mismatches:
             analyze_date_mismatches()
             sys.exit(0)
         
+        # List orphaned DB frames if requested
+        if args.list_orphans:
+            list_orphaned_frames(
+                start_date=args.start_date,
+                end_date=args.end_date,
+                specific_dates=args.dates
+            )
+            sys.exit(0)
+        
         # Use folder-based analysis if requested
         if args.by_folders:
             analyze_by_folders(
@@ -17,8 +17,9 @@ django.setup()
 
 from survey.models import (
     Night, FrameManager, ScienceFrame, BiasFrame, DarkFrame, FlatFrame,
-    Target, Tile, FilenamePatternAnalyzer, Unit, Filter
+    FrameIndex, Target, Tile, FilenamePatternAnalyzer, Unit, Filter
 )
+from django.db.models import Count
 
 def cleanup_existing_data(date_str, confirm=False):
     """
@@ -47,11 +48,16 @@ def cleanup_existing_data(date_str, confirm=False):
         print(f"✨ No Night record found for {date_str} - nothing to clean up")
         return True
     
-    # Count frames by type
-    science_count = ScienceFrame.objects.filter(night=night).count()
-    bias_count = BiasFrame.objects.filter(night=night).count()
-    dark_count = DarkFrame.objects.filter(night=night).count()
-    flat_count = FlatFrame.objects.filter(night=night).count()
+    # Count frames by type (single grouped query over the cross-type index)
+    type_counts = dict(
+        FrameIndex.objects.filter(night=night)
+        .values_list('frame_type')
+        .annotate(count=Count('id'))
+    )
+    science_count = type_counts.get('SCIENCE', 0)
+    bias_count = type_counts.get('BIAS', 0)
+    dark_count = type_counts.get('DARK', 0)
+    flat_count = type_counts.get('FLAT', 0)
     total_frames = science_count + bias_count + dark_count + flat_count
     
     print(f"📊 Found existing data:")
@@ -101,6 +107,7 @@ def cleanup_existing_data(date_str, confirm=False):
             model.objects.filter(night=night).delete()
             deleted_counts[name] = count
             print(f"  ✅ Deleted {count:,} {name} frames")
+    FrameIndex.objects.filter(night=night).delete()
     
     # Delete test targets
     if test_target_count > 0:
@@ -295,6 +302,7 @@ def enhanced_ingest(date_str="2025-06-04", cleanup=False, parallel=False, max_wo
         post_target_stats = post_process_targets(night, debug=debug)
         print(f"✅ Post-processing complete:")
         print(f"   🔗 Science frames linked to targets: {post_target_stats['linked_targets']}")
+        print(f"   📡 Science frames linked by position: {post_target_stats['linked_by_position']}")
         print(f"   🔗 Science frames linked to tiles: {post_target_stats['linked_tiles']}")
         print(f"   📍 Coordinates updated: {post_target_stats['coordinates_updated']}")
         print()
@@ -344,7 +352,10 @@ def enhanced_ingest(date_str="2025-06-04", cleanup=False, parallel=False, max_wo
     
     try:
         night.update_statistics()
+        refreshed = FrameManager.refresh_dirty_statistics()
         print("✅ Night statistics updated successfully")
+        print(f"   🔄 Refreshed dirty stats: {refreshed['tiles']} tiles, "
+              f"{refreshed['targets']} targets, {refreshed['units']} units")
         print(f"   🔬 Science frames: {night.science_count:,}")
         print(f"   📐 Bias frames: {night.bias_count:,}")
         print(f"   🌑 Dark frames: {night.dark_count:,}")
@@ -687,65 +698,12 @@ def determine_target_type(target_name):
 
 
 def post_process_targets(night, debug=False):
-    """Post-process science frames to link them with appropriate targets."""
-    target_stats = {
-        'linked_targets': 0,
-        'linked_tiles': 0,
-        'coordinates_updated': 0
-    }
-    
-    if debug:
-        science_frames = ScienceFrame.objects.filter(night=night)
-    else:
-        science_frames = ScienceFrame.objects.filter(
-            night=night,
-            target__isnull=True,
-            tile__isnull=True
-        )
+    """Link the night's science frames to tiles and targets (set-based)."""
+    start_time = time.time()
+    target_stats = FrameManager.link_frames_to_targets(night)
     
     if debug:
-        print(f"  🎯 Post-processing {science_frames.count()} science frames for target linking...")
-    
-    for frame in science_frames:
-        try:
-            object_name = frame.object_name
-            
-            if not object_name or object_name == 'UNKNOWN':
-                continue
-            
-            if object_name.startswith('T') and len(object_name) > 1:
-                try:
-                    tile_id_str = ''.join(filter(str.isdigit, object_name[1:]))
-                    if tile_id_str:
-                        tile_id = int(tile_id_str)
-                        tile = Tile.objects.filter(id=tile_id).first()
-                        if tile:
-                            if not frame.tile:
-                                frame.tile = tile
-                                frame.save(update_fields=['tile'])
-                                target_stats['linked_tiles'] += 1
-                            continue
-                except ValueError:
-                    pass
-            
-            target = Target.objects.filter(name=object_name).first()
-            if target:
-                if not frame.target:
-                    frame.target = target
-                    frame.save(update_fields=['target'])
-                    target_stats['linked_targets'] += 1
-                
-                if (frame.object_ra and frame.object_dec and 
-                    (target.ra == 0.0 or target.dec == 0.0)):
-                    target.ra = frame.object_ra
-                    target.dec = frame.object_dec
-                    target.save(update_fields=['ra', 'dec'])
-                    target_stats['coordinates_updated'] += 1
-                    
-        except Exception as e:
-            if debug:
-                print(f"    ❌ Error processing frame {frame.original_filename}: {e}")
-            continue
+        print(f"  🎯 Target linking done in {time.time() - start_time:.2f}s")
     
     return target_stats
 
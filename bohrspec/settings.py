@@ -171,6 +171,10 @@ LOGIN_REDIRECT_URL = '/'
 MEDIA_ROOT = '/data/' #IMSNG/IMSNGgalaxies/'
 MEDIA_URL = '/media/'
 
+# Precomputed survey lookup artifacts (memory-mapped .npy files shared by
+# ingest workers and web processes)
+SURVEY_CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.db import transaction
 from django.db.models import Count, Sum, Avg, Q
 from .models import (
     Night, Tile, Target, ScienceFrame, BiasFrame, DarkFrame, FlatFrame,
-    UnitStatistics
+    UnitStatistics, FrameManager, FrameIndex, ScienceFrameDetail
 )
 
 @admin.register(Night)
@@ -19,7 +20,9 @@ class NightAdmin(admin.ModelAdmin):
             'fields': ['date', 'sky_quality', 'notes']
         }),
         ('Astronomical Data', {
-            'fields': ['sunset', 'sunrise', 'evening_twilight_end', 'morning_twilight_start',
+            'fields': ['sunset', 'sunrise', 'evening_civil_twilight', 'morning_civil_twilight',
+                      'evening_twilight_end', 'morning_twilight_start',
+                      'evening_astronomical_twilight', 'morning_astronomical_twilight',
                       'moon_phase', 'moon_illumination', 'moon_alt_max']
         }),
         ('Statistics', {
@@ -36,6 +39,17 @@ class NightAdmin(admin.ModelAdmin):
             'classes': ['collapse']
         })
     ]
+    
+    # Deleting a night cascades to its frames: take their footprints off the coverage maps
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            FrameManager.remove_from_coverage_maps(ScienceFrame.objects.filter(night=obj))
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            FrameManager.remove_from_coverage_maps(ScienceFrame.objects.filter(night__in=queryset))
+            super().delete_queryset(request, queryset)
 
 @admin.register(Tile)
 class TileAdmin(admin.ModelAdmin):
@@ -543,6 +557,68 @@ class UnitStatisticsAdmin(admin.ModelAdmin):
     ]
 
 
+class ScienceFrameDetailInline(admin.StackedInline):
+    """Cold header-derived columns stored in the ScienceFrameDetail side table."""
+    model = ScienceFrameDetail
+    can_delete = False
+    extra = 0
+    max_num = 1
+    verbose_name_plural = 'Header Details'
+    
+    fieldsets = (
+        ('🎚️ Focus & Guiding', {
+            'fields': (
+                ('focuser_position', 'af_time'),
+                ('af_value', 'af_error'),
+                ('guiding_enabled', 'guiding_rms_total'),
+                ('guiding_rms_ra', 'guiding_rms_dec')
+            ),
+            'description': 'Focus and guiding information',
+            'classes': ('collapse',)
+        }),
+        
+        ('🌦️ Weather Conditions', {
+            'fields': (
+                'weather_update_time',
+                ('ambient_temperature', 'humidity'),
+                ('pressure', 'dew_point'),
+                ('wind_speed', 'wind_direction', 'wind_gust'),
+                ('sky_temperature', 'cloud_fraction', 'rain_rate'),
+                ('weather_age', 'weather_station')
+            ),
+            'description': 'Environmental conditions',
+            'classes': ('collapse',)
+        }),
+        
+        ('⭐ Detailed Image Quality', {
+            'fields': (
+                'background_level', 'num_sources',
+                'star_count', 'median_hfd', 'nina_hfr',
+                'limiting_magnitude', 'ellipticity'
+            ),
+            'description': 'Image quality metrics',
+            'classes': ('collapse',)
+        }),
+        
+        ('🎲 Plate Solving (NINA)', {
+            'fields': (
+                'plate_solved',
+                ('plate_solve_ra', 'plate_solve_dec'),
+                ('plate_solve_angle', 'plate_solve_pixel_scale')
+            ),
+            'description': 'Plate solving results (NINA only)',
+            'classes': ('collapse',)
+        }),
+        
+        ('📝 Observation Notes', {
+            'fields': (
+                'obsnote', 'sequence_title', 'sequence_target'
+            ),
+            'classes': ('collapse',)
+        }),
+    )
+
+
 @admin.register(ScienceFrame)
 class ScienceFrameAdmin(admin.ModelAdmin):
     list_display = [
@@ -559,6 +635,8 @@ class ScienceFrameAdmin(admin.ModelAdmin):
         'original_filename', 'unified_filename', 'object_name', 'object_id', 'observer'
     ]
     
+    inlines = [ScienceFrameDetailInline]
+    
     readonly_fields = [
         'original_filename', 'unified_filename', 'file_path', 'file_size', 'obstime', 
         'mjd', 'jd', 'image_id', 'created_at', 'updated_at'
@@ -616,56 +694,18 @@ class ScienceFrameAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         
-        ('🎚️ Focus & Guiding', {
-            'fields': (
-                ('focuser_position', 'af_time'),
-                ('af_value', 'af_error'),
-                ('guiding_enabled', 'guiding_rms_total'),
-                ('guiding_rms_ra', 'guiding_rms_dec')
-            ),
-            'description': 'Focus and guiding information',
-            'classes': ('collapse',)
-        }),
-        
-        ('🌦️ Weather Conditions', {
-            'fields': (
-                'weather_update_time',
-                ('ambient_temperature', 'humidity'),
-                ('pressure', 'dew_point'),
-                ('wind_speed', 'wind_direction', 'wind_gust'),
-                ('sky_brightness', 'sky_temperature'),
-                ('cloud_fraction', 'rain_rate')
-            ),
-            'description': 'Environmental conditions',
-            'classes': ('collapse',)
-        }),
-        
         ('⭐ Image Quality', {
             'fields': (
-                'fwhm', 'background_level', 'num_sources',
-                'star_count', 'median_hfd', 'nina_hfr',
-                'limiting_magnitude', 'ellipticity'
+                'fwhm', 'sky_brightness'
             ),
-            'description': 'Image quality metrics',
+            'description': 'Seeing and sky brightness (detailed metrics are in Header Details below)',
             'classes': ('collapse',)
         }),
         
-        ('🎲 Plate Solving (NINA)', {
+        ('🚩 Flags', {
             'fields': (
-                'plate_solved',
-                ('plate_solve_ra', 'plate_solve_dec'),
-                ('plate_solve_angle', 'plate_solve_pixel_scale')
+                'is_too', 'is_shift_observation', 'is_test_observation'
             ),
-            'description': 'Plate solving results (NINA only)',
-            'classes': ('collapse',)
-        }),
-        
-        ('📝 Observation Notes', {
-            'fields': (
-                'obsnote', 'sequence_title', 'sequence_target',
-                ('is_too')
-            ),
-            'description': 'Notes and flags',
             'classes': ('collapse',)
         }),
         
@@ -689,9 +729,13 @@ class ScienceFrameAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Weather, focus and guiding values live on the detail row: join it instead of one query per frame
+        return super().get_queryset(request).select_related('detail')
+    
     # === Helper method for data completeness ===
     def _calculate_data_completeness(self, frame):
-        """Calculate data completeness percentage for a frame."""
+        """Calculate data completeness percentage for a frame (fetched with select_related('detail'))."""
         fields_to_check = [
             'object_ra', 'object_dec', 'airmass', 'ambient_temperature',
             'humidity', 'wind_speed', 'focuser_position', 'fwhm'
@@ -799,15 +843,28 @@ class ScienceFrameAdmin(admin.ModelAdmin):
         """Re-parse FITS headers for selected frames."""
         success_count = 0
         error_count = 0
+        reparsed = []
+        previous_tiles, previous_targets = set(), set()
         
         for frame in queryset:
             try:
+                # A re-parse can move the frame to another tile or target
+                previous_tiles.add(frame.tile_id)
+                previous_targets.add(frame.target_id)
                 frame.parse_fits_header()
                 frame.save()
+                FrameIndex.register(frame)
+                reparsed.append(frame)
                 success_count += 1
             except Exception as e:
                 error_count += 1
         
+        # Re-parsed headers can change exposure, filter and quality values,
+        # so both the old and the new tile/target statistics are stale
+        FrameManager.mark_statistics_dirty(reparsed)
+        Tile.mark_statistics_dirty(previous_tiles)
+        Target.mark_statistics_dirty(previous_targets)
+        
         if success_count:
             self.message_user(request, f'Successfully re-parsed headers for {success_count} frames.')
         if error_count:
@@ -824,6 +881,17 @@ class ScienceFrameAdmin(admin.ModelAdmin):
     
     actions = ['reparse_headers', 'mark_test_observations']
     
+    # Deleted frames are taken off the coverage maps once the delete commits
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            FrameManager.remove_from_coverage_maps(ScienceFrame.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            FrameManager.remove_from_coverage_maps(queryset)
+            super().delete_queryset(request, queryset)
+    
     # === Enhanced change view ===
     def change_view(self, request, object_id, form_url='', extra_context=None):
         """Enhanced change view with additional context."""
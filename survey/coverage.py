@@ -0,0 +1,282 @@
+"""
+Per-filter HEALPix coverage and depth maps of the science frames.
+
+Each frame footprint (camera field of view around the plate-solved or
+pointing centre) is sampled on a regular grid finer than the HEALPix pixels;
+the distinct pixels it touches receive the frame's exposure time and a
+frame count. Maps are stored per filter as NESTED .npy arrays under
+<cache_dir>/coverage/nside<N>/ and updated in place (under a file lock) as
+frames are ingested, so survey-progress views never query the frame tables.
+"""
+import os
+import re
+import json
+import time
+import fcntl
+from contextlib import contextmanager
+
+import numpy as np
+import astropy.units as u
+
+from .skymap import HEALPix, require_healpix
+
+
+DEFAULT_NSIDE = 256
+
+# Footprint samples per HEALPix pixel width along each axis
+SAMPLES_PER_PIXEL = 2
+
+
+def footprint_offsets(nside, fov_width, fov_height):
+    """
+    Tangent-plane sample offsets (radians) covering a width x height field.
+
+    Returns:
+    --------
+    tuple : (x, y) 1-D arrays of sample positions relative to the centre
+    """
+    pixel_size = np.sqrt(4 * np.pi / (12 * nside ** 2))
+    step = pixel_size / SAMPLES_PER_PIXEL
+    width, height = np.radians(fov_width), np.radians(fov_height)
+    nx = max(1, int(np.ceil(width / step)))
+    ny = max(1, int(np.ceil(height / step)))
+    x = ((np.arange(nx) + 0.5) / nx - 0.5) * width
+    y = ((np.arange(ny) + 0.5) / ny - 0.5) * height
+    x, y = np.meshgrid(x, y)
+    return x.ravel(), y.ravel()
+
+
+def footprint_pixels(ra, dec, position_angle, nside, fov_width, fov_height):
+    """
+    Distinct NESTED pixels touched by each frame footprint (vectorized).
+
+    Parameters:
+    -----------
+    ra, dec : array_like
+        Footprint centres in degrees
+    position_angle : array_like
+        Rotation of the field in degrees (0 = long side along RA)
+    nside : int
+        HEALPix resolution
+    fov_width, fov_height : float
+        Field of view in degrees
+
+    Returns:
+    --------
+    tuple : (frame_index, pixel) arrays, one entry per distinct pair
+    """
+    require_healpix()
+    ra0 = np.radians(np.asarray(ra, dtype=float))[:, None]
+    dec0 = np.radians(np.asarray(dec, dtype=float))[:, None]
+    theta = np.radians(np.asarray(position_angle, dtype=float))[:, None]
+    x, y = footprint_offsets(nside, fov_width, fov_height)
+
+    # Rotate the sample grid, then inverse gnomonic projection to RA/Dec
+    xi = x * np.cos(theta) - y * np.sin(theta)
+    eta = x * np.sin(theta) + y * np.cos(theta)
+    denom = np.cos(dec0) - eta * np.sin(dec0)
+    lon = np.mod(ra0 + np.arctan2(xi, denom), 2 * np.pi)
+    lat = np.arctan2(np.sin(dec0) + eta * np.cos(dec0), np.hypot(xi, denom))
+
+    healpix = HEALPix(nside=nside, order='nested')
+    pixels = np.asarray(healpix.lonlat_to_healpix(lon.ravel() * u.rad, lat.ravel() * u.rad), dtype=np.int64)
+
+    frame_index = np.repeat(np.arange(len(ra0)), len(x))
+    keys = np.unique(frame_index * healpix.npix + pixels)
+    return keys // healpix.npix, keys % healpix.npix
+
+
+def accumulate(ra, dec, position_angle, exptime, filter_codes, nside, fov_width, fov_height):
+    """
+    Sparse per-filter coverage contributions of a set of frames.
+
+    Module-level and database-free so it can run in worker processes.
+
+    Returns:
+    --------
+    dict : {filter_code: (pixels, exptime_sum, frame_count)}
+    """
+    ra = np.asarray(ra, dtype=float)
+    if not len(ra):
+        return {}
+    exptime = np.asarray(exptime, dtype=float)
+    filter_codes = np.asarray(filter_codes)
+    frame_index, pixels = footprint_pixels(ra, dec, position_angle, nside, fov_width, fov_height)
+
+    result = {}
+    frame_filters = filter_codes[frame_index]
+    for code in np.unique(filter_codes):
+        mask = frame_filters == code
+        touched, inverse = np.unique(pixels[mask], return_inverse=True)
+        result[code.item()] = (
+            touched,
+            np.bincount(inverse, weights=exptime[frame_index[mask]], minlength=len(touched)),
+            np.bincount(inverse, minlength=len(touched)),
+        )
+    return result
+
+
+class CoverageMaps:
+    """
+    Per-filter exposure-time and frame-count maps on disk.
+
+    Files: <filter>.exptime.npy (float32, seconds) and <filter>.count.npy
+    (int32) per filter, plus meta.json. Writers hold an exclusive flock on
+    .lock and replace files atomically, so readers may memory-map them.
+    """
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, cache_dir, nside=DEFAULT_NSIDE):
+        self.nside = nside
+        self.npix = 12 * nside ** 2
+        self.directory = os.path.join(cache_dir, 'coverage', f'nside{nside}')
+
+    @staticmethod
+    def _safe_name(filter_name):
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', str(filter_name))
+
+    def _path(self, filter_name, kind):
+        return os.path.join(self.directory, f'{self._safe_name(filter_name)}.{kind}.npy')
+
+    @contextmanager
+    def locked(self):
+        """Exclusive lock shared by all processes updating these maps."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_meta(self):
+        try:
+            with open(os.path.join(self.directory, self.META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'nside': self.nside, 'filters': {}}
+
+    def _write_meta(self, meta):
+        meta['nside'] = self.nside
+        meta['updated_at'] = time.time()
+        path = os.path.join(self.directory, self.META_FILE)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+    def _save_array(self, filter_name, kind, array):
+        path = self._path(filter_name, kind)
+        temp_path = f'{path}.tmp-{os.getpid()}.npy'
+        np.save(temp_path, array)
+        os.replace(temp_path, path)
+
+    def load(self, filter_name, kind='exptime', mmap=True):
+        """
+        One filter map, or None if the filter has no coverage yet.
+
+        Parameters:
+        -----------
+        kind : str
+            'exptime' (summed seconds) or 'count' (frames)
+        """
+        try:
+            return np.load(self._path(filter_name, kind), mmap_mode='r' if mmap else None)
+        except (OSError, ValueError):
+            return None
+
+    def filters(self):
+        return sorted(self.read_meta().get('filters', {}))
+
+    def add(self, contributions, frame_count=0):
+        """
+        Add sparse contributions (from accumulate()) to the stored maps.
+
+        Negative contributions remove deleted frames; pixels whose frame
+        count drops to zero are reset so no float32 residue is left.
+
+        Parameters:
+        -----------
+        contributions : dict
+            {filter_name: (pixels, exptime_sum, frame_count)}
+        frame_count : int
+            Frames represented by the contributions (recorded in meta.json)
+        """
+        if not contributions:
+            return
+        with self.locked():
+            meta = self.read_meta()
+            for filter_name, (pixels, exptime, counts) in contributions.items():
+                exptime_map = self.load(filter_name, 'exptime', mmap=False)
+                count_map = self.load(filter_name, 'count', mmap=False)
+                if exptime_map is None or count_map is None:
+                    exptime_map = np.zeros(self.npix, dtype=np.float32)
+                    count_map = np.zeros(self.npix, dtype=np.int32)
+                np.add.at(exptime_map, pixels, exptime.astype(np.float32))
+                np.add.at(count_map, pixels, counts.astype(np.int32))
+                emptied = count_map <= 0
+                exptime_map[emptied] = 0
+                count_map[emptied] = 0
+                self._save_array(filter_name, 'exptime', exptime_map)
+                self._save_array(filter_name, 'count', count_map)
+                meta.setdefault('filters', {})[filter_name] = {
+                    'pixels_covered': int(np.count_nonzero(count_map)),
+                    'total_exptime': float(exptime_map.sum(dtype=np.float64)),
+                }
+            meta['frames_added'] = meta.get('frames_added', 0) + frame_count
+            self._write_meta(meta)
+
+    def replace(self, totals, frame_count):
+        """
+        Overwrite all maps with fully rebuilt dense arrays.
+
+        Parameters:
+        -----------
+        totals : dict
+            {filter_name: (exptime_map, count_map)} dense NESTED arrays
+        frame_count : int
+            Frames included in the rebuild
+        """
+        with self.locked():
+            old_filters = set(self.read_meta().get('filters', {}))
+            meta = {'filters': {}, 'frames_added': frame_count, 'rebuilt_at': time.time()}
+            for filter_name, (exptime_map, count_map) in totals.items():
+                self._save_array(filter_name, 'exptime', exptime_map.astype(np.float32))
+                self._save_array(filter_name, 'count', count_map.astype(np.int32))
+                meta['filters'][filter_name] = {
+                    'pixels_covered': int(np.count_nonzero(count_map)),
+                    'total_exptime': float(exptime_map.sum(dtype=np.float64)),
+                }
+            for filter_name in old_filters - set(totals):
+                for kind in ('exptime', 'count'):
+                    try:
+                        os.remove(self._path(filter_name, kind))
+                    except OSError:
+                        pass
+            self._write_meta(meta)
+
+    def downsample(self, filter_name, nside, kind='exptime'):
+        """
+        Map degraded to a coarser nside (NESTED children are contiguous).
+
+        'exptime' averages the children (mean depth per pixel); 'count'
+        keeps the maximum frame count; 'fraction' is the covered fraction.
+
+        Returns:
+        --------
+        np.ndarray or None
+        """
+        if nside > self.nside or self.nside % nside:
+            raise ValueError(f"nside must divide the stored nside {self.nside}")
+        source = self.load(filter_name, 'exptime' if kind == 'exptime' else 'count')
+        if source is None:
+            return None
+        children = (self.nside // nside) ** 2
+        blocks = np.asarray(source).reshape(-1, children)
+        if kind == 'exptime':
+            return blocks.mean(axis=1)
+        if kind == 'count':
+            return blocks.max(axis=1)
+        if kind == 'fraction':
+            return (blocks > 0).mean(axis=1)
+        raise ValueError(f"Unknown map kind: {kind}")
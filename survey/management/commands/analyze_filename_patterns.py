@@ -2,11 +2,42 @@ import os
 import json
 import re
 import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from survey.models import FilenamePatternAnalyzer
 
 
+def default_scan_workers():
+    """Directory walking waits on I/O, so use a few more workers than CPUs"""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def scan_directory(path, options, detailed=False, recursive=True):
+    """Scan one directory in a worker process (module level so it can be pickled)"""
+    command = Command()
+    if detailed:
+        return command._analyze_unit_directory_with_filtering(path, options, recursive)
+    return command._quick_unit_scan_with_filtering(path, options, recursive)
+
+
+def merge_scan_stats(total, part):
+    """Add the counters and date range of one partial scan to another (in place)"""
+    for key, value in part.items():
+        if key == 'date_range':
+            merged = total.setdefault(key, {'earliest': None, 'latest': None})
+            if value.get('earliest') and (not merged['earliest'] or value['earliest'] < merged['earliest']):
+                merged['earliest'] = value['earliest']
+            if value.get('latest') and (not merged['latest'] or value['latest'] > merged['latest']):
+                merged['latest'] = value['latest']
+        elif isinstance(value, dict):
+            merge_scan_stats(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+
 class Command(BaseCommand):
     help = 'Analyze FITS filename patterns in observation data directories'
 
@@ -88,6 +119,20 @@ class Command(BaseCommand):
             type=str,
             help='Save results to JSON file'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=default_scan_workers(),
+            help=f'Worker processes for multi-unit scans (default: {default_scan_workers()}, 1 = sequential). '
+                 'With --unlimited each date folder is a separate task'
+        )
+        parser.add_argument(
+            '--pattern-samples',
+            type=int,
+            default=0,
+            help='With --unit and --output-json, add per-pattern date ranges and N sample files per pattern '
+                 '(streaming, constant memory)'
+        )
         parser.add_argument(
             '--limit',
             type=int,
@@ -269,15 +314,13 @@ class Command(BaseCommand):
         }
         
         unit_results = []
+        scans = self._scan_units(unit_list, base_directory, options)
         
         for unit_name in unit_list:
-            unit_path = os.path.join(base_directory, unit_name)
-            
             try:
-                self.stdout.write(f"🔄 Analyzing {unit_name}...")
-                
-                # Quick scan for this unit with filtering
-                stats = self._quick_unit_scan_with_filtering(unit_path, options)
+                stats = scans[unit_name]
+                if isinstance(stats, Exception):
+                    raise stats
                 
                 unit_results.append({
                     'unit': unit_name,
@@ -297,13 +340,7 @@ class Command(BaseCommand):
                     total_stats['pattern_totals'][pattern] = total_stats['pattern_totals'].get(pattern, 0) + count
                 
                 # Update date range
-                date_range = stats.get('date_range', {})
-                if date_range.get('earliest'):
-                    if not total_stats['date_range']['earliest'] or date_range['earliest'] < total_stats['date_range']['earliest']:
-                        total_stats['date_range']['earliest'] = date_range['earliest']
-                if date_range.get('latest'):
-                    if not total_stats['date_range']['latest'] or date_range['latest'] > total_stats['date_range']['latest']:
-                        total_stats['date_range']['latest'] = date_range['latest']
+                merge_scan_stats({'date_range': total_stats['date_range']}, {'date_range': stats.get('date_range', {})})
                 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"❌ Failed to analyze {unit_name}: {str(e)}"))
@@ -311,7 +348,82 @@ class Command(BaseCommand):
         # Display summary results
         self._display_multi_unit_summary(unit_results, total_stats)
 
-    def _quick_unit_scan_with_filtering(self, unit_path, options):
+    def _scan_units(self, unit_list, base_directory, options, detailed=False):
+        """
+        Scan several units, in a process pool when --workers > 1.
+        
+        Each unit is one task; with --unlimited (no per-unit file limit to
+        respect) every date folder is a task of its own and the partial
+        counters are merged per unit. Progress is reported as units finish.
+        
+        Returns:
+        --------
+        dict : {unit_name: stats dict, or the exception that stopped the scan}
+        """
+        workers = max(1, options.get('workers') or 1)
+        scan_options = {key: options.get(key) for key in ('unlimited', 'limit')}
+        tasks = []
+        for unit_name in unit_list:
+            unit_path = os.path.join(base_directory, unit_name)
+            if options.get('unlimited') and workers > 1:
+                tasks.append((unit_name, unit_path, False))
+                try:
+                    with os.scandir(unit_path) as entries:
+                        for entry in sorted(entries, key=lambda e: e.name):
+                            if entry.is_dir() and not entry.name.startswith('.'):
+                                tasks.append((unit_name, entry.path, True))
+                except OSError as e:
+                    self.stdout.write(self.style.ERROR(f"❌ Cannot list {unit_path}: {e}"))
+            else:
+                tasks.append((unit_name, unit_path, True))
+        
+        results = {}
+        remaining = {}
+        for unit_name, _, _ in tasks:
+            remaining[unit_name] = remaining.get(unit_name, 0) + 1
+        
+        def finished(unit_name, stats):
+            if not isinstance(results.get(unit_name), Exception):
+                if isinstance(stats, Exception):
+                    results[unit_name] = stats
+                else:
+                    results[unit_name] = merge_scan_stats(results.get(unit_name, {}), stats)
+            remaining[unit_name] -= 1
+            if remaining[unit_name] == 0:
+                done = sum(1 for count in remaining.values() if count == 0)
+                result = results[unit_name]
+                if isinstance(result, Exception):
+                    self.stdout.write(self.style.ERROR(f"   ❌ [{done}/{len(remaining)}] {unit_name}: {result}"))
+                else:
+                    self.stdout.write(
+                        f"   ✅ [{done}/{len(remaining)}] {unit_name}: "
+                        f"{result.get('total_files_found', 0):,} FITS files"
+                    )
+        
+        if workers == 1:
+            for unit_name, path, recursive in tasks:
+                self.stdout.write(f"🔄 Analyzing {unit_name}...")
+                try:
+                    finished(unit_name, scan_directory(path, scan_options, detailed, recursive))
+                except Exception as e:
+                    finished(unit_name, e)
+            return results
+        
+        workers = min(workers, len(tasks))
+        self.stdout.write(f"🔄 Scanning {len(unit_list)} units as {len(tasks)} tasks with {workers} workers...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(scan_directory, path, scan_options, detailed, recursive): unit_name
+                for unit_name, path, recursive in tasks
+            }
+            for future in as_completed(futures):
+                try:
+                    finished(futures[future], future.result())
+                except Exception as e:
+                    finished(futures[future], e)
+        return results
+
+    def _quick_unit_scan_with_filtering(self, unit_path, options, recursive=True):
         """Perform quick scan of a unit directory with filtering applied"""
         stats = {
             'total_files_found': 0,
@@ -328,6 +440,7 @@ class Command(BaseCommand):
         limit = float('inf') if unlimited else options.get('limit', 5000)  # Lower default for summary
         
         file_count = 0
+        batch = []
         
         for root, dirs, files in os.walk(unit_path):
             dirs[:] = [d for d in dirs if not d.startswith('.')]
@@ -362,28 +475,44 @@ class Command(BaseCommand):
                 if not unlimited and file_count > limit:
                     break
                 
-                try:
-                    analyzer = FilenamePatternAnalyzer(filename)
-                    pattern = getattr(analyzer, 'filename_pattern', 'unknown')
-                    stats['pattern_counts'][pattern] = stats['pattern_counts'].get(pattern, 0) + 1
-                    
-                    # Update date range
-                    date_obj = getattr(analyzer, 'date', None)
-                    if date_obj:
-                        if not stats['date_range']['earliest'] or date_obj < stats['date_range']['earliest']:
-                            stats['date_range']['earliest'] = date_obj
-                        if not stats['date_range']['latest'] or date_obj > stats['date_range']['latest']:
-                            stats['date_range']['latest'] = date_obj
-                    
-                except ValueError:
-                    stats['unparseable_count'] += 1
-                    stats['pattern_counts']['unparseable'] = stats['pattern_counts'].get('unparseable', 0) + 1
+                batch.append(filename)
+            
+            # Parse the directory's names in one columnar pass
+            self._tally_parsed_batch(batch, stats)
+            batch = []
             
-            if not unlimited and file_count > limit:
+            if not recursive or (not unlimited and file_count > limit):
                 break
         
         return stats
 
+    def _tally_parsed_batch(self, filenames, stats):
+        """Add pattern counts and the date range of a batch of filenames to stats"""
+        if not filenames:
+            return
+        
+        columns = FilenamePatternAnalyzer.parse_many(filenames)
+        codes = columns['pattern']
+        pattern_names = columns['categories']['pattern']
+        for code, count in enumerate(np.bincount(codes[codes >= 0], minlength=len(pattern_names))):
+            if count:
+                pattern = pattern_names[code]
+                stats['pattern_counts'][pattern] = stats['pattern_counts'].get(pattern, 0) + int(count)
+        
+        unparseable = int(np.count_nonzero(codes < 0))
+        if unparseable:
+            stats['unparseable_count'] += unparseable
+            stats['pattern_counts']['unparseable'] = stats['pattern_counts'].get('unparseable', 0) + unparseable
+        
+        dates = columns['date'][codes >= 0]
+        if len(dates):
+            earliest = dates.min().astype(datetime.date)
+            latest = dates.max().astype(datetime.date)
+            if not stats['date_range']['earliest'] or earliest < stats['date_range']['earliest']:
+                stats['date_range']['earliest'] = earliest
+            if not stats['date_range']['latest'] or latest > stats['date_range']['latest']:
+                stats['date_range']['latest'] = latest
+
     def _display_multi_unit_summary(self, unit_results, total_stats):
         """Display summary results for multiple units with filtering information"""
         self.stdout.write(f"\n📈 FILTERED ANALYSIS COMPLETE")
@@ -465,13 +594,18 @@ class Command(BaseCommand):
 
     def _analyze_units_detailed(self, unit_list, base_directory, options):
         """Analyze multiple units with detailed output"""
+        scans = self._scan_units(unit_list, base_directory, options, detailed=True)
+        
         for i, unit_name in enumerate(unit_list, 1):
             self.stdout.write(f"\n{'=' * 80}")
             self.stdout.write(f"📂 ANALYZING UNIT {i}/{len(unit_list)}: {unit_name}")
             self.stdout.write(f"{'=' * 80}")
             
             try:
-                self._analyze_single_unit(unit_name, base_directory, options)
+                stats = scans[unit_name]
+                if isinstance(stats, Exception):
+                    raise stats
+                self._analyze_single_unit(unit_name, base_directory, options, stats)
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Failed to analyze {unit_name}: {str(e)}"))
 
@@ -891,8 +1025,8 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(f"   ❌ Error suggesting pattern fix: {str(e)}")
 
-    def _analyze_single_unit(self, unit_name, base_directory, options):
-        """Analyze a single telescope unit"""
+    def _analyze_single_unit(self, unit_name, base_directory, options, stats=None):
+        """Analyze a single telescope unit (stats: result of an earlier scan, if any)"""
         unit_path = os.path.join(base_directory, unit_name)
         
         if not os.path.exists(unit_path):
@@ -902,7 +1036,8 @@ class Command(BaseCommand):
         
         try:
             # Use our own analysis method with filtering
-            stats = self._analyze_unit_directory_with_filtering(unit_path, options)
+            if stats is None:
+                stats = self._analyze_unit_directory_with_filtering(unit_path, options)
             
             if options.get('quick'):
                 self._show_quick_summary_with_filtering(stats, unit_name)
@@ -910,12 +1045,16 @@ class Command(BaseCommand):
                 self._show_detailed_results_with_filtering(stats, unit_name)
 
             if options.get('output_json'):
+                if options.get('pattern_samples'):
+                    stats['pattern_details'] = FilenamePatternAnalyzer.analyze_directory_patterns(
+                        unit_path, streaming=True, sample_size=options['pattern_samples']
+                    )
                 self._save_to_json(stats, options['output_json'], unit_name)
                 
         except Exception as e:
             raise CommandError(f"Failed to analyze unit {unit_name}: {e}")
 
-    def _analyze_unit_directory_with_filtering(self, unit_path, options):
+    def _analyze_unit_directory_with_filtering(self, unit_path, options, recursive=True):
         """Analyze a unit directory with filtering and return statistics"""
         stats = {
             'total_files_found': 0,
@@ -980,7 +1119,7 @@ class Command(BaseCommand):
                 except ValueError:
                     stats['pattern_counts']['unparseable'] = stats['pattern_counts'].get('unparseable', 0) + 1
             
-            if not unlimited and file_count > limit:
+            if not recursive or (not unlimited and file_count > limit):
                 break
         
         return stats
@@ -0,0 +1,94 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.models import FilenamePatternAnalyzer
+
+
+class Command(BaseCommand):
+    help = '''Microbenchmark of FilenamePatternAnalyzer parsing.
+
+    Compares the original regex cascade, the prefix/shape dispatcher and the
+    memoized parse over a corpus (by default one filename per documented
+    variant), and checks that all three give identical results:
+
+        python manage.py benchmark_filename_parser
+        python manage.py benchmark_filename_parser --directory /lyman/data1/obsdata/7DT01/2024-05-27
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory',
+            type=str,
+            help='Use the FITS filenames of this directory as corpus instead of the examples'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Passes over the corpus per method (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        corpus = list(FilenamePatternAnalyzer.EXAMPLE_FILENAMES)
+        if options['directory']:
+            try:
+                corpus = sorted(
+                    entry.name for entry in os.scandir(options['directory'])
+                    if entry.name.endswith(('.fits', '.fits.fz'))
+                )
+            except OSError as e:
+                raise CommandError(f"Cannot read {options['directory']}: {e}")
+            if not corpus:
+                raise CommandError(f"No FITS files in {options['directory']}")
+
+        iterations = max(1, options['iterations'])
+        if options['directory']:
+            iterations = max(1, min(iterations, 200000 // len(corpus)))
+
+        # Identical results first
+        mismatches = [
+            name for name in corpus
+            if FilenamePatternAnalyzer._parse_uncached(name)
+            != FilenamePatternAnalyzer._parse_uncached(name, dispatch=False)
+        ]
+        if mismatches:
+            for name in mismatches[:10]:
+                self.stdout.write(self.style.ERROR(f"❌ Dispatcher differs from cascade: {name}"))
+            raise CommandError(f"{len(mismatches)} filenames parse differently")
+
+        candidates = [len(FilenamePatternAnalyzer.candidate_patterns(name)) for name in corpus]
+        self.stdout.write(f"\n⚡ Filename parser benchmark: {len(corpus):,} names × {iterations:,} passes")
+        self.stdout.write(
+            f"   Candidate patterns per name: mean {sum(candidates) / len(candidates):.2f} "
+            f"(of {len(FilenamePatternAnalyzer.ALL_PATTERNS)}), max {max(candidates)}"
+        )
+
+        FilenamePatternAnalyzer._parse_basename.cache_clear()
+        methods = [
+            ('cascade', lambda name: FilenamePatternAnalyzer._parse_uncached(name, dispatch=False)),
+            ('dispatch', FilenamePatternAnalyzer._parse_uncached),
+            ('memoized', FilenamePatternAnalyzer._parse_basename),
+            ('analyzer()', FilenamePatternAnalyzer),
+        ]
+
+        timings = {}
+        for label, parse in methods:
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                for name in corpus:
+                    try:
+                        parse(name)
+                    except ValueError:
+                        pass
+            timings[label] = (time.perf_counter() - start_time) / (iterations * len(corpus))
+
+        baseline = timings['cascade']
+        for label, seconds in timings.items():
+            self.stdout.write(
+                f"   {label:>11s}: {seconds * 1e6:8.2f} µs/name   {baseline / seconds:7.1f}x"
+            )
+
+        info = FilenamePatternAnalyzer._parse_basename.cache_info()
+        self.stdout.write(f"   Cache: {info.hits:,} hits, {info.misses:,} misses, size {info.currsize:,}/{info.maxsize:,}")
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum, Avg, Min, Max
+
+from survey.models import ScienceFrame, ScienceFrameDetail
+
+
+class Command(BaseCommand):
+    help = '''Benchmark statistics scans over the ScienceFrame table.
+
+    Times the aggregate queries used by Night/Unit statistics, reports the
+    average row width and the buffer pages each scan touches. Run it before
+    and after the ScienceFrame/ScienceFrameDetail split to see the gain:
+
+        python manage.py benchmark_frame_scan --output logs/scan_before.json
+        python manage.py migrate survey
+        python manage.py benchmark_frame_scan --compare logs/scan_before.json
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of runs per query; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Save results as JSON to this path'
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            help='Compare against a JSON file saved with --output'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The scan benchmark requires PostgreSQL')
+
+        table = ScienceFrame._meta.db_table
+        detail_table = ScienceFrameDetail._meta.db_table
+        has_detail = detail_table in connection.introspection.table_names()
+
+        night_id = ScienceFrame.objects.order_by('-night_id').values_list('night_id', flat=True).first()
+        if night_id is None:
+            raise CommandError('No science frames available for benchmarking')
+
+        results = {
+            'timestamp': datetime.now().isoformat(),
+            'split': has_detail,
+            'rows': ScienceFrame.objects.count(),
+            'width': self._table_width(table),
+            'queries': {},
+        }
+        if has_detail:
+            results['detail_width'] = self._table_width(detail_table)
+
+        queries = {
+            'night_statistics': ScienceFrame.objects.filter(night_id=night_id).aggregate,
+            'all_nights_summary': lambda **kw: list(
+                ScienceFrame.objects.values('night_id').annotate(**kw)
+            ),
+            'unit_summary': lambda **kw: list(
+                ScienceFrame.objects.values('unit_id').annotate(**kw)
+            ),
+        }
+        aggregates = {
+            'frames': Count('id'),
+            'exptime': Sum('exptime'),
+            'fwhm': Avg('fwhm'),
+            'airmass': Avg('airmass'),
+            'first': Min('obstime'),
+            'last': Max('obstime'),
+        }
+
+        self.stdout.write("=" * 80)
+        self.stdout.write(self.style.SUCCESS("⏱️ SCIENCE FRAME SCAN BENCHMARK"))
+        self.stdout.write(f"   Layout: {'core + detail (split)' if has_detail else 'single wide table'}")
+        self.stdout.write(f"   Rows: {results['rows']:,}   Avg row width: {results['width']['avg_row_bytes']:.0f} bytes   "
+                          f"Heap: {results['width']['heap_mb']:.1f} MB")
+        if has_detail:
+            self.stdout.write(f"   Detail avg row width: {results['detail_width']['avg_row_bytes']:.0f} bytes   "
+                              f"Heap: {results['detail_width']['heap_mb']:.1f} MB")
+        self.stdout.write("=" * 80)
+
+        for name, query in queries.items():
+            timings = []
+            for _ in range(options['repeat']):
+                start_time = time.perf_counter()
+                query(**aggregates)
+                timings.append((time.perf_counter() - start_time) * 1000)
+            timings.sort()
+            results['queries'][name] = {
+                'median_ms': timings[len(timings) // 2],
+                'min_ms': timings[0],
+            }
+
+        results['queries']['all_nights_summary']['buffers'] = self._buffers_touched(
+            ScienceFrame.objects.values('night_id').annotate(**aggregates)
+        )
+
+        if has_detail:
+            # The same scan forced through the side table approximates the old layout
+            joined = ScienceFrame.objects.filter(detail__isnull=False).values('night_id').annotate(
+                **aggregates, temperature=Avg('detail__ambient_temperature')
+            )
+            start_time = time.perf_counter()
+            list(joined)
+            results['queries']['summary_with_detail_join'] = {
+                'median_ms': (time.perf_counter() - start_time) * 1000,
+                'buffers': self._buffers_touched(joined),
+            }
+
+        self.stdout.write("\n📊 Query latency (ms):")
+        for name, timing in results['queries'].items():
+            buffers = f"   buffers {timing['buffers']:>9,}" if 'buffers' in timing else ''
+            self.stdout.write(f"   {name:<28} median {timing['median_ms']:>9.2f}{buffers}")
+
+        if options['compare']:
+            self._compare_results(results, options['compare'])
+
+        if options['output']:
+            os.makedirs(os.path.dirname(options['output']) or '.', exist_ok=True)
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"💾 Results saved to {options['output']}")
+
+    def _table_width(self, table):
+        """Average stored row width and heap size of a table."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COALESCE(AVG(pg_column_size(t.*)), 0) FROM (SELECT * FROM "{table}" LIMIT 10000) t'
+            )
+            avg_row = float(cursor.fetchone()[0])
+            cursor.execute("SELECT pg_relation_size(%s)", [table])
+            heap = cursor.fetchone()[0] or 0
+        return {'avg_row_bytes': avg_row, 'heap_mb': heap / 1024**2}
+
+    def _buffers_touched(self, queryset):
+        """Shared buffer pages (hit + read) a query needs, from EXPLAIN ANALYZE."""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        top = plan[0]['Plan']
+        return top.get('Shared Hit Blocks', 0) + top.get('Shared Read Blocks', 0)
+
+    def _compare_results(self, results, path):
+        """Print before/after deltas against a saved benchmark file."""
+        if not os.path.exists(path):
+            self.stdout.write(self.style.WARNING(f"⚠️ Comparison file not found: {path}"))
+            return
+
+        with open(path) as f:
+            before = json.load(f)
+
+        self.stdout.write(f"\n📈 Comparison with {path}:")
+        self.stdout.write(f"   {'avg row width (bytes)':<28} {before['width']['avg_row_bytes']:>9.0f} → "
+                          f"{results['width']['avg_row_bytes']:>9.0f}")
+        for name, timing in results['queries'].items():
+            previous = before.get('queries', {}).get(name)
+            if not previous:
+                continue
+            change = (timing['median_ms'] / previous['median_ms'] - 1) * 100 if previous['median_ms'] else 0
+            self.stdout.write(f"   {name:<28} {previous['median_ms']:>9.2f} → {timing['median_ms']:>9.2f} ms "
+                              f"({change:+.1f}%)")
+            if 'buffers' in timing and 'buffers' in previous:
+                self.stdout.write(f"   {'  buffers':<28} {previous['buffers']:>9,} → {timing['buffers']:>9,}")
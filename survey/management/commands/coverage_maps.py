@@ -0,0 +1,76 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from survey import coverage
+from survey.models import FrameManager
+
+
+class Command(BaseCommand):
+    help = 'Show or rebuild the per-filter HEALPix coverage/depth maps of science frames'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Rebuild all maps from the science frame table'
+        )
+        parser.add_argument(
+            '--nside',
+            type=int,
+            default=coverage.DEFAULT_NSIDE,
+            help=f'HEALPix resolution of the maps (default: {coverage.DEFAULT_NSIDE})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Worker processes for the rebuild (default: 4, 1 = no pool)'
+        )
+
+    def handle(self, *args, **options):
+        nside = options['nside']
+        if options['rebuild']:
+            self.rebuild(nside, options['workers'])
+        self.show(nside)
+
+    def rebuild(self, nside, workers):
+        self.stdout.write(f"🔄 Rebuilding coverage maps (nside={nside}, {workers} workers)...")
+        last_report = [0.0]
+
+        def progress(nights_done, nights_total, frames):
+            now = time.time()
+            if now - last_report[0] >= 5 or nights_done == nights_total:
+                last_report[0] = now
+                self.stdout.write(f"   📈 {nights_done:,}/{nights_total:,} nights, {frames:,} frames")
+
+        try:
+            result = FrameManager.rebuild_coverage_maps(nside=nside, workers=workers, progress_callback=progress)
+        except (ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['frames']:,} frames from {result['nights']:,} nights "
+            f"in {result['elapsed']:.1f}s ({len(result['filters'])} filters)"
+        ))
+
+    def show(self, nside):
+        maps = FrameManager.coverage_maps(nside)
+        meta = maps.read_meta()
+        filters = meta.get('filters', {})
+        if not filters:
+            self.stdout.write(self.style.WARNING(f"⚠️  No coverage maps at nside={nside} (run with --rebuild)"))
+            return
+
+        pixel_area = 41252.96 / maps.npix
+        self.stdout.write(f"\n🗺️  Coverage maps (nside={nside}, {meta.get('frames_added', 0):,} frames)")
+        if meta.get('rebuilt_at'):
+            self.stdout.write(f"   Last rebuild: {datetime.fromtimestamp(meta['rebuilt_at']):%Y-%m-%d %H:%M:%S}")
+        for name in sorted(filters):
+            info = filters[name]
+            mean_depth = info['total_exptime'] / info['pixels_covered'] if info['pixels_covered'] else 0.0
+            self.stdout.write(
+                f"   {name:>8s}: {info['pixels_covered'] * pixel_area:9.1f} sq deg covered, "
+                f"mean depth {mean_depth:8.1f} s"
+            )
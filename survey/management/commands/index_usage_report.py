@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from survey.models import FrameManager
+
+
+class Command(BaseCommand):
+    help = 'Report which frame table indexes actually serve queries (pg_stat_user_indexes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--unused-only',
+            action='store_true',
+            help='Show only indexes that have never been scanned'
+        )
+        parser.add_argument(
+            '--min-size-mb',
+            type=float,
+            default=0.0,
+            help='Hide indexes smaller than this size in MB (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Index usage statistics require PostgreSQL')
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+            )
+            stats_reset = cursor.fetchone()[0]
+
+        usage = FrameManager.index_usage()
+
+        self.stdout.write("=" * 110)
+        self.stdout.write(self.style.SUCCESS("📊 FRAME TABLE INDEX USAGE"))
+        self.stdout.write(f"   Statistics collected since: {stats_reset or 'server start'}")
+        self.stdout.write("=" * 110)
+        self.stdout.write(f"{'Table':<24} {'Index':<40} {'Scans':>12} {'Tuples read':>14} {'Size MB':>9}  Kind")
+        self.stdout.write("-" * 110)
+
+        unused_count = 0
+        unused_bytes = 0
+        total_bytes = 0
+        for row in usage:
+            total_bytes += row['size_bytes']
+            if row['scans'] == 0:
+                unused_count += 1
+                unused_bytes += row['size_bytes']
+
+            if options['unused_only'] and row['scans'] > 0:
+                continue
+            if row['size_bytes'] < options['min_size_mb'] * 1024**2:
+                continue
+
+            if row['constraint']:
+                kind = 'constraint'
+            elif row['essential']:
+                kind = 'essential'
+            else:
+                kind = 'deferrable'
+
+            self.stdout.write(
+                f"{row['table']:<24} {row['index']:<40} {row['scans']:>12,} "
+                f"{row['tuples_read']:>14,} {row['size_bytes'] / 1024**2:>9.1f}  {kind}"
+            )
+
+        self.stdout.write("-" * 110)
+        self.stdout.write(f"📦 {len(usage)} indexes, {total_bytes / 1024**3:.2f} GB total")
+        if unused_count:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  {unused_count} indexes never scanned ({unused_bytes / 1024**3:.2f} GB) - "
+                f"candidates for removal from the model Meta"
+            ))
+        self.stdout.write("💡 'deferrable' indexes are dropped and rebuilt by ingest_all_nights --bulk-load")
@@ -5,23 +5,27 @@ Processes all available nights from oldest to newest with comprehensive reportin
 
 import os
 import sys
+import fcntl
 import time
-import re
-import glob
 from datetime import date, datetime, timedelta
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 
 # Import from the parent survey app
 from survey.models import (
     Night, FrameManager, ScienceFrame, BiasFrame, DarkFrame, FlatFrame,
-    Target, Tile, FilenamePatternAnalyzer, Unit, Filter
+    FrameIndex, Target, Tile, FilenamePatternAnalyzer, Unit, Filter,
+    ArchiveFolder, ArchiveFile, ArchiveLayout
 )
 
 class Command(BaseCommand):
     help = 'Sequential RAW data ingest for all nights from oldest to newest'
     
+    # Filename keywords skipped by --exclude-focus / --exclude-test
+    FOCUS_KEYWORDS = ('focus', 'focusing', 'af_')
+    TEST_KEYWORDS = ('test', 'calib', 'lamp', 'twilight')
+    
     def add_arguments(self, parser):
         parser.add_argument(
             '--start-date',
@@ -36,6 +40,18 @@ class Command(BaseCommand):
             help='End date (YYYY-MM-DD). If not provided, processes until the latest available data'
         )
         
+        parser.add_argument(
+            '--units',
+            nargs='+',
+            help='Only ingest (and clean up) files of these units, e.g. 7DT01 7DT03'
+        )
+        
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only import files that have no frame index entry yet (from the archive inventory)'
+        )
+        
         parser.add_argument(
             '--cleanup',
             action='store_true',
@@ -137,6 +153,25 @@ class Command(BaseCommand):
             default='2025-06-29',
             help='Cutoff date for bulk processed data (default: 2025-06-29)'
         )
+        
+        parser.add_argument(
+            '--bulk-load',
+            action='store_true',
+            help='Drop non-essential frame indexes during the load, then rebuild them concurrently and ANALYZE'
+        )
+        
+        parser.add_argument(
+            '--rebuild-indexes',
+            action='store_true',
+            help='Only rebuild indexes left dropped by an interrupted --bulk-load run, then exit'
+        )
+        
+        parser.add_argument(
+            '--index-state-file',
+            type=str,
+            default='logs/bulk_load_indexes.json',
+            help='Where --bulk-load records dropped index definitions (default: logs/bulk_load_indexes.json)'
+        )
 
     def handle(self, *args, **options):
         """Main command handler."""
@@ -157,6 +192,12 @@ class Command(BaseCommand):
         # Setup logging
         self.setup_logging()
         
+        # Restore indexes from an interrupted bulk load and exit
+        if options['rebuild_indexes']:
+            self._acquire_bulk_load_lock()
+            self.finish_bulk_load()
+            return
+        
         # Print banner
         self.print_banner()
         
@@ -192,7 +233,14 @@ class Command(BaseCommand):
             
             # Phase 5: Sequential processing
             if not options['dry_run']:
-                self.process_all_nights(filtered_nights)
+                if options['bulk_load']:
+                    self.begin_bulk_load()
+                    try:
+                        self.process_all_nights(filtered_nights)
+                    finally:
+                        self.finish_bulk_load()
+                else:
+                    self.process_all_nights(filtered_nights)
             else:
                 self.stdout.write(
                     self.style.SUCCESS('✅ Dry run completed - no data was processed')
@@ -248,6 +296,8 @@ class Command(BaseCommand):
             self.stdout.write(f"🔢 Limit per night: {opts['limit_per_night']} files")
         if opts['dry_run']:
             self.stdout.write("🔍 Dry run mode: ENABLED")
+        if opts['bulk_load']:
+            self.stdout.write("🏗️  Bulk-load mode: ENABLED (secondary indexes deferred)")
         if opts['debug']:
             self.stdout.write("🔍 Debug mode: ENABLED")
         
@@ -258,7 +308,7 @@ class Command(BaseCommand):
         self.stdout.write("🔍 PHASE 1: DISCOVERING AVAILABLE NIGHTS")
         self.stdout.write("-" * 50)
         
-        base_path = "/lyman/data1/obsdata"
+        base_path = ArchiveFolder.BASE_PATH
         available_nights = set()
         
         if not os.path.exists(base_path):
@@ -273,41 +323,18 @@ class Command(BaseCommand):
             except ValueError:
                 pass
         
-        # Scan each telescope unit directory
-        unit_dirs = []
-        for item in os.listdir(base_path):
-            if item.startswith('7DT') and os.path.isdir(os.path.join(base_path, item)):
-                unit_dirs.append(item)
-        
-        unit_dirs.sort()
+        # Date folders of each telescope unit from the shared layout index
+        layout = ArchiveLayout.shared(base_path)
+        units = self.options.get('units')
+        unit_dirs = [unit_dir for unit_dir in layout.units() if not units or unit_dir in units]
         self.stdout.write(f"🔭 Found telescope units: {unit_dirs}")
         
         for unit_dir in unit_dirs:
-            unit_path = os.path.join(base_path, unit_dir)
-            unit_nights = set()
-            
-            try:
-                for subdir in os.listdir(unit_path):
-                    # Look for date patterns: YYYY-MM-DD or YYYY-MM-DD_*
-                    if self.is_valid_night_directory(subdir):
-                        night_date = self.extract_date_from_dirname(subdir)
-                        if night_date:
-                            # Skip dates before cutoff for efficiency
-                            if cutoff_date and night_date <= cutoff_date:
-                                continue
-                            unit_nights.add(night_date)
-                            available_nights.add(night_date)
-            
-            except PermissionError:
-                self.stdout.write(
-                    self.style.WARNING(f"⚠️ Permission denied accessing {unit_path}")
-                )
-                continue
-            except Exception as e:
-                self.stdout.write(
-                    self.style.WARNING(f"⚠️ Error scanning {unit_path}: {e}")
-                )
-                continue
+            unit_nights = {
+                night_date for night_date in layout.dates(unit_dir)
+                if not cutoff_date or night_date > cutoff_date
+            }
+            available_nights.update(unit_nights)
             
             if unit_nights:
                 self.stdout.write(f"  📊 {unit_dir}: {len(unit_nights)} nights")
@@ -328,21 +355,6 @@ class Command(BaseCommand):
         
         return available_nights
 
-    def is_valid_night_directory(self, dirname):
-        """Check if directory name represents a valid night."""
-        # Match YYYY-MM-DD or YYYY-MM-DD_*
-        pattern = r'^\d{4}-\d{2}-\d{2}(_.*)?$'
-        return bool(re.match(pattern, dirname))
-
-    def extract_date_from_dirname(self, dirname):
-        """Extract date from directory name."""
-        try:
-            # Take the first 10 characters (YYYY-MM-DD)
-            date_str = dirname[:10]
-            return date.fromisoformat(date_str)
-        except ValueError:
-            return None
-
     def filter_nights_by_date_range(self, available_nights):
         """Filter nights by specified date range."""
         self.stdout.write("\n🗓️  PHASE 2: FILTERING BY DATE RANGE")
@@ -439,6 +451,8 @@ class Command(BaseCommand):
         # Show configuration summary
         self.stdout.write("\n🔧 Configuration:")
         opts = self.options
+        self.stdout.write(f"  • Units: {', '.join(opts['units']) if opts['units'] else 'All'}")
+        self.stdout.write(f"  • Missing files only: {'Yes' if opts['missing_only'] else 'No'}")
         self.stdout.write(f"  • Cleanup: {'Yes' if opts['cleanup'] else 'No'}")
         self.stdout.write(f"  • Parallel: {'Yes' if opts['parallel'] else 'Auto'}")
         self.stdout.write(f"  • Workers: {opts['workers']}")
@@ -463,6 +477,81 @@ class Command(BaseCommand):
         
         return True
 
+    def _acquire_bulk_load_lock(self):
+        """
+        Exclusive flock next to the index state file (one bulk loader at a time).
+        
+        A lock file rather than a session advisory lock: the import closes and
+        reopens the database connection between chunks, which would silently
+        release a session lock.
+        """
+        lock_path = f"{self.options['index_state_file']}.lock"
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        lock_file = open(lock_path, 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise CommandError(f'Another bulk load or index rebuild is running (lock held on {lock_path})')
+        self._bulk_load_lock = lock_file
+
+    def _release_bulk_load_lock(self):
+        lock_file = getattr(self, '_bulk_load_lock', None)
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            self._bulk_load_lock = None
+
+    def begin_bulk_load(self):
+        """Drop non-essential secondary indexes on the frame tables before loading."""
+        self.stdout.write("\n🏗️  BULK-LOAD MODE: DEFERRING SECONDARY INDEXES")
+        self.stdout.write("-" * 50)
+        
+        if connection.vendor != 'postgresql':
+            raise CommandError('--bulk-load requires PostgreSQL')
+        
+        self._acquire_bulk_load_lock()
+        
+        state_path = self.options['index_state_file']
+        if os.path.exists(state_path):
+            self.stdout.write(f"♻️  Resuming: previous bulk-load state found in {state_path}")
+        
+        dropped = FrameManager.drop_secondary_indexes(state_path)
+        self.stdout.write(f"🗑️  Dropped {dropped} non-essential indexes "
+                          f"(definitions saved to {state_path})")
+        self.stdout.write("💡 If this run is interrupted, restore them with: "
+                          "python manage.py ingest_all_nights --rebuild-indexes")
+
+    def finish_bulk_load(self):
+        """Rebuild deferred indexes concurrently and ANALYZE the frame tables."""
+        state_path = self.options['index_state_file']
+        if not os.path.exists(state_path):
+            self._release_bulk_load_lock()
+            self.stdout.write("✅ No deferred indexes to rebuild")
+            return
+        
+        self.stdout.write("\n🔨 REBUILDING DEFERRED INDEXES")
+        self.stdout.write("-" * 50)
+        
+        def progress_callback(current, total, name, elapsed):
+            self.stdout.write(f"  🔨 [{current}/{total}] {name} ({elapsed:.1f}s)")
+        
+        start_rebuild = time.time()
+        try:
+            rebuilt = FrameManager.rebuild_secondary_indexes(state_path, progress_callback)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(
+                f"❌ Index rebuild failed: {e}\n"
+                f"   State kept in {state_path}; rerun with --rebuild-indexes"
+            ))
+            raise
+        finally:
+            self._release_bulk_load_lock()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {rebuilt} indexes and analyzed frame tables in {time.time() - start_rebuild:.1f}s"
+        ))
+
     def process_all_nights(self, nights):
         """Process all nights sequentially."""
         self.stdout.write("\n⚡ PHASE 5: SEQUENTIAL PROCESSING")
@@ -552,6 +641,19 @@ class Command(BaseCommand):
         if self.options['debug']:
             log_print(f"✅ Night object ready: {night}")
         
+        # Make sure monthly partitions exist for every partitioned frame table
+        for table_name in FrameManager.frame_tables():
+            try:
+                created_partitions = FrameManager.ensure_month_partitions(
+                    table_name, target_date, months_ahead=1
+                )
+            except Exception as e:
+                # Frames still land in the DEFAULT partition; not worth failing the night
+                log_print(f"⚠️ Could not create partitions for {table_name}: {e}", force=True)
+                continue
+            if created_partitions:
+                log_print(f"🗂️ Created partitions: {', '.join(created_partitions)}")
+        
         # Step 3: Discover and filter FITS files
         all_files = self.discover_fits_files(date_str)
         
@@ -630,13 +732,20 @@ class Command(BaseCommand):
         if self.options['create_targets'] and results['imported'] > 0:
             post_target_stats = self.post_process_targets(night)
             if self.options['debug']:
-                log_print(f"✅ Post-processing: {post_target_stats['linked_targets']} targets linked")
+                log_print(f"✅ Post-processing: {post_target_stats['linked_targets']} frames linked by name, "
+                          f"{post_target_stats['linked_by_position']} by position, "
+                          f"{post_target_stats['linked_tiles']} to tiles, "
+                          f"{post_target_stats['coordinates_updated']} target positions refreshed")
         
-        # Step 7: Update night statistics
+        # Step 7: Update night statistics (plus this night's tiles/targets/units marked dirty;
+        # anything else that is dirty is left to update_nights)
         try:
             night.update_statistics()
+            refreshed = FrameManager.refresh_dirty_statistics(night=night)
             if self.options['debug']:
                 log_print(f"✅ Night stats: {night.science_count:,} science, {night.total_frames:,} total")
+                log_print(f"✅ Refreshed dirty stats: {refreshed['tiles']} tiles, "
+                          f"{refreshed['targets']} targets, {refreshed['units']} units")
         except Exception as e:
             log_print(f"⚠️ Could not update night statistics: {e}")
         
@@ -659,31 +768,50 @@ class Command(BaseCommand):
         return results
 
     def discover_fits_files(self, date_str):
-        """Discover FITS files for the given date."""
-        file_paths = []
-        base_path = "/lyman/data1/obsdata"
+        """Discover FITS files for the given date (from the archive inventory)."""
+        base_path = ArchiveFolder.BASE_PATH
         
-        # Get all telescope units
         try:
-            units = [d for d in os.listdir(base_path) if d.startswith('7DT') and os.path.isdir(os.path.join(base_path, d))]
-            units.sort()
-        except (FileNotFoundError, PermissionError):
+            night_date = date.fromisoformat(date_str)
+        except ValueError:
             return []
         
-        for unit in units:
-            unit_path = os.path.join(base_path, unit)
-            
-            # Look for directories matching the date
-            for dir_name in os.listdir(unit_path):
-                if dir_name.startswith(date_str):
-                    date_dir = os.path.join(unit_path, dir_name)
-                    if os.path.isdir(date_dir):
-                        # Find all FITS files in this directory
-                        fits_pattern = os.path.join(date_dir, "*.fits")
-                        fits_files = glob.glob(fits_pattern)
-                        file_paths.extend(fits_files)
-        
-        return sorted(file_paths)
+        # No date folder of the requested units: nothing to refresh or query
+        units = self.options.get('units')
+        entries = ArchiveLayout.shared(base_path).folders(night_date)
+        if not any(not units or entry.unit in units for entry in entries):
+            return []
+        
+        # Refresh the inventory once per run; unchanged directories are not listed
+        if not getattr(self, '_inventory_refreshed', False):
+            try:
+                result = ArchiveFolder.refresh_inventory(base_path, units=self.options.get('units'))
+            except ValueError:
+                return []
+            self._inventory_refreshed = True
+            if self.options.get('debug'):
+                self.stdout.write(
+                    f"🗂️  Inventory refreshed: {result['folders_checked']:,} folders checked, "
+                    f"{result['folders_listed']:,} listed, {result['files_added']:,} new files "
+                    f"({result['elapsed']:.1f}s)"
+                )
+        
+        if self.options.get('missing_only'):
+            folder_ids = None
+            if units:
+                folder_ids = list(ArchiveFolder.date_folders(date=night_date).filter(
+                    unit_name__in=units).values_list('id', flat=True))
+            return [
+                os.path.join(folder['folder_path'], name)
+                for folder in ArchiveFile.missing_by_folder(dates=[night_date], folder_ids=folder_ids)
+                for name in folder['missing']
+            ]
+        if units:
+            return sorted(
+                path for unit_name in units
+                for path in ArchiveFile.paths(date=night_date, unit_name=unit_name, suffixes=('.fits',))
+            )
+        return ArchiveFile.paths(date=night_date, suffixes=('.fits',))
 
     def filter_unwanted_files(self, file_paths, exclude_focus=True, exclude_test=True):
         """Filter out unwanted files using FilenamePatternAnalyzer."""
@@ -697,12 +825,12 @@ class Command(BaseCommand):
             exclude = False
             
             if exclude_focus:
-                if any(keyword in filename.lower() for keyword in ['focus', 'focusing', 'af_']):
+                if any(keyword in filename.lower() for keyword in self.FOCUS_KEYWORDS):
                     exclusion_stats['focus'] += 1
                     exclude = True
             
             if exclude_test and not exclude:
-                if any(keyword in filename.lower() for keyword in ['test', 'calib', 'lamp', 'twilight']):
+                if any(keyword in filename.lower() for keyword in self.TEST_KEYWORDS):
                     exclusion_stats['test'] += 1
                     exclude = True
             
@@ -749,29 +877,12 @@ class Command(BaseCommand):
         return stats
 
     def post_process_targets(self, night):
-        """Post-process science frames to link them with appropriate targets."""
-        stats = {'linked_targets': 0}
-        
-        # Update target coordinates from science frames
-        science_frames = ScienceFrame.objects.filter(night=night, target__isnull=True)
-        
-        for frame in science_frames[:100]:  # Process sample
-            if frame.object_name:
-                try:
-                    target = Target.objects.get(name=frame.object_name)
-                    if frame.object_ra and frame.object_dec:
-                        target.ra = frame.object_ra
-                        target.dec = frame.object_dec
-                        target.save()
-                        frame.target = target
-                        frame.save()
-                        stats['linked_targets'] += 1
-                except Target.DoesNotExist:
-                    continue
-                except Exception:
-                    continue
-        
-        return stats
+        """Link the night's science frames to tiles and targets (set-based)."""
+        try:
+            return FrameManager.link_frames_to_targets(night)
+        except Exception as e:
+            self.stdout.write(f"⚠️ Target linking failed: {e}")
+            return {'linked_tiles': 0, 'linked_targets': 0, 'linked_by_position': 0, 'coordinates_updated': 0}
 
     def cleanup_existing_data(self, date_str, confirm=False):
         """Remove all existing data for the specified date."""
@@ -784,13 +895,13 @@ class Command(BaseCommand):
             except Night.DoesNotExist:
                 return True  # Nothing to clean up
             
-            # Count existing data
-            total_count = (
-                ScienceFrame.objects.filter(night=night).count() +
-                BiasFrame.objects.filter(night=night).count() +
-                DarkFrame.objects.filter(night=night).count() +
-                FlatFrame.objects.filter(night=night).count()
-            )
+            # Restrict to the requested units so other units' frames survive
+            scope = {'night': night}
+            if self.options.get('units'):
+                scope['unit__name__in'] = self.options['units']
+            
+            # Count existing data (single query over the cross-type index)
+            total_count = FrameIndex.objects.filter(**scope).count()
             
             if total_count == 0:
                 return True  # Nothing to clean up
@@ -803,19 +914,24 @@ class Command(BaseCommand):
             
             # Delete frames
             with transaction.atomic():
-                ScienceFrame.objects.filter(night=night).delete()
-                BiasFrame.objects.filter(night=night).delete()
-                DarkFrame.objects.filter(night=night).delete()
-                FlatFrame.objects.filter(night=night).delete()
+                FrameManager.remove_from_coverage_maps(ScienceFrame.objects.filter(**scope))
+                ScienceFrame.objects.filter(**scope).delete()
+                BiasFrame.objects.filter(**scope).delete()
+                DarkFrame.objects.filter(**scope).delete()
+                FlatFrame.objects.filter(**scope).delete()
+                FrameIndex.objects.filter(**scope).delete()
                 
-                # Reset night statistics
-                night.science_count = 0
-                night.bias_count = 0
-                night.dark_count = 0
-                night.flat_count = 0
-                night.distinct_tiles = 0
-                night.total_exptime = 0
-                night.save()
+                # Reset night statistics (recomputed after a unit-scoped cleanup)
+                if 'unit__name__in' in scope:
+                    night.update_statistics()
+                else:
+                    night.science_count = 0
+                    night.bias_count = 0
+                    night.dark_count = 0
+                    night.flat_count = 0
+                    night.distinct_tiles = 0
+                    night.total_exptime = 0
+                    night.save()
             
             if self.options['debug']:
                 self.stdout.write(f"✅ Cleaned up {total_count:,} frames for {date_str}")
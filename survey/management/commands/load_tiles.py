@@ -1,4 +1,6 @@
 import os
+import time
+import numpy as np
 from django.core.management.base import BaseCommand, CommandError
 from survey.models import Tile
 from django.db.models import Min, Max, Count, Sum, Avg
@@ -23,10 +25,25 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be loaded without actually loading',
         )
+        parser.add_argument(
+            '--rebuild-lookup',
+            action='store_true',
+            help='Only rebuild the shared sky->tile lookup grid from the Tile table',
+        )
+        parser.add_argument(
+            '--lookup-resolution',
+            type=float,
+            default=0.5,
+            help='Cell size of the lookup grid in degrees (default: 0.5)',
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
         
+        if options['rebuild_lookup']:
+            self.build_lookup_grid(options['lookup_resolution'])
+            return
+        
         # Check if file exists
         if not os.path.exists(file_path):
             raise CommandError(f'File does not exist: {file_path}')
@@ -48,6 +65,8 @@ class Command(BaseCommand):
             self.dry_run_load(file_path)
         else:
             self.load_tiles(file_path)
+            # Tile.load_from_file skips this so the rebuild can be timed here
+            self.build_lookup_grid(options['lookup_resolution'])
     
     def dry_run_load(self, file_path):
         """Show what would be loaded without actually loading"""
@@ -81,13 +100,16 @@ class Command(BaseCommand):
     def load_tiles(self, file_path):
         """Actually load the tiles"""
         try:
-            result = Tile.load_from_file(file_path)
+            start_time = time.perf_counter()
+            result = Tile.load_from_file(file_path, rebuild_lookup=False)
+            elapsed = time.perf_counter() - start_time
             
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Successfully loaded tiles: '
+                    f'Successfully loaded tiles in {elapsed:.1f}s: '
                     f'{result["created"]} created, '
                     f'{result["updated"]} updated, '
+                    f'{result["unchanged"]} unchanged, '
                     f'{result["total"]} total'
                 )
             )
@@ -107,3 +129,36 @@ class Command(BaseCommand):
             
         except Exception as e:
             raise CommandError(f'Error loading tiles: {e}')
+    
+    def build_lookup_grid(self, resolution):
+        """Rebuild the memory-mapped sky->tile lookup grid and time a lookup"""
+        start_time = time.perf_counter()
+        meta = Tile.build_lookup_grid(resolution=resolution)
+        elapsed = time.perf_counter() - start_time
+        
+        n_dec, n_ra, depth = meta['shape']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Lookup grid rebuilt in {elapsed:.1f}s: {n_dec}x{n_ra} cells at {resolution} deg, '
+                f'up to {depth} candidates per cell, {meta["footprints"]} tiles'
+            )
+        )
+        self.stdout.write(f'Saved to {Tile.lookup_grid_dir()}')
+        
+        # Quick throughput check on random positions
+        grid = Tile.lookup_grid()
+        if grid is None:
+            return
+        rng = np.random.default_rng(0)
+        n_points = 200000
+        ra = rng.uniform(0.0, 360.0, n_points)
+        dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n_points)))
+        
+        start_time = time.perf_counter()
+        tile_ids = grid.locate(ra, dec)
+        elapsed = time.perf_counter() - start_time
+        
+        self.stdout.write(
+            f'Lookup: {elapsed / n_points * 1e9:.0f} ns per position '
+            f'({np.count_nonzero(tile_ids >= 0) / n_points:.1%} of random positions covered)'
+        )
@@ -0,0 +1,550 @@
+import os
+import json
+import time
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Min, Max
+
+from survey.models import (
+    Night, FrameManager, FrameIndex, ScienceFrame, BiasFrame, DarkFrame, FlatFrame
+)
+
+
+FRAME_MODELS = {
+    'science': ScienceFrame,
+    'bias': BiasFrame,
+    'dark': DarkFrame,
+    'flat': FlatFrame,
+}
+
+
+class Command(BaseCommand):
+    help = '''Manage obstime range partitioning of the RAW frame tables (PostgreSQL).
+
+    The frame table is converted into a table PARTITIONED BY RANGE (obstime)
+    with one partition per month plus a DEFAULT partition. Django keeps using
+    "id" as the primary key; in the database the primary key becomes
+    (id, obstime) and unique constraints gain obstime, as PostgreSQL requires
+    the partition key in every unique constraint.
+
+    That weakens every single-column UNIQUE constraint: after conversion
+    ObservationFrame.image_id (unique=True in the model) is only unique per
+    obstime, so two frames with the same image ID can be stored. --convert
+    therefore refuses to run on a table with such constraints unless
+    --allow-weaker-unique is given.
+
+    Typical workflow:
+        python manage.py partition_frames --benchmark --benchmark-output logs/before.json
+        python manage.py partition_frames --convert --allow-weaker-unique
+        python manage.py partition_frames --benchmark --compare logs/before.json
+        python manage.py partition_frames --ensure --months-ahead 3
+        python manage.py partition_frames --status
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            choices=list(FRAME_MODELS.keys()),
+            default='science',
+            help='Frame table to operate on (default: science)'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Show partitions with row estimates and sizes'
+        )
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert the existing table into a monthly partitioned table (copies all rows)'
+        )
+        parser.add_argument(
+            '--allow-weaker-unique',
+            action='store_true',
+            help='Let --convert turn UNIQUE (col) constraints such as image_id into UNIQUE (col, obstime)'
+        )
+        parser.add_argument(
+            '--drop-legacy',
+            action='store_true',
+            help='Drop the renamed legacy table after a successful --convert'
+        )
+        parser.add_argument(
+            '--ensure',
+            action='store_true',
+            help='Create monthly partitions from the current month onward'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=2,
+            help='Number of future monthly partitions to create (default: 2)'
+        )
+        parser.add_argument(
+            '--detach',
+            metavar='YYYY-MM',
+            help='Detach the partition for the given month (it stays as a standalone table)'
+        )
+        parser.add_argument(
+            '--reindex',
+            metavar='YYYY-MM',
+            help='REINDEX CONCURRENTLY the partition for the given month'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Measure insert and night/time-scoped query latency on the current layout'
+        )
+        parser.add_argument(
+            '--benchmark-rows',
+            type=int,
+            default=1000,
+            help='Rows inserted (and rolled back) by the insert benchmark (default: 1000)'
+        )
+        parser.add_argument(
+            '--benchmark-repeat',
+            type=int,
+            default=5,
+            help='Repetitions per benchmark query (default: 5)'
+        )
+        parser.add_argument(
+            '--benchmark-output',
+            metavar='PATH',
+            help='Write benchmark results as JSON'
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='PATH',
+            help='Compare benchmark results against a previous JSON result file'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the SQL for --convert without executing it'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL')
+
+        self.options = options
+        self.model = FRAME_MODELS[options['table']]
+        self.table = self.model._meta.db_table
+
+        if options['convert']:
+            self.convert_table()
+        if options['ensure']:
+            self.ensure_partitions()
+        if options['detach']:
+            self.detach_partition(options['detach'])
+        if options['reindex']:
+            self.reindex_partition(options['reindex'])
+        if options['benchmark']:
+            self.run_benchmark()
+        if options['status'] or not any(
+            options[key] for key in ('convert', 'ensure', 'detach', 'reindex', 'benchmark')
+        ):
+            self.show_status()
+
+    # === Conversion ===
+
+    def convert_table(self):
+        """Rename the table, create the partitioned replacement and copy all rows."""
+        table = self.table
+        legacy = f"{table}_legacy"
+
+        if FrameManager.is_partitioned(table):
+            self.stdout.write(self.style.WARNING(f"⚠️ {table} is already partitioned"))
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [legacy])
+            if cursor.fetchone()[0] is not None:
+                raise CommandError(f'{legacy} already exists - drop or rename it before converting')
+
+            cursor.execute(f'SELECT MIN(obstime), MAX(obstime), COUNT(*) FROM "{table}"')
+            first_obs, last_obs, row_count = cursor.fetchone()
+
+            # Secondary indexes (excluding those backing constraints)
+            cursor.execute("""
+                SELECT i.relname, pg_get_indexdef(i.oid)
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                JOIN pg_class t ON t.oid = x.indrelid
+                WHERE t.relname = %s
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+            """, [table])
+            indexes = cursor.fetchall()
+
+            # Constraints: primary key, unique and foreign keys
+            cursor.execute("""
+                SELECT c.conname, c.contype, pg_get_constraintdef(c.oid),
+                       ARRAY(SELECT a.attname FROM unnest(c.conkey) k
+                             JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k)
+                FROM pg_constraint c
+                JOIN pg_class t ON t.oid = c.conrelid
+                WHERE t.relname = %s AND c.contype IN ('p', 'u', 'f')
+            """, [table])
+            constraints = cursor.fetchall()
+
+            # Django >= 4.1 creates identity columns; older tables use serial sequences
+            cursor.execute(
+                "SELECT attidentity, pg_get_serial_sequence(%s, 'id') FROM pg_attribute "
+                "WHERE attrelid = %s::regclass AND attname = 'id'",
+                [table, table]
+            )
+            identity, sequence = cursor.fetchone()
+
+        # PostgreSQL needs obstime in every unique constraint of a partitioned table
+        weakened = [
+            (name, columns) for name, contype, _, columns in constraints
+            if contype == 'u' and 'obstime' not in columns
+        ]
+        if weakened:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ UNIQUENESS WILL BE LOST: these constraints of {table} become unique per obstime only, "
+                f"so duplicate values can be stored while the Django model still declares them unique:"
+            ))
+            for name, columns in weakened:
+                self.stdout.write(self.style.WARNING(
+                    f"   {name}: UNIQUE ({', '.join(columns)}) -> UNIQUE ({', '.join(columns)}, obstime)"
+                ))
+            if not self.options['allow_weaker_unique'] and not self.options['dry_run']:
+                raise CommandError('Refusing to convert; rerun with --allow-weaker-unique to accept this')
+
+        today = date.today()
+        start = first_obs.date() if first_obs else today
+        end = max(last_obs.date() if last_obs else today, today)
+        months = self._month_starts(start, end, self.options['months_ahead'])
+
+        statements = [
+            f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE',
+            f'ALTER TABLE "{table}" RENAME TO "{legacy}"',
+        ]
+        # Free the original index/constraint names for the partitioned table
+        for name, _ in indexes:
+            statements.append(f'ALTER INDEX "{name}" RENAME TO "{self._legacy_name(name)}"')
+        for name, _, _, _ in constraints:
+            statements.append(
+                f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{name}" TO "{self._legacy_name(name)}"'
+            )
+
+        statements.append(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f'INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (obstime)'
+        )
+        for month_start, next_month in months:
+            partition = FrameManager.month_partition_name(table, month_start)
+            statements.append(
+                f'CREATE TABLE "{partition}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{next_month.isoformat()}')"
+            )
+        statements.append(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+        # Copy rows before building indexes so each index is built once
+        statements.append(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+
+        for name, contype, definition, columns in constraints:
+            if contype == 'p':
+                key = ', '.join(f'"{col}"' for col in columns if col != 'obstime')
+                statements.append(
+                    f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" PRIMARY KEY ({key}, "obstime")'
+                )
+            elif contype == 'u':
+                key = ', '.join(f'"{col}"' for col in columns if col != 'obstime')
+                statements.append(
+                    f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" UNIQUE ({key}, "obstime")'
+                )
+            else:
+                statements.append(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+        # Definitions were read before the rename, so they already target the new table
+        statements.extend(definition for _, definition in indexes)
+
+        # Keep id values continuous with the legacy table
+        if identity:
+            statements.append(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f'(SELECT COALESCE(MAX(id), 1) FROM "{table}"))'
+            )
+        elif sequence:
+            # The copied serial default still uses the legacy sequence; keep it alive
+            statements.append(f'ALTER SEQUENCE {sequence} OWNED BY "{table}".id')
+
+        if self.options['dry_run']:
+            self.stdout.write(f"📋 DRY RUN: {len(statements)} statements for {table} ({row_count:,} rows)")
+            for statement in statements:
+                self.stdout.write(f"{statement};")
+            return
+
+        self.stdout.write(f"🔄 Converting {table} ({row_count:,} rows) into {len(months)} monthly partitions...")
+        start_time = time.time()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{table}"')
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            copied = cursor.fetchone()[0]
+
+        if copied != row_count:
+            raise CommandError(f'Row count mismatch after conversion: {copied:,} != {row_count:,}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Converted {table}: {copied:,} rows in {time.time() - start_time:.1f}s"
+        ))
+
+        if self.options['drop_legacy']:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE "{legacy}"')
+            self.stdout.write(f"🗑️ Dropped {legacy}")
+        else:
+            self.stdout.write(f"💡 Legacy data kept in {legacy}; drop it once the new layout is verified")
+
+    @staticmethod
+    def _legacy_name(name):
+        """Suffix a relation name with _legacy while staying within 63 characters."""
+        return f"{name[:56]}_legacy"
+
+    @staticmethod
+    def _month_starts(start, end, months_ahead):
+        """List (month_start, next_month) pairs from start's month to end's month + months_ahead."""
+        months = []
+        month_start = date(start.year, start.month, 1)
+        last = date(end.year, end.month, 1)
+        for _ in range(months_ahead):
+            last = date(last.year + 1, 1, 1) if last.month == 12 else date(last.year, last.month + 1, 1)
+
+        while month_start <= last:
+            if month_start.month == 12:
+                next_month = date(month_start.year + 1, 1, 1)
+            else:
+                next_month = date(month_start.year, month_start.month + 1, 1)
+            months.append((month_start, next_month))
+            month_start = next_month
+        return months
+
+    # === Maintenance ===
+
+    def ensure_partitions(self):
+        """Create the current and upcoming monthly partitions."""
+        created = FrameManager.ensure_month_partitions(
+            self.table, date.today(), months_ahead=self.options['months_ahead']
+        )
+        if not FrameManager.is_partitioned(self.table):
+            self.stdout.write(self.style.WARNING(f"⚠️ {self.table} is not partitioned (run --convert first)"))
+        elif created:
+            self.stdout.write(self.style.SUCCESS(f"✅ Created partitions: {', '.join(created)}"))
+        else:
+            self.stdout.write("✅ All required partitions already exist")
+
+    def _partition_for_month(self, month_str):
+        """Resolve a YYYY-MM argument to a partition name."""
+        try:
+            month_start = datetime.strptime(month_str, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f'Invalid month: {month_str} (expected YYYY-MM)')
+        return FrameManager.month_partition_name(self.table, month_start)
+
+    def detach_partition(self, month_str):
+        """Detach one monthly partition so it can be archived or dropped separately."""
+        partition = self._partition_for_month(month_str)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{self.table}" DETACH PARTITION "{partition}"')
+        self.stdout.write(self.style.SUCCESS(f"✅ Detached {partition} (now a standalone table)"))
+
+    def reindex_partition(self, month_str):
+        """Rebuild the indexes of one monthly partition without locking the others."""
+        partition = self._partition_for_month(month_str)
+        start_time = time.time()
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX TABLE CONCURRENTLY "{partition}"')
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Reindexed {partition} in {time.time() - start_time:.1f}s"
+        ))
+
+    def show_status(self):
+        """Show partition layout, row estimates and sizes."""
+        self.stdout.write(f"\n🗂️ Partition status for {self.table}")
+        self.stdout.write("=" * 80)
+
+        if not FrameManager.is_partitioned(self.table):
+            self.stdout.write("   Not partitioned (single heap table)")
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid),
+                       c.reltuples::bigint, pg_total_relation_size(c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                WHERE p.relname = %s
+                ORDER BY c.relname
+            """, [self.table])
+            rows = cursor.fetchall()
+
+        total_rows = 0
+        total_bytes = 0
+        for name, bound, estimate, size in rows:
+            estimate = max(estimate, 0)
+            total_rows += estimate
+            total_bytes += size
+            self.stdout.write(f"   {name:<40} ~{estimate:>12,} rows  {size / 1024**2:>10.1f} MB  {bound}")
+
+        self.stdout.write("-" * 80)
+        self.stdout.write(f"   {len(rows)} partitions, ~{total_rows:,} rows, {total_bytes / 1024**3:.2f} GB")
+
+    # === Benchmark ===
+
+    def run_benchmark(self):
+        """Time night/time-scoped queries and bulk inserts on the current layout."""
+        repeat = self.options['benchmark_repeat']
+        results = {
+            'table': self.table,
+            'partitioned': FrameManager.is_partitioned(self.table),
+            'timestamp': datetime.now().isoformat(),
+            'queries': {},
+        }
+
+        night = Night.objects.filter(science_count__gt=0).order_by('-date').first()
+        if night is None:
+            raise CommandError('No night with science frames available for benchmarking')
+
+        bounds = self.model.objects.filter(night=night).aggregate(first=Min('obstime'), last=Max('obstime'))
+        self.stdout.write(f"⏱️ Benchmarking {self.table} "
+                          f"({'partitioned' if results['partitioned'] else 'not partitioned'}) "
+                          f"using {night.date}")
+
+        queries = {
+            'night_count': lambda: self.model.objects.filter(
+                night=night, obstime__gte=bounds['first'], obstime__lte=bounds['last']
+            ).count(),
+            'night_frames_by_unit': lambda: list(
+                self.model.objects.filter(
+                    night=night, obstime__gte=bounds['first'], obstime__lte=bounds['last']
+                ).values('unit').annotate(n=Count('id'))
+            ),
+            'time_window_count': lambda: self.model.objects.filter(
+                obstime__gte=bounds['first'], obstime__lte=bounds['last']
+            ).count(),
+            'frame_index_night_count': lambda: FrameIndex.objects.filter(night=night).count(),
+        }
+
+        for name, query in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - start_time) * 1000)
+            timings.sort()
+            results['queries'][name] = {
+                'median_ms': timings[len(timings) // 2],
+                'min_ms': timings[0],
+            }
+
+        results['partitions_scanned'] = self._partitions_scanned(
+            self.model.objects.filter(night=night, obstime__gte=bounds['first'], obstime__lte=bounds['last'])
+        )
+        results['insert'] = self._benchmark_insert(night, self.options['benchmark_rows'])
+
+        self.stdout.write("\n📊 Query latency (ms):")
+        for name, timing in results['queries'].items():
+            self.stdout.write(f"   {name:<28} median {timing['median_ms']:>9.2f}   min {timing['min_ms']:>9.2f}")
+        self.stdout.write(f"   Partitions scanned by night query: {results['partitions_scanned']}")
+        if results['insert']:
+            self.stdout.write(f"\n📥 Insert: {results['insert']['rows']:,} rows in "
+                              f"{results['insert']['elapsed_ms']:.1f} ms "
+                              f"({results['insert']['rows_per_s']:.0f} rows/s, rolled back)")
+
+        if self.options['compare']:
+            self._compare_results(results, self.options['compare'])
+
+        if self.options['benchmark_output']:
+            os.makedirs(os.path.dirname(self.options['benchmark_output']) or '.', exist_ok=True)
+            with open(self.options['benchmark_output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"💾 Results saved to {self.options['benchmark_output']}")
+
+        return results
+
+    def _partitions_scanned(self, queryset):
+        """Count the relations a query touches according to EXPLAIN (shows pruning)."""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        relations = set()
+
+        def walk(node):
+            if 'Relation Name' in node:
+                relations.add(node['Relation Name'])
+            for child in node.get('Plans', []):
+                walk(child)
+
+        walk(plan[0]['Plan'])
+        return len(relations)
+
+    def _benchmark_insert(self, night, rows):
+        """Insert copies of existing frames inside a transaction that is rolled back."""
+        columns = [
+            field.column for field in self.model._meta.concrete_fields
+            if not field.primary_key and field.column != 'image_id'
+        ]
+        column_sql = ', '.join(f'"{col}"' for col in columns)
+
+        sql = (
+            f'INSERT INTO "{self.table}" ({column_sql}, "image_id") '
+            f'SELECT {column_sql}, md5(random()::text || g::text) '
+            f'FROM (SELECT * FROM "{self.table}" WHERE night_id = %s LIMIT 1) src, '
+            f'generate_series(1, %s) g'
+        )
+
+        elapsed = None
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    start_time = time.perf_counter()
+                    cursor.execute(sql, [night.id, rows])
+                    elapsed = time.perf_counter() - start_time
+                transaction.set_rollback(True)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Insert benchmark failed: {e}"))
+            return None
+
+        return {
+            'rows': rows,
+            'elapsed_ms': elapsed * 1000,
+            'rows_per_s': rows / elapsed if elapsed else 0,
+        }
+
+    def _compare_results(self, results, path):
+        """Print before/after deltas against a saved benchmark file."""
+        if not os.path.exists(path):
+            self.stdout.write(self.style.WARNING(f"⚠️ Comparison file not found: {path}"))
+            return
+
+        with open(path) as f:
+            before = json.load(f)
+
+        self.stdout.write(f"\n📈 Comparison with {path}:")
+        for name, timing in results['queries'].items():
+            previous = before.get('queries', {}).get(name)
+            if not previous:
+                continue
+            change = (timing['median_ms'] / previous['median_ms'] - 1) * 100 if previous['median_ms'] else 0
+            self.stdout.write(f"   {name:<28} {previous['median_ms']:>9.2f} → {timing['median_ms']:>9.2f} ms "
+                              f"({change:+.1f}%)")
+
+        if results.get('insert') and before.get('insert'):
+            self.stdout.write(f"   {'insert rows/s':<28} {before['insert']['rows_per_s']:>9.0f} → "
+                              f"{results['insert']['rows_per_s']:>9.0f}")
+        self.stdout.write(f"   {'partitions scanned':<28} {before.get('partitions_scanned')} → "
+                          f"{results['partitions_scanned']}")
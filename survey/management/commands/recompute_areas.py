@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from survey.models import Tile, Target
+
+
+class Command(BaseCommand):
+    help = 'Recompute exact spherical areas (area_sq_deg) of all tiles and targets in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tiles-only',
+            action='store_true',
+            help='Only recompute tile areas'
+        )
+        parser.add_argument(
+            '--targets-only',
+            action='store_true',
+            help='Only recompute target areas'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compute and report the areas without writing them'
+        )
+
+    def handle(self, *args, **options):
+        models_to_run = []
+        if not options['targets_only']:
+            models_to_run.append(('Tiles', Tile))
+        if not options['tiles_only']:
+            models_to_run.append(('Targets', Target))
+
+        for label, model in models_to_run:
+            start_time = time.perf_counter()
+            result = model.recompute_areas(dry_run=options['dry_run'])
+            elapsed = time.perf_counter() - start_time
+            self.report(label, result, elapsed, options['dry_run'])
+
+    def report(self, label, result, elapsed, dry_run):
+        """Print a summary of old vs new areas."""
+        count = len(result['ids'])
+        self.stdout.write(f"\n📐 {label}: {count:,} footprints in {elapsed:.2f}s")
+        if not count:
+            return
+
+        new = result['new']
+        old = result['old']
+        self.stdout.write(f"   Area (sq deg): min {new.min():.4f}   mean {new.mean():.4f}   max {new.max():.4f}")
+
+        known = np.isfinite(old)
+        if known.any():
+            change = np.abs(new[known] - old[known])
+            worst = np.argmax(change)
+            worst_id = result['ids'][known][worst]
+            self.stdout.write(
+                f"   Change vs stored: mean {change.mean():.4f}, max {change.max():.4f} "
+                f"(id {worst_id}: {old[known][worst]:.4f} → {new[known][worst]:.4f})"
+            )
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("   🔍 Dry run - nothing written"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"   ✅ {result['written']:,} rows updated in one statement"))
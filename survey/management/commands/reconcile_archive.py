@@ -0,0 +1,316 @@
+import os
+import sys
+import json
+import time
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.models import Night, ArchiveFolder, ArchiveFile
+from survey.management.commands.ingest_all_nights import Command as IngestCommand
+
+
+# Files the ingest itself skips are never counted as gaps
+INGEST_EXCLUDE_PATTERNS = IngestCommand.FOCUS_KEYWORDS + IngestCommand.TEST_KEYWORDS
+
+
+class Command(BaseCommand):
+    help = '''Reconcile the raw-data archive with the database.
+
+    Refreshes the archive inventory, computes the per-(unit, folder) gap
+    between files on disk and the frame index in one query, and runs a
+    unit-scoped, missing-files-only ingest for each gap with bounded
+    concurrency. The outcome is recorded in a status file; a folder whose
+    gap has not changed since its last attempt is not retried, so a
+    reconciliation with nothing new costs one inventory diff:
+
+        python manage.py reconcile_archive
+        python manage.py reconcile_archive --start-date 2025-02-13 --end-date 2025-03-05 --workers 4
+        python manage.py reconcile_archive --dry-run
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-path',
+            default=ArchiveFolder.BASE_PATH,
+            help=f'Archive root containing the 7DT* unit directories (default: {ArchiveFolder.BASE_PATH})'
+        )
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            help='Only reconcile folders dated on or after this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            help='Only reconcile folders dated on or before this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--units',
+            nargs='+',
+            help='Only reconcile these units, e.g. 7DT01 7DT03'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Ingest jobs running at the same time (default: 2)'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Skip folders modified within this many seconds, still being written (default: 3600)'
+        )
+        parser.add_argument(
+            '--retry',
+            action='store_true',
+            help='Also retry gaps that did not change since their last attempt'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the gaps without ingesting'
+        )
+        parser.add_argument(
+            '--status-file',
+            default='logs/reconcile_status.json',
+            help='Where the outcome of each run is recorded (default: logs/reconcile_status.json)'
+        )
+        parser.add_argument(
+            '--log-dir',
+            default='logs',
+            help='Directory for the per-job ingest logs (default: logs)'
+        )
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        for key in ('start_date', 'end_date'):
+            if options[key]:
+                try:
+                    date.fromisoformat(options[key])
+                except ValueError:
+                    raise CommandError(f"Invalid {key.replace('_', ' ')}: {options[key]}")
+
+        self.stdout.write("🔄 Refreshing archive inventory...")
+        try:
+            inventory = ArchiveFolder.refresh_inventory(options['base_path'], units=options['units'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"   {inventory['folders_checked']:,} folders checked, {inventory['folders_listed']:,} listed, "
+            f"+{inventory['files_added']:,}/-{inventory['files_removed']:,} files ({inventory['elapsed']:.1f}s)"
+        )
+
+        status = self._load_status(options['status_file'])
+        previous = status.get('folders', {})
+        gaps, skipped = self.find_gaps(options, previous)
+
+        total_missing = sum(folder['missing_files'] for folder in gaps)
+        self.stdout.write(
+            f"📊 {len(gaps)} folders with {total_missing:,} missing files"
+            + (f" ({skipped} unchanged since their last attempt)" if skipped else "")
+        )
+
+        jobs = defaultdict(list)
+        for folder in gaps:
+            jobs[(folder['folder_date'], folder['unit'])].append(folder)
+        for (night_date, unit_name), folders in sorted(jobs.items()):
+            self.stdout.write(
+                f"   📁 {unit_name} {night_date}: "
+                f"{', '.join(folder['folder_name'] for folder in folders)} "
+                f"({sum(folder['missing_files'] for folder in folders):,} missing)"
+            )
+
+        if options['dry_run'] or not jobs:
+            if not jobs:
+                self.stdout.write(self.style.SUCCESS("✅ Archive and database are reconciled"))
+            self._record(options['status_file'], status, inventory, {}, [], start_time, options['dry_run'])
+            return
+
+        outcomes = self.run_jobs(jobs, options)
+
+        # One more summary over the reconciled dates gives what is still missing
+        remaining = {
+            folder['folder_path']: folder['missing_files']
+            for folder in ArchiveFile.folder_summary(
+                dates=sorted({night_date for night_date, _ in jobs}),
+                exclude_patterns=INGEST_EXCLUDE_PATTERNS
+            )
+        }
+        results = {}
+        for (night_date, unit_name), folders in jobs.items():
+            outcome = outcomes[(night_date, unit_name)]
+            for folder in folders:
+                results[folder['folder_path']] = {
+                    'unit': unit_name,
+                    'date': str(night_date),
+                    'mtime': folder['mtime'],
+                    'missing_before': folder['missing_files'],
+                    'missing_after': remaining.get(folder['folder_path'], 0),
+                    'status': outcome['status'],
+                    'exit_code': outcome['exit_code'],
+                    'log_file': outcome['log_file'],
+                    'elapsed': round(outcome['elapsed'], 1),
+                    'finished_at': datetime.now().isoformat(timespec='seconds'),
+                }
+
+        failed = sum(1 for outcome in outcomes.values() if outcome['status'] != 'success')
+        still_missing = sum(result['missing_after'] for result in results.values())
+        self._record(options['status_file'], status, inventory, results, list(outcomes.values()), start_time, False)
+
+        summary = (f"{len(outcomes) - failed}/{len(outcomes)} ingest jobs succeeded, "
+                   f"{total_missing - still_missing:,} of {total_missing:,} missing files recovered "
+                   f"in {time.time() - start_time:.1f}s")
+        if failed or still_missing:
+            self.stdout.write(self.style.WARNING(f"⚠️  {summary}"))
+            self.stdout.write(f"   Status recorded in {options['status_file']}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
+
+    def find_gaps(self, options, previous):
+        """
+        Date folders with science files missing from the frame index.
+
+        Folders still being written (younger than --min-age) and folders
+        whose gap and mtime match their last recorded attempt are left out.
+
+        Returns:
+        --------
+        tuple : (list of folder_summary dicts with mtime added, number skipped as unchanged)
+        """
+        summary = ArchiveFile.folder_summary(
+            start_date=options['start_date'], end_date=options['end_date'],
+            exclude_patterns=INGEST_EXCLUDE_PATTERNS
+        )
+        candidates = [
+            folder for folder in summary
+            if folder['missing_files'] and (not options['units'] or folder['unit'] in options['units'])
+        ]
+        mtimes = dict(
+            ArchiveFolder.objects.filter(id__in=[folder['folder_id'] for folder in candidates])
+            .values_list('id', 'mtime')
+        )
+
+        cutoff = time.time() - options['min_age']
+        gaps, skipped = [], 0
+        for folder in candidates:
+            folder['mtime'] = mtimes.get(folder['folder_id'], 0.0)
+            if not folder['mtime'] or folder['mtime'] > cutoff:
+                continue
+            last = previous.get(folder['folder_path'])
+            if (not options['retry'] and last
+                    and last.get('missing_after') == folder['missing_files']
+                    and last.get('mtime') == folder['mtime']):
+                skipped += 1
+                continue
+            gaps.append(folder)
+        return gaps, skipped
+
+    def run_jobs(self, jobs, options):
+        """
+        Ingest the missing files of each (date, unit) with at most --workers jobs at once.
+
+        Returns:
+        --------
+        dict : {(date, unit): {'status', 'exit_code', 'log_file', 'elapsed', ...}}
+        """
+        # Create the nights up front so concurrent unit jobs never race on them
+        for night_date in sorted({night_date for night_date, _ in jobs}):
+            Night.get_or_create_for_date(night_date)
+
+        os.makedirs(options['log_dir'], exist_ok=True)
+        workers = max(1, options['workers'])
+        self.stdout.write(f"\n🚀 Running {len(jobs)} ingest jobs ({workers} at a time)")
+
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._ingest, night_date, unit_name, options['log_dir']): (night_date, unit_name)
+                for night_date, unit_name in sorted(jobs)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                night_date, unit_name = futures[future]
+                outcome = future.result()
+                outcomes[(night_date, unit_name)] = outcome
+                if outcome['status'] == 'success':
+                    self.stdout.write(f"   ✅ [{done}/{len(jobs)}] {unit_name} {night_date} ({outcome['elapsed']:.0f}s)")
+                else:
+                    self.stdout.write(self.style.ERROR(
+                        f"   ❌ [{done}/{len(jobs)}] {unit_name} {night_date}: {outcome['status']} "
+                        f"(exit code {outcome['exit_code']}, see {outcome['log_file']})"
+                    ))
+        return outcomes
+
+    @staticmethod
+    def _ingest(night_date, unit_name, log_dir):
+        """Run one unit-scoped, missing-files-only ingest in a subprocess."""
+        date_str = str(night_date)
+        log_file = os.path.join(log_dir, f"reconcile_{date_str.replace('-', '')}_{unit_name}.log")
+        cmd = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'ingest_all_nights',
+            '--start-date', date_str,
+            '--end-date', date_str,
+            '--units', unit_name,
+            '--missing-only',
+            '--auto-confirm',
+            '--continue-on-error',
+            '--validate',
+            '--create-targets',
+            '--exclude-focus',
+            '--exclude-test',
+            '--report-interval', '1',
+        ]
+        start_time = time.time()
+        try:
+            with open(log_file, 'w') as log:
+                exit_code = subprocess.run(
+                    cmd, stdout=log, stderr=subprocess.STDOUT, cwd=settings.BASE_DIR
+                ).returncode
+            status = 'success' if exit_code == 0 else 'failed'
+        except OSError as e:
+            exit_code, status = None, f'error: {e}'
+        return {
+            'date': date_str,
+            'unit': unit_name,
+            'status': status,
+            'exit_code': exit_code,
+            'log_file': log_file,
+            'elapsed': time.time() - start_time,
+        }
+
+    def _load_status(self, status_file):
+        try:
+            with open(status_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'folders': {}}
+
+    def _record(self, status_file, status, inventory, results, jobs, start_time, dry_run):
+        """Merge this run's per-folder results into the status file (atomically)."""
+        folders = status.get('folders', {})
+        folders.update(results)
+        status = {
+            'folders': folders,
+            'last_run': {
+                'started_at': datetime.fromtimestamp(start_time).isoformat(timespec='seconds'),
+                'elapsed': round(time.time() - start_time, 1),
+                'dry_run': dry_run,
+                'inventory': {key: value for key, value in inventory.items() if key != 'elapsed'},
+                'jobs': len(jobs),
+                'jobs_failed': sum(1 for job in jobs if job['status'] != 'success'),
+                'folders_reconciled': len(results),
+                'missing_before': sum(result['missing_before'] for result in results.values()),
+                'missing_after': sum(result['missing_after'] for result in results.values()),
+            },
+        }
+        directory = os.path.dirname(status_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f'{status_file}.tmp', 'w') as f:
+            json.dump(status, f, indent=2, default=str)
+        os.replace(f'{status_file}.tmp', status_file)
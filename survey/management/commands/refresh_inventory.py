@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from survey.models import ArchiveFolder
+
+
+class Command(BaseCommand):
+    help = '''Refresh the archive inventory (folders and FITS files of the raw-data archive).
+
+    Only directories whose mtime changed since the last run are listed again,
+    so a steady-state refresh costs one stat per folder:
+
+        python manage.py refresh_inventory
+        python manage.py refresh_inventory --units 7DT01,7DT02 --force
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-path',
+            default=ArchiveFolder.BASE_PATH,
+            help=f'Archive root containing the unit directories (default: {ArchiveFolder.BASE_PATH})'
+        )
+        parser.add_argument(
+            '--units',
+            type=str,
+            help='Comma-separated unit directories to refresh (default: all)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='List every folder regardless of mtime'
+        )
+
+    def handle(self, *args, **options):
+        units = [unit.strip() for unit in options['units'].split(',')] if options['units'] else None
+        self.stdout.write(f"🗂️  Refreshing archive inventory of {options['base_path']}...")
+
+        try:
+            result = ArchiveFolder.refresh_inventory(options['base_path'], units=units, force=options['force'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['folders_checked']:,} folders checked, {result['folders_listed']:,} listed, "
+            f"{result['folders_removed']:,} removed in {result['elapsed']:.1f}s"
+        ))
+        self.stdout.write(
+            f"   Files: +{result['files_added']:,} added, -{result['files_removed']:,} removed, "
+            f"{result['files_updated']:,} changed"
+        )
+
+        totals = ArchiveFolder.objects.filter(depth=1).aggregate(
+            folders=Count('id'), files=Sum('file_count'), size=Sum('total_bytes')
+        )
+        self.stdout.write(
+            f"   Inventory: {totals['folders']:,} date folders, {totals['files'] or 0:,} FITS files, "
+            f"{(totals['size'] or 0) / 1024 ** 4:.2f} TB"
+        )
@@ -0,0 +1,149 @@
+import json
+import time
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from survey import skymap
+from survey.models import Tile, Target, TileFilterSummary
+
+
+class Command(BaseCommand):
+    help = '''Rank survey tiles by the probability they enclose in a GW HEALPix skymap.
+
+    The web API only serves nsides whose pixel -> tile membership is already
+    cached; build them offline, e.g. after loading new tiles:
+
+        python manage.py skymap_tiles --nside 256 --rebuild-cache
+        python manage.py skymap_tiles --nside 1024 --rebuild-cache
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'skymap_file',
+            type=str,
+            nargs='?',
+            help='Flat or multi-order HEALPix FITS skymap (omit to only build the membership cache)'
+        )
+        parser.add_argument(
+            '--nside',
+            type=int,
+            default=skymap.DEFAULT_NSIDE,
+            help=f'HEALPix resolution used for the overlay (default: {skymap.DEFAULT_NSIDE})'
+        )
+        parser.add_argument(
+            '--level',
+            type=float,
+            default=0.9,
+            help='Credible level of the tiles to list/associate (default: 0.9)'
+        )
+        parser.add_argument(
+            '--create-target',
+            type=str,
+            metavar='NAME',
+            help='Create or refresh a tile-based TOO target with the credible-region tiles'
+        )
+        parser.add_argument(
+            '--rebuild-cache',
+            action='store_true',
+            help='Rebuild the pixel -> tile membership cache for this nside'
+        )
+        parser.add_argument(
+            '--references',
+            action='store_true',
+            help='Show pre-event reference frames per filter for the credible-region tiles'
+        )
+        parser.add_argument(
+            '--cutoff',
+            type=str,
+            help='Reference cutoff time (ISO, UTC; default: now), e.g. the event time'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the ranked tiles to a JSON file'
+        )
+
+    def handle(self, *args, **options):
+        nside = options['nside']
+        level = options['level']
+        levels = tuple(sorted(set(skymap.CREDIBLE_LEVELS) | {level}))
+
+        try:
+            start_time = time.perf_counter()
+            membership = Tile.skymap_membership(nside, refresh=options['rebuild_cache'])
+            cache_time = time.perf_counter() - start_time
+            if not options['skymap_file']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Membership cache for nside={nside}: {len(membership.tile_ids):,} tiles "
+                    f"({cache_time:.1f}s)"
+                ))
+                return
+
+            start_time = time.perf_counter()
+            ranking = Tile.rank_by_skymap(options['skymap_file'], nside=nside, levels=levels)
+            rank_time = time.perf_counter() - start_time
+        except (ImportError, ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"\n🌌 Skymap: {options['skymap_file']} (nside={nside})")
+        self.stdout.write(f"   Membership: {len(membership.tile_ids):,} tiles, ready in {cache_time * 1000:.1f} ms")
+        self.stdout.write(f"   Ranking: {rank_time * 1000:.1f} ms")
+        self.stdout.write(f"   Probability inside the tiling: {ranking['total_in_tiles']:.1%}")
+
+        for credible_level, count in ranking['credible'].items():
+            if count is None:
+                self.stdout.write(self.style.WARNING(
+                    f"   {credible_level:.0%} region: not reachable with survey tiles"
+                ))
+            else:
+                self.stdout.write(f"   {credible_level:.0%} region: {count:,} tiles")
+
+        count = ranking['credible'].get(level) or len(ranking['tile_ids'])
+        self.stdout.write(f"\n📋 Top tiles ({level:.0%} region):")
+        for rank, (tile_id, prob, cumulative) in enumerate(zip(
+                ranking['tile_ids'][:min(count, 20)], ranking['probability'], ranking['cumulative']), 1):
+            self.stdout.write(f"   {rank:4d}. T{int(tile_id):05d}  {prob:7.4f}  (cum {cumulative:.4f})")
+        if count > 20:
+            self.stdout.write(f"   ... and {count - 20:,} more")
+
+        if options['references']:
+            self.show_references(ranking['tile_ids'][:count], options['cutoff'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(skymap.ranking_to_dict(ranking, level), f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\n💾 Ranking written to {options['output']}"))
+
+        if options['create_target']:
+            target = Target.create_from_skymap(options['create_target'], ranking, level=level)
+            self.stdout.write(self.style.SUCCESS(
+                f"\n🎯 Target {target.name}: {target.associated_tiles.count():,} associated tiles"
+            ))
+
+
+    def show_references(self, tile_ids, cutoff_text):
+        """Summarize reference coverage of the given tiles before the cutoff."""
+        cutoff = None
+        if cutoff_text:
+            cutoff = parse_datetime(cutoff_text)
+            if cutoff is None:
+                raise CommandError(f"Invalid --cutoff: {cutoff_text}")
+            if cutoff.tzinfo is None:
+                cutoff = cutoff.replace(tzinfo=dt_timezone.utc)
+
+        start_time = time.perf_counter()
+        coverage = TileFilterSummary.reference_coverage(tile_ids, cutoff=cutoff)
+        elapsed = time.perf_counter() - start_time
+
+        self.stdout.write(f"\n🗂️  Reference coverage ({len(coverage):,}/{len(tile_ids):,} tiles, {elapsed * 1000:.1f} ms):")
+        filter_totals = {}
+        for filters in coverage.values():
+            for name, summary in filters.items():
+                tiles, exptime = filter_totals.get(name, (0, 0.0))
+                filter_totals[name] = (tiles + 1, exptime + summary['total_exptime'])
+        for name, (tiles, exptime) in sorted(filter_totals.items()):
+            self.stdout.write(f"   {name:>8s}: {tiles:,} tiles, {exptime / 3600:.1f} h total")
+        if not filter_totals:
+            self.stdout.write(self.style.WARNING("   No pre-event science frames in these tiles"))
@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.models import Night
+
+
+class Command(BaseCommand):
+    help = '''Compute sunset/sunrise, civil/nautical/astronomical twilight and moon data for Nights.
+
+    All selected nights are computed in one vectorized pass and written with
+    one bulk update:
+
+        python manage.py update_ephemerides
+        python manage.py update_ephemerides --missing-only
+        python manage.py update_ephemerides --start-date 2024-01-01 --end-date 2024-12-31
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            help='First night to update (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            help='Last night to update (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only nights without a sunset yet'
+        )
+        parser.add_argument(
+            '--step',
+            type=float,
+            default=5,
+            help='Altitude grid spacing in minutes for the twilight crossings (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        dates = {}
+        for key in ('start_date', 'end_date'):
+            if options[key]:
+                try:
+                    dates[key] = date.fromisoformat(options[key])
+                except ValueError:
+                    raise CommandError(f"Invalid {key.replace('_', ' ')}: {options[key]}")
+        if options['step'] <= 0:
+            raise CommandError('--step must be positive')
+
+        self.stdout.write("🌗 Computing ephemerides...")
+        result = Night.update_ephemerides(
+            start_date=dates.get('start_date'),
+            end_date=dates.get('end_date'),
+            missing_only=options['missing_only'],
+            step_minutes=options['step'],
+        )
+        if not result['nights']:
+            self.stdout.write(self.style.WARNING("⚠️  No nights selected"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Updated {result['nights']:,} nights in {result['elapsed']:.1f}s"
+        ))
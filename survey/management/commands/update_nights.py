@@ -1,6 +1,7 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from survey.models import Night
+from survey.models import Night, FrameManager, ArchiveLayout
 import datetime
 import time
 import os
@@ -69,7 +70,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--update-stats',
             action='store_true',
-            help='Update statistics for processed nights'
+            help='Recompute statistics for nights, tiles, targets and units marked dirty'
         )
         
         parser.add_argument(
@@ -154,6 +155,21 @@ class Command(BaseCommand):
             help='Skip folders created within this many seconds (default: 3600)'
         )
         
+        # Scheduled archive reconciliation (see reconcile_archive)
+        parser.add_argument(
+            '--reconcile-interval',
+            type=int,
+            default=0,
+            help='Run reconcile_archive every N seconds to ingest files missing from the database (default: 0 = off)'
+        )
+        
+        parser.add_argument(
+            '--reconcile-workers',
+            type=int,
+            default=2,
+            help='Concurrent ingest jobs for scheduled reconciliation (default: 2)'
+        )
+        
         parser.add_argument(
             '--help-auto-ingest',
             action='store_true',
@@ -214,6 +230,8 @@ class Command(BaseCommand):
                 # Single execution mode
                 self.stdout.write(self.style.SUCCESS(f'Starting one-time Night update ({mode} mode)...'))
                 self._process_nights(base_path, options)
+                if options['reconcile_interval'] > 0:
+                    self._run_reconciliation(base_path, options)
                 self.stdout.write(self.style.SUCCESS('Night update complete!'))
                 return
             
@@ -225,12 +243,16 @@ class Command(BaseCommand):
             if options['smart_interval']:
                 self.stdout.write(self.style.SUCCESS(f'🧠 Smart interval: {options["min_interval"]}-{options["max_interval"]}s'))
             
+            if options['reconcile_interval'] > 0:
+                self.stdout.write(self.style.SUCCESS(f'🧮 Archive reconciliation every {options["reconcile_interval"]}s'))
+            
             # Initialize monitoring state
             last_check_time = None
             last_modification_time = None
             consecutive_no_changes = 0
             current_interval = interval
             last_state_save = time.time()  # Track when we last saved state
+            last_reconcile = None
             
             # Auto-ingest tracking
             if options['auto_ingest']:
@@ -321,6 +343,12 @@ class Command(BaseCommand):
                             self.stdout.write(self.style.ERROR(f"Auto-ingest error: {e}"))
                             self.stdout.write(traceback.format_exc())
                     
+                    # Scheduled reconciliation of archive vs database
+                    if options['reconcile_interval'] > 0 and (
+                            last_reconcile is None or time.time() - last_reconcile >= options['reconcile_interval']):
+                        last_reconcile = time.time()
+                        self._run_reconciliation(base_path, options)
+                    
                     # Smart interval adjustment
                     if options['smart_interval']:
                         current_interval = self._calculate_smart_interval(
@@ -374,6 +402,9 @@ class Command(BaseCommand):
             # Delete all Night records (CASCADE will handle related data)
             deleted_count, _ = Night.objects.all().delete()
             
+            # Every frame is gone, so the coverage maps are empty as well
+            FrameManager.coverage_maps().replace({}, 0)
+            
             self.stdout.write(self.style.SUCCESS(f'Deleted {deleted_count} Night records.'))
             
         except Exception as e:
@@ -381,28 +412,13 @@ class Command(BaseCommand):
             raise
 
     def _get_directory_modification_time(self, base_path):
-        """Get the latest modification time in the observation directory"""
-        try:
-            latest_mod_time = os.path.getmtime(base_path)
-            
-            # Check subdirectories for recent changes (last 7 days only for performance)
-            cutoff_time = time.time() - (7 * 24 * 3600)  # 7 days ago
-            
-            for entry in os.listdir(base_path):
-                entry_path = os.path.join(base_path, entry)
-                if os.path.isdir(entry_path):
-                    try:
-                        mod_time = os.path.getmtime(entry_path)
-                        if mod_time > cutoff_time:  # Only check recent directories
-                            latest_mod_time = max(latest_mod_time, mod_time)
-                    except (OSError, IOError):
-                        continue  # Skip directories we can't access
-            
-            return latest_mod_time
-            
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error checking directory modification time: {e}"))
+        """Get the latest modification time of the root and unit directories (shared layout index)"""
+        layout = ArchiveLayout.shared(base_path)
+        latest_mod_time = layout.latest_mtime()
+        if latest_mod_time is None:
+            self.stdout.write(self.style.ERROR(f"Error checking directory modification time: cannot read {base_path}"))
             return time.time()  # Return current time as fallback
+        return latest_mod_time
 
     def _calculate_smart_interval(self, change_detected, consecutive_no_changes, min_interval, max_interval, base_interval):
         """Calculate smart interval based on activity"""
@@ -657,25 +673,27 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"Status check error: {e}"))
             return {'total_nights': 0, 'scanned': 0}
 
-    def update_night_statistics(self, max_age_days=7):
-        """Update statistics for recently processed nights"""
-        self.stdout.write(f"\n📈 Updating night statistics (last {max_age_days} days)...")
+    def update_night_statistics(self):
+        """Update statistics for nights (and tiles, targets, units) marked dirty"""
+        self.stdout.write(f"\n📈 Updating dirty statistics...")
         
         try:
-            # Update statistics for recent nights
-            cutoff_date = timezone.now().date() - datetime.timedelta(days=max_age_days)
-            recent_nights = Night.objects.filter(updated_at__date__gte=cutoff_date)
+            # Only rows flagged by ingest, purge or header re-parse are recomputed
+            dirty_nights = Night.objects.filter(stats_dirty=True)
             
             updated_count = 0
-            for night in recent_nights:
+            for night in dirty_nights:
                 try:
-                    if hasattr(night, 'update_statistics'):
-                        night.update_statistics()
-                        updated_count += 1
+                    night.update_statistics()
+                    updated_count += 1
                 except Exception as e:
                     self.stdout.write(f"Warning: Failed to update stats for {night.date}: {e}")
             
-            self.stdout.write(f"✅ Updated statistics for {updated_count} nights")
+            refreshed = FrameManager.refresh_dirty_statistics()
+            
+            self.stdout.write(f"✅ Updated statistics for {updated_count} nights, "
+                              f"{refreshed['tiles']} tiles, {refreshed['targets']} targets, "
+                              f"{refreshed['units']} units")
             return updated_count
            
         except Exception as e:
@@ -848,44 +866,24 @@ class Command(BaseCommand):
         new_folders = []
         
         try:
-            # Look for telescope directories (7DT01, 7DT02, etc.)
-            for telescope_dir in os.listdir(base_path):
-                telescope_path = os.path.join(base_path, telescope_dir)
-                
-                # Skip if not a directory or doesn't match telescope pattern
-                if not os.path.isdir(telescope_path) or not telescope_dir.startswith('7DT'):
-                    continue
-                
-                # Look for date folders within telescope directory
-                try:
-                    for date_folder in os.listdir(telescope_path):
-                        date_folder_path = os.path.join(telescope_path, date_folder)
-                        
-                        # Skip if not a directory
-                        if not os.path.isdir(date_folder_path):
-                            continue
-                        
-                        # Check if this looks like an observation date folder
-                        if self._is_observation_folder(date_folder, telescope_dir):
-                            # Skip if already processed
-                            if date_folder_path in processed_folders:
-                                continue
-                            
-                            # Extract date and telescope info
-                            try:
-                                date_str = self._extract_date_from_folder(date_folder)
-                                new_folders.append({
-                                    'path': date_folder_path,
-                                    'date': date_str,
-                                    'telescope': telescope_dir,
-                                    'display_name': f"{telescope_dir}/{date_folder}"
-                                })
-                            except Exception as e:
-                                self.stdout.write(f"⚠️  Skipping invalid folder {date_folder}: {e}")
-                                
-                except (OSError, PermissionError) as e:
-                    self.stdout.write(f"⚠️  Cannot access telescope directory {telescope_dir}: {e}")
-                    continue
+            # Date folders of the telescope directories (7DT01, 7DT02, etc.) from the shared layout index
+            layout = ArchiveLayout.shared(base_path)
+            for telescope_dir in layout.units():
+                for night_date, entry in layout.items(telescope_dir):
+                    # Check if this looks like an observation date folder
+                    if not self._is_observation_folder(entry.folder, telescope_dir):
+                        continue
+                    
+                    # Skip if already processed
+                    if entry.path in processed_folders:
+                        continue
+                    
+                    new_folders.append({
+                        'path': entry.path,
+                        'date': night_date.strftime('%Y-%m-%d'),
+                        'telescope': telescope_dir,
+                        'display_name': f"{telescope_dir}/{entry.folder}"
+                    })
                     
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error discovering new folders: {e}"))
@@ -914,23 +912,6 @@ class Command(BaseCommand):
         
         return False
     
-    def _extract_date_from_folder(self, folder_name):
-        """Extract date string from folder name"""
-        import re
-        
-        # Try to find date pattern in folder name
-        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', folder_name)
-        if date_match:
-            return date_match.group(1)
-        
-        date_match = re.search(r'(\d{8})', folder_name)
-        if date_match:
-            date_str = date_match.group(1)
-            # Convert YYYYMMDD to YYYY-MM-DD
-            return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
-        
-        raise ValueError(f"Cannot extract date from folder name: {folder_name}")
-    
     def _check_folder_stability(self, folder_path, options):
         """Check if files in folder are stable (not being actively written)"""
         try:
@@ -1027,6 +1008,20 @@ class Command(BaseCommand):
             self.stdout.write(f"❌ Error during ingestion for {date_str}: {e}")
             return False
 
+    def _run_reconciliation(self, base_path, options):
+        """Ingest files missing from the database (only folders whose gap changed)"""
+        try:
+            call_command(
+                'reconcile_archive',
+                base_path=base_path,
+                workers=options['reconcile_workers'],
+                min_age=options['skip_recent_folders'],
+                stdout=self.stdout,
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Reconciliation error: {e}"))
+            self.stdout.write(traceback.format_exc())
+
     def _get_current_processing_status(self):
         """Get current status of auto-ingest processing"""
         status = {
@@ -1253,6 +1248,9 @@ python manage.py update_nights --once --mode validate
 
 # 6. FULL REBUILD (dangerous!)
 python manage.py update_nights --once --mode full --flush
+
+# 7. MONITORING WITH HOURLY RECONCILIATION (ingests files missing from the DB)
+python manage.py update_nights --auto-ingest --reconcile-interval 3600 --reconcile-workers 2
 """
         self.stdout.write(examples)
 
@@ -0,0 +1,120 @@
+# Generated by Django 5.2 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_SQL = """
+INSERT INTO survey_frameindex
+    (frame_type, frame_id, night_id, unit_id, original_filename, file_size, obstime, file_signature)
+SELECT 'SCIENCE', id, night_id, unit_id, original_filename, file_size, obstime, '' FROM survey_scienceframe
+UNION ALL
+SELECT 'BIAS', id, night_id, unit_id, original_filename, file_size, obstime, '' FROM survey_biasframe
+UNION ALL
+SELECT 'DARK', id, night_id, unit_id, original_filename, file_size, obstime, '' FROM survey_darkframe
+UNION ALL
+SELECT 'FLAT', id, night_id, unit_id, original_filename, file_size, obstime, '' FROM survey_flatframe;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("facility", "0007_weather"),
+        ("survey", "0008_alter_scienceframe_specmode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FrameIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "frame_type",
+                    models.CharField(
+                        choices=[
+                            ("SCIENCE", "Science"),
+                            ("BIAS", "Bias"),
+                            ("DARK", "Dark"),
+                            ("FLAT", "Flat"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "frame_id",
+                    models.BigIntegerField(
+                        help_text="Primary key of the frame in its own table"
+                    ),
+                ),
+                ("original_filename", models.CharField(max_length=255)),
+                (
+                    "file_size",
+                    models.BigIntegerField(
+                        blank=True, help_text="File size in bytes", null=True
+                    ),
+                ),
+                (
+                    "obstime",
+                    models.DateTimeField(
+                        blank=True, help_text="Observation timestamp (UTC)", null=True
+                    ),
+                ),
+                (
+                    "file_signature",
+                    models.CharField(
+                        blank=True,
+                        help_text="size:mtime signature of the file at ingest time",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "night",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="frame_index",
+                        to="survey.night",
+                    ),
+                ),
+                (
+                    "unit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="frame_index",
+                        to="facility.unit",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Frame Index Entry",
+                "verbose_name_plural": "Frame Index",
+                "indexes": [
+                    models.Index(
+                        fields=["night", "original_filename"],
+                        name="survey_fram_night_i_be800a_idx",
+                    ),
+                    models.Index(
+                        fields=["original_filename"],
+                        name="survey_fram_origina_6e090f_idx",
+                    ),
+                    models.Index(
+                        fields=["night", "frame_type"],
+                        name="survey_fram_night_i_d9ede4_idx",
+                    ),
+                    models.Index(
+                        fields=["unit", "night"], name="survey_fram_unit_id_f5acb9_idx"
+                    ),
+                ],
+                "unique_together": {("frame_type", "frame_id")},
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.2 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Add dirty-flag statistics tracking.
+
+    Existing rows were kept current by the old per-frame signal recompute, so
+    they start clean; rows created afterwards default to dirty.
+    """
+
+    dependencies = [
+        ("survey", "0009_frameindex"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="night",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="night",
+            name="stats_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Incremented each time the statistics are marked dirty",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tile",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tile",
+            name="stats_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Incremented each time the statistics are marked dirty",
+            ),
+        ),
+        migrations.AddField(
+            model_name="target",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="target",
+            name="stats_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Incremented each time the statistics are marked dirty",
+            ),
+        ),
+        migrations.AddField(
+            model_name="unitstatistics",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="unitstatistics",
+            name="stats_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Incremented each time the statistics are marked dirty",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="night",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=True,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tile",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=True,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="target",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=True,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="unitstatistics",
+            name="stats_dirty",
+            field=models.BooleanField(
+                db_index=True,
+                default=True,
+                help_text="Cached statistics are stale and need recomputation",
+            ),
+        ),
+    ]
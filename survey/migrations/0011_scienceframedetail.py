@@ -0,0 +1,691 @@
+# Generated by Django 5.2 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+COPY_DETAIL_SQL = """
+INSERT INTO survey_scienceframedetail (
+    frame_id,
+    focuser_position, af_time, af_value, af_error,
+    weather_update_time, ambient_temperature, humidity, pressure,
+    dew_point, wind_speed, wind_direction, wind_gust,
+    sky_temperature, cloud_fraction, rain_rate, weather_age,
+    weather_station, background_level, num_sources, limiting_magnitude,
+    ellipticity, star_count, median_hfd, nina_hfr,
+    nina_star_detection_sensitivity, guiding_enabled, guiding_rms_ra, guiding_rms_dec,
+    guiding_rms_total, plate_solved, plate_solve_ra, plate_solve_dec,
+    plate_solve_angle, plate_solve_pixel_scale, sequence_title, sequence_target,
+    obsnote
+)
+SELECT
+    id,
+    focuser_position, af_time, af_value, af_error,
+    weather_update_time, ambient_temperature, humidity, pressure,
+    dew_point, wind_speed, wind_direction, wind_gust,
+    sky_temperature, cloud_fraction, rain_rate, weather_age,
+    weather_station, background_level, num_sources, limiting_magnitude,
+    ellipticity, star_count, median_hfd, nina_hfr,
+    nina_star_detection_sensitivity, guiding_enabled, guiding_rms_ra, guiding_rms_dec,
+    guiding_rms_total, plate_solved, plate_solve_ra, plate_solve_dec,
+    plate_solve_angle, plate_solve_pixel_scale, sequence_title, sequence_target,
+    obsnote
+FROM survey_scienceframe;
+"""
+
+
+# Unapplying restores the columns first, then copies the detail rows back
+REVERSE_COPY_DETAIL_SQL = """
+UPDATE survey_scienceframe AS f SET
+    focuser_position = d.focuser_position,
+    af_time = d.af_time,
+    af_value = d.af_value,
+    af_error = d.af_error,
+    weather_update_time = d.weather_update_time,
+    ambient_temperature = d.ambient_temperature,
+    humidity = d.humidity,
+    pressure = d.pressure,
+    dew_point = d.dew_point,
+    wind_speed = d.wind_speed,
+    wind_direction = d.wind_direction,
+    wind_gust = d.wind_gust,
+    sky_temperature = d.sky_temperature,
+    cloud_fraction = d.cloud_fraction,
+    rain_rate = d.rain_rate,
+    weather_age = d.weather_age,
+    weather_station = d.weather_station,
+    background_level = d.background_level,
+    num_sources = d.num_sources,
+    limiting_magnitude = d.limiting_magnitude,
+    ellipticity = d.ellipticity,
+    star_count = d.star_count,
+    median_hfd = d.median_hfd,
+    nina_hfr = d.nina_hfr,
+    nina_star_detection_sensitivity = d.nina_star_detection_sensitivity,
+    guiding_enabled = d.guiding_enabled,
+    guiding_rms_ra = d.guiding_rms_ra,
+    guiding_rms_dec = d.guiding_rms_dec,
+    guiding_rms_total = d.guiding_rms_total,
+    plate_solved = d.plate_solved,
+    plate_solve_ra = d.plate_solve_ra,
+    plate_solve_dec = d.plate_solve_dec,
+    plate_solve_angle = d.plate_solve_angle,
+    plate_solve_pixel_scale = d.plate_solve_pixel_scale,
+    sequence_title = d.sequence_title,
+    sequence_target = d.sequence_target,
+    obsnote = d.obsnote
+FROM survey_scienceframedetail AS d
+WHERE d.frame_id = f.id;
+"""
+
+
+class Migration(migrations.Migration):
+    """
+    Vertical split of ScienceFrame.
+
+    Cold header-derived columns (focus, weather, guiding, plate solving,
+    detailed image quality, NINA sequence info) move to the one-to-one
+    ScienceFrameDetail table. The data is copied before the columns and
+    their indexes are dropped from survey_scienceframe.
+    """
+
+    dependencies = [
+        ("survey", "0010_statistics_dirty_tracking"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScienceFrameDetail",
+            fields=[
+                (
+                    "frame",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="detail",
+                        serialize=False,
+                        to="survey.scienceframe",
+                    ),
+                ),
+                (
+                    "focuser_position",
+                    models.FloatField(
+                        blank=True,
+                        help_text="FOCUSPOS/FOCPOS - Focuser position",
+                        null=True,
+                    ),
+                ),
+                (
+                    "af_time",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="AFTIME - Last autofocus time",
+                        null=True,
+                    ),
+                ),
+                (
+                    "af_value",
+                    models.FloatField(
+                        blank=True,
+                        help_text="AFVALUE - Autofocus position",
+                        null=True,
+                    ),
+                ),
+                (
+                    "af_error",
+                    models.FloatField(
+                        blank=True,
+                        help_text="AFERROR - Autofocus error",
+                        null=True,
+                    ),
+                ),
+                (
+                    "weather_update_time",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="DATE-WEA - Weather data timestamp",
+                        null=True,
+                    ),
+                ),
+                (
+                    "ambient_temperature",
+                    models.FloatField(
+                        blank=True,
+                        help_text="AMBTEMP - Ambient temperature (°C)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "humidity",
+                    models.FloatField(
+                        blank=True,
+                        help_text="HUMIDITY - Relative humidity (%)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "pressure",
+                    models.FloatField(
+                        blank=True,
+                        help_text="PRESSURE - Atmospheric pressure (hPa)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "dew_point",
+                    models.FloatField(
+                        blank=True,
+                        help_text="DEWPOINT - Dew point temperature (°C)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "wind_speed",
+                    models.FloatField(
+                        blank=True,
+                        help_text="WINDSPED/WINDSPD - Wind speed (m/s)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "wind_direction",
+                    models.FloatField(
+                        blank=True,
+                        help_text="WINDDIR - Wind direction (degrees)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "wind_gust",
+                    models.FloatField(
+                        blank=True,
+                        help_text="WINDGUST - Wind gust speed (m/s)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "sky_temperature",
+                    models.FloatField(
+                        blank=True,
+                        help_text="SKYTEMP - Sky temperature (°C)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "cloud_fraction",
+                    models.FloatField(
+                        blank=True,
+                        help_text="CLUDFRAC/CLOUDCVR - Cloud coverage fraction (0-1)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "rain_rate",
+                    models.FloatField(
+                        blank=True,
+                        help_text="RAINRATE - Rain rate (mm/h)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "weather_age",
+                    models.FloatField(
+                        blank=True,
+                        help_text="WEATHER_AGE - Age of weather data (NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "weather_station",
+                    models.CharField(
+                        blank=True,
+                        help_text="Weather station identifier (NINA only)",
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "background_level",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Background level (ADU)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "num_sources",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Number of detected sources",
+                        null=True,
+                    ),
+                ),
+                (
+                    "limiting_magnitude",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Limiting magnitude",
+                        null=True,
+                    ),
+                ),
+                (
+                    "ellipticity",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Average source ellipticity",
+                        null=True,
+                    ),
+                ),
+                (
+                    "star_count",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="STAR_COUNT - Number of detected stars",
+                        null=True,
+                    ),
+                ),
+                (
+                    "median_hfd",
+                    models.FloatField(
+                        blank=True,
+                        help_text="HFD - Half Flux Diameter median (pixels)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "nina_hfr",
+                    models.FloatField(
+                        blank=True,
+                        help_text="HFR - Half Flux Radius (NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "nina_star_detection_sensitivity",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Star detection sensitivity (NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "guiding_enabled",
+                    models.BooleanField(
+                        blank=True,
+                        help_text="GUIDING - Guiding status (NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "guiding_rms_ra",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Guiding RMS RA (arcsec, NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "guiding_rms_dec",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Guiding RMS Dec (arcsec, NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "guiding_rms_total",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Guiding RMS total (arcsec, NINA only)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "plate_solved",
+                    models.BooleanField(
+                        blank=True,
+                        help_text="Plate solving status",
+                        null=True,
+                    ),
+                ),
+                (
+                    "plate_solve_ra",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Plate solved RA",
+                        null=True,
+                    ),
+                ),
+                (
+                    "plate_solve_dec",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Plate solved Dec",
+                        null=True,
+                    ),
+                ),
+                (
+                    "plate_solve_angle",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Plate solved rotation angle",
+                        null=True,
+                    ),
+                ),
+                (
+                    "plate_solve_pixel_scale",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Plate solved pixel scale",
+                        null=True,
+                    ),
+                ),
+                (
+                    "sequence_title",
+                    models.CharField(
+                        blank=True,
+                        help_text="Sequence title (NINA only)",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "sequence_target",
+                    models.CharField(
+                        blank=True,
+                        help_text="Sequence target (NINA only)",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "obsnote",
+                    models.TextField(
+                        blank=True,
+                        help_text="NOTE - Observation notes",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Science Frame Detail",
+                "verbose_name_plural": "Science Frame Details",
+                "indexes": [
+                    models.Index(
+                        fields=["ambient_temperature", "humidity", "wind_speed"],
+                        name="survey_scie_ambient_d69338_idx",
+                    ),
+                    models.Index(
+                        fields=["cloud_fraction", "rain_rate"],
+                        name="survey_scie_cloud_f_9b80fd_idx",
+                    ),
+                    models.Index(
+                        fields=["af_time", "af_error"],
+                        name="survey_scie_af_time_92cc0d_idx",
+                    ),
+                    models.Index(
+                        fields=["focuser_position"],
+                        name="survey_scie_focuser_0dd4a1_idx",
+                    ),
+                    models.Index(
+                        fields=["guiding_rms_total"],
+                        name="survey_scie_guiding_f5c4ab_idx",
+                    ),
+                    models.Index(
+                        fields=["plate_solved"],
+                        name="survey_scie_plate_s_e7cc18_idx",
+                    ),
+                    models.Index(
+                        fields=["star_count"],
+                        name="survey_scie_star_co_a9808f_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(COPY_DETAIL_SQL, reverse_sql=REVERSE_COPY_DETAIL_SQL),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_ambient_fefc9a_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_humidit_0a2d24_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_pressur_7dbe82_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_dew_poi_274222_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_wind_sp_5e3b54_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_wind_di_438d96_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_wind_gu_27009d_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_sky_tem_2b56d1_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_cloud_f_1fc050_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_rain_ra_9dfae7_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_focuser_e328b0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_af_time_74f924_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_af_valu_541309_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_af_erro_caaf8d_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_star_co_ef02ba_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_median__854b46_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_nina_hf_81a99f_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_guiding_1f5d97_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_guiding_3418f1_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_plate_s_c89c21_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_ambient_39960f_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_cloud_f_a18fc7_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_af_time_6c48af_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_focuser_8b49ab_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="scienceframe",
+            name="survey_scie_guiding_805328_idx",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="focuser_position",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="af_time",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="af_value",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="af_error",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="weather_update_time",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="ambient_temperature",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="humidity",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="pressure",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="dew_point",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="wind_speed",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="wind_direction",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="wind_gust",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="sky_temperature",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="cloud_fraction",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="rain_rate",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="weather_age",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="weather_station",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="background_level",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="num_sources",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="limiting_magnitude",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="ellipticity",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="star_count",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="median_hfd",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="nina_hfr",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="nina_star_detection_sensitivity",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="guiding_enabled",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="guiding_rms_ra",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="guiding_rms_dec",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="guiding_rms_total",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="plate_solved",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="plate_solve_ra",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="plate_solve_dec",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="plate_solve_angle",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="plate_solve_pixel_scale",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="sequence_title",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="sequence_target",
+        ),
+        migrations.RemoveField(
+            model_name="scienceframe",
+            name="obsnote",
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 16:00
+
+from django.db import migrations
+
+
+Q3C_INDEXES = [
+    ("survey_tile_q3c_idx", "survey_tile", "ra", "dec"),
+    ("survey_target_q3c_idx", "survey_target", "ra", "dec"),
+    ("survey_scienceframe_object_q3c_idx", "survey_scienceframe", "object_ra", "object_dec"),
+    ("survey_scienceframe_unit_q3c_idx", "survey_scienceframe", "unit_ra", "unit_dec"),
+]
+
+
+class Migration(migrations.Migration):
+    """
+    Enable the q3c extension once and add q3c_ang2ipix functional indexes
+    used by q3c_radial_query, q3c_poly_query and q3c_join.
+    """
+
+    dependencies = [
+        ("survey", "0011_scienceframedetail"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS q3c;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} (q3c_ang2ipix("{ra}", "{dec}"));',
+            reverse_sql=f"DROP INDEX IF EXISTS {name};",
+        )
+        for name, table, ra, dec in Q3C_INDEXES
+    ] + [
+        migrations.RunSQL(
+            "ANALYZE survey_tile; ANALYZE survey_target; ANALYZE survey_scienceframe;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_SQL = """
+INSERT INTO survey_tilefiltersummary
+    (tile_id, filter_id, frame_count, total_exptime, best_fwhm, first_obstime, last_obstime, updated_at)
+SELECT tile_id, filter_id, count(*), coalesce(sum(exptime), 0),
+       min(fwhm) FILTER (WHERE fwhm > 0), min(obstime), max(obstime), now()
+FROM survey_scienceframe
+WHERE tile_id IS NOT NULL AND NOT is_test_observation
+GROUP BY tile_id, filter_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("facility", "0007_weather"),
+        ("survey", "0012_q3c_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TileFilterSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "frame_count",
+                    models.IntegerField(default=0, help_text="Number of science frames"),
+                ),
+                (
+                    "total_exptime",
+                    models.FloatField(
+                        default=0, help_text="Total exposure time in seconds"
+                    ),
+                ),
+                (
+                    "best_fwhm",
+                    models.FloatField(
+                        blank=True, help_text="Best (smallest) FWHM in arcsec", null=True
+                    ),
+                ),
+                (
+                    "first_obstime",
+                    models.DateTimeField(
+                        blank=True, help_text="First observation (UTC)", null=True
+                    ),
+                ),
+                (
+                    "last_obstime",
+                    models.DateTimeField(
+                        blank=True, help_text="Last observation (UTC)", null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "filter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tile_summaries",
+                        to="facility.filter",
+                    ),
+                ),
+                (
+                    "tile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="filter_summaries",
+                        to="survey.tile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tile Filter Summary",
+                "verbose_name_plural": "Tile Filter Summaries",
+                "indexes": [
+                    models.Index(
+                        fields=["filter", "last_obstime"],
+                        name="survey_tile_filter__bd25e1_idx",
+                    ),
+                ],
+                "unique_together": {("tile", "filter")},
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 5.2 on 2026-10-18 19:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survey", "0013_tilefiltersummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveFolder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(max_length=500, unique=True)),
+                (
+                    "unit_name",
+                    models.CharField(
+                        help_text="Unit directory name (e.g. 7DT01)", max_length=20
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "depth",
+                    models.PositiveSmallIntegerField(
+                        help_text="0 = unit directory, 1 = date folder, 2+ = nested folder"
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateField(
+                        blank=True,
+                        help_text="Date of the (enclosing) date folder",
+                        null=True,
+                    ),
+                ),
+                (
+                    "suffix",
+                    models.CharField(
+                        blank=True,
+                        help_text="Date folder suffix (e.g. gain2750, 2x2)",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "mtime",
+                    models.FloatField(
+                        help_text="Directory mtime when it was last listed (0 = list again)"
+                    ),
+                ),
+                (
+                    "file_count",
+                    models.IntegerField(
+                        default=0, help_text="FITS files directly in this folder"
+                    ),
+                ),
+                (
+                    "total_bytes",
+                    models.BigIntegerField(
+                        default=0, help_text="Size of those FITS files in bytes"
+                    ),
+                ),
+                (
+                    "scanned_at",
+                    models.DateTimeField(help_text="When the folder was last listed"),
+                ),
+                (
+                    "parent",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="children",
+                        to="survey.archivefolder",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archive Folder",
+                "verbose_name_plural": "Archive Folders",
+                "indexes": [
+                    models.Index(
+                        fields=["date", "unit_name"],
+                        name="survey_arch_date_f9a2d4_idx",
+                    ),
+                    models.Index(
+                        fields=["unit_name", "depth"],
+                        name="survey_arch_unit_na_930272_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchiveFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("size", models.BigIntegerField(help_text="File size in bytes")),
+                (
+                    "mtime",
+                    models.FloatField(
+                        help_text="File modification time (Unix seconds)"
+                    ),
+                ),
+                (
+                    "folder",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="files",
+                        to="survey.archivefolder",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archive File",
+                "verbose_name_plural": "Archive Files",
+                "indexes": [
+                    models.Index(fields=["name"], name="survey_arch_name_3d8412_idx"),
+                ],
+                "unique_together": {("folder", "name")},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("survey", "0014_archivefolder_archivefile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="night",
+            name="evening_civil_twilight",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="night",
+            name="morning_civil_twilight",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -8,18 +8,21 @@ import traceback
 import csv
 import warnings
 import hashlib
+import json
+import random
 import uuid
 import multiprocessing as mp
 from queue import Queue
 import threading
-from collections import defaultdict, Counter
+from collections import defaultdict, deque, namedtuple, Counter
+from functools import lru_cache
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # === Scientific Computing ===
 import numpy as np
 from astropy.io import fits
 from astropy.time import Time
-from astropy.coordinates import SkyCoord, get_body, EarthLocation, AltAz
+from astropy.coordinates import SkyCoord, get_body, EarthLocation, AltAz, TETE
 import astropy.units as u
 import datetime
 
@@ -29,19 +32,122 @@ from django.db import models, connection, transaction
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.gis.geos import Polygon, Point, MultiPolygon
-from django.db.models import Avg, Min, Max, Count, Sum, BooleanField, Q
+from django.db.models import Avg, Min, Max, Count, Sum, BooleanField, Q, F, Value
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Greatest
 
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 # === Local Application Imports ===
 from facility.models import Unit, Filter #, FilterWheel, Camera, Weather
+from .spherical import (
+    SphericalPolygonIndex, SkyLookupGrid, points_in_polygon, angular_separation, polygon_areas,
+    radec_to_xyz
+)
+from . import q3c, skymap, coverage
 
 # === Constants ===
 CHILE_TIMEZONE = pytz.timezone('America/Santiago')
 
-class Night(models.Model):
+
+class StatisticsTrackedModel(models.Model):
+    """
+    Abstract base for models that cache statistics derived from frames.
+
+    Ingest, purge and header re-parse paths call mark_statistics_dirty() on the
+    affected rows; recompute jobs then only visit rows with stats_dirty=True.
+    stats_version is bumped on every mark, so a recompute that overlapped with
+    new frames leaves the row dirty for the next pass.
+    """
+    stats_dirty = models.BooleanField(default=True, db_index=True,
+        help_text="Cached statistics are stale and need recomputation")
+    stats_version = models.PositiveIntegerField(default=0,
+        help_text="Incremented each time the statistics are marked dirty")
+
+    # Method that recomputes the cached statistics for one row
+    STATISTICS_METHOD = 'update_statistics'
+    # Field used to look up rows in mark_statistics_dirty()
+    STATISTICS_KEY = 'pk'
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """Never let a stale in-memory dirty flag overwrite a concurrent mark."""
+        if (not self._state.adding and self.pk is not None and not args
+                and kwargs.get('update_fields') is None and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('stats_dirty', 'stats_version')
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def mark_statistics_dirty(cls, keys):
+        """
+        Flag rows whose cached statistics need recomputation.
+
+        Parameters:
+        -----------
+        keys : iterable
+            Values of STATISTICS_KEY identifying the rows (None is ignored)
+
+        Returns:
+        --------
+        int : Number of rows marked
+        """
+        keys = {key for key in keys if key is not None}
+        if not keys:
+            return 0
+        return cls.objects.filter(**{f'{cls.STATISTICS_KEY}__in': keys}).update(
+            stats_dirty=True, stats_version=F('stats_version') + 1
+        )
+
+    def _current_statistics_version(self):
+        """Read the stored stats_version before a recompute starts."""
+        return type(self).objects.filter(pk=self.pk).values_list('stats_version', flat=True).first()
+
+    def _clear_statistics_dirty(self, start_version):
+        """Clear the dirty flag unless the row was marked again during the recompute."""
+        cleared = type(self).objects.filter(
+            pk=self.pk, stats_version=start_version
+        ).update(stats_dirty=False)
+        self.stats_dirty = not cleared
+        return bool(cleared)
+
+    @classmethod
+    def refresh_dirty_statistics(cls, limit=None, keys=None):
+        """
+        Recompute statistics for dirty rows only.
+
+        Parameters:
+        -----------
+        limit : int, optional
+            Maximum number of rows to recompute in this pass
+        keys : iterable, optional
+            Only consider rows with these STATISTICS_KEY values
+
+        Returns:
+        --------
+        int : Number of rows recomputed
+        """
+        queryset = cls.objects.filter(stats_dirty=True).order_by('pk')
+        if keys is not None:
+            queryset = queryset.filter(**{f'{cls.STATISTICS_KEY}__in': {key for key in keys if key is not None}})
+        if limit:
+            queryset = queryset[:limit]
+
+        updated_count = 0
+        for obj in queryset.iterator():
+            try:
+                getattr(obj, cls.STATISTICS_METHOD)()
+                updated_count += 1
+            except Exception as e:
+                print(f"  ❌ Failed to update statistics for {obj}: {e}")
+        return updated_count
+
+class Night(StatisticsTrackedModel):
     """
     Represents an observing night based on data directories.
     
@@ -59,6 +165,9 @@ class Night(models.Model):
     morning_twilight_start = models.DateTimeField(null=True, blank=True)
     evening_astronomical_twilight = models.DateTimeField(null=True, blank=True)
     morning_astronomical_twilight = models.DateTimeField(null=True, blank=True)
+    # Sun at -6° (civil); the twilight_end/start pair above is -12° (nautical), the astronomical pair -18°
+    evening_civil_twilight = models.DateTimeField(null=True, blank=True)
+    morning_civil_twilight = models.DateTimeField(null=True, blank=True)
 
     # Moon information
     moon_phase = models.FloatField(null=True, blank=True, help_text="Moon phase (0=new, 0.25=first quarter, 0.5=full, 0.75=last quarter)")
@@ -141,13 +250,10 @@ class Night(models.Model):
     @property 
     def data_volume_gb(self):
         """Total data volume in GB for this night."""
-        total_bytes = 0
-        for frame_class in [ScienceFrame, BiasFrame, DarkFrame, FlatFrame]:
-            result = frame_class.objects.filter(night=self).aggregate(
-                total_size=Sum('file_size')
-            )
-            if result['total_size']:
-                total_bytes += result['total_size']
+        result = FrameIndex.objects.filter(night=self).aggregate(
+            total_size=Sum('file_size')
+        )
+        total_bytes = result['total_size'] or 0
         
         return total_bytes / (1024**3)  # Convert to GB
 
@@ -209,12 +315,28 @@ class Night(models.Model):
             
         return units
     
+    def science_frames(self):
+        """
+        Science frames of this night, bounded by obstime.
+        
+        The obstime bounds come from the narrow FrameIndex table and let
+        PostgreSQL prune ScienceFrame partitions when the table is partitioned
+        by obstime (see the partition_frames command).
+        """
+        frames = ScienceFrame.objects.filter(night=self)
+        bounds = FrameIndex.objects.filter(night=self, frame_type='SCIENCE').aggregate(
+            first=Min('obstime'), last=Max('obstime')
+        )
+        if bounds['first'] and bounds['last']:
+            frames = frames.filter(obstime__gte=bounds['first'], obstime__lte=bounds['last'])
+        return frames
+
     @property
     def tiles_observed(self):
         """Get list of tiles observed on this night with exposure counts"""
         
-        return ScienceFrame.objects.filter(
-            night=self, tile__isnull=False
+        return self.science_frames().filter(
+            tile__isnull=False
         ).values('tile__name').annotate(
             frame_count=Count('id')
         ).order_by('tile__name')
@@ -231,42 +353,16 @@ class Night(models.Model):
         except cls.DoesNotExist:
             pass
         
-        # Try to find actual directory structure for this date
-        base_path = "/lyman/data1/obsdata"
+        # Find the date folders across all units from the shared layout index
+        base_path = ArchiveFolder.BASE_PATH
         date_str = date.strftime('%Y-%m-%d')
+        entries = ArchiveLayout.shared(base_path).folders(date)
+        found_directories = [entry.path for entry in entries]
+        preferred = ArchiveLayout.preferred(entries)
         
-        # Look for directories with this date across all units
-        found_directories = []
-        preferred_directory = None
-        
-        if os.path.exists(base_path):
-            # Check all unit directories
-            for item in os.listdir(base_path):
-                unit_path = os.path.join(base_path, item)
-                if os.path.isdir(unit_path) and item.startswith('7DT'):
-                    # Look for date directories in this unit
-                    try:
-                        for subitem in os.listdir(unit_path):
-                            if subitem.startswith(date_str):
-                                full_path = os.path.join(unit_path, subitem)
-                                if os.path.isdir(full_path):
-                                    found_directories.append(full_path)
-                                    
-                                    # Prefer gain2750 directories
-                                    if '_gain2750' in subitem:
-                                        preferred_directory = full_path
-                                    elif preferred_directory is None and '_gain' in subitem:
-                                        preferred_directory = full_path
-                                    elif preferred_directory is None:
-                                        preferred_directory = full_path
-                    except OSError:
-                        continue
-        
-        # Set default directory
-        if preferred_directory:
-            data_directory = preferred_directory
-        elif found_directories:
-            data_directory = found_directories[0]
+        # Set default directory (gain2750 preferred)
+        if preferred:
+            data_directory = preferred.path
         else:
             # Fallback to expected path structure
             data_directory = f"{base_path}/{date_str}"
@@ -308,10 +404,8 @@ class Night(models.Model):
         updated_count = 0
         skipped_count = 0
         test_excluded_count = 0  # Track excluded TEST directories
-    
-        # Regex to extract date and any suffix
-        date_pattern = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:_(.+))?$')
-        gain_pattern = re.compile(r'gain(\d+)')
+        too_old_count = 0
+        future_count = 0
 
         # Date filtering
         start_date = datetime.date(2023, 10, 9)
@@ -330,12 +424,9 @@ class Night(models.Model):
                 cutoff_date = latest_night.date
                 print(f"Incremental scan: Looking for directories after {cutoff_date}")
     
-        # Get all unit directories sorted by name
-        unit_dirs = []
-        for item in sorted(os.listdir(base_path)):
-            unit_path = os.path.join(base_path, item)
-            if os.path.isdir(unit_path) and item.startswith('7DT'):
-                unit_dirs.append((item, unit_path))
+        # Date folders of every unit from the shared layout index
+        layout = ArchiveLayout.shared(base_path)
+        unit_dirs = layout.units()
     
         if not unit_dirs:
             print("No unit directories found")
@@ -347,152 +438,115 @@ class Night(models.Model):
                 'dates_found': 0
             }
     
-        print(f"Found {len(unit_dirs)} unit directories: {[name for name, _ in unit_dirs]}")
+        print(f"Found {len(unit_dirs)} unit directories: {unit_dirs}")
     
         # Dictionary to collect all directories by date
         all_directories = {}
     
-        # Scan each unit directory
-        for unit_name, unit_dir in unit_dirs:
-            print(f"Scanning unit {unit_name}...")
-        
-            try:
-                unit_items = sorted(os.listdir(unit_dir))
-            except OSError as e:
-                print(f"Error reading {unit_dir}: {e}")
-                continue
-            
-            for item in unit_items:
-                item_path = os.path.join(unit_dir, item)
-                if not os.path.isdir(item_path):
-                    continue
-         
+        # Scan each unit's date folders
+        for unit_name in unit_dirs:
+            for date_obj, entry in layout.items(unit_name):
+                item = entry.folder
+                
                 # Skip TEST directories if exclude_test is True
                 if exclude_test and ('TEST' in item.upper() or 'test' in item):
                     test_excluded_count += 1
-                    print(f"  Skipping TEST directory: {item}")
-                    continue
-       
-                # Extract date and suffix from directory name
-                match = date_pattern.match(item)
-                if not match:
-                    continue
-            
-                date_str = match.group(1)
-                suffix = match.group(2) or ""
-
-                # Additional TEST check in suffix
-                if exclude_test and ('TEST' in suffix.upper() or 'test' in suffix):
-                    test_excluded_count += 1
-                    print(f"  Skipping TEST suffix: {item}")
                     continue
-            
-                # Skip obviously invalid dates
-                if '-00-' in date_str:
+                
+                if date_obj < start_date:
+                    too_old_count += 1
+                    skipped_count += 1
                     continue
                 
-                try:
-                    date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-
-                    if date_obj < start_date:
-                        print(f"  Skipping too old: {date_obj} (before {start_date})")
-                        skipped_count += 1
-                        continue
-                    
-                    if date_obj > today:
-                        print(f"  Skipping future date: {date_obj} (after {today})")
-                        skipped_count += 1
-                        continue
+                if date_obj > today:
+                    future_count += 1
+                    skipped_count += 1
+                    continue
                 
-                    # Skip dates before cutoff for incremental scan
-                    if cutoff_date and date_obj <= cutoff_date:
-                        skipped_count += 1
-                        continue
+                # Skip dates before cutoff for incremental scan
+                if cutoff_date and date_obj <= cutoff_date:
+                    skipped_count += 1
+                    continue
                 
-                    # Initialize tracking for this date if needed
-                    if date_obj not in all_directories:
-                        all_directories[date_obj] = {
-                            'variants': {},
-                            'preferred': None,
-                            'units': set()
-                        }
+                # Initialize tracking for this date if needed
+                if date_obj not in all_directories:
+                    all_directories[date_obj] = {
+                        'variants': {},
+                        'preferred': None,
+                        'units': set()
+                    }
                 
-                    # Create variant key
-                    variant_key = f"{unit_name}_{suffix}" if unit_name and suffix else unit_name or suffix or "default"
+                # Create variant key
+                suffix = entry.suffix
+                variant_key = f"{unit_name}_{suffix}" if suffix else unit_name
                 
-                    # Store directory information
-                    all_directories[date_obj]['variants'][variant_key] = {
-                        'path': item_path,
-                        'unit': unit_name,
-                        'suffix': suffix,
-                        'is_gain': 'gain' in suffix,
-                        'gain_value': int(gain_pattern.search(suffix).group(1)) if gain_pattern.search(suffix) else None
-                    }
+                # Store directory information
+                all_directories[date_obj]['variants'][variant_key] = {
+                    'path': entry.path,
+                    'unit': unit_name,
+                    'suffix': suffix,
+                    'is_gain': entry.gain is not None,
+                    'gain_value': entry.gain
+                }
                 
-                    # Track units for this date
-                    all_directories[date_obj]['units'].add(unit_name)
+                # Track units for this date
+                all_directories[date_obj]['units'].add(unit_name)
                 
-                    # Determine preferred directory (prioritize gain2750)
-                    current_var = all_directories[date_obj]['variants'][variant_key]
-                    if all_directories[date_obj]['preferred'] is None:
-                        all_directories[date_obj]['preferred'] = variant_key
-                    elif current_var['is_gain'] and current_var['gain_value'] == 2750:
-                        all_directories[date_obj]['preferred'] = variant_key
-                    
-                except ValueError:
-                    continue
+                # Determine preferred directory (prioritize gain2750)
+                if all_directories[date_obj]['preferred'] is None or entry.gain == 2750:
+                    all_directories[date_obj]['preferred'] = variant_key
     
         # Process collected directories in chronological order
         sorted_dates = sorted(all_directories.keys())
-        print(f"Processing {len(sorted_dates)} unique dates...")
 
         # Apply limit if specified
         if limit:
             sorted_dates = sorted_dates[:limit]
-            print(f"Processing first {len(sorted_dates)} dates (limited by --limit {limit})...")
+            print(f"Processing first {len(sorted_dates)} of {len(all_directories)} dates (limited by --limit {limit})...")
         else:
             print(f"Processing {len(sorted_dates)} unique dates...")
     
+        # Build every night in memory, then upsert them in one statement per batch
+        nights = []
         for date_obj in sorted_dates:
             date_info = all_directories[date_obj]
-        
-            # Get or create night
-            night, is_new = cls.objects.get_or_create(date=date_obj)
-        
-            if is_new:
-                created_count += 1
-                print(f"Created Night: {date_obj}")
-            else:
-                updated_count += 1
-                print(f"Updated Night: {date_obj}")
-        
-            # Build data directories list
-            all_paths = [info['path'] for info in date_info['variants'].values()]
-        
-            # Set preferred directory as main data_directory
             preferred_key = date_info['preferred']
             if preferred_key:
-                preferred_path = date_info['variants'][preferred_key]['path']
-                night.data_directory = preferred_path
+                data_directory = date_info['variants'][preferred_key]['path']
             else:
-                night.data_directory = os.path.join(base_path, date_obj.strftime("%Y-%m-%d"))
-        
-            # Update data directories list
-            night.data_directories = all_paths
-        
-            # Store variant information
-            night.directory_variants = {
-                'variants': {key: {
-                    'path': info['path'],
-                    'unit': info['unit'],
-                    'suffix': info['suffix']
-                } for key, info in date_info['variants'].items()},
-                'preferred': preferred_key,
-                'units': list(date_info['units'])
-            }
-        
-            night.save()
+                data_directory = os.path.join(base_path, date_obj.strftime("%Y-%m-%d"))
+        
+            nights.append(cls(
+                date=date_obj,
+                data_directory=data_directory,
+                data_directories=[info['path'] for info in date_info['variants'].values()],
+                directory_variants={
+                    'variants': {key: {
+                        'path': info['path'],
+                        'unit': info['unit'],
+                        'suffix': info['suffix']
+                    } for key, info in date_info['variants'].items()},
+                    'preferred': preferred_key,
+                    'units': sorted(date_info['units'])
+                },
+            ))
+    
+        with transaction.atomic():
+            existing_count = cls.objects.filter(date__in=sorted_dates).count() if sorted_dates else 0
+            cls.objects.bulk_create(
+                nights,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['date'],
+                update_fields=['data_directory', 'data_directories', 'directory_variants', 'updated_at'],
+            )
+        created_count = len(nights) - existing_count
+        updated_count = existing_count
 
+        print(f"Nights: {created_count} created, {updated_count} updated"
+              + (f" ({sorted_dates[0]} to {sorted_dates[-1]})" if sorted_dates else ""))
+        print(f"Directories skipped: {too_old_count} before {start_date}, {future_count} after {today}, "
+              f"{skipped_count - too_old_count - future_count} at or before the incremental cutoff")
         print(f"Excluded {test_excluded_count} TEST directories")   
  
         return {
@@ -558,6 +612,9 @@ class Night(models.Model):
             recent_nights = cls.objects.filter(date__gte=latest_date - datetime.timedelta(days=result['created']))
             for night in recent_nights:
                 night.update_statistics()
+            
+            # Sun, twilight and moon data for the new nights
+            cls.update_ephemerides(missing_only=True)
     
         return result
 
@@ -636,38 +693,38 @@ class Night(models.Model):
         print(f"✅ Valid suffixes: {', '.join(valid_suffixes)}")
         print("=" * 80)
         
-        # Discover telescope unit directories (7DT01, 7DT02, etc.)
-        unit_dirs = []
+        # Bring the archive inventory up to date (lists only changed directories)
         try:
-            for item in sorted(os.listdir(base_path)):
-                unit_path = os.path.join(base_path, item)
-                if os.path.isdir(unit_path) and item.startswith('7DT'):
-                    unit_dirs.append((item, unit_path))
-        except OSError as e:
+            ArchiveFolder.refresh_inventory(base_path)
+        except ValueError as e:
             print(f"❌ Error accessing base directory {base_path}: {e}")
             return results
         
+        # Discover telescope unit directories (7DT01, 7DT02, etc.)
+        folders = ArchiveFolder.objects.filter(
+            path__startswith=f"{base_path.rstrip('/')}/", depth__lte=1
+        ).order_by('unit_name', 'depth', 'name')
+        unit_items_by_name = {}
+        for folder in folders:
+            unit_items = unit_items_by_name.setdefault(folder.unit_name, [])
+            if folder.depth == 1:
+                unit_items.append(folder)
+        unit_dirs = sorted(unit_items_by_name)
+        
         if not unit_dirs:
             print("❌ No telescope unit directories found (expected 7DT01, 7DT02, etc.)")
             return results
         
-        print(f"🔭 Found {len(unit_dirs)} telescope unit directories: {[name for name, _ in unit_dirs]}")
+        print(f"🔭 Found {len(unit_dirs)} telescope unit directories: {unit_dirs}")
         
         # Analyze each telescope unit directory
-        for unit_name, unit_dir in unit_dirs:
+        for unit_name in unit_dirs:
             print(f"\n📂 Analyzing unit: {unit_name}")
             
-            try:
-                unit_items = sorted(os.listdir(unit_dir))
-            except OSError as e:
-                print(f"  ❌ Error reading directory {unit_dir}: {e}")
-                continue
-            
             # Examine each subdirectory (expected to be observation dates)
-            for item in unit_items:
-                item_path = os.path.join(unit_dir, item)
-                if not os.path.isdir(item_path):
-                    continue  # Skip non-directory items
+            for folder in unit_items_by_name[unit_name]:
+                item = folder.name
+                item_path = folder.path
                 
                 results['statistics']['total_folders'] += 1
                 folder_info = {
@@ -844,88 +901,213 @@ class Night(models.Model):
             return [self.data_directory]
         return self.data_directories
         
-    def find_files_by_unit(self, unit_name):
-        """Find all FITS files for a specific unit on this night"""
-        all_files = []
-        
-        base_path = f"/lyman/data1/obsdata/{unit_name}"
-        if not os.path.exists(base_path):
-            return all_files
-            
-        # Look for directories containing this night's date
-        date_str = self.date.strftime('%Y-%m-%d')
+    def find_files_by_unit(self, unit_name, refresh=True):
+        """
+        Find all FITS files for a specific unit on this night.
         
-        for item in os.listdir(base_path):
-            if not item.startswith(date_str):
-                continue
-                
-            # This directory matches our night
-            dir_path = os.path.join(base_path, item)
-            if os.path.isdir(dir_path):
-                # Scan for FITS files
-                for root, _, files in os.walk(dir_path):
-                    for file in files:
-                        if file.endswith('.fits') or file.endswith('.fits.fz'):
-                            all_files.append(os.path.join(root, file))
-                            
-        return all_files
-    
+        Read from the archive inventory (refreshed for this unit first unless
+        refresh=False), including files in folders nested below the date folders.
+        Units without a folder for this date (per the shared layout index)
+        return at once.
+        """
+        if refresh:
+            if not ArchiveLayout.shared().folders(self.date, unit_name):
+                return []
+            try:
+                ArchiveFolder.refresh_inventory(units=[unit_name])
+            except ValueError:
+                return []
+        return ArchiveFile.paths(date=self.date, unit_name=unit_name, recursive=True)
+    
+    # Observatory location (Cerro Tololo) used for ephemerides
+    OBSERVATORY_LON = -70.7040
+    OBSERVATORY_LAT = -30.1691
+    OBSERVATORY_HEIGHT = 2200
+
+    # Sun altitudes (degrees) of the evening/morning crossings and the fields they fill
+    SUN_ALTITUDE_EVENTS = (
+        (-0.833, 'sunset', 'sunrise'),
+        (-6.0, 'evening_civil_twilight', 'morning_civil_twilight'),
+        (-12.0, 'evening_twilight_end', 'morning_twilight_start'),
+        (-18.0, 'evening_astronomical_twilight', 'morning_astronomical_twilight'),
+    )
+    EPHEMERIS_FIELDS = tuple(field for _, evening, morning in SUN_ALTITUDE_EVENTS for field in (evening, morning)) + (
+        'moon_phase', 'moon_illumination', 'moon_alt_max', 'moon_ra', 'moon_dec',
+    )
+
+    @classmethod
+    def observatory_location(cls):
+        """EarthLocation of the observatory."""
+        return EarthLocation(lon=cls.OBSERVATORY_LON * u.deg, lat=cls.OBSERVATORY_LAT * u.deg,
+                             height=cls.OBSERVATORY_HEIGHT * u.m)
+
+    @classmethod
+    def compute_ephemerides(cls, dates, step_minutes=5):
+        """
+        Sun and moon ephemerides of many nights in one vectorized pass.
+
+        Every night spans local noon on its date to local noon the next day.
+        Apparent (topocentric, true-equinox) sun and moon positions come from
+        one get_body call per body over an hourly (nights x 25) astropy Time
+        grid; they are interpolated onto a step_minutes grid, where altitudes
+        follow from the local sidereal time in plain numpy. Each twilight is
+        the crossing of its sun-altitude threshold, found by linear
+        interpolation between the bracketing samples. Moon phase,
+        illumination, RA and Dec are taken at local midnight; the maximum
+        moon altitude is over the samples with the sun below the horizon.
+
+        Parameters:
+        -----------
+        dates : iterable of datetime.date
+            Night dates (the local date at the start of the night)
+        step_minutes : float
+            Spacing of the altitude grid
+
+        Returns:
+        --------
+        dict : {date: {field: value}} for the fields in EPHEMERIS_FIELDS
+               (None where an event does not occur)
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return {}
+
+        location = cls.observatory_location()
+        nights = len(dates)
+
+        # Local mean noon of each date (JD, UTC) and the hourly position grid
+        noon = Time([f"{date}T12:00:00" for date in dates], scale='utc').jd - cls.OBSERVATORY_LON / 360.0
+        hours = np.arange(25) / 24.0
+        coarse = Time((noon[:, None] + hours[None, :]).ravel(), format='jd', scale='utc')
+        apparent = TETE(obstime=coarse, location=location)
+        sun = get_body('sun', coarse, location)
+        moon = get_body('moon', coarse, location)
+        sun_apparent = sun.transform_to(apparent)
+        moon_apparent = moon.transform_to(apparent)
+
+        # Fine grid: interpolate RA (unwrapped) and Dec, altitude from the hour angle
+        samples = int(round(24 * 60 / step_minutes)) + 1
+        step = 1.0 / (samples - 1)
+        offsets = np.arange(samples) * step
+        position = np.minimum(offsets * 24, 23.999999)
+        lower = position.astype(int)
+        weight = position - lower
+        lst = (Time(noon, format='jd', scale='utc').sidereal_time('apparent', longitude=location.lon).deg[:, None]
+               + 360.98564736629 * offsets[None, :])
+        latitude = np.radians(cls.OBSERVATORY_LAT)
+
+        def altitudes(coord):
+            ra = np.unwrap(coord.ra.deg.reshape(nights, 25), period=360.0, axis=1)
+            dec = coord.dec.deg.reshape(nights, 25)
+            ra = ra[:, lower] * (1 - weight) + ra[:, lower + 1] * weight
+            dec = np.radians(dec[:, lower] * (1 - weight) + dec[:, lower + 1] * weight)
+            hour_angle = np.radians(lst - ra)
+            return np.degrees(np.arcsin(
+                np.sin(latitude) * np.sin(dec) + np.cos(latitude) * np.cos(dec) * np.cos(hour_angle)
+            ))
+
+        sun_alt = altitudes(sun_apparent)
+        moon_alt = altitudes(moon_apparent)
+        rows = np.arange(nights)
+
+        def crossings(altitude, descending):
+            # First sample pair bracketing the threshold in each row (NaN if none)
+            above = sun_alt > altitude
+            bracket = (above[:, :-1] & ~above[:, 1:]) if descending else (~above[:, :-1] & above[:, 1:])
+            index = bracket.argmax(axis=1)
+            before, after = sun_alt[rows, index], sun_alt[rows, index + 1]
+            jd = noon + (index + (before - altitude) / (before - after)) * step
+            return np.where(bracket.any(axis=1), jd, np.nan)
+
+        events = {}
+        for altitude, evening_field, morning_field in cls.SUN_ALTITUDE_EVENTS:
+            events[evening_field] = crossings(altitude, descending=True)
+            events[morning_field] = crossings(altitude, descending=False)
+
+        # Moon at local midnight (hour 12 of the grid); waxing while east of the sun
+        sun_ra = np.radians(sun_apparent.ra.deg.reshape(nights, 25)[:, 12])
+        sun_dec = np.radians(sun_apparent.dec.deg.reshape(nights, 25)[:, 12])
+        moon_ra = np.radians(moon_apparent.ra.deg.reshape(nights, 25)[:, 12])
+        moon_dec = np.radians(moon_apparent.dec.deg.reshape(nights, 25)[:, 12])
+        elongation = np.arccos(np.clip(
+            np.sin(sun_dec) * np.sin(moon_dec) + np.cos(sun_dec) * np.cos(moon_dec) * np.cos(moon_ra - sun_ra),
+            -1.0, 1.0
+        ))
+        waxing = np.mod(moon_ra - sun_ra, 2 * np.pi) < np.pi
+        moon_phase = np.where(waxing, elongation, 2 * np.pi - elongation) / (2 * np.pi)
+        moon_illumination = 100 * (1 - np.cos(elongation)) / 2
+        dark_moon_alt = np.where(sun_alt < -0.833, moon_alt, -np.inf).max(axis=1)
+        moon_midnight = moon.reshape(nights, 25)[:, 12]
+
+        def to_datetimes(jd):
+            result = [None] * len(jd)
+            valid = np.flatnonzero(np.isfinite(jd))
+            if len(valid):
+                converted = Time(jd[valid], format='jd', scale='utc').to_datetime(timezone=datetime.timezone.utc)
+                for row, value in zip(valid, converted):
+                    result[row] = value
+            return result
+
+        columns = {field: to_datetimes(jd) for field, jd in events.items()}
+        results = {}
+        for i, date in enumerate(dates):
+            values = {field: column[i] for field, column in columns.items()}
+            values.update({
+                'moon_phase': float(moon_phase[i]),
+                'moon_illumination': float(moon_illumination[i]),
+                'moon_alt_max': float(dark_moon_alt[i]) if np.isfinite(dark_moon_alt[i]) else None,
+                'moon_ra': float(moon_midnight.ra.deg[i]),
+                'moon_dec': float(moon_midnight.dec.deg[i]),
+            })
+            results[date] = values
+        return results
+
+    @classmethod
+    def update_ephemerides(cls, start_date=None, end_date=None, missing_only=False, step_minutes=5):
+        """
+        Compute and store the ephemerides of all nights in a date range.
+
+        One compute_ephemerides() pass over every selected night, then one
+        bulk_update of the sun/twilight and moon fields.
+
+        Parameters:
+        -----------
+        start_date, end_date : datetime.date, optional
+            Inclusive date range (default: all nights)
+        missing_only : bool
+            Only nights without a sunset yet
+        step_minutes : float
+            Spacing of the altitude grid used for the twilight crossings
+
+        Returns:
+        --------
+        dict : nights updated and elapsed seconds
+        """
+        start_time = time.time()
+        nights = cls.objects.all()
+        if start_date:
+            nights = nights.filter(date__gte=start_date)
+        if end_date:
+            nights = nights.filter(date__lte=end_date)
+        if missing_only:
+            nights = nights.filter(sunset__isnull=True)
+        nights = list(nights.only('id', 'date', *cls.EPHEMERIS_FIELDS))
+
+        ephemerides = cls.compute_ephemerides([night.date for night in nights], step_minutes=step_minutes)
+        for night in nights:
+            for field, value in ephemerides[night.date].items():
+                setattr(night, field, value)
+        with transaction.atomic():
+            cls.objects.bulk_update(nights, list(cls.EPHEMERIS_FIELDS), batch_size=500)
+
+        return {'nights': len(nights), 'elapsed': time.time() - start_time}
+
     def update_celestial_bodies(self):
-        """Update sun and moon information for this night"""
+        """Update sun, twilight and moon information for this night"""
         try:
-            # Observatory location (Cerro Tololo)
-            location = EarthLocation(
-                lon=-70.7040*u.deg, 
-                lat=-30.1691*u.deg,
-                height=2200*u.m
-            )
-            
-            # Calculate for midnight local time
-            midnight = Time(f"{self.date}T00:00:00") + 0.5  # Add 0.5 day to get to midnight
-            
-            # Get moon position at midnight
-            moon = get_body('moon', midnight, location)
-            sun = get_body('sun', midnight, location)
-            
-            # Calculate moon phase and illumination
-            elongation = sun.separation(moon).rad
-            self.moon_phase = (1 - np.cos(elongation)) / 2
-            self.moon_illumination = 100 * (1 + np.cos(np.pi - elongation)) / 2
-            
-            # Get moon distance
-            self.moon_distance = moon.distance.to(u.km).value
-            
-            # Get moon position in equatorial coordinates
-            self.moon_ra = moon.ra.deg
-            self.moon_dec = moon.dec.deg
-            
-            # Calculate positions throughout the night for max/min altitudes
-            night_start = midnight - 0.25  # 6pm
-            night_end = midnight + 0.25    # 6am
-            times = Time(np.linspace(night_start.jd, night_end.jd, 24))
-            
-            # Get altitudes throughout night
-            altaz_frame = AltAz(obstime=times, location=location)
-            moon_altaz = moon.transform_to(altaz_frame)
-            sun_altaz = sun.transform_to(altaz_frame)
-            
-            self.moon_alt_max = np.max(moon_altaz.alt.deg)
-            self.sun_min_altitude = np.min(sun_altaz.alt.deg)
-            
-            # Calculate sun positions at sunrise/sunset if available
-            if self.sunset and self.sunrise:
-                sunset_time = Time(self.sunset)
-                sunrise_time = Time(self.sunrise)
-                
-                sun_at_set = get_body('sun', sunset_time, location)
-                sun_at_rise = get_body('sun', sunrise_time, location)
-                
-                self.sun_ra_set = sun_at_set.ra.deg
-                self.sun_dec_set = sun_at_set.dec.deg
-                self.sun_ra_rise = sun_at_rise.ra.deg
-                self.sun_dec_rise = sun_at_rise.dec.deg
-            
-            self.save()
+            for field, value in self.compute_ephemerides([self.date])[self.date].items():
+                setattr(self, field, value)
+            self.save(update_fields=list(self.EPHEMERIS_FIELDS) + ['updated_at'])
             return True
             
         except Exception as e:
@@ -1017,9 +1199,10 @@ class Night(models.Model):
         This method recalculates all night statistics from the actual frame data,
         ensuring consistency between cached values and database reality.
         """
+        start_version = self._current_statistics_version()
         
-        # Get all frames for this night
-        science_frames = self.scienceframe_set.all()
+        # Get all frames for this night (obstime-bounded for partition pruning)
+        science_frames = self.science_frames()
         bias_frames = self.biasframe_set.all()
         dark_frames = self.darkframe_set.all()
         flat_frames = self.flatframe_set.all()
@@ -1139,25 +1322,34 @@ class Night(models.Model):
             'sky_quality', 'avg_seeing', 'files_scanned', 'scan_status',
             'scan_completed_at'
         ])
+        self._clear_statistics_dirty(start_version)
 
     @classmethod
-    def update_all_statistics(cls):
+    def update_all_statistics(cls, dirty_only=False):
         """
         Update statistics for all nights in the database.
         
         This is useful for bulk updates after data imports or corrections.
         
+        Parameters:
+        -----------
+        dirty_only : bool
+            Only recompute nights whose statistics are marked dirty
+        
         Returns:
         --------
         int : Number of nights updated
         """
         updated_count = 0
-        total_nights = cls.objects.count()
+        nights = cls.objects.all()
+        if dirty_only:
+            nights = nights.filter(stats_dirty=True)
+        total_nights = nights.count()
         
         print(f"📊 Updating statistics for {total_nights:,} nights...")
         start_time = timezone.now()
         
-        for i, night in enumerate(cls.objects.all().order_by('date'), 1):
+        for i, night in enumerate(nights.order_by('date'), 1):
             try:
                 night.update_statistics()
                 updated_count += 1
@@ -1348,16 +1540,14 @@ class Night(models.Model):
         """
         Check if statistics are current with actual frame data.
         
+        Uses the stats_dirty marker set by the ingest, purge and re-parse
+        paths, so no frame tables are queried.
+        
         Returns:
         --------
-        bool : True if statistics match actual data, False otherwise
+        bool : True if no frames changed since the last recompute
         """
-        return (
-            self.science_count == self.actual_science_count and
-            self.bias_count == self.actual_bias_count and
-            self.dark_count == self.actual_dark_count and
-            self.flat_count == self.actual_flat_count
-        )
+        return not self.stats_dirty
 
     @property
     def needs_statistics_update(self):
@@ -1380,10 +1570,10 @@ class Night(models.Model):
         if total_frames == 0 and self.files_scanned:
             return True
         
-        return
+        return False
 
 
-class Tile(models.Model):
+class Tile(StatisticsTrackedModel):
     """
     Pre-defined 7DS survey tile information.
 
@@ -1430,6 +1620,8 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
         ]
         # Note: Q3C indexes are created in migration files using RunSQL
 
+    STATISTICS_METHOD = 'update_observation_statistics'
+
     def save(self, *args, **kwargs):
         self.name = f"T{str(self.id).zfill(5)}"
 
@@ -1452,28 +1644,192 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
     def contains_point(self, ra, dec):
         """
         Check if a celestial point falls within this tile.
-        Handles RA wrap-around and pole proximity cases.
+
+        Uses the spherical (great-circle edge) test, which needs no special
+        handling for RA wrap-around or the poles. For many points use
+        Tile.locate() instead.
+        """
+        vertices = self.vertex_coords
+        return bool(points_in_polygon(
+            ra, dec, [v[0] for v in vertices], [v[1] for v in vertices], self.ra, self.dec
+        )[0])
+
+    # Per-process cache of the vectorized footprint index (see polygon_index)
+    _polygon_index = None
+
+    @classmethod
+    def polygon_index(cls, refresh=False):
+        """
+        Return the SphericalPolygonIndex of all tile footprints.
+
+        Built once per process from the Tile table and reused by locate().
+
+        Parameters:
+        -----------
+        refresh : bool
+            Rebuild from the database (e.g. after load_tiles)
+        """
+        if cls._polygon_index is None or refresh:
+            ids, centers, polygons = [], [], []
+            for tile_id, ra, dec, vertices in cls.objects.values_list('id', 'ra', 'dec', 'vertices').iterator():
+                ids.append(tile_id)
+                centers.append((ra, dec))
+                polygons.append(vertices[0].coords)
+            cls._polygon_index = SphericalPolygonIndex.from_polygons(ids, centers, polygons)
+        return cls._polygon_index
+
+    # Memory-mapped lookup grid and the meta.json mtime it was opened at
+    _lookup_grid = None
+    _lookup_grid_mtime = None
+
+    @staticmethod
+    def lookup_grid_dir():
+        """Directory holding the shared tile lookup grid (.npy files)."""
+        cache_dir = getattr(settings, 'SURVEY_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache'))
+        return os.path.join(cache_dir, 'tile_lookup')
+
+    @classmethod
+    def lookup_grid(cls):
+        """
+        Return the memory-mapped SkyLookupGrid, or None if it was never built.
+
+        The files are re-opened when build_lookup_grid() has replaced them
+        (checked via the meta.json modification time).
+        """
+        meta_path = os.path.join(cls.lookup_grid_dir(), SkyLookupGrid.META_FILE)
+        try:
+            mtime = os.path.getmtime(meta_path)
+        except OSError:
+            cls._lookup_grid = None
+            return None
+
+        if cls._lookup_grid is None or mtime != cls._lookup_grid_mtime:
+            cls._lookup_grid = SkyLookupGrid.load(cls.lookup_grid_dir())
+            cls._lookup_grid_mtime = mtime
+        return cls._lookup_grid
+
+    @classmethod
+    def build_lookup_grid(cls, resolution=0.5):
+        """
+        Rebuild the shared tile lookup grid from the Tile table.
+
+        Parameters:
+        -----------
+        resolution : float
+            Grid cell size in degrees
+
+        Returns:
+        --------
+        dict : Grid metadata (shape, footprint count, build time)
+        """
+        grid = SkyLookupGrid.build(cls.polygon_index(refresh=True), resolution=resolution)
+        meta = grid.save(cls.lookup_grid_dir(), tile_count=len(grid.index))
+        cls._lookup_grid = None
+        return meta
+
+    @classmethod
+    def locate(cls, ra, dec):
+        """
+        Find the tile covering each position (vectorized).
+
+        Uses the memory-mapped lookup grid when it exists, otherwise the
+        in-process polygon index.
+
+        Parameters:
+        -----------
+        ra, dec : array_like
+            Positions in degrees
+
+        Returns:
+        --------
+        np.ndarray : Tile ids, -1 where no tile covers the position
+        """
+        grid = cls.lookup_grid()
+        if grid is not None:
+            return grid.locate(ra, dec)
+        return cls.polygon_index().locate(ra, dec)
+
+    # Pixel -> tile memberships already opened in this process, by nside
+    _skymap_memberships = {}
+
+    @classmethod
+    def _tiling_tag(cls):
+        """Identifies the current tiling, used to invalidate skymap caches."""
+        grid = cls.lookup_grid()
+        if grid is not None:
+            return f"grid-{grid.meta.get('built_at')}"
+        stats = cls.objects.aggregate(count=Count('id'), max_id=Max('id'))
+        return f"db-{stats['count']}-{stats['max_id']}"
+
+    @classmethod
+    def skymap_membership(cls, nside=skymap.DEFAULT_NSIDE, refresh=False, build=True):
+        """
+        HEALPix pixel -> tile assignment for one nside (cached on disk).
+
+        Built once per nside and tiling (a few seconds) with Tile.locate,
+        then memory-mapped from SURVEY_CACHE_DIR/skymap/nside<N>/.
+
+        Parameters:
+        -----------
+        nside : int
+            HEALPix resolution (power of two)
+        refresh : bool
+            Rebuild even if a valid cache exists
+        build : bool
+            Build a missing or outdated cache; with False, return None instead
+            (web requests never build, see the skymap_tiles command)
+
+        Returns:
+        --------
+        TilePixelMembership or None
         """
-        # Normalize input coordinates
-        ra = ra % 360.0
-        dec = max(-90.0, min(90.0, dec))
+        cache_dir = os.path.dirname(cls.lookup_grid_dir())
+        tag = cls._tiling_tag()
+
+        membership = None if refresh else cls._skymap_memberships.get((nside, tag))
+        if membership is None and not refresh:
+            membership = skymap.TilePixelMembership.load(cache_dir, nside, tag)
+        if membership is None:
+            if not build:
+                return None
+            membership = skymap.TilePixelMembership.build(nside, cls.locate)
+            membership.save(cache_dir, tag)
 
-        # For points near poles, special handling might be needed
-        if abs(dec) > 88.0:
-            # Near poles, just check declination range
-            vertices = self.vertex_coords
-            dec_min = min(v[1] for v in vertices)
-            dec_max = max(v[1] for v in vertices)
-            return dec_min <= dec <= dec_max
+        cls._skymap_memberships = {(nside, tag): membership}
+        return membership
+
+    @classmethod
+    def rank_by_skymap(cls, skymap_file, nside=skymap.DEFAULT_NSIDE, levels=skymap.CREDIBLE_LEVELS,
+                       build_membership=True):
+        """
+        Rank all tiles by the probability they enclose in a HEALPix skymap.
 
-        # Handle RA wrap-around
-        point = Point(ra, dec)
-        if self.crosses_meridian():
-            # Split the polygon at the meridian and check both parts
-            west_poly, east_poly = self.split_at_meridian()
-            return west_poly.contains(point) or east_poly.contains(point)
+        Parameters:
+        -----------
+        skymap_file : str or file-like
+            Flat or multi-order FITS skymap
+        nside : int
+            Resolution the skymap is resampled to
+        levels : tuple of float
+            Credible levels to report (default 50% and 90%)
+        build_membership : bool
+            Build the pixel -> tile cache when missing; with False a missing
+            cache raises ValueError
 
-        return self.vertices.contains(point)
+        Returns:
+        --------
+        dict : See skymap.rank_tiles(); also contains 'nside'
+        """
+        membership = cls.skymap_membership(nside, build=build_membership)
+        if membership is None:
+            raise ValueError(
+                f"nside {nside} is not available; build it with "
+                f"'manage.py skymap_tiles --nside {nside} --rebuild-cache'"
+            )
+        probability = skymap.read_skymap(skymap_file, nside=nside)
+        ranking = skymap.rank_tiles(probability, membership, levels=levels)
+        ranking['nside'] = nside
+        return ranking
 
     def crosses_meridian(self):
         """
@@ -1502,63 +1858,108 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
         return MultiPolygon(west_poly), MultiPolygon(east_poly)
 
     @classmethod
-    def load_from_file(cls, file_path):
+    def load_from_file(cls, file_path, batch_size=5000, rebuild_lookup=True, lookup_resolution=0.5):
         """
         Load tile information from final_tiles.txt format file.
         
         File format:
         id ra dec ra1 dec1 ra2 dec2 ra3 dec3 ra4 dec4
-        """
-        created = 0
-        updated = 0
         
-        with open(file_path, 'r') as f:
-            reader = csv.reader(f, delimiter=' ', skipinitialspace=True)
-            # Skip header
-            next(reader)
+        The file is parsed with NumPy and all (spherical excess) areas are
+        computed in one vectorized pass. Centres, corners and areas are
+        diffed against the existing tiles in one array comparison; new
+        tiles are written with bulk_create and changed tiles with
+        bulk_update, all inside one transaction. Afterwards the shared
+        lookup grid is rebuilt.
+        
+        Parameters:
+        -----------
+        file_path : str
+            Path to the tiling file
+        batch_size : int
+            Rows per bulk INSERT/UPDATE statement
+        rebuild_lookup : bool
+            Rebuild the memory-mapped sky->tile lookup grid afterwards
+        lookup_resolution : float
+            Lookup grid cell size in degrees
             
-            for row in reader:
-                # Skip empty rows
-                if not row:
-                    continue
-                    
-                # Extract tile ID from first column
-                tile_id = int(row[0][1:]) if row[0].startswith('T') else int(row[0])
-                ra = float(row[1])
-                dec = float(row[2])
-                
-                # Extract vertex coordinates
-                vertices = [
-                    (float(row[3]), float(row[4])),  # ra1, dec1
-                    (float(row[5]), float(row[6])),  # ra2, dec2
-                    (float(row[7]), float(row[8])),  # ra3, dec3
-                    (float(row[9]), float(row[10])), # ra4, dec4
-                    (float(row[3]), float(row[4])),  # Close the polygon by repeating first vertex
-                ]
-                
-                # Create polygon
-                polygon = Polygon(vertices)
-                
-                # Create or update tile
-                tile, is_new = cls.objects.update_or_create(
-                    id=tile_id,
-                    defaults={
-                        'ra': ra,
-                        'dec': dec,
-                        'vertices': polygon,
-                        'name': f"T{str(tile_id).zfill(5)}",
-                    }
-                )
-                
-                if is_new:
-                    created += 1
-                else:
-                    updated += 1
-                
-                # Calculate area in square degrees
-                tile.calculate_area()
-                
-        return {'created': created, 'updated': updated, 'total': created + updated}
+        Returns:
+        --------
+        dict : created / updated / unchanged / total counts
+        """
+        rows = np.loadtxt(file_path, dtype=str, skiprows=1, ndmin=2)
+        if not len(rows):
+            return {'created': 0, 'updated': 0, 'unchanged': 0, 'total': 0}
+        
+        names = np.char.lstrip(rows[:, 0], 'T')
+        tile_ids = names.astype(np.int64)
+        values = rows[:, 1:11].astype(float)
+        ra = np.mod(values[:, 0], 360.0)
+        dec = np.clip(values[:, 1], -90.0, 90.0)
+        vertices_ra = values[:, 2::2]
+        vertices_dec = values[:, 3::2]
+        areas = polygon_areas(vertices_ra, vertices_dec)
+        
+        # Existing tiles as one array (corners extracted in SQL): id, ra, dec, area, ra1, dec1 ... ra4, dec4
+        corner_sql = ', '.join(
+            f'ST_X(ST_PointN(ST_ExteriorRing(vertices), {k})), ST_Y(ST_PointN(ST_ExteriorRing(vertices), {k}))'
+            for k in range(1, 5)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, ra, dec, area_sq_deg, {corner_sql} FROM "{cls._meta.db_table}" ORDER BY id'
+            )
+            stored = np.array(cursor.fetchall(), dtype=float).reshape(-1, 12)
+        stored_ids = stored[:, 0].astype(np.int64)
+        
+        # Match file rows to stored rows and compare all columns at once (NULL = NaN counts as changed)
+        incoming = np.column_stack([ra, dec, areas, values[:, 2:10]])
+        position = np.clip(np.searchsorted(stored_ids, tile_ids), 0, max(len(stored_ids) - 1, 0))
+        exists = np.zeros(len(tile_ids), dtype=bool)
+        same = np.zeros(len(tile_ids), dtype=bool)
+        if len(stored_ids):
+            exists = stored_ids[position] == tile_ids
+            same = exists & np.all(
+                np.isclose(stored[position, 1:], incoming, rtol=1e-9, atol=1e-9), axis=1
+            )
+        unchanged = int(same.sum())
+        
+        to_create = []
+        to_update = []
+        for i in np.flatnonzero(~same).tolist():
+            tile_id = int(tile_ids[i])
+            corners = list(zip(vertices_ra[i].tolist(), vertices_dec[i].tolist()))
+            tile = cls(
+                id=tile_id,
+                name=f"T{str(tile_id).zfill(5)}",
+                ra=float(ra[i]),
+                dec=float(dec[i]),
+                vertices=Polygon(corners + [corners[0]]),
+                area_sq_deg=float(areas[i]),
+            )
+            if exists[i]:
+                to_update.append(tile)
+            else:
+                to_create.append(tile)
+        
+        with transaction.atomic():
+            cls.objects.bulk_create(to_create, batch_size=batch_size)
+            cls.objects.bulk_update(
+                to_update, ['name', 'ra', 'dec', 'vertices', 'area_sq_deg'], batch_size=batch_size
+            )
+        
+        # Footprints may have changed
+        cls._polygon_index = None
+        if rebuild_lookup and (to_create or to_update or cls.lookup_grid() is None):
+            cls.build_lookup_grid(resolution=lookup_resolution)
+        
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'unchanged': unchanged,
+            'total': len(tile_ids),
+        }
+    
 
     @classmethod
     def q3c_radial_search(cls, ra, dec, radius_deg):
@@ -1578,16 +1979,7 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
         --------
         QuerySet of Tile objects that fall within the search circle
         """
-        # Ensure Q3C extension is enabled
-        with connection.cursor() as cursor:
-            cursor.execute("CREATE EXTENSION IF NOT EXISTS q3c;")
-        
-        # Use Q3C for efficient spatial search
-        return cls.objects.filter(
-            RawSQL("q3c_radial_query(ra, dec, %s, %s, %s)",
-                  [ra, dec, radius_deg],
-                  output_field=BooleanField())
-        )
+        return cls.objects.filter(q3c.radial_filter(ra, dec, radius_deg))
     
     @classmethod
     def q3c_poly_search(cls, vertices):
@@ -1603,56 +1995,61 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
         --------
         QuerySet of Tile objects that fall within the search polygon
         """
+        return cls.objects.filter(q3c.poly_filter(vertices))
+    
+    @classmethod
+    def q3c_crossmatch(cls, ra, dec, radius_deg=1.0):
+        """
+        Match many positions to the nearest tile centre in one query per chunk.
         
-        # Ensure Q3C extension is enabled
-        with connection.cursor() as cursor:
-            cursor.execute("CREATE EXTENSION IF NOT EXISTS q3c;")
-        
-        # Create arrays from vertices
-        ra_list = [v[0] for v in vertices]
-        dec_list = [v[1] for v in vertices]
-        
-        # Format arrays for SQL
-        ra_array = "ARRAY[" + ",".join(str(ra) for ra in ra_list) + "]"
-        dec_array = "ARRAY[" + ",".join(str(dec) for dec in dec_list) + "]"
-        
-        # Use Q3C polygon search
-        return cls.objects.filter(
-            RawSQL(f"q3c_poly_query(ra, dec, {ra_array}, {dec_array})",
-                  [],
-                  output_field=BooleanField())
-        )
+        Parameters:
+        -----------
+        ra, dec : array_like
+            Positions in degrees
+        radius_deg : float
+            Maximum centre distance in degrees
+            
+        Returns:
+        --------
+        tuple : (tile_ids, separations_arcsec) NumPy arrays, -1/NaN where unmatched
+        """
+        return q3c.nearest_ids(cls, ra, dec, radius_deg)
     
     def calculate_area(self):
-        """Calculate the area of this tile in square degrees"""
-        # This is approximate since we're on a sphere
+        """Calculate the exact spherical area of this tile in square degrees"""
         vertices = self.vertex_coords
         if not vertices:
             return 0
-            
-        # Calculate area using spherical geometry
-        ra_values = [v[0] for v in vertices]
-        dec_values = [v[1] for v in vertices]
-        
-        width = max(ra_values) - min(ra_values)
-        height = max(dec_values) - min(dec_values)
-        
-        # Special case for polygons that cross the meridian
-        if width > 180:
-            # Adjust width calculation for meridian crossing
-            ra_sorted = sorted(ra_values)
-            width = 360 - (ra_sorted[-1] - ra_sorted[0])
-        
-        # Adjust for cosine of declination (spherical correction)
-        avg_dec = sum(dec_values) / len(dec_values)
-        width_corrected = width * np.cos(np.radians(abs(avg_dec)))
         
-        self.area_sq_deg = width_corrected * height
+        self.area_sq_deg = polygon_areas([v[0] for v in vertices], [v[1] for v in vertices])
         self.save(update_fields=['area_sq_deg'])
         return self.area_sq_deg
 
+    @classmethod
+    def recompute_areas(cls, dry_run=False):
+        """
+        Recompute area_sq_deg of every tile in one NumPy pass.
+        
+        Parameters:
+        -----------
+        dry_run : bool
+            Compute and return the areas without writing them
+            
+        Returns:
+        --------
+        dict : ids, old and new areas (NumPy arrays) and rows written
+        """
+        ids, old_areas, polygons = [], [], []
+        for tile_id, area, polygon in cls.objects.values_list('id', 'area_sq_deg', 'vertices').iterator():
+            ids.append(tile_id)
+            old_areas.append(np.nan if area is None else area)
+            polygons.append(polygon[0].coords)
+        
+        return _recompute_footprint_areas(cls, ids, old_areas, polygons, dry_run)
+
     def update_observation_statistics(self):
         """Update observation statistics for this tile."""
+        start_version = self._current_statistics_version()
         stats = ScienceFrame.objects.filter(tile=self).aggregate(
             count=Count('id'),
             total_exptime=Sum('exptime'),
@@ -1672,6 +2069,7 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
             'observation_count', 'total_exposure_time', 
             'first_observed', 'last_observed'
         ])
+        self._clear_statistics_dirty(start_version)
         
         return {
             'tile_name': self.name,
@@ -1682,22 +2080,60 @@ T00002 51.42857142857143 -89.15094339622642 79.18340200529899 -88.52361237902466
         }
     
     @classmethod
-    def update_all_statistics(cls, progress_callback=None):
-        """Update statistics for all tiles."""
+    def update_all_statistics(cls, progress_callback=None, dirty_only=False):
+        """Update statistics for all tiles (or only tiles marked dirty)."""
         tiles = cls.objects.all()
+        if dirty_only:
+            tiles = tiles.filter(stats_dirty=True)
+        total_tiles = tiles.count()
         updated_count = 0
         
-        for i, tile in enumerate(tiles):
+        for i, tile in enumerate(tiles.iterator()):
             tile.update_observation_statistics()
             updated_count += 1
             
             if progress_callback and i % 100 == 0:
-                progress_callback(i, tiles.count())
+                progress_callback(i, total_tiles)
         
         return updated_count
 
 
-class Target(models.Model):
+def _recompute_footprint_areas(model, ids, old_areas, polygons, dry_run=False):
+    """
+    Compute spherical areas for many footprints and write them in one UPDATE.
+    
+    Shared by Tile.recompute_areas and Target.recompute_areas. The new values
+    are sent as two arrays and applied with a single UPDATE ... FROM unnest().
+    """
+    result = {
+        'ids': np.asarray(ids, dtype=np.int64),
+        'old': np.asarray(old_areas, dtype=float),
+        'new': np.zeros(0),
+        'written': 0,
+    }
+    if not ids:
+        return result
+    
+    # Pad ragged vertex lists by repeating the last vertex (zero-area triangles)
+    width = max(len(p) for p in polygons)
+    padded = np.array([list(p) + [p[-1]] * (width - len(p)) for p in polygons], dtype=float)
+    result['new'] = polygon_areas(padded[..., 0], padded[..., 1])
+    
+    if not dry_run:
+        table = model._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{table}" AS t SET area_sq_deg = v.area '
+                f'FROM unnest(%s::bigint[], %s::double precision[]) AS v(id, area) '
+                f'WHERE t.id = v.id',
+                [result['ids'].tolist(), result['new'].tolist()]
+            )
+            result['written'] = cursor.rowcount
+    
+    return result
+
+
+class Target(StatisticsTrackedModel):
     """
     Target model for non-tile observations (TOO, calibration targets, etc.)
     Enhanced with field of view polygon for spatial coverage tracking.
@@ -1768,6 +2204,8 @@ class Target(models.Model):
             models.Index(fields=['last_observed']),
         ]
 
+    STATISTICS_METHOD = 'update_observation_statistics'
+
     def save(self, *args, **kwargs):
         """Ensure coordinates are in valid ranges and generate FOV polygon."""
         # Ensure RA is in range [0, 360)
@@ -1781,6 +2219,7 @@ class Target(models.Model):
             self._generate_fov_polygon()
         
         super().save(*args, **kwargs)
+        Target._polygon_index = None
 
     def __str__(self):
         return f"{self.name} ({self.target_type})"
@@ -1847,8 +2286,10 @@ class Target(models.Model):
             # Create polygon
             self.vertices = Polygon(corners_celestial)
             
-            # Calculate area
-            self.area_sq_deg = self.fov_width * self.fov_height
+            # Exact spherical area of the footprint
+            self.area_sq_deg = polygon_areas(
+                [c[0] for c in corners_celestial[:-1]], [c[1] for c in corners_celestial[:-1]]
+            )
             
         except Exception as e:
             print(f"Error generating FOV polygon for {self.name}: {e}")
@@ -1864,34 +2305,77 @@ class Target(models.Model):
     def contains_point(self, ra, dec):
         """
         Check if a celestial point falls within this target's field of view.
-        Uses the same logic as Tile model.
+        Uses the same spherical test as Tile; see Target.locate() for batches.
         """
         if not self.vertices:
             # Fallback to simple circular check
-            target_coord = SkyCoord(ra=self.ra*u.degree, dec=self.dec*u.degree)
-            point_coord = SkyCoord(ra=ra*u.degree, dec=dec*u.degree)
-            separation = target_coord.separation(point_coord).degree
-            return separation <= max(self.fov_width, self.fov_height) / 2.0
+            separation = angular_separation(self.ra, self.dec, ra, dec)
+            return bool(separation <= max(self.fov_width, self.fov_height) / 2.0)
         
-        # Normalize input coordinates
-        ra = ra % 360.0
-        dec = max(-90.0, min(90.0, dec))
+        corners = self.vertex_coords
+        return bool(points_in_polygon(
+            ra, dec, [v[0] for v in corners], [v[1] for v in corners], self.ra, self.dec
+        )[0])
+    
+    # Per-process cache of the vectorized footprint index (see polygon_index)
+    _polygon_index = None
+    
+    @classmethod
+    def polygon_index(cls, refresh=False):
+        """
+        Return the SphericalPolygonIndex of all target fields of view.
         
-        # For points near poles, special handling
-        if abs(dec) > 88.0:
-            corners = self.vertex_coords
-            dec_min = min(v[1] for v in corners)
-            dec_max = max(v[1] for v in corners)
-            return dec_min <= dec <= dec_max
+        Targets without a stored polygon get one generated from their
+        FOV parameters. The cache is dropped whenever a Target is saved.
+        """
+        if cls._polygon_index is None or refresh:
+            ids, centers, polygons = [], [], []
+            for target in cls.objects.only(
+                'id', 'ra', 'dec', 'vertices', 'fov_width', 'fov_height', 'position_angle'
+            ).iterator():
+                if not target.vertices:
+                    target._generate_fov_polygon()
+                if not target.vertices:
+                    continue
+                ids.append(target.id)
+                centers.append((target.ra, target.dec))
+                polygons.append(target.vertex_coords)
+            cls._polygon_index = SphericalPolygonIndex.from_polygons(ids, centers, polygons)
+        return cls._polygon_index
+    
+    @classmethod
+    def recompute_areas(cls, dry_run=False):
+        """
+        Recompute area_sq_deg of every target footprint in one NumPy pass.
         
-        # Handle RA wrap-around (same as Tile)
-        point = Point(ra, dec)
+        Targets without a stored polygon use the one generated from their
+        FOV parameters. See Tile.recompute_areas for the return value.
+        """
+        ids, old_areas, polygons = [], [], []
+        for target in cls.objects.only(
+            'id', 'ra', 'dec', 'vertices', 'fov_width', 'fov_height', 'position_angle', 'area_sq_deg'
+        ).iterator():
+            old_area = target.area_sq_deg
+            if not target.vertices:
+                target._generate_fov_polygon()
+            if not target.vertices:
+                continue
+            ids.append(target.id)
+            old_areas.append(np.nan if old_area is None else old_area)
+            polygons.append(target.vertex_coords)
         
-        if self.crosses_meridian():
-            west_poly, east_poly = self.split_at_meridian()
-            return west_poly.contains(point) or east_poly.contains(point)
+        return _recompute_footprint_areas(cls, ids, old_areas, polygons, dry_run)
+    
+    @classmethod
+    def locate(cls, ra, dec):
+        """
+        Find the target whose field of view covers each position (vectorized).
         
-        return self.vertices.contains(point)
+        Returns:
+        --------
+        np.ndarray : Target ids, -1 where no target covers the position
+        """
+        return cls.polygon_index().locate(ra, dec)
     
     def crosses_meridian(self):
         """Check if the field of view crosses the meridian (RA=0)."""
@@ -1973,30 +2457,77 @@ class Target(models.Model):
         if associated_tile_ids:
             tiles = Tile.objects.filter(id__in=associated_tile_ids)
             target.associated_tiles.set(tiles)
-        
+
         return target
-    
+
+    @classmethod
+    def create_from_skymap(cls, name, ranking, level=0.9, description='', **kwargs):
+        """
+        Create (or refresh) a tile-based TOO target from a skymap ranking.
+
+        Parameters:
+        -----------
+        name : str
+            Target name (e.g., "S250818k")
+        ranking : dict
+            Result of Tile.rank_by_skymap()
+        level : float
+            Credible level whose tiles are associated with the target
+
+        Returns:
+        --------
+        Target : The target, positioned on the most probable tile
+        """
+        count = ranking['credible'].get(level) or len(ranking['tile_ids'])
+        tile_ids = [int(tile_id) for tile_id in ranking['tile_ids'][:count]]
+        if not tile_ids:
+            raise ValueError(f"No tiles enclose any probability for {name}")
+
+        top_tile = Tile.objects.get(id=tile_ids[0])
+        description = description or (
+            f"{len(tile_ids)} tiles covering {ranking['cumulative'][count - 1]:.1%} "
+            f"(target {level:.0%} credible region, nside={ranking.get('nside')})"
+        )
+
+        existing = cls.objects.filter(name=name).first()
+        if existing is None:
+            return cls.create_tile_based(
+                name, top_tile.ra, top_tile.dec, associated_tile_ids=tile_ids,
+                target_type='TOO', description=description, **kwargs
+            )
+
+        existing.ra, existing.dec = top_tile.ra, top_tile.dec
+        existing.description = description
+        existing.save()
+        existing.associated_tiles.set(Tile.objects.filter(id__in=tile_ids))
+        return existing
+
     @classmethod
     def q3c_radial_search(cls, ra, dec, radius_deg):
         """
         Find targets using Q3C cone search (same as Tile).
         """
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("CREATE EXTENSION IF NOT EXISTS q3c;")
-        
-            return cls.objects.filter(
-                RawSQL("q3c_radial_query(ra, dec, %s, %s, %s)",
-                      [ra, dec, radius_deg],
-                      output_field=BooleanField())
-            )
+            return cls.objects.filter(q3c.radial_filter(ra, dec, radius_deg))
         except Exception as e:
             print(f"Q3C search failed: {e}")
             # Fallback to simple distance calculation or empty queryset
             return cls.objects.none()
     
+    @classmethod
+    def q3c_crossmatch(cls, ra, dec, radius_deg, nearest_only=True):
+        """
+        Cross-match many positions against target coordinates (q3c_join).
+        
+        Returns:
+        --------
+        list of (position_index, target_id, separation_arcsec)
+        """
+        return q3c.crossmatch(cls, ra, dec, radius_deg, nearest_only=nearest_only)
+    
     def update_observation_statistics(self):
         """Update observation statistics for this target."""
+        start_version = self._current_statistics_version()
         
         stats = ScienceFrame.objects.filter(target=self).aggregate(
             count=Count('id'),
@@ -2017,9 +2548,10 @@ class Target(models.Model):
             'observation_count', 'total_exposure_time', 
             'first_observed', 'last_observed'
         ])
+        self._clear_statistics_dirty(start_version)
 
 
-class UnitStatistics(models.Model):
+class UnitStatistics(StatisticsTrackedModel):
     """
     Statistics tracking for each telescope unit.
     
@@ -2046,11 +2578,15 @@ class UnitStatistics(models.Model):
     # Updated timestamp
     last_updated = models.DateTimeField(auto_now=True)
     
+    # Dirty marks are keyed by unit so frame writers need no extra lookup
+    STATISTICS_KEY = 'unit_id'
+    
     def __str__(self):
         return f"Statistics for {self.unit.name}"
     
     def update_statistics(self):
         """Update all statistics for this unit"""
+        start_version = self._current_statistics_version()
         
         # Get time range
         times = ScienceFrame.objects.filter(unit=self.unit).aggregate(
@@ -2074,11 +2610,12 @@ class UnitStatistics(models.Model):
         )
         
         self.science_frame_count = science_stats['count'] or 0
-        self.total_exposure_time = science_stats['exptime'] or 0
+        self.total_exptime = science_stats['exptime'] or 0
         self.distinct_tiles_observed = science_stats['tiles'] or 0
         self.distinct_nights = science_stats['nights'] or 0
         
         self.save()
+        self._clear_statistics_dirty(start_version)
     
     @property
     def science_frames_by_filter(self):
@@ -2130,6 +2667,10 @@ class UnitStatistics(models.Model):
         return nights
 
 
+# Distinct basenames memoized by FilenamePatternAnalyzer
+PARSE_CACHE_SIZE = 65536
+
+
 class FilenamePatternAnalyzer:
     """
     Complete utility class for analyzing astronomical observation filename patterns.
@@ -2223,6 +2764,72 @@ class FilenamePatternAnalyzer:
         r'^(LTT\d+)_(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})_([a-zA-Z]+\d*)_(\$\$\$\$)_(\d+\.?\d*)s_(\d{4})\.fits(?:\.fz)?$'
     )
 
+    # Frame-type keywords used by the v1/v2 formats
+    FRAME_KEYWORDS = frozenset(['LIGHT', 'DARK', 'BIAS', 'FLAT'])
+
+    ALL_PATTERNS = frozenset([
+        'NEW_FITS_PATTERN', 'NEW_UNIT_TIMESTAMP_PATTERN', 'NEW_UNIT_EXTENDED_PATTERN',
+        'FLATWIZARD_PATTERN', 'OLD_V2_FITS_PATTERN',
+        'OLD_V1_FOCUS_CALIB_PATTERN', 'OLD_V1_FOCUSTEST_PATTERN', 'OLD_V1_EMPTY_OBJECT_PATTERN',
+        'OLD_V1_FITS_PATTERN', 'OLD_V1_SIMPLE_PATTERN',
+        'OLD_V0_FITS_PATTERN', 'OLD_V0_CALIB_PATTERN', 'OLD_V0_TEMPERATURE_PATTERN', 'OLD_V0_LTT_PATTERN',
+    ])
+
+    # filename_pattern values, indexed by the parse_many() pattern codes
+    PATTERN_CODES = ('new_fits', 'old_v2_fits', 'old_v1_fits', 'old_v0_fits')
+
+    # Order in which the group methods try the patterns
+    CASCADE_ORDER = (
+        'NEW_FITS_PATTERN', 'NEW_UNIT_TIMESTAMP_PATTERN', 'NEW_UNIT_EXTENDED_PATTERN',
+        'FLATWIZARD_PATTERN', 'OLD_V2_FITS_PATTERN',
+        'OLD_V1_FOCUS_CALIB_PATTERN', 'OLD_V1_FOCUSTEST_PATTERN', 'OLD_V1_EMPTY_OBJECT_PATTERN',
+        'OLD_V1_FITS_PATTERN', 'OLD_V1_SIMPLE_PATTERN',
+        'OLD_V0_FITS_PATTERN', 'OLD_V0_CALIB_PATTERN', 'OLD_V0_TEMPERATURE_PATTERN', 'OLD_V0_LTT_PATTERN',
+    )
+
+    # Raw string columns of parse_many(); 'tile' is the object field of new_fits names
+    RAW_COLUMNS = ('unit', 'date', 'time', 'filter', 'exptime', 'sequence', 'frame_type', 'tile')
+
+    # Per pattern: pattern code, then the source of each RAW_COLUMNS entry
+    # (int = match group, str = literal value, None = not in the filename)
+    COLUMN_GROUPS = {
+        'NEW_FITS_PATTERN': (0, 1, 2, 3, 5, 7, 8, None, 4),
+        'NEW_UNIT_TIMESTAMP_PATTERN': (0, 1, 2, 3, 5, 6, 7, None, None),
+        'NEW_UNIT_EXTENDED_PATTERN': (0, 1, 3, 4, 5, 7, 8, 'LIGHT', None),
+        'FLATWIZARD_PATTERN': (1, 1, 2, 3, 4, 6, 7, 'FLAT', None),
+        'OLD_V2_FITS_PATTERN': (1, 1, 4, 5, 6, 8, 9, 2, None),
+        'OLD_V1_FOCUS_CALIB_PATTERN': (2, None, 3, 4, 5, 6, 7, 1, None),
+        'OLD_V1_FOCUSTEST_PATTERN': (2, None, 4, 5, 6, 7, 8, 1, None),
+        'OLD_V1_EMPTY_OBJECT_PATTERN': (2, None, 2, 3, 4, 5, 6, 1, None),
+        'OLD_V1_FITS_PATTERN': (2, None, 4, 5, 6, 7, 8, 1, None),
+        'OLD_V1_SIMPLE_PATTERN': (2, None, 3, 4, 5, 6, 7, 1, None),
+        'OLD_V0_FITS_PATTERN': (3, None, 2, 3, 4, 6, 7, 'LIGHT', None),
+        'OLD_V0_CALIB_PATTERN': (3, None, 2, 3, None, 5, 6, 1, None),
+        'OLD_V0_TEMPERATURE_PATTERN': (3, None, 1, 2, 3, 5, 6, 'LIGHT', None),
+        'OLD_V0_LTT_PATTERN': (3, None, 2, 3, 4, 6, 7, 'LIGHT', None),
+    }
+
+    # One example per documented variant (docstring order), used by benchmarks
+    EXAMPLE_FILENAMES = (
+        '7DT01_20250521_070659_T11746_i_1x1_100.0s_0000.fits',
+        '7DT01_20240826_020023_GRB240825A_m425_1x1_100.0s_0002.fits',
+        '7DT01_20240722_012512_NGC6121_shift_m425_1x1_100.0s_0001.fits',
+        '7DT01_LIGHT_COSMOS_2024-03-11_02-09-07_m675_2x2_120.00s_0005.fits',
+        '7DT01_LIGHT_COSMOS_2_2024-05-27_21-08-01_m425_1x1_120.00s_0015.fits',
+        'LIGHT_FOCUS7522__WD0123-262_2023-11-02_01-29-23_u_60.00s_0091.fits',
+        'LIGHT_FOCUS7524__Gcluster_Shim_2024-01-04_23-45-26_m675_60.00s_0072.fits',
+        'LIGHT_Feige110_2023-10-11_23-31-11_i_30.00s_0009.fits',
+        'DARK_FOCUS7446___2024-01-10_05-16-45_u_10.00s_0002.fits',
+        'LIGHT_focustest_NGC1980_2023-10-12_04-46-05_u_6.00s_0007.fits',
+        'BIAS__2023-10-11_20-42-45_u_0.00s_0009.fits',
+        'ObjectName_2023-10-12_03-01-14_r_-9.82_60.00s_0021.fits',
+        'DARK_2023-10-11_20-51-11__-9.82_60.00s_0017.fits',
+        '2024-12-23_01-23-58_g_-9.83_100.00s_0000.fits',
+        'LTT1020_2023-10-11_02-58-48_u_$$$$_60.00s_0000.fits',
+        '7DT01-20240527-061352-M107-m400-10.0s-0000.fits',
+        '7DT01_LIGHT_Serpens_main_2024-05-09_02-22-26_m400_1x1_120.00s_0000.fits',
+    )
+
     def __init__(self, input_value):
         """Initialize with filename string."""
         self._date_obj = None
@@ -2253,27 +2860,253 @@ class FilenamePatternAnalyzer:
         return self._parsed_filename
 
     def _parse_from_string(self, input_string):
-        """Enhanced parsing with FlatWizard pattern support."""
+        """Parse a filename via the dispatcher, memoized per basename."""
         basename = os.path.basename(input_string)
+        result = self._parse_basename(basename)
+        if result is None:
+            raise ValueError(f"Could not parse date from '{input_string}'")
         
-        # Try new FITS filename pattern first
-        if self._try_new_format(basename):
-            return
-
-        # Try old format v2 (includes regular v2 and FlatWizard)
-        if self._try_old_v2_format(basename):
-            return
+        # Copy so callers may modify parsed_filename without touching the cache
+        self._filename_pattern, parsed, self._date_obj = result
+        self._parsed_filename = dict(parsed)
+    
+    @staticmethod
+    @lru_cache(maxsize=PARSE_CACHE_SIZE)
+    def _parse_basename(basename):
+        """
+        Cached parse of one basename.
         
-        # Try old format v1 patterns (multiple variations, ordered by specificity)
-        if self._try_old_v1_patterns(basename):
-            return
+        Returns:
+        --------
+        tuple or None : (filename_pattern, parsed dict, date), None if unparseable
+        """
+        return FilenamePatternAnalyzer._parse_uncached(basename)
+    
+    @classmethod
+    def _parse_uncached(cls, basename, dispatch=True):
+        """
+        Run the pattern groups in their historical order on one basename.
         
-        # Try old v0 patterns
-        if self._try_old_v0_patterns(basename):
-            return
+        With dispatch=True only the candidate patterns returned by
+        candidate_patterns() are tried; dispatch=False tries every pattern
+        (the original cascade, kept for benchmarking and verification).
+        """
+        analyzer = cls.__new__(cls)
+        analyzer._date_obj = None
+        analyzer._parsed_filename = None
+        analyzer._filename_pattern = None
+        analyzer._original_input = basename
+        analyzer._candidates = cls.candidate_patterns(basename) if dispatch else cls.ALL_PATTERNS
+        
+        for group, try_group in cls._PATTERN_GROUPS:
+            if analyzer._candidates.isdisjoint(group):
+                continue
+            if try_group(analyzer, basename):
+                return analyzer._filename_pattern, analyzer._parsed_filename, analyzer._date_obj
+        return None
+    
+    def _match(self, pattern_name, basename):
+        """Match one pattern, skipping those the dispatcher ruled out."""
+        if pattern_name not in self._candidates:
+            return None
+        return getattr(self, pattern_name).match(basename)
+    
+    @staticmethod
+    def _is_dash_date(token):
+        """Cheap check for a YYYY-MM-DD token."""
+        return (len(token) == 10 and token[4] == '-' and token[7] == '-'
+                and token[:4].isdigit() and token[5:7].isdigit() and token[8:].isdigit())
+    
+    @classmethod
+    def candidate_patterns(cls, basename):
+        """
+        Patterns that can possibly match a basename, from cheap prefix/shape tests.
+        
+        Every test is a necessary condition of the anchored regex prefix
+        (7DT unit, frame-type keyword, leading date, LTT name), so skipping
+        the other patterns never changes the result of the cascade. Real
+        filenames end up with a single candidate.
+        
+        Returns:
+        --------
+        frozenset : Names of the *_PATTERN attributes to try
+        """
+        tokens = basename.split('_')
+        first = tokens[0]
+        second = tokens[1] if len(tokens) > 1 else None
+        third = tokens[2] if len(tokens) > 2 else None
+        fourth = tokens[3] if len(tokens) > 3 else None
+        candidates = []
+        
+        if first.startswith('7DT'):
+            if '-' in first:
+                candidates.append('NEW_UNIT_TIMESTAMP_PATTERN')
+            elif first[3:].isdigit() and second is not None:
+                if len(second) == 8 and second.isdigit():
+                    candidates.append('NEW_FITS_PATTERN')
+                elif second == 'LIGHT':
+                    candidates.append('NEW_UNIT_EXTENDED_PATTERN')
+                if second == 'FLAT' and third == 'FlatWizard':
+                    candidates.append('FLATWIZARD_PATTERN')
+                if second in cls.FRAME_KEYWORDS:
+                    candidates.append('OLD_V2_FITS_PATTERN')
+        
+        if first in cls.FRAME_KEYWORDS and second is not None:
+            if second.startswith('FOCUS') and '___' in basename:
+                candidates.append('OLD_V1_FOCUS_CALIB_PATTERN')
+            if second == 'focustest':
+                candidates.append('OLD_V1_FOCUSTEST_PATTERN')
+            if second == '' and first in ('BIAS', 'DARK'):
+                candidates.append('OLD_V1_EMPTY_OBJECT_PATTERN')
+            if second and '__' in basename:
+                candidates.append('OLD_V1_FITS_PATTERN')
+            if second and any(token is not None and cls._is_dash_date(token) for token in (third, fourth)):
+                candidates.append('OLD_V1_SIMPLE_PATTERN')
+        
+        if second is not None and cls._is_dash_date(second):
+            if first:
+                candidates.append('OLD_V0_FITS_PATTERN')
+            if first in ('BIAS', 'DARK', 'FLAT'):
+                candidates.append('OLD_V0_CALIB_PATTERN')
+            if first.startswith('LTT'):
+                candidates.append('OLD_V0_LTT_PATTERN')
+        if cls._is_dash_date(first):
+            candidates.append('OLD_V0_TEMPERATURE_PATTERN')
+        
+        return frozenset(candidates)
+    
+    @classmethod
+    def parse_many(cls, names, chunk_size=100000):
+        """
+        Parse many filenames into columnar NumPy arrays.
+        
+        The regex matching is not vectorized: every name is still matched
+        in Python, one re.match per candidate pattern in cascade order, at
+        roughly the per-name cost of the single-name parser. What the batch
+        form saves is the analyzer object and dict per name: match groups
+        are copied straight into columns, and date validation and the
+        conversion to typed arrays run as NumPy operations over the chunk.
+        Names whose first matching pattern carries an invalid date go
+        through the regular per-name parse, so results equal
+        FilenamePatternAnalyzer(name).
+        
+        Parameters:
+        -----------
+        names : iterable of str
+            Filenames or paths (only the basename is parsed)
+        chunk_size : int
+            Names converted per step (bounds temporary memory)
+        
+        Returns:
+        --------
+        dict : One array per column, aligned with names:
+               pattern (int8 code into categories['pattern'], -1 unparseable),
+               unit (int16 unit number), date (datetime64[D]), time (int32
+               seconds of day), filter and frame_type (int16 codes into
+               categories), exptime (float32), sequence (int32) and tile_id
+               (int32); -1 / NaT / NaN where missing or out of range
+        """
+        categories = {'pattern': cls.PATTERN_CODES, 'filter': {}, 'frame_type': {}}
+        chunks = []
+        batch = []
+        for name in names:
+            batch.append(os.path.basename(name))
+            if len(batch) >= chunk_size:
+                chunks.append(cls._parse_chunk(batch, categories))
+                batch = []
+        if batch or not chunks:
+            chunks.append(cls._parse_chunk(batch, categories))
+        
+        result = {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+        result['categories'] = {
+            'pattern': list(cls.PATTERN_CODES),
+            'filter': list(categories['filter']),
+            'frame_type': list(categories['frame_type']),
+        }
+        return result
+    
+    @classmethod
+    def _parse_chunk(cls, names, categories):
+        """Columnar parse of one chunk of basenames (per-name regex matching, see parse_many)."""
+        count = len(names)
+        raw = {column: [None] * count for column in cls.RAW_COLUMNS}
+        pattern = np.full(count, -1, dtype=np.int8)
+        
+        candidates = [cls.candidate_patterns(name) for name in names]
+        unresolved = set(range(count))
+        for pattern_name in cls.CASCADE_ORDER:
+            indices = [i for i in unresolved if pattern_name in candidates[i]]
+            if not indices:
+                continue
+            regex = getattr(cls, pattern_name)
+            code, *groups = cls.COLUMN_GROUPS[pattern_name]
+            for i in indices:
+                match = regex.match(names[i])
+                if match is None:
+                    continue
+                unresolved.discard(i)
+                pattern[i] = code
+                for column, group in zip(cls.RAW_COLUMNS, groups):
+                    raw[column][i] = match.group(group) if isinstance(group, int) else group
+        
+        # Vectorized date validation (the per-name parse rejects invalid dates)
+        matched = pattern >= 0
+        dates = np.full(count, np.datetime64('NaT'), dtype='datetime64[D]')
+        if matched.any():
+            digits = [raw['date'][i].replace('-', '') for i in np.flatnonzero(matched)]
+            year = np.array([d[:4] for d in digits], dtype=np.int64)
+            month = np.array([d[4:6] for d in digits], dtype=np.int64)
+            day = np.array([d[6:8] for d in digits], dtype=np.int64)
+            month_index = (year - 1970) * 12 + np.clip(month, 1, 12) - 1
+            first = month_index.astype('datetime64[M]').astype('datetime64[D]')
+            length = ((month_index + 1).astype('datetime64[M]').astype('datetime64[D]') - first).astype(np.int64)
+            valid = (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= length)
+            dates[np.flatnonzero(matched)[valid]] = first[valid] + (day[valid] - 1)
+            
+            # Invalid dates: fall back to the exact per-name cascade
+            for i in np.flatnonzero(matched)[~valid]:
+                result = cls._parse_basename(names[i])
+                pattern[i] = -1
+                for column in cls.RAW_COLUMNS:
+                    raw[column][i] = None
+                if result is not None:
+                    filename_pattern, parsed, date_obj = result
+                    pattern[i] = cls.PATTERN_CODES.index(filename_pattern)
+                    dates[i] = np.datetime64(date_obj, 'D')
+                    for column in cls.RAW_COLUMNS[:-1]:
+                        raw[column][i] = parsed.get(column)
+                    raw['tile'][i] = f"T{parsed['tile_id']}" if parsed.get('tile_id') else None
+        
+        def codes(values, mapping):
+            return np.array(
+                [-1 if value is None else mapping.setdefault(value, len(mapping)) for value in values],
+                dtype=np.int16
+            )
+        
+        def integers(values, dtype=np.int32, convert=int):
+            array = np.array(
+                [convert(value) if value is not None and value.isdigit() else -1 for value in values],
+                dtype=object
+            )
+            array[array > np.iinfo(dtype).max] = -1
+            return array.astype(dtype)
         
-        # If we reach here, we couldn't parse the filename
-        raise ValueError(f"Could not parse date from '{input_string}'")
+        sequence = [('0000' if value == '$$FRAMENR$' else value) for value in raw['sequence']]
+        tiles = [value[1:] if value and value[0] == 'T' else None for value in raw['tile']]
+        
+        return {
+            'pattern': pattern,
+            'unit': integers([value[3:] if value else None for value in raw['unit']], np.int16),
+            'date': dates,
+            'time': integers([value.replace('-', '') if value else None for value in raw['time']],
+                             convert=lambda hms: int(hms[:2]) * 3600 + int(hms[2:4]) * 60 + int(hms[4:6])),
+            'filter': codes(raw['filter'], categories['filter']),
+            'exptime': np.array([np.nan if value is None else value for value in raw['exptime']],
+                                dtype=np.float32),
+            'sequence': integers(sequence),
+            'frame_type': codes(raw['frame_type'], categories['frame_type']),
+            'tile_id': integers(tiles),
+        }
     
     def _try_flatwizard_format(self, basename):
         """Try FlatWizard format - automated flat field acquisition."""
@@ -2308,7 +3141,7 @@ class FilenamePatternAnalyzer:
 
     def _try_new_format(self, basename):
         """Try all new FITS filename format (unified as new_fits)."""
-        new_match = self.NEW_FITS_PATTERN.match(basename)
+        new_match = self._match('NEW_FITS_PATTERN', basename)
         if  new_match:
             self._filename_pattern = 'new_fits'
             object_info = new_match.group(4)
@@ -2358,7 +3191,7 @@ class FilenamePatternAnalyzer:
                 return False
    
         # 2. Try unit-timestamp format
-        timestamp_match = self.NEW_UNIT_TIMESTAMP_PATTERN.match(basename)
+        timestamp_match = self._match('NEW_UNIT_TIMESTAMP_PATTERN', basename)
         if timestamp_match:
             self._filename_pattern = 'new_fits' #'new_unit_timestamp'
         
@@ -2389,7 +3222,7 @@ class FilenamePatternAnalyzer:
                 return False
 
         # 3. Try unit-extended format
-        extended_match = self.NEW_UNIT_EXTENDED_PATTERN.match(basename)
+        extended_match = self._match('NEW_UNIT_EXTENDED_PATTERN', basename)
         if extended_match:
             self._filename_pattern = 'new_fits'
 
@@ -2428,7 +3261,7 @@ class FilenamePatternAnalyzer:
         """Try old format v2 - includes regular v2 and FlatWizard patterns."""
 
         # First try FlatWizard pattern (specific v2 variant)
-        flatwizard_match = self.FLATWIZARD_PATTERN.match(basename)
+        flatwizard_match = self._match('FLATWIZARD_PATTERN', basename)
         if flatwizard_match:
             self._filename_pattern = 'old_v2_fits'
             self._parsed_filename = {
@@ -2458,7 +3291,7 @@ class FilenamePatternAnalyzer:
                 return False
 
         # Then try regular old v2 pattern
-        old_v2_match = self.OLD_V2_FITS_PATTERN.match(basename)
+        old_v2_match = self._match('OLD_V2_FITS_PATTERN', basename)
         if old_v2_match:
             self._filename_pattern = 'old_v2_fits'
             
@@ -2508,7 +3341,7 @@ class FilenamePatternAnalyzer:
         """Try all OLD_V1 pattern variations in order of specificity."""
         
         # 1. Try FOCUS calibration pattern first (triple underscore, no object)
-        focus_calib_match = self.OLD_V1_FOCUS_CALIB_PATTERN.match(basename)
+        focus_calib_match = self._match('OLD_V1_FOCUS_CALIB_PATTERN', basename)
         if focus_calib_match:
             self._filename_pattern = 'old_v1_fits'
             
@@ -2542,7 +3375,7 @@ class FilenamePatternAnalyzer:
                 return False
         
         # 2. Try focustest pattern
-        focustest_match = self.OLD_V1_FOCUSTEST_PATTERN.match(basename)
+        focustest_match = self._match('OLD_V1_FOCUSTEST_PATTERN', basename)
         if focustest_match:
             self._filename_pattern = 'old_v1_fits'
             
@@ -2574,7 +3407,7 @@ class FilenamePatternAnalyzer:
                 return False
         
         # 3. Try empty object pattern (BIAS/DARK with double underscore)
-        empty_obj_match = self.OLD_V1_EMPTY_OBJECT_PATTERN.match(basename)
+        empty_obj_match = self._match('OLD_V1_EMPTY_OBJECT_PATTERN', basename)
         if empty_obj_match:
             self._filename_pattern = 'old_v1_fits'
             
@@ -2606,7 +3439,7 @@ class FilenamePatternAnalyzer:
                 return False
         
         # 4. Try the complex pattern (FOCUS+number with double underscore and object)
-        old_v1_match = self.OLD_V1_FITS_PATTERN.match(basename)
+        old_v1_match = self._match('OLD_V1_FITS_PATTERN', basename)
         if old_v1_match:
             self._filename_pattern = 'old_v1_fits'
             
@@ -2653,7 +3486,7 @@ class FilenamePatternAnalyzer:
                 return False
         
         # 5. Try the simple 7-part pattern
-        simple_match = self.OLD_V1_SIMPLE_PATTERN.match(basename)
+        simple_match = self._match('OLD_V1_SIMPLE_PATTERN', basename)
         if simple_match:
             self._filename_pattern = 'old_v1_fits'
             
@@ -2692,7 +3525,7 @@ class FilenamePatternAnalyzer:
         """Try OLD_V0 pattern variations (early format with temperature)."""
         
         # 1. Try original v0 pattern (object_date_time_filter_temp_exptime_sequence)
-        old_v0_match = self.OLD_V0_FITS_PATTERN.match(basename)
+        old_v0_match = self._match('OLD_V0_FITS_PATTERN', basename)
         if old_v0_match:
             self._filename_pattern = 'old_v0_fits'
             self._parsed_filename = {
@@ -2719,7 +3552,7 @@ class FilenamePatternAnalyzer:
                 return False
         
         # 2. Try v0 calibration pattern
-        old_v0_calib_match = self.OLD_V0_CALIB_PATTERN.match(basename)
+        old_v0_calib_match = self._match('OLD_V0_CALIB_PATTERN', basename)
         if old_v0_calib_match:
             self._filename_pattern = 'old_v0_fits'
             sequence = old_v0_calib_match.group(6)
@@ -2750,7 +3583,7 @@ class FilenamePatternAnalyzer:
                 return False
 
         # 3. NEW: Try temperature format without object (date_time_filter_temp_exptime_sequence)
-        temp_match = self.OLD_V0_TEMPERATURE_PATTERN.match(basename)
+        temp_match = self._match('OLD_V0_TEMPERATURE_PATTERN', basename)
         if temp_match:
             self._filename_pattern = 'old_v0_fits'
         
@@ -2778,7 +3611,7 @@ class FilenamePatternAnalyzer:
                 return False
 
         # 4. NEW: Try LTT standard star pattern with $$$$ placeholder
-        ltt_match = self.OLD_V0_LTT_PATTERN.match(basename)
+        ltt_match = self._match('OLD_V0_LTT_PATTERN', basename)
         if ltt_match:
             self._filename_pattern = 'old_v0_fits'
         
@@ -2809,10 +3642,29 @@ class FilenamePatternAnalyzer:
         return False
 
     @classmethod
-    def analyze_directory_patterns(cls, directory_path):
+    def analyze_directory_patterns(cls, directory_path, streaming=False, sample_size=20):
         """
         Analyze all FITS files in a directory to identify filename patterns.
         Enhanced to include FlatWizard pattern analysis.
+        
+        By default every file is listed under its pattern. With streaming=True
+        only counters, per-pattern date ranges and a uniform reservoir sample
+        of at most sample_size files per pattern are kept, so memory (and the
+        size of a JSON dump of the result) does not grow with the archive.
+        
+        Parameters:
+        -----------
+        directory_path : str
+            Directory to walk recursively
+        streaming : bool
+            Keep bounded samples instead of every file record
+        sample_size : int
+            Files kept per pattern in streaming mode
+        
+        Returns:
+        --------
+        dict : Statistics; pattern names map to lists of file records
+               (a sample in streaming mode, see 'pattern_date_ranges')
         """
         # Core pattern types - add flatwizard
         all_patterns = ['new_fits', 'flatwizard', 'old_v2_fits', 'old_v1_fits', 'old_v0_fits', 'unparseable']
@@ -2847,6 +3699,25 @@ class FilenamePatternAnalyzer:
         for pattern in all_patterns:
             stats[pattern] = []
         
+        if streaming:
+            stats['streaming'] = True
+            stats['sample_size'] = sample_size
+            stats['pattern_date_ranges'] = {}
+            rng = random.Random(0)
+        
+        def keep(pattern, file_info):
+            """Record a file, as reservoir sample (algorithm R) when streaming."""
+            if not streaming:
+                stats[pattern].append(file_info)
+                return
+            samples = stats[pattern]
+            if len(samples) < sample_size:
+                samples.append(file_info)
+            else:
+                slot = rng.randrange(stats['pattern_counts'][pattern])
+                if slot < sample_size:
+                    samples[slot] = file_info
+        
         # Walk through directory tree
         for root, dirs, files in os.walk(directory_path):
             for filename in files:
@@ -2874,10 +3745,16 @@ class FilenamePatternAnalyzer:
                         'parsed': analyzer.parsed_filename
                     }
                     
-                    stats[pattern].append(file_info)
+                    keep(pattern, file_info)
 
                     # Update date range
                     if analyzer.date:
+                        if streaming:
+                            pattern_range = stats['pattern_date_ranges'].setdefault(
+                                pattern, {'earliest': analyzer.date, 'latest': analyzer.date}
+                            )
+                            pattern_range['earliest'] = min(pattern_range['earliest'], analyzer.date)
+                            pattern_range['latest'] = max(pattern_range['latest'], analyzer.date)
                         if stats['date_range']['earliest'] is None or analyzer.date < stats['date_range']['earliest']:
                             stats['date_range']['earliest'] = analyzer.date
                         if stats['date_range']['latest'] is None or analyzer.date > stats['date_range']['latest']:
@@ -2932,7 +3809,7 @@ class FilenamePatternAnalyzer:
                 except ValueError:
                     # File couldn't be parsed
                     stats['pattern_counts']['unparseable'] += 1
-                    stats['unparseable'].append({
+                    keep('unparseable', {
                         'filename': filename,
                         'path': file_path
                     })
@@ -3018,6 +3895,20 @@ class FilenamePatternAnalyzer:
             return "Unknown exclusion reason"
 
 
+# Pattern groups in cascade order, with the patterns each group method tries
+FilenamePatternAnalyzer._PATTERN_GROUPS = (
+    (frozenset(['NEW_FITS_PATTERN', 'NEW_UNIT_TIMESTAMP_PATTERN', 'NEW_UNIT_EXTENDED_PATTERN']),
+     FilenamePatternAnalyzer._try_new_format),
+    (frozenset(['FLATWIZARD_PATTERN', 'OLD_V2_FITS_PATTERN']),
+     FilenamePatternAnalyzer._try_old_v2_format),
+    (frozenset(['OLD_V1_FOCUS_CALIB_PATTERN', 'OLD_V1_FOCUSTEST_PATTERN', 'OLD_V1_EMPTY_OBJECT_PATTERN',
+                'OLD_V1_FITS_PATTERN', 'OLD_V1_SIMPLE_PATTERN']),
+     FilenamePatternAnalyzer._try_old_v1_patterns),
+    (frozenset(['OLD_V0_FITS_PATTERN', 'OLD_V0_CALIB_PATTERN', 'OLD_V0_TEMPERATURE_PATTERN', 'OLD_V0_LTT_PATTERN']),
+     FilenamePatternAnalyzer._try_old_v0_patterns),
+)
+
+
 # === ABSTRACT BASE MODEL FOR ALL RAW FRAMES ===
 class ObservationFrame(models.Model):
     """
@@ -3133,13 +4024,7 @@ class ObservationFrame(models.Model):
             chile_tz = pytz.timezone('America/Santiago')
             self.local_obstime = chile_tz.localize(self.local_obstime)
 
-        # Ensure af_time is timezone-aware
-        if hasattr(self, 'af_time') and self.af_time and self.af_time.tzinfo is None:
-            self.af_time = pytz.UTC.localize(self.af_time)
-    
-        # Ensure weather_update_time is timezone-aware
-        if hasattr(self, 'weather_update_time') and self.weather_update_time and self.weather_update_time.tzinfo is None:
-            self.weather_update_time = pytz.UTC.localize(self.weather_update_time)
+        # af_time / weather_update_time are normalised by ScienceFrame.build_detail
     
         # Generate IDs if needed
         if not self.image_id:
@@ -3537,69 +4422,20 @@ class ScienceFrame(ObservationFrame):
     ntels = models.IntegerField(null=True, blank=True, 
                                        help_text="NTELSCOP - Number of telescopes in observation")
     
-    # === Focus Information (TCSpy Standard, NINA Compatible) ===
-    focuser_position = models.FloatField(null=True, blank=True, db_index=True, help_text="FOCUSPOS/FOCPOS - Focuser position")
-    af_time = models.DateTimeField(null=True, blank=True, db_index=True, help_text="AFTIME - Last autofocus time")
-    af_value = models.FloatField(null=True, blank=True, db_index=True, help_text="AFVALUE - Autofocus position")
-    af_error = models.FloatField(null=True, blank=True, db_index=True, help_text="AFERROR - Autofocus error")
-    
-    # === Weather Data (TCSpy Standard, NINA Compatible) ===
-    weather_update_time = models.DateTimeField(null=True, blank=True, help_text="DATE-WEA - Weather data timestamp")
-    ambient_temperature = models.FloatField(null=True, blank=True, db_index=True, help_text="AMBTEMP - Ambient temperature (°C)")
-    humidity = models.FloatField(null=True, blank=True, db_index=True, help_text="HUMIDITY - Relative humidity (%)")
-    pressure = models.FloatField(null=True, blank=True, db_index=True, help_text="PRESSURE - Atmospheric pressure (hPa)")
-    dew_point = models.FloatField(null=True, blank=True, db_index=True, help_text="DEWPOINT - Dew point temperature (°C)")
-    wind_speed = models.FloatField(null=True, blank=True, db_index=True, help_text="WINDSPED/WINDSPD - Wind speed (m/s)")
-    wind_direction = models.FloatField(null=True, blank=True, db_index=True, help_text="WINDDIR - Wind direction (degrees)")
-    wind_gust = models.FloatField(null=True, blank=True, db_index=True, help_text="WINDGUST - Wind gust speed (m/s)")
+    # === Sky Conditions Used by Night Statistics ===
     sky_brightness = models.FloatField(null=True, blank=True, db_index=True, help_text="SKYBRGHT/MPSAS - Sky brightness (mag/arcsec²)")
-    sky_temperature = models.FloatField(null=True, blank=True, db_index=True, help_text="SKYTEMP - Sky temperature (°C)")
-    cloud_fraction = models.FloatField(null=True, blank=True, db_index=True, help_text="CLUDFRAC/CLOUDCVR - Cloud coverage fraction (0-1)")
-    rain_rate = models.FloatField(null=True, blank=True, db_index=True, help_text="RAINRATE - Rain rate (mm/h)")
-    
-    # === NINA-Specific Weather Data (Not in TCSpy) ===
-    weather_age = models.FloatField(null=True, blank=True, help_text="WEATHER_AGE - Age of weather data (NINA only)")
-    weather_station = models.CharField(max_length=50, blank=True, help_text="Weather station identifier (NINA only)")
     
     # === Image Quality Metrics ===
     fwhm = models.FloatField(null=True, blank=True, db_index=True, help_text="SKYFWHM/STARFWHM - Seeing FWHM (arcsec)")
-    background_level = models.FloatField(null=True, blank=True, help_text="Background level (ADU)")
-    num_sources = models.IntegerField(null=True, blank=True, help_text="Number of detected sources")
-    limiting_magnitude = models.FloatField(null=True, blank=True, help_text="Limiting magnitude")
-    ellipticity = models.FloatField(null=True, blank=True, help_text="Average source ellipticity")
-    
-    # === Star Detection (TCSpy/NINA Compatible) ===
-    star_count = models.IntegerField(null=True, blank=True, help_text="STAR_COUNT - Number of detected stars")
-    median_hfd = models.FloatField(null=True, blank=True, help_text="HFD - Half Flux Diameter median (pixels)")
-    
-    # === NINA-Specific Image Quality ===
-    nina_hfr = models.FloatField(null=True, blank=True, help_text="HFR - Half Flux Radius (NINA only)")
-    nina_star_detection_sensitivity = models.FloatField(null=True, blank=True, help_text="Star detection sensitivity (NINA only)")
     
     # === Observation Flags ===
     is_too = models.BooleanField(default=False, db_index=True, help_text="IS_TOO - Target of Opportunity")
     is_shift_observation = models.BooleanField(default=False, db_index=True, help_text="Shift observation flag")
     is_test_observation = models.BooleanField(default=False, db_index=True, help_text="Test observation flag")
     
-    # === Guiding Information (NINA Only) ===
-    guiding_enabled = models.BooleanField(null=True, blank=True, help_text="GUIDING - Guiding status (NINA only)")
-    guiding_rms_ra = models.FloatField(null=True, blank=True, help_text="Guiding RMS RA (arcsec, NINA only)")
-    guiding_rms_dec = models.FloatField(null=True, blank=True, help_text="Guiding RMS Dec (arcsec, NINA only)")
-    guiding_rms_total = models.FloatField(null=True, blank=True, help_text="Guiding RMS total (arcsec, NINA only)")
-    
-    # === Plate Solving (NINA/TCSpy Compatible) ===
-    plate_solved = models.BooleanField(null=True, blank=True, help_text="Plate solving status")
-    plate_solve_ra = models.FloatField(null=True, blank=True, help_text="Plate solved RA")
-    plate_solve_dec = models.FloatField(null=True, blank=True, help_text="Plate solved Dec")
-    plate_solve_angle = models.FloatField(null=True, blank=True, help_text="Plate solved rotation angle")
-    plate_solve_pixel_scale = models.FloatField(null=True, blank=True, help_text="Plate solved pixel scale")
-    
-    # === Sequence Information (NINA Only) ===
-    sequence_title = models.CharField(max_length=100, blank=True, help_text="Sequence title (NINA only)")
-    sequence_target = models.CharField(max_length=100, blank=True, help_text="Sequence target (NINA only)")
-    
-    # === Notes and Comments ===
-    obsnote = models.TextField(blank=True, help_text="NOTE - Observation notes")
+    # Focus, weather, guiding, plate solving, detailed image quality and NINA
+    # sequence columns live in ScienceFrameDetail (one-to-one, joined on demand).
+    # They remain readable and writable as attributes of the frame.
 
     class Meta:
         verbose_name = "Science Frame"
@@ -3620,23 +4456,7 @@ class ScienceFrame(ObservationFrame):
             # === Quality and conditions ===
             models.Index(fields=['fwhm']),
             models.Index(fields=['airmass']),
-            models.Index(fields=['ambient_temperature']),
-            models.Index(fields=['humidity']),
-            models.Index(fields=['pressure']),
-            models.Index(fields=['dew_point']),
-            models.Index(fields=['wind_speed']),
-            models.Index(fields=['wind_direction']),
-            models.Index(fields=['wind_gust']),
             models.Index(fields=['sky_brightness']),
-            models.Index(fields=['sky_temperature']),
-            models.Index(fields=['cloud_fraction']),
-            models.Index(fields=['rain_rate']),
-            
-            # === Focus indexes ===
-            models.Index(fields=['focuser_position']),
-            models.Index(fields=['af_time']),
-            models.Index(fields=['af_value']),
-            models.Index(fields=['af_error']),
             
             # === Moon and strategy ===
             models.Index(fields=['moon_sep']),
@@ -3648,27 +4468,69 @@ class ScienceFrame(ObservationFrame):
             models.Index(fields=['is_shift_observation']),
             models.Index(fields=['is_test_observation']),
             
-            # === Image quality ===
-            models.Index(fields=['star_count']),
-            models.Index(fields=['median_hfd']),
-            models.Index(fields=['nina_hfr']),
-            
-            # === Guiding ===
-            models.Index(fields=['guiding_enabled']),
-            models.Index(fields=['guiding_rms_total']),
-            
-            # === Plate solving ===
-            models.Index(fields=['plate_solved']),
-            
             # === Composite indexes for complex queries ===
-            models.Index(fields=['ambient_temperature', 'humidity', 'wind_speed']),
-            models.Index(fields=['cloud_fraction', 'rain_rate']),
             models.Index(fields=['fwhm', 'airmass', 'sky_brightness']),
-            models.Index(fields=['af_time', 'af_error']),
-            models.Index(fields=['focuser_position', 'fwhm']),
-            models.Index(fields=['guiding_rms_total', 'fwhm']),
         ]
 
+    def save(self, *args, **kwargs):
+        """Save the core row, then write any pending detail columns."""
+        super().save(*args, **kwargs)
+
+        if self.__dict__.get('_pending_detail') and not self.__dict__.get('_defer_detail'):
+            self.save_detail()
+
+    # === Detail (cold column) handling ===
+    def get_detail(self):
+        """
+        Return the ScienceFrameDetail row for this frame, or None.
+
+        The row is fetched once and cached by Django's reverse one-to-one
+        descriptor; frames created during ingest skip the lookup entirely.
+        """
+        if self.pk is None or self.__dict__.get('_detail_is_new'):
+            return None
+        try:
+            return self.detail
+        except ScienceFrameDetail.DoesNotExist:
+            return None
+
+    def build_detail(self):
+        """
+        Build (without saving) the ScienceFrameDetail row for this frame.
+
+        Returns:
+        --------
+        ScienceFrameDetail or None : Detail row including pending values,
+        or None if nothing was set and no row exists
+        """
+        pending = self.__dict__.get('_pending_detail') or {}
+        detail = self.get_detail()
+        if detail is None:
+            if not pending:
+                return None
+            detail = ScienceFrameDetail(frame_id=self.pk)
+
+        for name, value in pending.items():
+            if name in ScienceFrameDetail.AWARE_FIELDS and value and value.tzinfo is None:
+                value = pytz.UTC.localize(value)
+            setattr(detail, name, value)
+        return detail
+
+    def save_detail(self):
+        """Write pending detail columns to the side table and clear the buffer."""
+        detail = self.build_detail()
+        if detail is None:
+            return None
+
+        pending = self.__dict__.get('_pending_detail') or {}
+        defaults = {name: getattr(detail, name) for name in pending}
+        detail, _ = ScienceFrameDetail.objects.update_or_create(frame_id=self.pk, defaults=defaults)
+
+        self._pending_detail = {}
+        self._detail_is_new = False
+        self._state.fields_cache['detail'] = detail
+        return detail
+
     def _get_int_header(self, header, key, default=None):
         """Safely get integer value from header."""
         try:
@@ -4167,8 +5029,1321 @@ class ScienceFrame(ObservationFrame):
         else:
             return None, None
 
+    # Coordinate columns with a q3c_ang2ipix index (migration 0012)
+    POINTING_COLUMNS = {
+        'object': ('object_ra', 'object_dec'),
+        'unit': ('unit_ra', 'unit_dec'),
+    }
 
-class HeaderMappingReference:
+    @classmethod
+    def q3c_crossmatch(cls, ra, dec, radius_deg, pointing='object', nearest_only=False,
+                       where_sql='', where_params=None):
+        """
+        Find frames pointed near many positions at once (q3c_join).
+        
+        Parameters:
+        -----------
+        ra, dec : array_like
+            Positions in degrees
+        radius_deg : float
+            Match radius in degrees
+        pointing : str
+            'object' (OBJCTRA_/OBJCTDE_) or 'unit' (telescope RA/DEC)
+        nearest_only : bool
+            Keep only the closest frame per position
+        where_sql, where_params :
+            Extra condition on the frame table (alias "t")
+            
+        Returns:
+        --------
+        list of (position_index, frame_id, separation_arcsec)
+        """
+        ra_column, dec_column = cls.POINTING_COLUMNS[pointing]
+        return q3c.crossmatch(
+            cls, ra, dec, radius_deg, ra_column=ra_column, dec_column=dec_column,
+            nearest_only=nearest_only, where_sql=where_sql, where_params=where_params
+        )
+
+    # Columns returned by cone_search()
+    CONE_SEARCH_FIELDS = (
+        'id', 'original_filename', 'obstime', 'exptime', 'object_name',
+        'object_ra', 'object_dec', 'unit_ra', 'unit_dec', 'airmass', 'fwhm',
+        'night__date', 'unit__name', 'filter__name', 'tile_id', 'target_id',
+    )
+
+    @classmethod
+    def cone_search(cls, ra, dec, radius_deg, filters=None, units=None, start=None, end=None,
+                    min_exptime=None, max_exptime=None, pointing='object', after=None, limit=100):
+        """
+        Science frames pointed within a cone, with keyset pagination.
+        
+        The cone uses the q3c_ang2ipix index on the pointing columns; filter,
+        unit, time and exposure predicates are applied in the same query
+        (filter/unit names are resolved to ids first, so no join is needed
+        for filtering). Results are ordered by (obstime, id).
+        
+        Parameters:
+        -----------
+        ra, dec : float
+            Cone centre in degrees
+        radius_deg : float
+            Cone radius in degrees
+        filters, units : list of str, optional
+            Filter names / unit names to include
+        start, end : datetime, optional
+            Observation time range [start, end)
+        min_exptime, max_exptime : float, optional
+            Exposure time range in seconds
+        pointing : str
+            'object' (target coordinates) or 'unit' (telescope pointing)
+        after : tuple (obstime, id), optional
+            Keyset cursor: return frames after this one
+        limit : int
+            Page size
+            
+        Returns:
+        --------
+        tuple : (list of dict rows with 'separation_arcsec', next cursor or None)
+        """
+        ra_column, dec_column = cls.POINTING_COLUMNS[pointing]
+        frames = cls.objects.filter(
+            q3c.radial_filter(ra, dec, radius_deg, ra_column=ra_column, dec_column=dec_column)
+        )
+        
+        if filters:
+            frames = frames.filter(filter_id__in=list(
+                Filter.objects.filter(name__in=filters).values_list('id', flat=True)
+            ))
+        if units:
+            frames = frames.filter(unit_id__in=list(
+                Unit.objects.filter(name__in=units).values_list('id', flat=True)
+            ))
+        if start is not None:
+            frames = frames.filter(obstime__gte=start)
+        if end is not None:
+            frames = frames.filter(obstime__lt=end)
+        if min_exptime is not None:
+            frames = frames.filter(exptime__gte=min_exptime)
+        if max_exptime is not None:
+            frames = frames.filter(exptime__lte=max_exptime)
+        if after is not None:
+            after_obstime, after_id = after
+            frames = frames.filter(
+                Q(obstime__gt=after_obstime) | Q(obstime=after_obstime, id__gt=after_id)
+            )
+        
+        rows = list(
+            frames.annotate(separation_arcsec=RawSQL(
+                f'q3c_dist("{ra_column}", "{dec_column}", %s, %s) * 3600.0', [float(ra), float(dec)],
+                output_field=models.FloatField()
+            )).order_by('obstime', 'id').values(*cls.CONE_SEARCH_FIELDS, 'separation_arcsec')[:limit + 1]
+        )
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]['obstime'], rows[-1]['id'])
+        return rows, next_cursor
+
+
+class ScienceFrameDetail(models.Model):
+    """
+    Cold, header-derived columns of a ScienceFrame (one-to-one side table).
+
+    Statistics and list scans only touch the narrow ScienceFrame core; these
+    rarely filtered columns are joined on demand (select_related('detail')).
+    Values are still accessible as ScienceFrame attributes, which buffer
+    writes until the frame is saved or the ingest batch bulk-inserts them.
+    """
+    frame = models.OneToOneField(
+        ScienceFrame,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='detail',
+        # No database FK: a range-partitioned survey_scienceframe has a
+        # composite (id, obstime) primary key. Django still cascades deletes.
+        db_constraint=False
+    )
+
+    # === Focus Information (TCSpy Standard, NINA Compatible) ===
+    focuser_position = models.FloatField(null=True, blank=True, help_text="FOCUSPOS/FOCPOS - Focuser position")
+    af_time = models.DateTimeField(null=True, blank=True, help_text="AFTIME - Last autofocus time")
+    af_value = models.FloatField(null=True, blank=True, help_text="AFVALUE - Autofocus position")
+    af_error = models.FloatField(null=True, blank=True, help_text="AFERROR - Autofocus error")
+
+    # === Weather Data (TCSpy Standard, NINA Compatible) ===
+    weather_update_time = models.DateTimeField(null=True, blank=True, help_text="DATE-WEA - Weather data timestamp")
+    ambient_temperature = models.FloatField(null=True, blank=True, help_text="AMBTEMP - Ambient temperature (°C)")
+    humidity = models.FloatField(null=True, blank=True, help_text="HUMIDITY - Relative humidity (%)")
+    pressure = models.FloatField(null=True, blank=True, help_text="PRESSURE - Atmospheric pressure (hPa)")
+    dew_point = models.FloatField(null=True, blank=True, help_text="DEWPOINT - Dew point temperature (°C)")
+    wind_speed = models.FloatField(null=True, blank=True, help_text="WINDSPED/WINDSPD - Wind speed (m/s)")
+    wind_direction = models.FloatField(null=True, blank=True, help_text="WINDDIR - Wind direction (degrees)")
+    wind_gust = models.FloatField(null=True, blank=True, help_text="WINDGUST - Wind gust speed (m/s)")
+    sky_temperature = models.FloatField(null=True, blank=True, help_text="SKYTEMP - Sky temperature (°C)")
+    cloud_fraction = models.FloatField(null=True, blank=True, help_text="CLUDFRAC/CLOUDCVR - Cloud coverage fraction (0-1)")
+    rain_rate = models.FloatField(null=True, blank=True, help_text="RAINRATE - Rain rate (mm/h)")
+
+    # === NINA-Specific Weather Data (Not in TCSpy) ===
+    weather_age = models.FloatField(null=True, blank=True, help_text="WEATHER_AGE - Age of weather data (NINA only)")
+    weather_station = models.CharField(max_length=50, blank=True, help_text="Weather station identifier (NINA only)")
+
+    # === Image Quality Metrics ===
+    background_level = models.FloatField(null=True, blank=True, help_text="Background level (ADU)")
+    num_sources = models.IntegerField(null=True, blank=True, help_text="Number of detected sources")
+    limiting_magnitude = models.FloatField(null=True, blank=True, help_text="Limiting magnitude")
+    ellipticity = models.FloatField(null=True, blank=True, help_text="Average source ellipticity")
+
+    # === Star Detection (TCSpy/NINA Compatible) ===
+    star_count = models.IntegerField(null=True, blank=True, help_text="STAR_COUNT - Number of detected stars")
+    median_hfd = models.FloatField(null=True, blank=True, help_text="HFD - Half Flux Diameter median (pixels)")
+
+    # === NINA-Specific Image Quality ===
+    nina_hfr = models.FloatField(null=True, blank=True, help_text="HFR - Half Flux Radius (NINA only)")
+    nina_star_detection_sensitivity = models.FloatField(null=True, blank=True, help_text="Star detection sensitivity (NINA only)")
+
+    # === Guiding Information (NINA Only) ===
+    guiding_enabled = models.BooleanField(null=True, blank=True, help_text="GUIDING - Guiding status (NINA only)")
+    guiding_rms_ra = models.FloatField(null=True, blank=True, help_text="Guiding RMS RA (arcsec, NINA only)")
+    guiding_rms_dec = models.FloatField(null=True, blank=True, help_text="Guiding RMS Dec (arcsec, NINA only)")
+    guiding_rms_total = models.FloatField(null=True, blank=True, help_text="Guiding RMS total (arcsec, NINA only)")
+
+    # === Plate Solving (NINA/TCSpy Compatible) ===
+    plate_solved = models.BooleanField(null=True, blank=True, help_text="Plate solving status")
+    plate_solve_ra = models.FloatField(null=True, blank=True, help_text="Plate solved RA")
+    plate_solve_dec = models.FloatField(null=True, blank=True, help_text="Plate solved Dec")
+    plate_solve_angle = models.FloatField(null=True, blank=True, help_text="Plate solved rotation angle")
+    plate_solve_pixel_scale = models.FloatField(null=True, blank=True, help_text="Plate solved pixel scale")
+
+    # === Sequence Information (NINA Only) ===
+    sequence_title = models.CharField(max_length=100, blank=True, help_text="Sequence title (NINA only)")
+    sequence_target = models.CharField(max_length=100, blank=True, help_text="Sequence target (NINA only)")
+
+    # === Notes and Comments ===
+    obsnote = models.TextField(blank=True, help_text="NOTE - Observation notes")
+
+    # Columns exposed as ScienceFrame attributes
+    DETAIL_FIELDS = (
+        'focuser_position', 'af_time', 'af_value', 'af_error',
+        'weather_update_time', 'ambient_temperature', 'humidity', 'pressure',
+        'dew_point', 'wind_speed', 'wind_direction', 'wind_gust',
+        'sky_temperature', 'cloud_fraction', 'rain_rate',
+        'weather_age', 'weather_station',
+        'background_level', 'num_sources', 'limiting_magnitude', 'ellipticity',
+        'star_count', 'median_hfd', 'nina_hfr', 'nina_star_detection_sensitivity',
+        'guiding_enabled', 'guiding_rms_ra', 'guiding_rms_dec', 'guiding_rms_total',
+        'plate_solved', 'plate_solve_ra', 'plate_solve_dec',
+        'plate_solve_angle', 'plate_solve_pixel_scale',
+        'sequence_title', 'sequence_target', 'obsnote',
+    )
+
+    # Timestamps normalised to UTC before saving
+    AWARE_FIELDS = ('af_time', 'weather_update_time')
+
+    class Meta:
+        verbose_name = "Science Frame Detail"
+        verbose_name_plural = "Science Frame Details"
+        indexes = [
+            models.Index(fields=['ambient_temperature', 'humidity', 'wind_speed']),
+            models.Index(fields=['cloud_fraction', 'rain_rate']),
+            models.Index(fields=['af_time', 'af_error']),
+            models.Index(fields=['focuser_position']),
+            models.Index(fields=['guiding_rms_total']),
+            models.Index(fields=['plate_solved']),
+            models.Index(fields=['star_count']),
+        ]
+
+    def __str__(self):
+        return f"Detail of frame {self.frame_id}"
+
+    @staticmethod
+    def bulk_write(details, batch_size=500):
+        """
+        Insert or update detail rows in bulk.
+
+        Parameters:
+        -----------
+        details : list
+            ScienceFrameDetail instances (typically from ScienceFrame.build_detail)
+        batch_size : int
+            Rows per INSERT statement
+
+        Returns:
+        --------
+        int : Number of rows written
+        """
+        if not details:
+            return 0
+        ScienceFrameDetail.objects.bulk_create(
+            details,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['frame'],
+            update_fields=list(ScienceFrameDetail.DETAIL_FIELDS),
+        )
+        return len(details)
+
+
+def _detail_attribute(name):
+    """Build a ScienceFrame property that proxies one ScienceFrameDetail column."""
+    def getter(self):
+        pending = self.__dict__.get('_pending_detail')
+        if pending and name in pending:
+            return pending[name]
+        detail = self.get_detail()
+        if detail is not None:
+            return getattr(detail, name)
+        return ScienceFrameDetail._meta.get_field(name).get_default()
+
+    def setter(self, value):
+        self.__dict__.setdefault('_pending_detail', {})[name] = value
+
+    return property(getter, setter)
+
+
+for _detail_name in ScienceFrameDetail.DETAIL_FIELDS:
+    setattr(ScienceFrame, _detail_name, _detail_attribute(_detail_name))
+del _detail_name
+
+
+class FrameIndex(models.Model):
+    """
+    Narrow cross-type index of all RAW frames (bias, dark, flat, science).
+
+    One row per frame, written by FrameManager in the same transaction as the
+    frame itself. Existence checks, per-night counts and data volume queries
+    use this single compact table instead of querying the four frame tables.
+    """
+    FRAME_TYPE_CHOICES = [
+        ('SCIENCE', 'Science'),
+        ('BIAS', 'Bias'),
+        ('DARK', 'Dark'),
+        ('FLAT', 'Flat'),
+    ]
+
+    frame_type = models.CharField(max_length=10, choices=FRAME_TYPE_CHOICES)
+    frame_id = models.BigIntegerField(help_text="Primary key of the frame in its own table")
+    night = models.ForeignKey(Night, on_delete=models.CASCADE, related_name='frame_index')
+    unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name='frame_index')
+    original_filename = models.CharField(max_length=255)
+    file_size = models.BigIntegerField(null=True, blank=True, help_text="File size in bytes")
+    obstime = models.DateTimeField(null=True, blank=True, help_text="Observation timestamp (UTC)")
+    file_signature = models.CharField(max_length=64, blank=True,
+                                      help_text="size:mtime signature of the file at ingest time")
+
+    class Meta:
+        verbose_name = "Frame Index Entry"
+        verbose_name_plural = "Frame Index"
+        unique_together = [('frame_type', 'frame_id')]
+        indexes = [
+            models.Index(fields=['night', 'original_filename']),
+            models.Index(fields=['original_filename']),
+            models.Index(fields=['night', 'frame_type']),
+            models.Index(fields=['unit', 'night']),
+        ]
+
+    def __str__(self):
+        return f"{self.frame_type} {self.original_filename}"
+
+    @staticmethod
+    def frame_classes():
+        """Map frame_type codes to their frame model classes."""
+        return {
+            'SCIENCE': ScienceFrame,
+            'BIAS': BiasFrame,
+            'DARK': DarkFrame,
+            'FLAT': FlatFrame,
+        }
+
+    @classmethod
+    def frame_type_for(cls, frame):
+        """Return the frame_type code for a frame instance."""
+        for frame_type, frame_class in cls.frame_classes().items():
+            if isinstance(frame, frame_class):
+                return frame_type
+        return None
+
+    @staticmethod
+    def signature_for_path(file_path):
+        """Cheap file signature (size:mtime) used to detect changed files."""
+        try:
+            stat = os.stat(file_path)
+            return f"{stat.st_size}:{int(stat.st_mtime)}"
+        except OSError:
+            return ''
+
+    @classmethod
+    def register(cls, frame, file_path=None):
+        """Create or refresh the index row for a saved frame."""
+        frame_type = cls.frame_type_for(frame)
+        if frame_type is None or frame.pk is None:
+            return None
+
+        entry, _ = cls.objects.update_or_create(
+            frame_type=frame_type,
+            frame_id=frame.pk,
+            defaults={
+                'night_id': frame.night_id,
+                'unit_id': frame.unit_id,
+                'original_filename': frame.original_filename,
+                'file_size': frame.file_size,
+                'obstime': frame.obstime,
+                'file_signature': cls.signature_for_path(file_path or frame.file_path),
+            }
+        )
+        return entry
+
+    @classmethod
+    def remove(cls, frame):
+        """Delete the index row for a frame."""
+        frame_type = cls.frame_type_for(frame)
+        if frame_type is not None and frame.pk is not None:
+            cls.objects.filter(frame_type=frame_type, frame_id=frame.pk).delete()
+
+    @classmethod
+    def rebuild(cls, night=None, batch_size=5000):
+        """
+        Rebuild index rows from the frame tables.
+
+        Each file is stat()ed for its signature, exactly as register() does,
+        so rebuilt rows match live-registered ones (missing files get '').
+
+        Parameters:
+        -----------
+        night : Night, optional
+            Restrict the rebuild to one night (default: all nights)
+        batch_size : int
+            Rows per bulk_create call
+
+        Returns:
+        --------
+        int : Number of index rows written
+        """
+        written = 0
+        with transaction.atomic():
+            existing = cls.objects.all()
+            if night is not None:
+                existing = existing.filter(night=night)
+            existing.delete()
+
+            for frame_type, frame_class in cls.frame_classes().items():
+                frames = frame_class.objects.all()
+                if night is not None:
+                    frames = frames.filter(night=night)
+
+                rows = frames.values_list(
+                    'id', 'night_id', 'unit_id', 'original_filename', 'file_size', 'obstime', 'file_path'
+                ).iterator(chunk_size=batch_size)
+
+                batch = []
+                for frame_id, night_id, unit_id, filename, file_size, obstime, file_path in rows:
+                    batch.append(cls(
+                        frame_type=frame_type, frame_id=frame_id, night_id=night_id,
+                        unit_id=unit_id, original_filename=filename,
+                        file_size=file_size, obstime=obstime,
+                        file_signature=cls.signature_for_path(file_path),
+                    ))
+                    if len(batch) >= batch_size:
+                        cls.objects.bulk_create(batch)
+                        written += len(batch)
+                        batch = []
+                if batch:
+                    cls.objects.bulk_create(batch)
+                    written += len(batch)
+
+        return written
+
+
+class TileFilterSummary(models.Model):
+    """
+    Pre-event reference coverage per (tile, filter).
+
+    Maintained by ingest (refresh_pairs() after each batch, on tile
+    assignment and on frame deletion), so ToO follow-up can see which tiles
+    already have science frames, in which filters and how deep, without
+    aggregating the frame table. Test observations are not counted.
+    """
+    tile = models.ForeignKey(Tile, on_delete=models.CASCADE, related_name='filter_summaries')
+    filter = models.ForeignKey(Filter, on_delete=models.CASCADE, related_name='tile_summaries')
+    frame_count = models.IntegerField(default=0, help_text="Number of science frames")
+    total_exptime = models.FloatField(default=0, help_text="Total exposure time in seconds")
+    best_fwhm = models.FloatField(null=True, blank=True, help_text="Best (smallest) FWHM in arcsec")
+    first_obstime = models.DateTimeField(null=True, blank=True, help_text="First observation (UTC)")
+    last_obstime = models.DateTimeField(null=True, blank=True, help_text="Last observation (UTC)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Tile Filter Summary"
+        verbose_name_plural = "Tile Filter Summaries"
+        unique_together = [('tile', 'filter')]
+        indexes = [
+            models.Index(fields=['filter', 'last_obstime']),
+        ]
+
+    # Aggregates of the science frames of the (tile, filter) pairs in "pairs"
+    AGGREGATE_SQL = """
+        SELECT f.tile_id, f.filter_id, count(*) AS frame_count,
+               coalesce(sum(f.exptime), 0) AS total_exptime,
+               min(f.fwhm) FILTER (WHERE f.fwhm > 0) AS best_fwhm,
+               min(f.obstime) AS first_obstime, max(f.obstime) AS last_obstime
+        FROM survey_scienceframe f
+        JOIN pairs p ON f.tile_id = p.tile_id AND f.filter_id = p.filter_id
+        WHERE NOT f.is_test_observation
+        GROUP BY f.tile_id, f.filter_id
+    """
+
+    def __str__(self):
+        return f"{self.tile_id}/{self.filter_id}: {self.frame_count} frames"
+
+    @classmethod
+    def refresh_pairs(cls, pairs):
+        """
+        Recompute the summary rows of the given (tile_id, filter_id) pairs.
+
+        One statement: aggregates the frames of all pairs, upserts the
+        results and deletes rows whose frames are all gone.
+
+        Parameters:
+        -----------
+        pairs : iterable of (tile_id, filter_id)
+            Pairs touched by ingest or deletion (None tiles are ignored)
+
+        Returns:
+        --------
+        int : Number of pairs refreshed
+        """
+        pairs = {(tile_id, filter_id) for tile_id, filter_id in pairs
+                 if tile_id is not None and filter_id is not None}
+        if not pairs:
+            return 0
+        tile_ids, filter_ids = zip(*pairs)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH pairs AS (
+                    SELECT * FROM unnest(%s::bigint[], %s::bigint[]) AS p(tile_id, filter_id)
+                ),
+                agg AS ({cls.AGGREGATE_SQL}),
+                removed AS (
+                    DELETE FROM survey_tilefiltersummary s USING pairs p
+                    WHERE s.tile_id = p.tile_id AND s.filter_id = p.filter_id
+                      AND NOT EXISTS (
+                          SELECT 1 FROM agg a WHERE a.tile_id = s.tile_id AND a.filter_id = s.filter_id
+                      )
+                )
+                INSERT INTO survey_tilefiltersummary
+                    (tile_id, filter_id, frame_count, total_exptime, best_fwhm,
+                     first_obstime, last_obstime, updated_at)
+                SELECT tile_id, filter_id, frame_count, total_exptime, best_fwhm,
+                       first_obstime, last_obstime, now()
+                FROM agg
+                ON CONFLICT (tile_id, filter_id) DO UPDATE SET
+                    frame_count = EXCLUDED.frame_count,
+                    total_exptime = EXCLUDED.total_exptime,
+                    best_fwhm = EXCLUDED.best_fwhm,
+                    first_obstime = EXCLUDED.first_obstime,
+                    last_obstime = EXCLUDED.last_obstime,
+                    updated_at = EXCLUDED.updated_at
+            """, [list(tile_ids), list(filter_ids)])
+
+        return len(pairs)
+
+    # Pairs of deleted frames waiting for the commit, per thread (see refresh_pairs_on_commit)
+    _pending = threading.local()
+
+    @classmethod
+    def refresh_pairs_on_commit(cls, pairs):
+        """
+        Refresh pairs once, after the current transaction commits.
+
+        Deleting a night's frames calls this once per frame; the pairs are
+        collected and each distinct pair is re-aggregated in a single
+        refresh_pairs() call at commit time. Outside a transaction the
+        pairs are refreshed immediately.
+        """
+        if not connection.in_atomic_block:
+            return cls.refresh_pairs(pairs)
+
+        # A commit or rollback replaces run_on_commit, so a new list means a new hook is needed
+        hooks = connection.run_on_commit
+        pending = cls._pending.__dict__
+        if pending.get('hooks') is not hooks:
+            pairs_to_refresh = set()
+            pending['hooks'], pending['pairs'] = hooks, pairs_to_refresh
+            transaction.on_commit(lambda: cls.refresh_pairs(pairs_to_refresh))
+        pending['pairs'].update(pairs)
+        return 0
+
+    @classmethod
+    def refresh_for_frames(cls, frame_ids):
+        """Refresh the pairs of the given science frames (by primary key)."""
+        frame_ids = list(frame_ids)
+        if not frame_ids:
+            return 0
+        pairs = ScienceFrame.objects.filter(
+            pk__in=frame_ids, tile__isnull=False
+        ).values_list('tile_id', 'filter_id').distinct()
+        return cls.refresh_pairs(pairs)
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Recompute every summary row from the science frame table.
+
+        Returns:
+        --------
+        int : Number of summary rows written
+        """
+        with transaction.atomic():
+            cls.objects.all().delete()
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    WITH pairs AS (
+                        SELECT DISTINCT tile_id, filter_id FROM survey_scienceframe
+                        WHERE tile_id IS NOT NULL
+                    )
+                    INSERT INTO survey_tilefiltersummary
+                        (tile_id, filter_id, frame_count, total_exptime, best_fwhm,
+                         first_obstime, last_obstime, updated_at)
+                    SELECT tile_id, filter_id, frame_count, total_exptime, best_fwhm,
+                           first_obstime, last_obstime, now()
+                    FROM ({cls.AGGREGATE_SQL}) agg
+                """)
+                return cursor.rowcount
+
+    @classmethod
+    def reference_coverage(cls, tile_ids, cutoff=None, filters=None):
+        """
+        Reference coverage of a set of tiles before a cutoff time (one query).
+
+        Pairs observed entirely before the cutoff come straight from the
+        summary; only pairs with frames on both sides of it are aggregated
+        from the frame table.
+
+        Parameters:
+        -----------
+        tile_ids : iterable of int
+            Tiles to report (e.g. the credible region of a skymap)
+        cutoff : datetime, optional
+            Only frames observed before this time count (default: now)
+        filters : list of str, optional
+            Restrict to these filter names
+
+        Returns:
+        --------
+        dict : {tile_id: {filter_name: {frame_count, total_exptime,
+                best_fwhm, first_obstime, last_obstime}}}
+        """
+        tile_ids = [int(tile_id) for tile_id in tile_ids]
+        if not tile_ids:
+            return {}
+        cutoff = cutoff or timezone.now()
+
+        filter_names = dict(Filter.objects.values_list('id', 'name'))
+        filter_clause = ''
+        filter_params = []
+        if filters:
+            filter_ids = [fid for fid, name in filter_names.items() if name in set(filters)]
+            filter_clause = 'AND s.filter_id = ANY(%s)'
+            filter_params = [filter_ids]
+
+        sql = f"""
+            SELECT s.tile_id, s.filter_id, s.frame_count, s.total_exptime, s.best_fwhm,
+                   s.first_obstime, s.last_obstime
+            FROM survey_tilefiltersummary s
+            WHERE s.tile_id = ANY(%s) AND s.last_obstime < %s {filter_clause}
+            UNION ALL
+            SELECT f.tile_id, f.filter_id, count(*), coalesce(sum(f.exptime), 0),
+                   min(f.fwhm) FILTER (WHERE f.fwhm > 0), min(f.obstime), max(f.obstime)
+            FROM survey_tilefiltersummary s
+            JOIN survey_scienceframe f ON f.tile_id = s.tile_id AND f.filter_id = s.filter_id
+            WHERE s.tile_id = ANY(%s) AND s.last_obstime >= %s AND s.first_obstime < %s
+              AND f.obstime < %s AND NOT f.is_test_observation {filter_clause}
+            GROUP BY f.tile_id, f.filter_id
+        """
+        params = [tile_ids, cutoff, *filter_params, tile_ids, cutoff, cutoff, cutoff, *filter_params]
+
+        coverage = defaultdict(dict)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for tile_id, filter_id, count, exptime, fwhm, first, last in cursor.fetchall():
+                coverage[tile_id][filter_names.get(filter_id, str(filter_id))] = {
+                    'frame_count': count,
+                    'total_exptime': exptime,
+                    'best_fwhm': fwhm,
+                    'first_obstime': first,
+                    'last_obstime': last,
+                }
+        return dict(coverage)
+
+
+class ArchiveFolder(models.Model):
+    """
+    Directory of the raw-data archive as seen by the last inventory scan.
+
+    Unit directories (depth 0), their date folders (depth 1) and any nested
+    folders are stored with their mtime; refresh_inventory() only re-lists
+    directories whose mtime changed, so file discovery, missing-file checks
+    and folder validation read these tables instead of walking the disk.
+    """
+    BASE_PATH = "/lyman/data1/obsdata"
+    FITS_SUFFIXES = ('.fits', '.fits.fz')
+    DATE_FOLDER_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}|\d{8})(?:_(.+))?$')
+
+    path = models.CharField(max_length=500, unique=True)
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='children')
+    unit_name = models.CharField(max_length=20, help_text="Unit directory name (e.g. 7DT01)")
+    name = models.CharField(max_length=255)
+    depth = models.PositiveSmallIntegerField(help_text="0 = unit directory, 1 = date folder, 2+ = nested folder")
+    date = models.DateField(null=True, blank=True, help_text="Date of the (enclosing) date folder")
+    suffix = models.CharField(max_length=100, blank=True, help_text="Date folder suffix (e.g. gain2750, 2x2)")
+    mtime = models.FloatField(help_text="Directory mtime when it was last listed (0 = list again)")
+    file_count = models.IntegerField(default=0, help_text="FITS files directly in this folder")
+    total_bytes = models.BigIntegerField(default=0, help_text="Size of those FITS files in bytes")
+    scanned_at = models.DateTimeField(help_text="When the folder was last listed")
+
+    class Meta:
+        verbose_name = "Archive Folder"
+        verbose_name_plural = "Archive Folders"
+        indexes = [
+            models.Index(fields=['date', 'unit_name']),
+            models.Index(fields=['unit_name', 'depth']),
+        ]
+
+    def __str__(self):
+        return self.path
+
+    @classmethod
+    def parse_folder_name(cls, name):
+        """
+        Date and suffix of a date folder name.
+
+        Both YYYY-MM-DD[_suffix] and the older YYYYMMDD[_suffix] layouts
+        are recognized.
+
+        Returns:
+        --------
+        tuple : (datetime.date or None, suffix str)
+        """
+        match = cls.DATE_FOLDER_PATTERN.match(name)
+        if not match:
+            return None, ''
+        date_format = '%Y-%m-%d' if '-' in match.group(1) else '%Y%m%d'
+        try:
+            return datetime.datetime.strptime(match.group(1), date_format).date(), match.group(2) or ''
+        except ValueError:
+            return None, match.group(2) or ''
+
+    @classmethod
+    def refresh_inventory(cls, base_path=BASE_PATH, units=None, force=False):
+        """
+        Bring the inventory up to date with the archive.
+
+        The base directory is listed once; every known folder is stat'ed and
+        only those whose mtime changed (or that are new) are listed again.
+        Their FITS file rows are synced (added, removed, size/mtime updated)
+        and vanished folders are deleted with their files.
+
+        Parameters:
+        -----------
+        base_path : str
+            Archive root containing the 7DT* unit directories
+        units : iterable of str, optional
+            Restrict the refresh to these unit directories
+        force : bool
+            List every folder regardless of mtime
+
+        Returns:
+        --------
+        dict : Counts of folders checked/listed/removed and files added/removed/updated
+        """
+        start_time = time.time()
+        base_path = base_path.rstrip('/')
+        units = set(units) if units else None
+        stats = {'folders_checked': 0, 'folders_listed': 0, 'folders_removed': 0,
+                 'files_added': 0, 'files_removed': 0, 'files_updated': 0}
+
+        known = cls.objects.filter(path__startswith=f'{base_path}/')
+        if units:
+            known = known.filter(unit_name__in=units)
+        known = {folder.path: folder for folder in known}
+        children = defaultdict(list)
+        for folder in known.values():
+            children[folder.parent_id].append(folder)
+
+        try:
+            with os.scandir(base_path) as entries:
+                unit_entries = sorted(
+                    (entry.name, entry.path) for entry in entries
+                    if entry.name.startswith('7DT') and entry.is_dir()
+                    and (units is None or entry.name in units)
+                )
+        except OSError as e:
+            raise ValueError(f"Cannot list archive base directory {base_path}: {e}")
+
+        listed_units = {path for _, path in unit_entries}
+        for folder in children[None]:
+            if folder.path not in listed_units:
+                folder.delete()
+                stats['folders_removed'] += 1
+
+        queue = deque((path, name, None) for name, path in unit_entries)
+        while queue:
+            path, name, parent = queue.popleft()
+            folder = known.get(path)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                if folder is not None:
+                    folder.delete()
+                    stats['folders_removed'] += 1
+                continue
+
+            stats['folders_checked'] += 1
+            if folder is not None and not force and folder.mtime == mtime:
+                queue.extend((child.path, child.name, folder) for child in children[folder.id])
+                continue
+
+            try:
+                folder, subdirs = cls._list_folder(path, name, parent, folder, mtime, stats)
+            except OSError as e:
+                print(f"⚠️  Cannot list {path}: {e}")
+                continue
+            stats['folders_listed'] += 1
+
+            for child in children[folder.id]:
+                if child.name not in subdirs:
+                    child.delete()
+                    stats['folders_removed'] += 1
+            queue.extend((os.path.join(path, subdir), subdir, folder) for subdir in sorted(subdirs))
+
+        stats['elapsed'] = time.time() - start_time
+        return stats
+
+    @classmethod
+    def _list_folder(cls, path, name, parent, folder, mtime, stats):
+        """List one directory and sync its folder row and FITS file rows."""
+        files = {}
+        subdirs = set()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.add(entry.name)
+                elif entry.name.endswith(cls.FITS_SUFFIXES):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files[entry.name] = (stat.st_size, stat.st_mtime)
+
+        if parent is None:
+            depth, unit_name, date, suffix = 0, name, None, ''
+        elif parent.depth == 0:
+            depth, unit_name = 1, parent.unit_name
+            date, suffix = cls.parse_folder_name(name)
+        else:
+            depth, unit_name, date, suffix = parent.depth + 1, parent.unit_name, parent.date, parent.suffix
+
+        # A directory modified within the last seconds may still be filling
+        # up (and coarse mtimes would hide it): list it again next time
+        if time.time() - mtime < 2:
+            mtime = 0.0
+
+        with transaction.atomic():
+            is_new = folder is None
+            if is_new:
+                folder = cls(path=path)
+            folder.parent = parent
+            folder.unit_name = unit_name
+            folder.name = name
+            folder.depth = depth
+            folder.date = date
+            folder.suffix = suffix
+            folder.mtime = mtime
+            folder.file_count = len(files)
+            folder.total_bytes = sum(size for size, _ in files.values())
+            folder.scanned_at = timezone.now()
+            folder.save()
+
+            existing = {} if is_new else {entry.name: entry for entry in folder.files.all()}
+            gone = [entry.id for file_name, entry in existing.items() if file_name not in files]
+            if gone:
+                ArchiveFile.objects.filter(id__in=gone).delete()
+            changed = []
+            for file_name, (size, file_mtime) in files.items():
+                entry = existing.get(file_name)
+                if entry is not None and (entry.size != size or entry.mtime != file_mtime):
+                    entry.size, entry.mtime = size, file_mtime
+                    changed.append(entry)
+            ArchiveFile.objects.bulk_update(changed, ['size', 'mtime'], batch_size=5000)
+            ArchiveFile.objects.bulk_create(
+                [ArchiveFile(folder=folder, name=file_name, size=size, mtime=file_mtime)
+                 for file_name, (size, file_mtime) in files.items() if file_name not in existing],
+                batch_size=5000
+            )
+
+        stats['files_removed'] += len(gone)
+        stats['files_updated'] += len(changed)
+        stats['files_added'] += sum(1 for file_name in files if file_name not in existing)
+        return folder, subdirs
+
+    @classmethod
+    def date_folders(cls, date=None, unit_name=None):
+        """Date-level folders (depth 1), optionally for one date and/or unit."""
+        folders = cls.objects.filter(depth=1)
+        if date is not None:
+            folders = folders.filter(date=date)
+        if unit_name is not None:
+            folders = folders.filter(unit_name=unit_name)
+        return folders
+
+
+class ArchiveFile(models.Model):
+    """FITS file of the raw-data archive as seen by the last inventory scan."""
+    folder = models.ForeignKey(ArchiveFolder, on_delete=models.CASCADE, related_name='files')
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text="File size in bytes")
+    mtime = models.FloatField(help_text="File modification time (Unix seconds)")
+
+    class Meta:
+        verbose_name = "Archive File"
+        verbose_name_plural = "Archive Files"
+        unique_together = [('folder', 'name')]
+        indexes = [
+            models.Index(fields=['name']),
+        ]
+
+    def __str__(self):
+        return f"{self.folder.path}/{self.name}"
+
+    @classmethod
+    def paths(cls, date=None, unit_name=None, recursive=False, suffixes=ArchiveFolder.FITS_SUFFIXES):
+        """
+        Full paths of inventoried files, sorted.
+
+        Parameters:
+        -----------
+        date : datetime.date, optional
+            Only files of date folders of this date
+        unit_name : str, optional
+            Only files of this unit
+        recursive : bool
+            Include files in folders nested below the date folders
+        suffixes : tuple of str
+            Filename endings to include
+
+        Returns:
+        --------
+        list : Absolute file paths
+        """
+        files = cls.objects.filter(folder__depth__gte=1) if recursive else cls.objects.filter(folder__depth=1)
+        if date is not None:
+            files = files.filter(folder__date=date)
+        if unit_name is not None:
+            files = files.filter(folder__unit_name=unit_name)
+        suffix_filter = Q()
+        for suffix in suffixes:
+            suffix_filter |= Q(name__endswith=suffix)
+        files = files.filter(suffix_filter)
+        return sorted(
+            os.path.join(folder_path, name)
+            for folder_path, name in files.values_list('folder__path', 'name').iterator(chunk_size=20000)
+        )
+
+    # Science-file date taken from the 7DT*_YYYYMMDD_ part of the name, else the folder date
+    FILENAME_DATE_SQL = r"""coalesce(
+        regexp_replace(substring(f.name from '7DT[0-9]+_([0-9]{8})_'),
+                       '^([0-9]{4})([0-9]{2})([0-9]{2})$', '\1-\2-\3'),
+        to_char(d.date, 'YYYY-MM-DD'))"""
+
+    # File name not registered in the cross-type frame index
+    MISSING_SQL = "NOT EXISTS (SELECT 1 FROM survey_frameindex fi WHERE fi.original_filename = f.name)"
+
+    @staticmethod
+    def _like_escape(text):
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @classmethod
+    def _scope_sql(cls, start_date=None, end_date=None, dates=None, by_filename_date=False,
+                   exclude_patterns=(), exclude_names=(), suffix='.fits'):
+        """
+        WHERE clause and science condition over f (archive file) joined to d (date folder).
+
+        Returns:
+        --------
+        tuple : (where_sql, where_params, science_sql, science_params)
+        """
+        clauses = ["d.depth = 1", "f.name LIKE %s"]
+        params = ['%' + cls._like_escape(suffix)]
+        if by_filename_date:
+            date_expr, array_type = cls.FILENAME_DATE_SQL, 'text[]'
+        else:
+            date_expr, array_type = 'd.date', 'date[]'
+            clauses.append("d.date IS NOT NULL")
+        if dates:
+            clauses.append(f"{date_expr} = ANY(%s::{array_type})")
+            params.append([str(value) for value in dates])
+        if start_date:
+            clauses.append(f"{date_expr} >= %s")
+            params.append(str(start_date))
+        if end_date:
+            clauses.append(f"{date_expr} <= %s")
+            params.append(str(end_date))
+
+        science_sql = "lower(f.name) NOT LIKE ALL(%s::text[]) AND lower(f.name) <> ALL(%s::text[])"
+        science_params = [
+            [f'%{cls._like_escape(pattern.lower())}%' for pattern in exclude_patterns],
+            [name.lower() for name in exclude_names],
+        ]
+        return ' AND '.join(clauses), params, science_sql, science_params
+
+    @staticmethod
+    def _stream(sql, params, chunk_size=5000):
+        """Rows of a query through a server-side cursor, chunk_size at a time."""
+        with transaction.atomic(), connection.chunked_cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @classmethod
+    def folder_summary(cls, start_date=None, end_date=None, dates=None, by_filename_date=False,
+                       exclude_patterns=(), exclude_names=(), suffix='.fits'):
+        """
+        Per date folder file counts against the frame index, in one query.
+
+        Parameters:
+        -----------
+        start_date, end_date : str or datetime.date, optional
+            Inclusive date range (folder date, or the filename date with by_filename_date)
+        dates : iterable, optional
+            Specific dates instead of a range
+        exclude_patterns : iterable of str
+            Case-insensitive substrings marking non-science files
+        exclude_names : iterable of str
+            Case-insensitive exact names of non-science files
+        suffix : str
+            Filename ending of the files to consider
+
+        Returns:
+        --------
+        list : Dicts with folder_id, unit, folder_name, folder_date, folder_path,
+               total_files, science_files and missing_files, by unit and folder name
+        """
+        where_sql, params, science_sql, science_params = cls._scope_sql(
+            start_date, end_date, dates, by_filename_date, exclude_patterns, exclude_names, suffix
+        )
+        sql = f"""
+            SELECT d.id, d.unit_name, d.name, d.date, d.path, count(*),
+                   count(*) FILTER (WHERE {science_sql}),
+                   count(*) FILTER (WHERE {science_sql} AND {cls.MISSING_SQL})
+            FROM survey_archivefile f
+            JOIN survey_archivefolder d ON d.id = f.folder_id
+            WHERE {where_sql}
+            GROUP BY d.id
+            ORDER BY d.unit_name, d.name
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, science_params + science_params + params)
+            return [
+                {
+                    'folder_id': folder_id, 'unit': unit_name, 'folder_name': name,
+                    'folder_date': folder_date, 'folder_path': path, 'total_files': total,
+                    'science_files': science, 'missing_files': missing,
+                }
+                for folder_id, unit_name, name, folder_date, path, total, science, missing in cursor.fetchall()
+            ]
+
+    @classmethod
+    def missing_by_folder(cls, start_date=None, end_date=None, dates=None, by_filename_date=False,
+                          exclude_patterns=(), exclude_names=(), suffix='.fits', folder_ids=None):
+        """
+        Stream the science files that have no frame index row, one folder at a time.
+
+        An anti-join of the inventory against FrameIndex.original_filename
+        (both indexed), read through a server-side cursor, so memory holds
+        one folder's missing files at most. Arguments as for folder_summary();
+        folder_ids restricts the scan to those folders.
+
+        Yields:
+        -------
+        dict : unit, folder_name, folder_date, folder_path and missing (sorted filenames)
+        """
+        where_sql, params, science_sql, science_params = cls._scope_sql(
+            start_date, end_date, dates, by_filename_date, exclude_patterns, exclude_names, suffix
+        )
+        if folder_ids is not None:
+            where_sql += " AND d.id = ANY(%s)"
+            params.append(list(folder_ids))
+        sql = f"""
+            SELECT d.unit_name, d.name, d.date, d.path, f.name
+            FROM survey_archivefile f
+            JOIN survey_archivefolder d ON d.id = f.folder_id
+            WHERE {where_sql} AND {science_sql} AND {cls.MISSING_SQL}
+            ORDER BY d.path, f.name
+        """
+        current = None
+        for unit_name, folder_name, folder_date, path, name in cls._stream(sql, params + science_params):
+            if current is None or current['folder_path'] != path:
+                if current is not None:
+                    yield current
+                current = {'unit': unit_name, 'folder_name': folder_name, 'folder_date': folder_date,
+                           'folder_path': path, 'missing': []}
+            current['missing'].append(name)
+        if current is not None:
+            yield current
+
+    @classmethod
+    def date_mismatches(cls, start_date=None, end_date=None, dates=None, suffix='.fits'):
+        """
+        Stream files whose 7DT*_YYYYMMDD_ filename date differs from their folder date.
+
+        Yields:
+        -------
+        tuple : (filename, filename_date, folder_date, folder_name, folder_path) with ISO date strings
+        """
+        where_sql, params, _, _ = cls._scope_sql(start_date, end_date, dates, True, suffix=suffix)
+        sql = f"""
+            SELECT f.name, {cls.FILENAME_DATE_SQL} AS file_date, to_char(d.date, 'YYYY-MM-DD'), d.name, d.path
+            FROM survey_archivefile f
+            JOIN survey_archivefolder d ON d.id = f.folder_id
+            WHERE {where_sql} AND d.date IS NOT NULL
+              AND {cls.FILENAME_DATE_SQL} <> to_char(d.date, 'YYYY-MM-DD')
+            ORDER BY d.path, f.name
+        """
+        yield from cls._stream(sql, params)
+
+    @classmethod
+    def orphaned_frames(cls, start_date=None, end_date=None, dates=None):
+        """
+        Stream frame index rows whose file is no longer in the archive inventory.
+
+        Yields:
+        -------
+        tuple : (night date, unit name, frame_type, original_filename), by night and unit
+        """
+        clauses, params = ["TRUE"], []
+        if dates:
+            clauses.append("n.date = ANY(%s::date[])")
+            params.append([str(value) for value in dates])
+        if start_date:
+            clauses.append("n.date >= %s")
+            params.append(str(start_date))
+        if end_date:
+            clauses.append("n.date <= %s")
+            params.append(str(end_date))
+        sql = f"""
+            SELECT n.date, u.name, fi.frame_type, fi.original_filename
+            FROM survey_frameindex fi
+            JOIN survey_night n ON n.id = fi.night_id
+            JOIN facility_unit u ON u.id = fi.unit_id
+            WHERE {' AND '.join(clauses)}
+              AND NOT EXISTS (SELECT 1 FROM survey_archivefile af WHERE af.name = fi.original_filename)
+            ORDER BY n.date, u.name, fi.original_filename
+        """
+        yield from cls._stream(sql, params)
+
+
+class ArchiveLayout:
+    """
+    In-memory index of the archive's date folders: date → [(unit, folder, suffix, gain, binning)].
+
+    Built with one scandir pass over the archive root and its 7DT* unit
+    directories, then kept current by re-listing only the directories whose
+    mtime changed (new date folders change their unit directory's mtime).
+    Processes share one instance per root through shared(), so night
+    discovery, Night creation and the monitoring daemon stop listing the
+    same directories over and over. Nothing is stored in the database; the
+    file-level inventory is ArchiveFolder/ArchiveFile.
+    """
+    Entry = namedtuple('Entry', ['unit', 'folder', 'suffix', 'gain', 'binning', 'path'])
+
+    GAIN_PATTERN = re.compile(r'gain(\d+)')
+    BINNING_PATTERN = re.compile(r'(?:^|_)(\d)x\1(?:_|$)')
+
+    # Seconds within which shared() reuses the index without stat'ing again
+    MIN_REFRESH_INTERVAL = 5.0
+
+    _instances = {}
+
+    def __init__(self, base_path=ArchiveFolder.BASE_PATH):
+        self.base_path = base_path.rstrip('/')
+        self.base_mtime = None
+        self.unit_mtimes = {}      # unit name -> mtime when last listed
+        self.unsettled = set()     # directories listed within 2s of a change (list again)
+        self.unit_entries = {}     # unit name -> [Entry] of its date folders
+        self.by_date = {}
+        self.refreshed_at = 0.0
+
+    @classmethod
+    def shared(cls, base_path=ArchiveFolder.BASE_PATH, refresh=True):
+        """
+        Process-wide index for an archive root, refreshed incrementally.
+
+        Parameters:
+        -----------
+        base_path : str
+            Archive root containing the 7DT* unit directories
+        refresh : bool
+            Bring the index up to date first (skipped if it was refreshed
+            within MIN_REFRESH_INTERVAL seconds)
+
+        Returns:
+        --------
+        ArchiveLayout
+        """
+        key = base_path.rstrip('/')
+        layout = cls._instances.get(key)
+        if layout is None:
+            layout = cls._instances[key] = cls(key)
+            layout.refresh()
+        elif refresh and time.time() - layout.refreshed_at >= cls.MIN_REFRESH_INTERVAL:
+            layout.refresh()
+        return layout
+
+    @classmethod
+    def parse_suffix(cls, suffix):
+        """
+        Gain and binning encoded in a date folder suffix (e.g. '2x2_gain0').
+
+        Returns:
+        --------
+        tuple : (gain int or None, binning int or None)
+        """
+        gain_match = cls.GAIN_PATTERN.search(suffix)
+        binning_match = cls.BINNING_PATTERN.search(suffix)
+        return (
+            int(gain_match.group(1)) if gain_match else None,
+            int(binning_match.group(1)) if binning_match else None,
+        )
+
+    def refresh(self):
+        """
+        Re-list the root and the unit directories whose mtime changed.
+
+        Returns:
+        --------
+        dict : Units listed and removed, plus whether anything changed
+        """
+        stats = {'units_listed': 0, 'units_removed': 0, 'changed': False}
+        try:
+            base_mtime = os.stat(self.base_path).st_mtime
+            if base_mtime != self.base_mtime or self.base_path in self.unsettled:
+                with os.scandir(self.base_path) as entries:
+                    units = {
+                        entry.name: entry.path for entry in entries
+                        if entry.name.startswith('7DT') and entry.is_dir()
+                    }
+                self.base_mtime = base_mtime
+                self._settle(self.base_path, base_mtime)
+            else:
+                units = {name: os.path.join(self.base_path, name) for name in self.unit_mtimes}
+        except OSError:
+            units = {}
+            self.base_mtime = None
+
+        for name in set(self.unit_mtimes) - set(units):
+            del self.unit_mtimes[name]
+            self.unit_entries.pop(name, None)
+            self.unsettled.discard(name)
+            stats['units_removed'] += 1
+
+        for name, path in units.items():
+            try:
+                mtime = os.stat(path).st_mtime
+                if self.unit_mtimes.get(name) == mtime and name not in self.unsettled:
+                    continue
+                self.unit_entries[name] = self._list_unit(name, path)
+            except OSError:
+                self.unit_mtimes.pop(name, None)
+                self.unit_entries.pop(name, None)
+                stats['units_removed'] += 1
+                continue
+            self.unit_mtimes[name] = mtime
+            self._settle(name, mtime)
+            stats['units_listed'] += 1
+
+        if stats['units_listed'] or stats['units_removed']:
+            by_date = defaultdict(list)
+            for name in sorted(self.unit_entries):
+                for date, entry in self.unit_entries[name]:
+                    by_date[date].append(entry)
+            self.by_date = dict(by_date)
+            stats['changed'] = True
+        self.refreshed_at = time.time()
+        return stats
+
+    def _settle(self, key, mtime):
+        # A directory modified within the last seconds may still change
+        # without a visible mtime change (coarse mtimes): list it again next time
+        if time.time() - mtime < 2:
+            self.unsettled.add(key)
+        else:
+            self.unsettled.discard(key)
+
+    def _list_unit(self, unit_name, unit_path):
+        """Date folders of one unit directory as (date, Entry) pairs, by folder name."""
+        folders = []
+        with os.scandir(unit_path) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                date, suffix = ArchiveFolder.parse_folder_name(entry.name)
+                if date is None:
+                    continue
+                gain, binning = self.parse_suffix(suffix)
+                folders.append((date, self.Entry(unit_name, entry.name, suffix, gain, binning, entry.path)))
+        folders.sort(key=lambda item: item[1].folder)
+        return folders
+
+    def units(self):
+        """Unit directory names, sorted."""
+        return sorted(self.unit_entries)
+
+    def dates(self, unit_name=None):
+        """Dates with at least one folder (of the given unit), sorted."""
+        if unit_name is None:
+            return sorted(self.by_date)
+        return sorted({date for date, _ in self.unit_entries.get(unit_name, ())})
+
+    def folders(self, date, unit_name=None):
+        """Entries of the folders of one date (optionally one unit), by unit and folder name."""
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        entries = self.by_date.get(date, [])
+        if unit_name is not None:
+            entries = [entry for entry in entries if entry.unit == unit_name]
+        return list(entries)
+
+    def items(self, unit_name=None):
+        """All (date, Entry) pairs, by unit and folder name."""
+        for name in ([unit_name] if unit_name is not None else self.units()):
+            yield from self.unit_entries.get(name, ())
+
+    def latest_mtime(self):
+        """Most recent mtime of the root and unit directories (None if unreadable)."""
+        if self.base_mtime is None:
+            return None
+        return max([self.base_mtime] + list(self.unit_mtimes.values()))
+
+    @staticmethod
+    def preferred(entries):
+        """Main folder of a date: a gain2750 folder, else any gain folder, else the first."""
+        entries = list(entries)
+        for entry in entries:
+            if entry.gain == 2750:
+                return entry
+        for entry in entries:
+            if entry.gain is not None:
+                return entry
+        return entries[0] if entries else None
+
+
+class HeaderMappingReference:
     """Reference for NINA ↔ TCSpy header mapping."""
     
     # Fields that map directly between NINA and TCSpy
@@ -4289,7 +6464,12 @@ class FrameManager:
 
     @staticmethod
     def _calculate_data_completeness(frame):
-        """Calculate data completeness percentage for a frame."""
+        """
+        Calculate data completeness percentage for a frame.
+        
+        Several checked fields live on ScienceFrameDetail; fetch frames with
+        select_related('detail') before calling this in a loop.
+        """
         fields_to_check = [
             'object_ra', 'object_dec', 'airmass', 'ambient_temperature',
             'humidity', 'wind_speed', 'focuser_position', 'fwhm'
@@ -4507,61 +6687,369 @@ class FrameManager:
             connection.close()
     
     @staticmethod
-    def _process_batch_with_headers(file_paths, night):
+    def _process_batch_with_headers(file_paths, night):
+        """
+        Process a batch of files with complete FITS header parsing.
+        
+        This method creates frame objects and immediately parses their FITS headers
+        to ensure all ObservationFrame functionality is available.
+        """
+        results = {
+            'imported': 0,
+            'existing': 0,
+            'failed': 0,
+            'frame_types': defaultdict(int),
+            'errors': []
+        }
+        
+        # Build caches for efficient lookups
+        units_cache = {unit.name: unit for unit in Unit.objects.all()}
+        filters_cache = {filter.name: filter for filter in Filter.objects.all()}
+        tiles_cache = {tile.name: tile for tile in Tile.objects.all()}
+        
+        # ScienceFrameDetail rows collected here and inserted once per batch
+        detail_rows = []
+        
+        # New science frames without a Txxxxx tile, assigned by position below
+        untiled_ids = []
+        
+        # New science frames tiled from OBJECT, for the reference summary
+        tiled_ids = []
+        
+        # Process each file individually to ensure proper header parsing
+        for file_path in file_paths:
+            try:
+                filename = os.path.basename(file_path)
+                
+                # Quick existence check
+                if FrameManager._frame_exists(filename, night):
+                    results['existing'] += 1
+                    continue
+
+                frame = FrameManager._create_frame_with_headers(
+                    file_path, night, units_cache, filters_cache, tiles_cache,
+                    detail_rows=detail_rows
+                )
+                
+                if frame:
+                    results['imported'] += 1
+                    frame_type = type(frame).__name__.replace('Frame', '')
+                    results['frame_types'][frame_type] += 1
+                    if isinstance(frame, ScienceFrame):
+                        (tiled_ids if frame.tile_id is not None else untiled_ids).append(frame.pk)
+                else:
+                    results['failed'] += 1
+                    results['errors'].append(f"Failed to create frame for {file_path}")
+                    
+            except Exception as e:
+                results['failed'] += 1
+                results['errors'].append(f"Error processing {file_path}: {e}")
+        
+        # Write the cold header columns of all new science frames in one go
+        try:
+            with transaction.atomic():
+                ScienceFrameDetail.bulk_write(detail_rows)
+        except Exception as e:
+            results['errors'].append(f"Detail bulk write failed for {len(detail_rows)} frames, "
+                                     f"retrying row by row: {e}")
+            discarded = FrameManager._write_details_individually(detail_rows, results)
+            tiled_ids = [pk for pk in tiled_ids if pk not in discarded]
+            untiled_ids = [pk for pk in untiled_ids if pk not in discarded]
+        
+        # Assign tiles from header coordinates when OBJECT was not a tile name
+        if untiled_ids:
+            try:
+                with transaction.atomic():
+                    FrameManager.assign_tiles_by_position(ScienceFrame.objects.filter(pk__in=untiled_ids))
+            except Exception as e:
+                results['errors'].append(f"Positional tile assignment failed: {e}")
+        
+        # Keep the (tile, filter) reference coverage current
+        if tiled_ids:
+            try:
+                TileFilterSummary.refresh_for_frames(tiled_ids)
+            except Exception as e:
+                results['errors'].append(f"Reference summary refresh failed: {e}")
+        
+        # Add the new footprints to the coverage maps once the batch is committed
+        science_ids = tiled_ids + untiled_ids
+        if science_ids:
+            transaction.on_commit(lambda: FrameManager._update_coverage_after_commit(science_ids))
+        
+        return results
+    
+    @staticmethod
+    def _write_details_individually(detail_rows, results):
+        """
+        Fallback for a failed detail bulk write: write the rows one at a time.
+        
+        A science frame whose detail row cannot be written is deleted together
+        with its FrameIndex entry and counted as failed instead of imported,
+        so the next ingest picks the file up again.
+        
+        Returns:
+        --------
+        set : Primary keys of the discarded frames
+        """
+        discarded = set()
+        for detail in detail_rows:
+            try:
+                with transaction.atomic():
+                    ScienceFrameDetail.bulk_write([detail])
+            except Exception as e:
+                discarded.add(detail.frame_id)
+                results['errors'].append(f"Detail write failed for frame {detail.frame_id}: {e}")
+        
+        if discarded:
+            with transaction.atomic():
+                FrameIndex.objects.filter(frame_type='SCIENCE', frame_id__in=discarded).delete()
+                ScienceFrame.objects.filter(pk__in=discarded).delete()
+            results['imported'] -= len(discarded)
+            results['failed'] += len(discarded)
+            results['frame_types']['Science'] -= len(discarded)
+        return discarded
+    
+    @staticmethod
+    def assign_tiles_by_position(frames=None, batch_size=20000):
+        """
+        Assign tiles to science frames from their coordinates (vectorized).
+        
+        Uses the target coordinates from the header (OBJCTRA_/OBJCTDE_),
+        falling back to the telescope pointing, and Tile.locate() to find the
+        covering tile for all frames at once. Frames outside every tile are
+        left unchanged.
+        
+        Parameters:
+        -----------
+        frames : QuerySet, optional
+            Science frames to consider (default: all frames without a tile)
+        batch_size : int
+            Frames located per step
+            
+        Returns:
+        --------
+        int : Number of frames that received a tile
+        """
+        if frames is None:
+            frames = ScienceFrame.objects.all()
+        
+        rows = frames.filter(tile__isnull=True).annotate(
+            pos_ra=Coalesce('object_ra', 'unit_ra'),
+            pos_dec=Coalesce('object_dec', 'unit_dec'),
+        ).filter(pos_ra__isnull=False, pos_dec__isnull=False).values_list('id', 'pos_ra', 'pos_dec')
+        
+        assigned = 0
+        touched_tiles = set()
+        assigned_ids = []
+        batch = []
+        
+        def flush(batch):
+            data = np.array(batch, dtype=float)
+            tile_ids = Tile.locate(data[:, 1], data[:, 2])
+            frame_ids = data[:, 0].astype(np.int64)
+            found = tile_ids >= 0
+            for tile_id in np.unique(tile_ids[found]):
+                ids = frame_ids[found & (tile_ids == tile_id)].tolist()
+                ScienceFrame.objects.filter(pk__in=ids).update(tile_id=int(tile_id))
+                touched_tiles.add(int(tile_id))
+                assigned_ids.extend(ids)
+            return int(found.sum())
+        
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                assigned += flush(batch)
+                batch = []
+        if batch:
+            assigned += flush(batch)
+        
+        if touched_tiles:
+            Tile.mark_statistics_dirty(touched_tiles)
+            TileFilterSummary.refresh_for_frames(assigned_ids)
+
+        return assigned
+
+    @staticmethod
+    def link_frames_to_targets(night=None, positional=True, refresh_coordinates=True):
+        """
+        Link unlinked science frames to tiles and targets with set-based SQL.
+
+        1. OBJECT equal to a tile name sets tile (one UPDATE ... FROM).
+        2. OBJECT equal to a target name sets target (one UPDATE ... FROM).
+        3. Remaining frames with neither are matched by position: a Q3C join
+           finds frames near any target, Target.locate() keeps those inside
+           a target-centred field of view, and one UPDATE applies them.
+        4. Coordinates of the targets linked here (target-centred only) are
+           set to the median frame position in one UPDATE.
+
+        Parameters:
+        -----------
+        night : Night, optional
+            Restrict to one night (default: all frames)
+        positional : bool
+            Run the Q3C positional fallback
+        refresh_coordinates : bool
+            Refresh target coordinates from their frames
+
+        Returns:
+        --------
+        dict : linked_tiles, linked_targets, linked_by_position, coordinates_updated
+        """
+        stats = {'linked_tiles': 0, 'linked_targets': 0, 'linked_by_position': 0, 'coordinates_updated': 0}
+        night_sql = 'AND f.night_id = %s' if night is not None else ''
+        night_params = [night.id] if night is not None else []
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE survey_scienceframe f SET tile_id = t.id
+                FROM survey_tile t
+                WHERE f.tile_id IS NULL AND f.target_id IS NULL
+                  AND f.object_name = t.name {night_sql}
+                RETURNING f.id, f.tile_id
+            """, night_params)
+            tile_rows = cursor.fetchall()
+            stats['linked_tiles'] = len(tile_rows)
+
+            cursor.execute(f"""
+                UPDATE survey_scienceframe f SET target_id = t.id
+                FROM survey_target t
+                WHERE f.target_id IS NULL
+                  AND f.object_name = t.name {night_sql}
+                RETURNING f.target_id
+            """, night_params)
+            touched_targets = {row[0] for row in cursor.fetchall()}
+            stats['linked_targets'] = cursor.rowcount
+
+            if positional:
+                linked = FrameManager._link_targets_by_position(cursor, night_sql, night_params)
+                stats['linked_by_position'] = sum(len(ids) for ids in linked.values())
+                touched_targets.update(linked)
+
+            if refresh_coordinates and touched_targets:
+                stats['coordinates_updated'] = FrameManager._refresh_target_coordinates(
+                    cursor, sorted(touched_targets)
+                )
+
+        if tile_rows:
+            Tile.mark_statistics_dirty({tile_id for _, tile_id in tile_rows})
+            TileFilterSummary.refresh_for_frames([frame_id for frame_id, _ in tile_rows])
+        Target.mark_statistics_dirty(touched_targets)
+
+        return stats
+
+    @staticmethod
+    def _link_targets_by_position(cursor, night_sql, night_params):
         """
-        Process a batch of files with complete FITS header parsing.
-        
-        This method creates frame objects and immediately parses their FITS headers
-        to ensure all ObservationFrame functionality is available.
+        Positional fallback of link_frames_to_targets().
+
+        Returns:
+        --------
+        dict : {target_id: [frame_id, ...]} of the frames linked
         """
-        results = {
-            'imported': 0,
-            'existing': 0,
-            'failed': 0,
-            'frame_types': defaultdict(int),
-            'errors': []
-        }
-        
-        # Build caches for efficient lookups
-        units_cache = {unit.name: unit for unit in Unit.objects.all()}
-        filters_cache = {filter.name: filter for filter in Filter.objects.all()}
-        tiles_cache = {tile.name: tile for tile in Tile.objects.all()}
-        
-        # Process each file individually to ensure proper header parsing
-        for file_path in file_paths:
-            try:
-                filename = os.path.basename(file_path)
-                
-                # Quick existence check
-                if FrameManager._frame_exists(filename, night):
-                    results['existing'] += 1
-                    continue
+        centered = dict(Target.objects.filter(observation_strategy='centered').values_list(
+            'id', Greatest('fov_width', 'fov_height')
+        ))
+        if not centered:
+            return {}
+        # Circumscribed radius of the largest field of view
+        radius = max(centered.values()) / np.sqrt(2.0)
+
+        q3c.ensure_extension()
+        cursor.execute(f"""
+            SELECT f.id, coalesce(f.object_ra, f.unit_ra), coalesce(f.object_dec, f.unit_dec), t.id
+            FROM survey_scienceframe f
+            JOIN survey_target t ON q3c_join(
+                coalesce(f.object_ra, f.unit_ra), coalesce(f.object_dec, f.unit_dec), t.ra, t.dec, %s
+            )
+            WHERE f.target_id IS NULL AND f.tile_id IS NULL
+              AND t.observation_strategy = 'centered' {night_sql}
+        """, [radius] + night_params)
+        rows = cursor.fetchall()
+        if not rows:
+            return {}
+
+        # Exact footprint test on the (frame, centered target) pairs of the join only,
+        # so survey or other targets overlapping a frame can never win it
+        data = np.array(rows, dtype=float)
+        frame_ids, first, point_idx = np.unique(data[:, 0], return_index=True, return_inverse=True)
+        index = Target.polygon_index()
+        position = {target_id: i for i, target_id in enumerate(index.ids.tolist())}
+        polygon_idx = np.array([position.get(int(target_id), -1) for target_id in data[:, 3]], dtype=np.int64)
+        known = polygon_idx >= 0
+
+        points = np.atleast_2d(radec_to_xyz(data[first, 1], data[first, 2]))
+        target_ids = np.full(len(frame_ids), SphericalPolygonIndex.MISSING, dtype=np.int64)
+        index.resolve_pairs(points, point_idx.ravel()[known], polygon_idx[known], target_ids)
+        keep = target_ids != SphericalPolygonIndex.MISSING
+        if not keep.any():
+            return {}
+
+        frame_ids = frame_ids[keep].astype(np.int64)
+        target_ids = target_ids[keep]
+        cursor.execute("""
+            UPDATE survey_scienceframe f SET target_id = m.target_id
+            FROM unnest(%s::bigint[], %s::bigint[]) AS m(frame_id, target_id)
+            WHERE f.id = m.frame_id AND f.target_id IS NULL
+        """, [frame_ids.tolist(), target_ids.tolist()])
+
+        linked = defaultdict(list)
+        for frame_id, target_id in zip(frame_ids.tolist(), target_ids.tolist()):
+            linked[target_id].append(frame_id)
+        return linked
 
-                frame = FrameManager._create_frame_with_headers(
-                    file_path, night, units_cache, filters_cache, tiles_cache
-                )
-                
-                if frame:
-                    results['imported'] += 1
-                    frame_type = type(frame).__name__.replace('Frame', '')
-                    results['frame_types'][frame_type] += 1
-                else:
-                    results['failed'] += 1
-                    results['errors'].append(f"Failed to create frame for {file_path}")
-                    
-            except Exception as e:
-                results['failed'] += 1
-                results['errors'].append(f"Error processing {file_path}: {e}")
-        
-        return results
+    @staticmethod
+    def _refresh_target_coordinates(cursor, target_ids):
+        """
+        Move target-centred targets to the median position of their frames.
+
+        RA is averaged as an offset from the current target RA so medians
+        across RA=0 stay correct. Footprint polygons are regenerated for the
+        targets that moved.
+
+        Returns:
+        --------
+        int : Number of targets updated
+        """
+        cursor.execute("""
+            UPDATE survey_target t
+            SET ra = mod((t.ra + m.dra)::numeric + 360, 360)::double precision, dec = m.dec
+            FROM (
+                SELECT f.target_id,
+                       percentile_cont(0.5) WITHIN GROUP (
+                           ORDER BY (mod((f.object_ra - tt.ra)::numeric + 540, 360) - 180)::double precision
+                       ) AS dra,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY f.object_dec) AS dec
+                FROM survey_scienceframe f
+                JOIN survey_target tt ON tt.id = f.target_id
+                WHERE f.target_id = ANY(%s)
+                  AND f.object_ra IS NOT NULL AND f.object_dec IS NOT NULL
+                GROUP BY f.target_id
+            ) m
+            WHERE t.id = m.target_id AND t.observation_strategy = 'centered'
+              AND (abs(m.dra) > 1e-6 OR abs(t.dec - m.dec) > 1e-6)
+            RETURNING t.id
+        """, [list(target_ids)])
+        moved = [row[0] for row in cursor.fetchall()]
+
+        if moved:
+            targets = list(Target.objects.filter(id__in=moved))
+            for target in targets:
+                target._generate_fov_polygon()
+            Target.objects.bulk_update(targets, ['vertices', 'area_sq_deg'])
+            Target._polygon_index = None
+        return len(moved)
     
     @staticmethod
-    def _create_frame_with_headers(file_path, night, units_cache, filters_cache, tiles_cache):
+    def _create_frame_with_headers(file_path, night, units_cache, filters_cache, tiles_cache,
+                                   detail_rows=None):
         """
         Create a single frame object with complete FITS header parsing.
         
         This method extracts all possible information from both filename and
         FITS header to populate the ObservationFrame model completely.
+        
+        When detail_rows is given, the ScienceFrameDetail row is appended to it
+        for a later bulk insert instead of being saved immediately.
         """
         filename = os.path.basename(file_path)
         
@@ -4586,6 +7074,11 @@ class FrameManager:
 
             frame = frame_class.objects.create(**frame_data)
 
+            if isinstance(frame, ScienceFrame):
+                # Brand-new frame: no detail row to look up yet
+                frame._detail_is_new = True
+                frame._defer_detail = detail_rows is not None
+
             # Explicitly assign JD/MJD after creation
             if jd is not None:
                 frame.jd = jd
@@ -4618,6 +7111,14 @@ class FrameManager:
                 frame.save()
                 print(f"  ⚠️ Header parsing failed for {filename}: {e}")
             
+            if isinstance(frame, ScienceFrame) and frame._defer_detail:
+                detail = frame.build_detail()
+                if detail is not None:
+                    detail_rows.append(detail)
+            
+            # Keep the cross-type index in step with the frame tables
+            FrameIndex.register(frame, file_path)
+            
             return frame
             
         except Exception as e:
@@ -5090,12 +7591,10 @@ class FrameManager:
         """
         Quick check if frame already exists in database.
         
-        Checks all frame types for the given filename and night.
+        Uses the cross-type FrameIndex so a single indexed lookup covers
+        all frame types for the given filename and night.
         """
-        for frame_class in [ScienceFrame, BiasFrame, DarkFrame, FlatFrame]:
-            if frame_class.objects.filter(original_filename=filename, night=night).exists():
-                return True
-        return False
+        return FrameIndex.objects.filter(original_filename=filename, night=night).exists()
     
     @staticmethod
     def _get_unit_name(filename, file_path):
@@ -5168,6 +7667,347 @@ class FrameManager:
         }
         return frame_class_map.get(frame_type, ScienceFrame)
     
+    @staticmethod
+    def is_partitioned(table_name):
+        """Check whether a frame table is a declaratively partitioned table."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+                [table_name]
+            )
+            return cursor.fetchone() is not None
+    
+    @staticmethod
+    def month_partition_name(table_name, month_start):
+        """Name of the monthly partition holding month_start (e.g. survey_scienceframe_p2025_06)."""
+        return f"{table_name}_p{month_start.year:04d}_{month_start.month:02d}"
+    
+    @staticmethod
+    def ensure_month_partitions(table_name, start_date, months_ahead=2):
+        """
+        Create monthly obstime partitions from start_date's month onward.
+        
+        Does nothing when the table is not partitioned, so callers can use it
+        unconditionally before importing frames. Concurrent callers are
+        serialized with a transaction-level advisory lock on the table name.
+        Rows of a new month that already landed in the DEFAULT partition are
+        moved into the new partition, which PostgreSQL would otherwise refuse
+        to create.
+        
+        Parameters:
+        -----------
+        table_name : str
+            Partitioned frame table (e.g. 'survey_scienceframe')
+        start_date : date
+            First month that must have a partition
+        months_ahead : int
+            Number of additional months to create after start_date's month
+        
+        Returns:
+        --------
+        list : Names of partitions that were created
+        """
+        if not FrameManager.is_partitioned(table_name):
+            return []
+        
+        created = []
+        default_partition = f"{table_name}_default"
+        month_start = datetime.date(start_date.year, start_date.month, 1)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [table_name])
+            cursor.execute("SELECT to_regclass(%s)", [default_partition])
+            has_default = cursor.fetchone()[0] is not None
+            
+            for _ in range(months_ahead + 1):
+                if month_start.month == 12:
+                    next_month = datetime.date(month_start.year + 1, 1, 1)
+                else:
+                    next_month = datetime.date(month_start.year, month_start.month + 1, 1)
+                
+                partition = FrameManager.month_partition_name(table_name, month_start)
+                bounds = f"FROM ('{month_start.isoformat()}') TO ('{next_month.isoformat()}')"
+                cursor.execute("SELECT to_regclass(%s)", [partition])
+                if cursor.fetchone()[0] is not None:
+                    month_start = next_month
+                    continue
+                
+                in_default = False
+                if has_default:
+                    cursor.execute(
+                        f'SELECT EXISTS (SELECT 1 FROM "{default_partition}" '
+                        f'WHERE obstime >= %s AND obstime < %s)',
+                        [month_start, next_month]
+                    )
+                    in_default = cursor.fetchone()[0]
+                
+                if in_default:
+                    # Move the month out of DEFAULT, then attach it as its own partition
+                    cursor.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{partition}" '
+                        f'(LIKE "{table_name}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+                    )
+                    cursor.execute(
+                        f'WITH moved AS (DELETE FROM "{default_partition}" '
+                        f'WHERE obstime >= %s AND obstime < %s RETURNING *) '
+                        f'INSERT INTO "{partition}" SELECT * FROM moved',
+                        [month_start, next_month]
+                    )
+                    cursor.execute(f'ALTER TABLE "{table_name}" ATTACH PARTITION "{partition}" FOR VALUES {bounds}')
+                else:
+                    cursor.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{partition}" PARTITION OF "{table_name}" FOR VALUES {bounds}'
+                    )
+                created.append(partition)
+                month_start = next_month
+        return created
+    
+    # Index columns needed by ingest itself (FK lookups, cascades, duplicate checks)
+    ESSENTIAL_INDEX_COLUMNS = {
+        'night_id', 'unit_id', 'filter_id', 'tile_id', 'target_id',
+        'original_filename', 'obstime',
+    }
+    
+    @staticmethod
+    def frame_tables():
+        """Database table names of the four frame models."""
+        return [cls._meta.db_table for cls in (ScienceFrame, BiasFrame, DarkFrame, FlatFrame)]
+    
+    @staticmethod
+    def secondary_indexes(table_name, non_essential_only=True):
+        """
+        List secondary indexes of a frame table.
+        
+        Indexes backing primary key / unique constraints are never returned.
+        With non_essential_only, indexes whose columns are all in
+        ESSENTIAL_INDEX_COLUMNS are skipped as well.
+        
+        Returns:
+        --------
+        list : (index_name, index_definition) tuples
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT i.relname, pg_get_indexdef(i.oid),
+                       ARRAY(SELECT a.attname FROM unnest(x.indkey) k
+                             JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k)
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                JOIN pg_class t ON t.oid = x.indrelid
+                WHERE t.relname = %s
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+                ORDER BY i.relname
+            """, [table_name])
+            rows = cursor.fetchall()
+        
+        indexes = []
+        for name, definition, columns in rows:
+            if non_essential_only and columns and set(columns) <= FrameManager.ESSENTIAL_INDEX_COLUMNS:
+                continue
+            indexes.append((name, definition))
+        return indexes
+    
+    @staticmethod
+    def drop_secondary_indexes(state_path, tables=None):
+        """
+        Drop non-essential secondary indexes before a bulk load.
+        
+        Index definitions are written to state_path before anything is
+        dropped, so an interrupted load can always be restored with
+        rebuild_secondary_indexes(). An existing state file means a previous
+        bulk load has not finished; its indexes are kept and merged.
+        
+        Returns:
+        --------
+        int : Number of indexes dropped
+        """
+        tables = tables or FrameManager.frame_tables()
+        
+        state = {'indexes': []}
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+        known = {entry['name'] for entry in state['indexes']}
+        
+        to_drop = []
+        for table_name in tables:
+            for name, definition in FrameManager.secondary_indexes(table_name):
+                if name not in known:
+                    to_drop.append({'table': table_name, 'name': name, 'definition': definition})
+        
+        state['indexes'].extend(to_drop)
+        state['updated_at'] = timezone.now().isoformat()
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with open(state_path, 'w') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        with connection.cursor() as cursor:
+            for entry in to_drop:
+                cursor.execute(f'DROP INDEX IF EXISTS "{entry["name"]}"')
+        
+        return len(to_drop)
+    
+    # CREATE [UNIQUE] INDEX name ON [ONLY] table rest — as produced by pg_get_indexdef()
+    INDEX_DEFINITION_PATTERN = re.compile(r'^CREATE (UNIQUE )?INDEX (\S+) ON (?:ONLY )?(\S+) (.*)$', re.S)
+    
+    @staticmethod
+    def _index_validity(cursor, index_name):
+        """indisvalid of an index, or None if it does not exist."""
+        cursor.execute(
+            "SELECT x.indisvalid FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+            "WHERE i.relname = %s", [index_name]
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _build_partitioned_index(cursor, entry):
+        """
+        Recreate an index of a partitioned table without blocking writes.
+        
+        The parent index is created ON ONLY the parent (invalid and empty),
+        each partition's index is built CONCURRENTLY and attached; the parent
+        index becomes valid once every partition has its index attached.
+        Partition indexes left by an interrupted rebuild are reused if valid.
+        """
+        match = FrameManager.INDEX_DEFINITION_PATTERN.match(entry['definition'])
+        if not match:
+            raise ValueError(f"Cannot parse index definition: {entry['definition']}")
+        unique, _, table, rest = match.groups()
+        unique = unique or ''
+        
+        if FrameManager._index_validity(cursor, entry['name']) is None:
+            cursor.execute(f'CREATE {unique}INDEX "{entry["name"]}" ON ONLY {table} {rest}')
+        
+        cursor.execute("""
+            SELECT c.relname FROM pg_inherits h
+            JOIN pg_class c ON c.oid = h.inhrelid
+            WHERE h.inhparent = %s::regclass
+            ORDER BY c.relname
+        """, [entry['table']])
+        for (partition,) in cursor.fetchall():
+            digest = hashlib.md5(f"{entry['name']}:{partition}".encode()).hexdigest()[:8]
+            child = f"{entry['name'][:50]}_{digest}"
+            if FrameManager._index_validity(cursor, child) is False:
+                cursor.execute(f'DROP INDEX IF EXISTS "{child}"')
+            cursor.execute(
+                f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS "{child}" ON "{partition}" {rest}'
+            )
+            cursor.execute(f'ALTER INDEX "{entry["name"]}" ATTACH PARTITION "{child}"')
+    
+    @staticmethod
+    def rebuild_secondary_indexes(state_path, progress_callback=None):
+        """
+        Recreate indexes recorded by drop_secondary_indexes() and ANALYZE.
+        
+        Indexes are built CONCURRENTLY; on partitioned tables each partition's
+        index is built concurrently and attached to the parent index (see
+        _build_partitioned_index). Invalid leftovers of an interrupted build
+        are dropped and rebuilt. The state file is removed only once every
+        recorded index exists and is valid.
+        
+        Returns:
+        --------
+        int : Number of indexes rebuilt
+        
+        Raises:
+        -------
+        RuntimeError : Some indexes are still missing or invalid (state file kept)
+        """
+        if not os.path.exists(state_path):
+            return 0
+        
+        with open(state_path) as f:
+            state = json.load(f)
+        
+        rebuilt = 0
+        tables = set()
+        with connection.cursor() as cursor:
+            for i, entry in enumerate(state['indexes'], 1):
+                tables.add(entry['table'])
+                
+                partitioned = FrameManager.is_partitioned(entry['table'])
+                validity = FrameManager._index_validity(cursor, entry['name'])
+                if validity:
+                    continue
+                # An invalid parent index of a partitioned table is completed by attaching
+                if validity is False and not partitioned:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{entry["name"]}"')
+                
+                start_time = time.time()
+                if partitioned:
+                    FrameManager._build_partitioned_index(cursor, entry)
+                else:
+                    cursor.execute(re.sub(
+                        r'^CREATE (UNIQUE )?INDEX ', r'CREATE \1INDEX CONCURRENTLY ', entry['definition']
+                    ))
+                rebuilt += 1
+                
+                if progress_callback:
+                    progress_callback(i, len(state['indexes']), entry['name'], time.time() - start_time)
+            
+            for table_name in sorted(tables):
+                cursor.execute(f'ANALYZE "{table_name}"')
+            
+            not_valid = [
+                entry['name'] for entry in state['indexes']
+                if not FrameManager._index_validity(cursor, entry['name'])
+            ]
+        
+        if not_valid:
+            raise RuntimeError(f"Indexes missing or invalid after rebuild: {', '.join(not_valid)}")
+        os.remove(state_path)
+        return rebuilt
+    
+    @staticmethod
+    def index_usage(tables=None):
+        """
+        Index usage statistics from pg_stat_user_indexes for the frame tables.
+        
+        pg_stat_user_indexes has no rows for the indexes of a partitioned
+        table, so each index is expanded to its partition indexes with
+        pg_partition_tree() and their scans, tuples and sizes are summed
+        per parent index (a plain index is its own single leaf).
+        
+        Returns:
+        --------
+        list : dicts with table, index, scans, tuples_read, size_bytes, essential
+        """
+        tables = tables or FrameManager.frame_tables()
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT t.relname, i.relname,
+                       coalesce(sum(s.idx_scan), 0) AS scans,
+                       coalesce(sum(s.idx_tup_read), 0),
+                       coalesce(sum(pg_relation_size(tree.relid)), 0) AS size_bytes,
+                       EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                JOIN pg_class t ON t.oid = x.indrelid
+                CROSS JOIN LATERAL pg_partition_tree(x.indexrelid) tree
+                LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = tree.relid
+                WHERE t.relname = ANY(%s)
+                GROUP BY t.relname, i.relname, x.indexrelid
+                ORDER BY scans, size_bytes DESC
+            """, [list(tables)])
+            rows = cursor.fetchall()
+        
+        droppable = {
+            name for table_name in tables
+            for name, _ in FrameManager.secondary_indexes(table_name)
+        }
+        return [{
+            'table': table_name,
+            'index': index_name,
+            'scans': scans,
+            'tuples_read': tuples_read,
+            'size_bytes': size_bytes,
+            'constraint': is_constraint,
+            'essential': index_name not in droppable,
+        } for table_name, index_name, scans, tuples_read, size_bytes, is_constraint in rows]
+    
     @staticmethod
     def quick_stats():
         """
@@ -5175,12 +8015,10 @@ class FrameManager:
         
         Returns count of each frame type and total frames.
         """
-        stats = {
-            'science': ScienceFrame.objects.count(),
-            'bias': BiasFrame.objects.count(),
-            'dark': DarkFrame.objects.count(),
-            'flat': FlatFrame.objects.count(),
-        }
+        stats = {'science': 0, 'bias': 0, 'dark': 0, 'flat': 0}
+        counts = FrameIndex.objects.values('frame_type').annotate(count=Count('id'))
+        for row in counts:
+            stats[row['frame_type'].lower()] = row['count']
         stats['total'] = sum(stats.values())
         return stats
     
@@ -5219,8 +8057,12 @@ class FrameManager:
                 print(f"  ... and {len(duplicates) - 5} more")
         else:
             # Actually delete duplicates
-            for frame in duplicates:
-                frame.delete()
+            with transaction.atomic():
+                FrameManager.remove_from_coverage_maps(ScienceFrame.objects.filter(
+                    pk__in=[frame.pk for frame in duplicates if isinstance(frame, ScienceFrame)]
+                ))
+                for frame in duplicates:
+                    frame.delete()
             print(f"🗑️ Deleted {len(duplicates)} duplicate frames")
         
         return len(duplicates)
@@ -5239,7 +8081,16 @@ class FrameManager:
             'validation_passed': True
         }
         
-        for frame_class in [ScienceFrame, BiasFrame, DarkFrame, FlatFrame]:
+        # Only sample frame types that actually exist for this night
+        present_types = set(
+            FrameIndex.objects.filter(night=night)
+            .values_list('frame_type', flat=True).distinct()
+        )
+        
+        for frame_type, frame_class in FrameIndex.frame_classes().items():
+            if frame_type not in present_types:
+                continue
+            
             frames = frame_class.objects.filter(night=night)[:sample_size]
             
             for frame in frames:
@@ -5599,54 +8450,300 @@ class FrameManager:
             'mjd': mjd,
         }
 
+    @staticmethod
+    def mark_statistics_dirty(frames):
+        """
+        Flag the cached statistics touched by the given frames as dirty.
+        
+        Marks the night, unit and (for science frames) tile and target of each
+        frame so the recompute jobs pick them up on their next pass.
+        """
+        if isinstance(frames, ObservationFrame):
+            frames = [frames]
+        
+        night_ids, unit_ids, tile_ids, target_ids = set(), set(), set(), set()
+        for frame in frames:
+            night_ids.add(frame.night_id)
+            unit_ids.add(frame.unit_id)
+            tile_ids.add(getattr(frame, 'tile_id', None))
+            target_ids.add(getattr(frame, 'target_id', None))
+        
+        Night.mark_statistics_dirty(night_ids)
+        UnitStatistics.mark_statistics_dirty(unit_ids)
+        Tile.mark_statistics_dirty(tile_ids)
+        Target.mark_statistics_dirty(target_ids)
+
+    @staticmethod
+    def refresh_dirty_statistics(limit=None, night=None):
+        """
+        Recompute cached statistics for every dirty night, tile, target and unit.
+        
+        Parameters:
+        -----------
+        limit : int, optional
+            Maximum number of rows to recompute per model
+        night : Night, optional
+            Only refresh that night and the tiles, targets and units of its
+            frames; rows dirtied elsewhere are left for the next full pass
+        
+        Returns:
+        --------
+        dict : Number of rows recomputed per model
+        """
+        if night is None:
+            scopes = {'nights': None, 'tiles': None, 'targets': None, 'units': None}
+        else:
+            science = ScienceFrame.objects.filter(night=night)
+            scopes = {
+                'nights': [night.pk],
+                'tiles': science.values_list('tile_id', flat=True).distinct(),
+                'targets': science.values_list('target_id', flat=True).distinct(),
+                'units': FrameIndex.objects.filter(night=night).values_list('unit_id', flat=True).distinct(),
+            }
+        return {
+            'nights': Night.refresh_dirty_statistics(limit, keys=scopes['nights']),
+            'tiles': Tile.refresh_dirty_statistics(limit, keys=scopes['tiles']),
+            'targets': Target.refresh_dirty_statistics(limit, keys=scopes['targets']),
+            'units': UnitStatistics.refresh_dirty_statistics(limit, keys=scopes['units']),
+        }
+
+    @staticmethod
+    def coverage_maps(nside=coverage.DEFAULT_NSIDE):
+        """Per-filter HEALPix coverage maps stored under SURVEY_CACHE_DIR."""
+        return coverage.CoverageMaps(os.path.dirname(Tile.lookup_grid_dir()), nside)
+
+    @staticmethod
+    def _coverage_arrays(frames):
+        """
+        Footprint centre, rotation, exptime and filter of science frames.
+
+        The plate-solved centre and angle are used when available, otherwise
+        the header target coordinates or the telescope pointing (angle 0).
+
+        Returns:
+        --------
+        tuple : (ra, dec, angle, exptime, filter_id) NumPy arrays
+        """
+        rows = list(frames.annotate(
+            cov_ra=Coalesce('detail__plate_solve_ra', 'object_ra', 'unit_ra'),
+            cov_dec=Coalesce('detail__plate_solve_dec', 'object_dec', 'unit_dec'),
+            cov_angle=Coalesce('detail__plate_solve_angle', Value(0.0)),
+        ).filter(
+            cov_ra__isnull=False, cov_dec__isnull=False, exptime__gt=0
+        ).values_list('cov_ra', 'cov_dec', 'cov_angle', 'exptime', 'filter_id'))
+        if not rows:
+            return tuple(np.empty(0) for _ in range(5))
+        data = np.array(rows, dtype=float)
+        return data[:, 0], data[:, 1], data[:, 2], data[:, 3], data[:, 4].astype(np.int64)
+
+    @staticmethod
+    def _frame_fov():
+        """Camera field of view (degrees), as used for Target footprints."""
+        return (Target._meta.get_field('fov_width').default,
+                Target._meta.get_field('fov_height').default)
+
+    @staticmethod
+    def update_coverage_maps(frame_ids, nside=coverage.DEFAULT_NSIDE):
+        """
+        Add the footprints of newly ingested science frames to the coverage maps.
+
+        Parameters:
+        -----------
+        frame_ids : list
+            Primary keys of science frames not yet included in the maps
+
+        Returns:
+        --------
+        int : Number of frames added
+        """
+        ra, dec, angle, exptime, filter_ids = FrameManager._coverage_arrays(
+            ScienceFrame.objects.filter(pk__in=list(frame_ids))
+        )
+        if not len(ra):
+            return 0
+
+        contributions = coverage.accumulate(ra, dec, angle, exptime, filter_ids, nside, *FrameManager._frame_fov())
+        filter_names = dict(Filter.objects.values_list('id', 'name'))
+        FrameManager.coverage_maps(nside).add(
+            {filter_names[code]: values for code, values in contributions.items()},
+            frame_count=len(ra)
+        )
+        return len(ra)
+
+    @staticmethod
+    def _update_coverage_after_commit(frame_ids):
+        """on_commit hook: coverage maps are a cache, never fail the ingest."""
+        try:
+            FrameManager.update_coverage_maps(frame_ids)
+        except Exception as e:
+            print(f"  ⚠️  Coverage map update failed for {len(frame_ids)} frames: {e}")
+
+    @staticmethod
+    def remove_from_coverage_maps(frames, nside=coverage.DEFAULT_NSIDE):
+        """
+        Subtract the footprints of science frames that are about to be deleted.
+
+        The contributions are computed now, while the frames and their detail
+        rows still exist, and subtracted once the deleting transaction
+        commits (nothing changes if it rolls back). Every path that deletes
+        science frames calls this first, so re-ingesting a cleaned night
+        does not count its exposure twice.
+
+        Parameters:
+        -----------
+        frames : QuerySet
+            Science frames about to be deleted
+
+        Returns:
+        --------
+        int : Number of frames whose footprints will be subtracted
+        """
+        ra, dec, angle, exptime, filter_ids = FrameManager._coverage_arrays(frames)
+        if not len(ra):
+            return 0
+
+        contributions = coverage.accumulate(ra, dec, angle, exptime, filter_ids, nside, *FrameManager._frame_fov())
+        filter_names = dict(Filter.objects.values_list('id', 'name'))
+        negative = {
+            filter_names[code]: (pixels, -exptime_sum, -counts)
+            for code, (pixels, exptime_sum, counts) in contributions.items()
+        }
+        frame_count = len(ra)
+        transaction.on_commit(
+            lambda: FrameManager._subtract_coverage_after_commit(negative, frame_count, nside)
+        )
+        return frame_count
+
+    @staticmethod
+    def _subtract_coverage_after_commit(contributions, frame_count, nside):
+        """on_commit hook of remove_from_coverage_maps()."""
+        try:
+            FrameManager.coverage_maps(nside).add(contributions, frame_count=-frame_count)
+        except Exception as e:
+            print(f"  ⚠️  Coverage map update failed for {frame_count} deleted frames: {e}")
+
+    @staticmethod
+    def rebuild_coverage_maps(nside=coverage.DEFAULT_NSIDE, workers=4, progress_callback=None):
+        """
+        Rebuild all coverage maps from the science frame table.
+
+        Frames are read night by night in this process; footprint
+        pixelization runs in a process pool (no database access there) and
+        the sparse per-night results are summed into dense maps.
+
+        Parameters:
+        -----------
+        nside : int
+            HEALPix resolution of the maps
+        workers : int
+            Worker processes (1 = run in-process)
+        progress_callback : callable, optional
+            Called as progress_callback(nights_done, nights_total, frames)
+
+        Returns:
+        --------
+        dict : Frames and nights processed, filters written, elapsed time
+        """
+        start_time = time.time()
+        fov = FrameManager._frame_fov()
+        filter_names = dict(Filter.objects.values_list('id', 'name'))
+        npix = 12 * nside ** 2
+        totals = {}
+        frame_count = 0
+        nights_done = 0
+
+        night_ids = list(
+            ScienceFrame.objects.values_list('night_id', flat=True).distinct().order_by('night_id')
+        )
+
+        def merge(contributions):
+            for code, (pixels, exptime, counts) in contributions.items():
+                name = filter_names.get(code, str(code))
+                if name not in totals:
+                    totals[name] = (np.zeros(npix), np.zeros(npix, dtype=np.int64))
+                totals[name][0][pixels] += exptime
+                totals[name][1][pixels] += counts
+
+        def night_jobs():
+            for night_id in night_ids:
+                arrays = FrameManager._coverage_arrays(ScienceFrame.objects.filter(night_id=night_id))
+                yield len(arrays[0]), arrays
+
+        if workers <= 1:
+            for count, arrays in night_jobs():
+                merge(coverage.accumulate(*arrays, nside, *fov))
+                frame_count += count
+                nights_done += 1
+                if progress_callback:
+                    progress_callback(nights_done, len(night_ids), frame_count)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = {}
+                for count, arrays in night_jobs():
+                    pending[executor.submit(coverage.accumulate, *arrays, nside, *fov)] = count
+                    # Keep the queue bounded: drain once every worker has work queued
+                    if len(pending) >= 2 * workers:
+                        future = next(as_completed(pending))
+                        merge(future.result())
+                        frame_count += pending.pop(future)
+                        nights_done += 1
+                        if progress_callback:
+                            progress_callback(nights_done, len(night_ids), frame_count)
+                for future in as_completed(list(pending)):
+                    merge(future.result())
+                    frame_count += pending.pop(future)
+                    nights_done += 1
+                    if progress_callback:
+                        progress_callback(nights_done, len(night_ids), frame_count)
+
+        FrameManager.coverage_maps(nside).replace(totals, frame_count)
+        return {
+            'frames': frame_count,
+            'nights': nights_done,
+            'filters': sorted(totals),
+            'elapsed': time.time() - start_time,
+        }
+
     @receiver(post_save, sender=ScienceFrame)
     def update_statistics_on_science_save(sender, instance, created, **kwargs):
         if created:
-            if instance.night:
-                instance.night.update_statistics()
-            if instance.tile:
-                instance.tile.update_observation_statistics()
-            if instance.target:
-                instance.target.update_observation_statistics()
+            FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_delete, sender=ScienceFrame)
     def update_statistics_on_science_delete(sender, instance, **kwargs):
-        if instance.night:
-            instance.night.update_statistics()
-        if instance.tile:
-            instance.tile.update_observation_statistics()
-        if instance.target:
-            instance.target.update_observation_statistics()
+        FrameIndex.remove(instance)
+        FrameManager.mark_statistics_dirty(instance)
+        TileFilterSummary.refresh_pairs_on_commit([(instance.tile_id, instance.filter_id)])
 
     @receiver(post_save, sender=BiasFrame)
     def update_statistics_on_bias_save(sender, instance, created, **kwargs):
-        if created and instance.night:
-            instance.night.update_statistics()
+        if created:
+            FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_delete, sender=BiasFrame)
     def update_statistics_on_bias_delete(sender, instance, **kwargs):
-        if instance.night:
-            instance.night.update_statistics()
+        FrameIndex.remove(instance)
+        FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_save, sender=DarkFrame)
     def update_statistics_on_dark_save(sender, instance, created, **kwargs):
-        if created and instance.night:
-            instance.night.update_statistics()
+        if created:
+            FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_delete, sender=DarkFrame)
     def update_statistics_on_dark_delete(sender, instance, **kwargs):
-        if instance.night:
-            instance.night.update_statistics()
+        FrameIndex.remove(instance)
+        FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_save, sender=FlatFrame)
     def update_statistics_on_flat_save(sender, instance, created, **kwargs):
-        if created and instance.night:
-            instance.night.update_statistics()
+        if created:
+            FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_delete, sender=FlatFrame)
     def update_statistics_on_flat_delete(sender, instance, **kwargs):
-        if instance.night:
-            instance.night.update_statistics()
+        FrameIndex.remove(instance)
+        FrameManager.mark_statistics_dirty(instance)
 
     @receiver(post_save, sender=Unit)
     def create_unit_statistics(sender, instance, created, **kwargs):
@@ -0,0 +1,169 @@
+"""
+Q3C helpers for cone, polygon and batch cross-match queries.
+
+The q3c extension and the q3c_ang2ipix() functional indexes are created by
+migration 0012_q3c_indexes; ensure_extension() only verifies (once per
+process) that the extension is present. All SQL is parameterized.
+"""
+import numpy as np
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+
+_extension_ready = False
+
+
+def ensure_extension():
+    """
+    Make sure the q3c extension is installed (checked once per process).
+
+    Falls back to CREATE EXTENSION when the migration has not run yet,
+    which needs sufficient database privileges.
+    """
+    global _extension_ready
+    if _extension_ready:
+        return True
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'q3c'")
+        if cursor.fetchone() is None:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS q3c")
+
+    _extension_ready = True
+    return True
+
+
+def radial_filter(ra, dec, radius_deg, ra_column='ra', dec_column='dec'):
+    """
+    Boolean expression selecting rows within a cone (uses the Q3C index).
+
+    Parameters:
+    -----------
+    ra, dec : float
+        Cone centre in degrees
+    radius_deg : float
+        Cone radius in degrees
+    ra_column, dec_column : str
+        Coordinate columns of the queried table
+
+    Returns:
+    --------
+    RawSQL : Usable in QuerySet.filter()
+    """
+    ensure_extension()
+    return RawSQL(
+        f'q3c_radial_query("{ra_column}", "{dec_column}", %s, %s, %s)',
+        [float(ra), float(dec), float(radius_deg)],
+        output_field=BooleanField()
+    )
+
+
+def poly_filter(vertices, ra_column='ra', dec_column='dec'):
+    """
+    Boolean expression selecting rows inside a polygon (uses the Q3C index).
+
+    Parameters:
+    -----------
+    vertices : list of (ra, dec)
+        Polygon vertices in degrees
+    ra_column, dec_column : str
+        Coordinate columns of the queried table
+
+    Returns:
+    --------
+    RawSQL : Usable in QuerySet.filter()
+    """
+    ensure_extension()
+    flat = [float(value) for vertex in vertices for value in vertex[:2]]
+    if len(flat) < 6:
+        raise ValueError("A polygon needs at least three vertices")
+    return RawSQL(
+        f'q3c_poly_query("{ra_column}", "{dec_column}", %s::double precision[])',
+        [flat],
+        output_field=BooleanField()
+    )
+
+
+def crossmatch(model, ra, dec, radius_deg, ra_column='ra', dec_column='dec',
+               nearest_only=True, chunk_size=20000, where_sql='', where_params=None):
+    """
+    Cross-match many positions against a table in one query per chunk.
+
+    The positions are sent as arrays and unnested server-side; q3c_join
+    uses the q3c_ang2ipix index of the target table.
+
+    Parameters:
+    -----------
+    model : Model class
+        Table to match against (Tile, Target, ScienceFrame, ...)
+    ra, dec : array_like
+        Positions in degrees
+    radius_deg : float
+        Match radius in degrees
+    ra_column, dec_column : str
+        Coordinate columns of the model table
+    nearest_only : bool
+        Return only the closest match per position
+    chunk_size : int
+        Positions per query
+    where_sql : str
+        Extra SQL condition on the table (alias "t"), e.g. 't.night_id = %s'
+    where_params : list
+        Parameters for where_sql
+
+    Returns:
+    --------
+    list of (position_index, pk, separation_arcsec)
+    """
+    ensure_extension()
+    ra = np.asarray(ra, dtype=float).ravel()
+    dec = np.asarray(dec, dtype=float).ravel()
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    extra = f'AND ({where_sql})' if where_sql else ''
+
+    sql = (
+        f'SELECT {"DISTINCT ON (p.idx)" if nearest_only else ""} '
+        f'p.idx, t."{pk_column}", '
+        f'q3c_dist(p.ra, p.dec, t."{ra_column}", t."{dec_column}") * 3600.0 AS sep '
+        f'FROM unnest(%s::bigint[], %s::double precision[], %s::double precision[]) AS p(idx, ra, dec) '
+        f'JOIN "{table}" t ON q3c_join(p.ra, p.dec, t."{ra_column}", t."{dec_column}", %s) '
+        f'WHERE true {extra} '
+        f'ORDER BY p.idx, sep'
+    )
+
+    matches = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(ra), chunk_size):
+            chunk_ra = ra[start:start + chunk_size]
+            chunk_dec = dec[start:start + chunk_size]
+            valid = np.isfinite(chunk_ra) & np.isfinite(chunk_dec)
+            idx = (np.flatnonzero(valid) + start).tolist()
+            if not idx:
+                continue
+            params = [idx, chunk_ra[valid].tolist(), chunk_dec[valid].tolist(), float(radius_deg)]
+            params.extend(where_params or [])
+            cursor.execute(sql, params)
+            matches.extend(cursor.fetchall())
+
+    return matches
+
+
+def nearest_ids(model, ra, dec, radius_deg, **kwargs):
+    """
+    Closest matching primary key for each position (-1 where none).
+
+    Convenience wrapper around crossmatch(nearest_only=True).
+
+    Returns:
+    --------
+    tuple : (ids, separations_arcsec) as NumPy arrays aligned with the input
+    """
+    ra = np.asarray(ra, dtype=float).ravel()
+    ids = np.full(len(ra), -1, dtype=np.int64)
+    separations = np.full(len(ra), np.nan)
+    for position, pk, sep in crossmatch(model, ra, dec, radius_deg, nearest_only=True, **kwargs):
+        ids[position] = pk
+        separations[position] = sep
+    return ids, separations
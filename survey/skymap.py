@@ -0,0 +1,276 @@
+"""
+Overlay of LIGO/Virgo/KAGRA HEALPix localizations on the 7DS tile grid.
+
+Skymaps (flat or multi-order) are resampled to a fixed NESTED nside. Each
+HEALPix pixel is assigned to the tile covering its centre (via Tile.locate),
+and this pixel -> tile membership is cached per nside as memory-mapped .npy
+files, so ranking tiles for a new event is a single np.bincount.
+
+Requires astropy-healpix (the HEALPix backend used by ligo.skymap).
+"""
+import os
+import json
+import time
+import shutil
+
+import numpy as np
+from astropy.table import Table
+
+try:
+    from astropy_healpix import HEALPix, ring_to_nested
+except ImportError:  # optional dependency
+    HEALPix = None
+    ring_to_nested = None
+
+
+DEFAULT_NSIDE = 256
+CREDIBLE_LEVELS = (0.5, 0.9)
+
+
+def require_healpix():
+    if HEALPix is None:
+        raise ImportError("Skymap support requires astropy-healpix: pip install astropy-healpix")
+
+
+def nside_to_level(nside):
+    """HEALPix order (level) of a power-of-two nside."""
+    level = int(np.log2(nside))
+    if 2 ** level != nside:
+        raise ValueError(f"nside must be a power of two, got {nside}")
+    return level
+
+
+def read_skymap(path, nside=DEFAULT_NSIDE):
+    """
+    Read a HEALPix skymap as per-pixel probabilities in NESTED order.
+
+    Multi-order maps (UNIQ + PROBDENSITY) are rasterized to the requested
+    nside: coarser pixels are split into their children, finer pixels are
+    summed into their parent. Flat maps (PROB column) are converted to
+    NESTED and up/down-sampled the same way.
+
+    Parameters:
+    -----------
+    path : str or file-like
+        FITS skymap (e.g. bayestar.multiorder.fits)
+    nside : int
+        Output resolution (power of two)
+
+    Returns:
+    --------
+    np.ndarray : Probability per NESTED pixel, normalised to sum 1
+    """
+    require_healpix()
+    level = nside_to_level(nside)
+    table = Table.read(path, format='fits')
+    columns = {name.upper(): name for name in table.colnames}
+
+    if 'UNIQ' in columns:
+        uniq = np.asarray(table[columns['UNIQ']], dtype=np.int64)
+        density = np.asarray(table[columns['PROBDENSITY']], dtype=float)
+        pixel_levels = (np.floor(np.log2(uniq)).astype(np.int64) // 2) - 1
+        pixels = uniq - 4 ** (pixel_levels + 1)
+        # Probability of each input pixel (density is per steradian)
+        probability = density * (4.0 * np.pi / (12 * 4 ** pixel_levels))
+    else:
+        name = columns.get('PROB', table.colnames[0])
+        probability = np.asarray(table[name], dtype=float).ravel()
+        map_nside = int(round(np.sqrt(len(probability) / 12)))
+        pixels = np.arange(len(probability), dtype=np.int64)
+        ordering = str(table.meta.get('ORDERING', 'RING')).upper()
+        if ordering.startswith('RING'):
+            pixels = np.asarray(ring_to_nested(pixels, map_nside), dtype=np.int64)
+        pixel_levels = np.full(len(pixels), nside_to_level(map_nside), dtype=np.int64)
+
+    probability = np.nan_to_num(probability, nan=0.0)
+    return _rasterize(pixels, pixel_levels, probability, level)
+
+
+def _rasterize(pixels, pixel_levels, probability, level):
+    """Resample NESTED (pixel, level, probability) triplets to one level."""
+    npix = 12 * 4 ** level
+    result = np.zeros(npix)
+
+    coarse = pixel_levels <= level
+    if coarse.any():
+        shift = 2 * (level - pixel_levels[coarse])
+        counts = np.left_shift(1, shift).astype(np.int64)
+        starts = np.left_shift(pixels[coarse], shift)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        children = np.repeat(starts, counts) + offsets
+        result += np.bincount(children, weights=np.repeat(probability[coarse] / counts, counts), minlength=npix)
+
+    fine = ~coarse
+    if fine.any():
+        parents = np.right_shift(pixels[fine], 2 * (pixel_levels[fine] - level))
+        result += np.bincount(parents, weights=probability[fine], minlength=npix)
+
+    total = result.sum()
+    return result / total if total > 0 else result
+
+
+class TilePixelMembership:
+    """
+    Cached NESTED pixel -> tile assignment for one nside.
+
+    Stored under <cache_dir>/skymap/nside<N>/<version>/ as member.npy (int32
+    position into tile_ids, -1 outside the tiling) and tile_ids.npy, opened
+    with mmap_mode='r'; meta.json names the current version. The cache is
+    tagged with the tile lookup grid build time and rebuilt when the tiling
+    changes.
+    """
+
+    def __init__(self, nside, member, tile_ids):
+        self.nside = nside
+        self.member = member
+        self.tile_ids = tile_ids
+
+    @staticmethod
+    def directory(cache_dir, nside):
+        return os.path.join(cache_dir, 'skymap', f'nside{nside}')
+
+    @classmethod
+    def build(cls, nside, locate):
+        """
+        Assign every pixel centre to a tile.
+
+        Parameters:
+        -----------
+        nside : int
+            HEALPix resolution
+        locate : callable
+            Vectorized (ra, dec) -> tile id function (Tile.locate)
+        """
+        require_healpix()
+        healpix = HEALPix(nside=nside, order='nested')
+        lon, lat = healpix.healpix_to_lonlat(np.arange(healpix.npix))
+
+        pixel_tiles = np.empty(healpix.npix, dtype=np.int64)
+        step = 1 << 20
+        for start in range(0, healpix.npix, step):
+            pixel_tiles[start:start + step] = locate(lon.deg[start:start + step], lat.deg[start:start + step])
+
+        covered = pixel_tiles >= 0
+        tile_ids, positions = np.unique(pixel_tiles[covered], return_inverse=True)
+        member = np.full(healpix.npix, -1, dtype=np.int32)
+        member[covered] = positions
+        return cls(nside, member, tile_ids)
+
+    def save(self, cache_dir, tag, keep_versions=2):
+        """
+        Write the arrays into a new version directory, then point meta.json at it.
+
+        Readers follow meta.json, so they see one complete generation; the
+        newest keep_versions versions are kept for processes still mapping them.
+        """
+        directory = self.directory(cache_dir, self.nside)
+        version = f'v{time.time_ns():020d}'
+        version_dir = os.path.join(directory, version)
+        os.makedirs(version_dir)
+        for name, array in (('member', self.member), ('tile_ids', self.tile_ids)):
+            np.save(os.path.join(version_dir, f'{name}.npy'), array)
+
+        meta_path = os.path.join(directory, 'meta.json')
+        temp_path = f'{meta_path}.tmp-{os.getpid()}'
+        with open(temp_path, 'w') as f:
+            json.dump({'nside': self.nside, 'tag': tag, 'version': version}, f)
+        os.replace(temp_path, meta_path)
+
+        versions = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith('v') and os.path.isdir(os.path.join(directory, name))
+        )
+        for old in versions[:-max(1, keep_versions)]:
+            if old != version:
+                shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+    @classmethod
+    def load(cls, cache_dir, nside, tag):
+        """Open the cached membership, or None if missing or built for another tiling."""
+        directory = cls.directory(cache_dir, nside)
+        try:
+            with open(os.path.join(directory, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta.get('tag') != tag or not meta.get('version'):
+                return None
+            version_dir = os.path.join(directory, meta['version'])
+            member = np.load(os.path.join(version_dir, 'member.npy'), mmap_mode='r')
+            tile_ids = np.load(os.path.join(version_dir, 'tile_ids.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return cls(nside, member, tile_ids)
+
+    def tile_probabilities(self, probability):
+        """
+        Enclosed probability of every tile (one bincount over all pixels).
+
+        Returns:
+        --------
+        np.ndarray : Probability per entry of tile_ids
+        """
+        member = np.asarray(self.member)
+        covered = member >= 0
+        return np.bincount(member[covered], weights=probability[covered], minlength=len(self.tile_ids))
+
+
+def rank_tiles(probability, membership, levels=CREDIBLE_LEVELS):
+    """
+    Rank tiles by enclosed probability and find the credible-region tiles.
+
+    Parameters:
+    -----------
+    probability : np.ndarray
+        NESTED per-pixel probability at membership.nside
+    membership : TilePixelMembership
+        Pixel -> tile cache for the same nside
+    levels : tuple of float
+        Credible levels (default 50% and 90%)
+
+    Returns:
+    --------
+    dict : tile_ids / probability / cumulative arrays (descending), the
+           number of top tiles needed for each level (None if the tiling
+           never reaches it) and the total probability inside the tiling
+    """
+    tile_probability = membership.tile_probabilities(probability)
+    order = np.argsort(tile_probability)[::-1]
+    order = order[tile_probability[order] > 0]
+
+    ranked_probability = tile_probability[order]
+    cumulative = np.cumsum(ranked_probability)
+
+    credible = {}
+    for level in levels:
+        count = int(np.searchsorted(cumulative, level) + 1)
+        credible[level] = count if count <= len(cumulative) else None
+
+    return {
+        'tile_ids': np.asarray(membership.tile_ids)[order],
+        'probability': ranked_probability,
+        'cumulative': cumulative,
+        'credible': credible,
+        'total_in_tiles': float(cumulative[-1]) if len(cumulative) else 0.0,
+    }
+
+
+def ranking_to_dict(ranking, level=0.9, limit=None):
+    """JSON-serializable summary of a Tile.rank_by_skymap() result."""
+    count = ranking['credible'].get(level) or len(ranking['tile_ids'])
+    if limit is not None:
+        count = min(count, limit)
+    return {
+        'nside': ranking['nside'],
+        'total_in_tiles': ranking['total_in_tiles'],
+        'credible': {f'{key:g}': value for key, value in ranking['credible'].items()},
+        'tiles': [
+            {
+                'tile_id': int(tile_id),
+                'name': f'T{int(tile_id):05d}',
+                'probability': float(prob),
+                'cumulative': float(cumulative),
+            }
+            for tile_id, prob, cumulative in zip(
+                ranking['tile_ids'][:count], ranking['probability'], ranking['cumulative']
+            )
+        ],
+    }
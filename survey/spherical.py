@@ -0,0 +1,503 @@
+"""
+Vectorized spherical geometry helpers for tile and target footprints.
+
+Footprints (7DS tiles, target fields of view) are small convex spherical
+polygons. Points and vertices are converted to unit vectors, and a point
+lies inside a polygon when it is on the inner side of every great-circle
+edge. Working on the unit sphere needs no special cases for the RA=0
+meridian or the poles.
+
+Only NumPy is required, so the helpers can be used by ingest worker
+processes and by scripts that do not touch the database.
+"""
+import os
+import json
+import time
+import shutil
+
+import numpy as np
+
+
+# Points exactly on a shared edge count as inside (both neighbours match)
+EDGE_TOLERANCE = 1e-12
+
+# Slack on the centre-distance pre-filter (cosine units)
+RADIUS_TOLERANCE = 1e-9
+
+
+def radec_to_xyz(ra, dec):
+    """
+    Convert RA/Dec in degrees to unit vectors.
+
+    Parameters:
+    -----------
+    ra, dec : array_like
+        Coordinates in degrees (RA is wrapped, Dec is clipped to [-90, 90])
+
+    Returns:
+    --------
+    np.ndarray : Array of shape (..., 3)
+    """
+    ra = np.radians(np.mod(np.asarray(ra, dtype=float), 360.0))
+    dec = np.radians(np.clip(np.asarray(dec, dtype=float), -90.0, 90.0))
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def angular_separation(ra1, dec1, ra2, dec2):
+    """Angular separation in degrees between (arrays of) positions."""
+    p1 = radec_to_xyz(ra1, dec1)
+    p2 = radec_to_xyz(ra2, dec2)
+    cross = np.linalg.norm(np.cross(p1, p2), axis=-1)
+    dot = np.sum(p1 * p2, axis=-1)
+    return np.degrees(np.arctan2(cross, dot))
+
+
+def _polygon_vertices(vertices_ra, vertices_dec):
+    """Unit vectors of polygon vertices with a repeated closing vertex removed."""
+    vertices_ra = np.asarray(vertices_ra, dtype=float)
+    vertices_dec = np.asarray(vertices_dec, dtype=float)
+    if (len(vertices_ra) > 3 and vertices_ra[0] == vertices_ra[-1]
+            and vertices_dec[0] == vertices_dec[-1]):
+        vertices_ra = vertices_ra[:-1]
+        vertices_dec = vertices_dec[:-1]
+    return radec_to_xyz(vertices_ra, vertices_dec)
+
+
+def _edge_normals(vertices, center):
+    """
+    Inward-pointing great-circle normals of a convex polygon's edges.
+
+    Edges are oriented using the polygon centre, so the vertex winding
+    order in the source data does not matter.
+    """
+    normals = np.cross(vertices, np.roll(vertices, -1, axis=-2))
+    lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    side = np.sign(np.sum(normals * center[..., np.newaxis, :], axis=-1, keepdims=True))
+    side[side == 0] = 1.0
+    return normals * side
+
+
+def polygon_areas(vertices_ra, vertices_dec):
+    """
+    Exact areas of convex spherical polygons (spherical excess), vectorized.
+
+    Each polygon is split into a triangle fan from its first vertex and the
+    triangle areas come from the Van Oosterom-Strackee formula
+    tan(E/2) = |a.(b x c)| / (1 + a.b + b.c + c.a). Edges are great circles,
+    so polygons around a pole or across RA=0 need no special handling.
+    Padding vertices (repeats) contribute zero-area triangles.
+
+    Parameters:
+    -----------
+    vertices_ra, vertices_dec : array_like
+        Vertex coordinates in degrees, shape (N, K) or (K,)
+
+    Returns:
+    --------
+    np.ndarray : Areas in square degrees, shape (N,) (a float for one polygon)
+    """
+    vertices = radec_to_xyz(vertices_ra, vertices_dec)
+    single = vertices.ndim == 2
+    if single:
+        vertices = vertices[np.newaxis]
+
+    a = vertices[:, :1, :]
+    b = vertices[:, 1:-1, :]
+    c = vertices[:, 2:, :]
+    triple = np.abs(np.sum(a * np.cross(b, c), axis=-1))
+    denominator = (1.0 + np.sum(a * b, axis=-1) + np.sum(b * c, axis=-1)
+                   + np.sum(c * a, axis=-1))
+    excess = 2.0 * np.arctan2(triple, denominator)
+
+    areas = np.degrees(np.degrees(np.sum(excess, axis=1)))
+    return float(areas[0]) if single else areas
+
+
+def points_in_polygon(ra, dec, vertices_ra, vertices_dec, center_ra, center_dec):
+    """
+    Test many points against a single convex spherical polygon.
+
+    Parameters:
+    -----------
+    ra, dec : array_like
+        Point coordinates in degrees
+    vertices_ra, vertices_dec : array_like
+        Polygon vertices in degrees (closing vertex optional)
+    center_ra, center_dec : float
+        A point inside the polygon (tile or target centre)
+
+    Returns:
+    --------
+    np.ndarray : Boolean array, True where the point lies inside
+    """
+    points = np.atleast_2d(radec_to_xyz(ra, dec))
+    center = radec_to_xyz(center_ra, center_dec)
+    normals = _edge_normals(_polygon_vertices(vertices_ra, vertices_dec), center)
+    return np.all(points @ normals.T >= -EDGE_TOLERANCE, axis=1)
+
+
+class SphericalPolygonIndex:
+    """
+    Batch point-in-polygon lookup over a fixed set of convex footprints.
+
+    Vertex unit vectors, inward edge normals and bounding radii are computed
+    once; lookups then only use matrix products. Each point is assigned the
+    containing polygon whose centre is closest (tiles overlap slightly).
+
+    Parameters:
+    -----------
+    ids : array_like
+        Identifier returned for each polygon (e.g. Tile.id)
+    centers_ra, centers_dec : array_like
+        Polygon centres in degrees, shape (M,)
+    vertices_ra, vertices_dec : array_like
+        Polygon vertices in degrees, shape (M, K) without closing vertex
+    """
+
+    MISSING = -1
+
+    def __init__(self, ids, centers_ra, centers_dec, vertices_ra, vertices_dec):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.centers = radec_to_xyz(centers_ra, centers_dec)
+
+        vertices = radec_to_xyz(vertices_ra, vertices_dec)
+        self.normals = _edge_normals(vertices, self.centers)
+
+        # Cosine of the largest centre-to-vertex distance: cheap pre-filter
+        self.cos_radius = np.min(np.sum(vertices * self.centers[:, np.newaxis, :], axis=-1), axis=1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_arrays(cls, ids, centers, normals, cos_radius):
+        """Rebuild an index from its precomputed arrays (e.g. memory-mapped files)."""
+        index = cls.__new__(cls)
+        index.ids = ids
+        index.centers = centers
+        index.normals = normals
+        index.cos_radius = cos_radius
+        return index
+
+    @classmethod
+    def from_polygons(cls, ids, centers, polygons):
+        """
+        Build the index from ragged vertex lists.
+
+        Parameters:
+        -----------
+        ids : list
+            Polygon identifiers
+        centers : list of (ra, dec)
+            Polygon centres
+        polygons : list of list of (ra, dec)
+            Vertices per polygon; a repeated closing vertex is dropped and
+            shorter polygons are padded by repeating their last vertex
+        """
+        cleaned = []
+        for vertices in polygons:
+            vertices = list(vertices)
+            if len(vertices) > 3 and tuple(vertices[0]) == tuple(vertices[-1]):
+                vertices = vertices[:-1]
+            cleaned.append(vertices)
+
+        width = max((len(v) for v in cleaned), default=3)
+        padded = np.array([v + [v[-1]] * (width - len(v)) for v in cleaned], dtype=float)
+        if not len(padded):
+            padded = np.zeros((0, width, 2))
+
+        centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        return cls(ids, centers[:, 0], centers[:, 1], padded[..., 0], padded[..., 1])
+
+    def test_pairs(self, points, point_idx, polygon_idx):
+        """
+        Exact containment test for (point, polygon) candidate pairs.
+
+        Parameters:
+        -----------
+        points : np.ndarray
+            Unit vectors, shape (N, 3)
+        point_idx, polygon_idx : np.ndarray
+            Candidate pair indices into points and into this index
+
+        Returns:
+        --------
+        np.ndarray : Boolean array, one value per pair
+        """
+        dots = np.einsum('pkj,pj->pk', self.normals[polygon_idx], points[point_idx])
+        return np.all(dots >= -EDGE_TOLERANCE, axis=1)
+
+    def resolve_pairs(self, points, point_idx, polygon_idx, result, offset=0):
+        """
+        Write the best containing polygon id for each point into result.
+
+        Among the candidate pairs that pass the exact test, the polygon with
+        the nearest centre wins.
+        """
+        inside = self.test_pairs(points, point_idx, polygon_idx)
+        point_idx = point_idx[inside]
+        polygon_idx = polygon_idx[inside]
+        if not point_idx.size:
+            return result
+
+        closeness = np.sum(points[point_idx] * self.centers[polygon_idx], axis=1)
+        order = np.lexsort((-closeness, point_idx))
+        point_idx = point_idx[order]
+        polygon_idx = polygon_idx[order]
+        first = np.ones(len(point_idx), dtype=bool)
+        first[1:] = point_idx[1:] != point_idx[:-1]
+        result[offset + point_idx[first]] = self.ids[polygon_idx[first]]
+        return result
+
+    def locate(self, ra, dec, chunk_size=256):
+        """
+        Find the containing polygon for every position.
+
+        Parameters:
+        -----------
+        ra, dec : array_like
+            Positions in degrees
+        chunk_size : int
+            Points compared against all centres per step (memory bound)
+
+        Returns:
+        --------
+        np.ndarray : Polygon ids, MISSING (-1) where no polygon contains the point
+        """
+        points = np.atleast_2d(radec_to_xyz(ra, dec))
+        valid = np.all(np.isfinite(points), axis=1)
+        result = np.full(len(points), self.MISSING, dtype=np.int64)
+        if not len(self.ids):
+            return result
+
+        for start in range(0, len(points), chunk_size):
+            chunk = points[start:start + chunk_size]
+            closeness = chunk @ self.centers.T
+            candidates = closeness >= self.cos_radius[np.newaxis, :] - RADIUS_TOLERANCE
+            candidates &= valid[start:start + chunk_size, np.newaxis]
+            point_idx, polygon_idx = np.nonzero(candidates)
+            if point_idx.size:
+                self.resolve_pairs(chunk, point_idx, polygon_idx, result, offset=start)
+
+        return result
+
+
+class SkyLookupGrid:
+    """
+    Constant-time sky position -> footprint lookup on a regular RA/Dec grid.
+
+    Every grid cell lists the footprints (indices into a
+    SphericalPolygonIndex) whose bounding cap overlaps the cell. A lookup
+    computes the cell of each position, gathers its few candidates and runs
+    the exact spherical test only on those pairs, so the cost per position
+    does not depend on the number of tiles.
+
+    The arrays are stored as .npy files in a versioned subdirectory and
+    opened with mmap_mode='r': every ingest worker and web process maps the
+    same pages instead of holding its own copy. meta.json in the top
+    directory names the current version.
+
+    Parameters:
+    -----------
+    cells : np.ndarray
+        int32 array (n_dec, n_ra, max_candidates), -1 padded
+    index : SphericalPolygonIndex
+        Footprints referenced by the cells
+    resolution : float
+        Cell size in degrees
+    """
+
+    ARRAYS = ('cells', 'ids', 'centers', 'normals', 'cos_radius')
+    META_FILE = 'meta.json'
+
+    def __init__(self, cells, index, resolution):
+        self.cells = cells
+        self.index = index
+        self.resolution = float(resolution)
+        self.n_dec, self.n_ra = cells.shape[:2]
+
+    @classmethod
+    def build(cls, index, resolution=0.5):
+        """
+        Build the grid for all footprints of a SphericalPolygonIndex.
+
+        Each footprint is registered in the cells overlapping its bounding
+        cap (centre + largest vertex distance). Caps that reach a pole cover
+        the full RA range of the affected dec rows.
+        """
+        n_dec = int(np.ceil(180.0 / resolution))
+        n_ra = int(np.ceil(360.0 / resolution))
+
+        centers_ra = np.degrees(np.arctan2(index.centers[:, 1], index.centers[:, 0])) % 360.0
+        centers_dec = np.degrees(np.arcsin(np.clip(index.centers[:, 2], -1.0, 1.0)))
+        radius = np.arccos(np.clip(index.cos_radius - RADIUS_TOLERANCE, -1.0, 1.0))
+        radius_deg = np.degrees(radius)
+
+        cell_parts = []
+        polygon_parts = []
+        for position in range(len(index)):
+            dec_lo = centers_dec[position] - radius_deg[position]
+            dec_hi = centers_dec[position] + radius_deg[position]
+            rows = np.arange(
+                max(0, int(np.floor((dec_lo + 90.0) / resolution))),
+                min(n_dec - 1, int(np.floor((dec_hi + 90.0) / resolution))) + 1
+            )
+
+            cos_dec = np.cos(np.radians(centers_dec[position]))
+            if dec_lo <= -90.0 or dec_hi >= 90.0 or np.sin(radius[position]) >= cos_dec:
+                columns = np.arange(n_ra)
+            else:
+                half_width = np.degrees(np.arcsin(np.sin(radius[position]) / cos_dec))
+                first = int(np.floor((centers_ra[position] - half_width) / resolution))
+                last = int(np.floor((centers_ra[position] + half_width) / resolution))
+                columns = np.arange(first, last + 1) % n_ra
+
+            flat = (rows[:, np.newaxis] * n_ra + columns[np.newaxis, :]).ravel()
+            cell_parts.append(flat)
+            polygon_parts.append(np.full(len(flat), position, dtype=np.int32))
+
+        cells = np.full((n_dec * n_ra, 1), -1, dtype=np.int32)
+        if cell_parts:
+            flat = np.concatenate(cell_parts)
+            polygons = np.concatenate(polygon_parts)
+            order = np.argsort(flat, kind='stable')
+            flat = flat[order]
+            polygons = polygons[order]
+
+            # Rank of each entry within its cell -> column in the padded table
+            starts = np.r_[0, np.flatnonzero(np.diff(flat)) + 1]
+            counts = np.diff(np.r_[starts, len(flat)])
+            rank = np.arange(len(flat)) - np.repeat(starts, counts)
+
+            cells = np.full((n_dec * n_ra, int(counts.max())), -1, dtype=np.int32)
+            cells[flat, rank] = polygons
+
+        return cls(cells.reshape(n_dec, n_ra, -1), index, resolution)
+
+    def candidates(self, ra, dec):
+        """
+        Candidate footprint positions for each position (no exact test).
+
+        Returns:
+        --------
+        np.ndarray : int32 array (N, max_candidates), -1 padded
+        """
+        ra = np.mod(np.asarray(ra, dtype=float), 360.0)
+        dec = np.clip(np.asarray(dec, dtype=float), -90.0, 90.0)
+        valid = np.isfinite(ra) & np.isfinite(dec)
+        rows = np.zeros(ra.shape, dtype=np.intp)
+        columns = np.zeros(ra.shape, dtype=np.intp)
+        rows[valid] = np.minimum(((dec[valid] + 90.0) / self.resolution).astype(np.intp), self.n_dec - 1)
+        columns[valid] = np.minimum((ra[valid] / self.resolution).astype(np.intp), self.n_ra - 1)
+
+        candidates = np.asarray(self.cells[rows, columns])
+        candidates[~valid] = -1
+        return candidates
+
+    def locate(self, ra, dec):
+        """
+        Find the footprint id covering each position.
+
+        Parameters:
+        -----------
+        ra, dec : array_like
+            Positions in degrees
+
+        Returns:
+        --------
+        np.ndarray : Footprint ids, -1 where nothing covers the position
+        """
+        ra = np.atleast_1d(np.asarray(ra, dtype=float))
+        dec = np.atleast_1d(np.asarray(dec, dtype=float))
+        result = np.full(len(ra), SphericalPolygonIndex.MISSING, dtype=np.int64)
+
+        candidates = self.candidates(ra, dec)
+        point_idx, slot = np.nonzero(candidates >= 0)
+        if point_idx.size:
+            points = radec_to_xyz(ra, dec)
+            self.index.resolve_pairs(points, point_idx, candidates[point_idx, slot], result)
+        return result
+
+    def save(self, directory, keep_versions=2, **metadata):
+        """
+        Write the grid as .npy files in a new version directory plus meta.json.
+
+        Every rebuild goes to its own subdirectory, and meta.json pointing at
+        it is moved into place last, so readers see either the complete old
+        grid or the complete new one, never a mix. Only the newest
+        keep_versions versions are kept; processes that still map a removed
+        version keep their pages until they re-open the grid.
+        """
+        built_at = time.time()
+        version = f'v{time.time_ns():020d}'
+        version_dir = os.path.join(directory, version)
+        os.makedirs(version_dir)
+        arrays = {
+            'cells': self.cells,
+            'ids': self.index.ids,
+            'centers': self.index.centers,
+            'normals': self.index.normals,
+            'cos_radius': self.index.cos_radius,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(version_dir, f'{name}.npy'), np.ascontiguousarray(array))
+
+        meta = {
+            'version': version,
+            'resolution': self.resolution,
+            'shape': list(self.cells.shape),
+            'footprints': len(self.index),
+            'built_at': built_at,
+        }
+        meta.update(metadata)
+        meta_path = os.path.join(directory, self.META_FILE)
+        temp_path = f'{meta_path}.tmp-{os.getpid()}'
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(temp_path, meta_path)
+
+        versions = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith('v') and os.path.isdir(os.path.join(directory, name))
+        )
+        for old in versions[:-max(1, keep_versions)]:
+            if old != version:
+                shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+        return meta
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Open the version of the grid named in meta.json, memory-mapped by default.
+
+        Returns:
+        --------
+        SkyLookupGrid or None : None if the directory holds no complete grid
+        """
+        meta_path = os.path.join(directory, cls.META_FILE)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not meta.get('version'):
+            return None
+        version_dir = os.path.join(directory, meta['version'])
+        mode = 'r' if mmap else None
+        try:
+            arrays = {
+                name: np.load(os.path.join(version_dir, f'{name}.npy'), mmap_mode=mode)
+                for name in cls.ARRAYS
+            }
+        except (OSError, ValueError):
+            return None
+
+        index = SphericalPolygonIndex.from_arrays(
+            arrays['ids'], arrays['centers'], arrays['normals'], arrays['cos_radius']
+        )
+        grid = cls(arrays['cells'], index, meta['resolution'])
+        grid.meta = meta
+        return grid
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'survey'
+
+urlpatterns = [
+    path('api/frames/cone/', views.frame_cone_search, name='frame_cone_search'),
+    path('api/skymap/tiles/', views.skymap_tiles, name='skymap_tiles'),
+    path('api/references/', views.reference_coverage, name='reference_coverage'),
+    path('api/coverage/', views.coverage_map, name='coverage_map'),
+]
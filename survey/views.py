@@ -1,3 +1,323 @@
-from django.shortcuts import render
+import json
+import math
+import time
+import base64
+import logging
+from functools import wraps
+from datetime import datetime, timezone as dt_timezone
 
-# Create your views here.
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime, parse_date
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+
+from survey import skymap
+from survey.models import ScienceFrame, Tile, TileFilterSummary, FrameManager
+
+logger = logging.getLogger(__name__)
+
+MAX_CONE_RADIUS_DEG = 10.0
+MAX_PAGE_SIZE = 1000
+MAX_SKYMAP_NSIDE = 1024
+MAX_REFERENCE_TILES = 5000
+MAX_COVERAGE_NSIDE = 128
+
+
+def _encode_cursor(cursor):
+    """Opaque keyset cursor from (obstime, id)."""
+    if cursor is None:
+        return None
+    obstime, frame_id = cursor
+    raw = json.dumps([obstime.isoformat(), frame_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(token):
+    """Inverse of _encode_cursor; raises ValueError on malformed tokens."""
+    try:
+        obstime, frame_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(obstime), int(frame_id)
+
+
+def _parse_time(value, name):
+    """Parse an ISO date or datetime query parameter (naive values are UTC)."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid {name}: {value}")
+        parsed = datetime(day.year, day.month, day.day)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def _parse_tile_ids(values):
+    """Tile ids from repeated 'tile' parameters (numeric ids or T01234 names)."""
+    tile_ids = []
+    for value in values:
+        for token in value.split(','):
+            token = token.strip().upper()
+            if not token:
+                continue
+            try:
+                tile_ids.append(int(token[1:] if token.startswith('T') else token))
+            except ValueError:
+                raise ValueError(f"Invalid tile: {token}")
+    return tile_ids
+
+
+def _parse_float(params, name, default=None):
+    """Parse an optional float query parameter (inf and nan are rejected)."""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        parsed = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+    if not math.isfinite(parsed):
+        raise ValueError(f"Invalid {name}: {value}")
+    return parsed
+
+
+def _parse_int(params, name, default=None):
+    """Parse an optional integer query parameter."""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+
+
+def _parse_nside(params, default, max_nside):
+    """Parse an nside parameter: a power of two in [1, max_nside]."""
+    nside = _parse_int(params, 'nside', default)
+    if nside < 1 or nside & (nside - 1):
+        raise ValueError(f"nside must be a positive power of two, got {nside}")
+    if nside > max_nside:
+        raise ValueError(f"nside must be at most {max_nside}")
+    return nside
+
+
+def _login_required_json(view):
+    """Like login_required, but answers API clients with 401 instead of a redirect."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_GET
+def frame_cone_search(request):
+    """
+    Science frames pointed within a cone.
+
+    GET parameters: ra, dec, radius (degrees, required); filter and unit
+    (repeatable); start, end (ISO date/datetime, UTC); min_exptime,
+    max_exptime (seconds); pointing ('object' or 'unit'); limit; cursor
+    (next_cursor from the previous page).
+    """
+    params = request.GET
+    try:
+        ra = _parse_float(params, 'ra')
+        dec = _parse_float(params, 'dec')
+        radius = _parse_float(params, 'radius')
+        if ra is None or dec is None or radius is None:
+            raise ValueError("ra, dec and radius are required")
+        if not -90.0 <= dec <= 90.0:
+            raise ValueError("dec must be within [-90, 90]")
+        if not 0.0 < radius <= MAX_CONE_RADIUS_DEG:
+            raise ValueError(f"radius must be within (0, {MAX_CONE_RADIUS_DEG}] degrees")
+
+        pointing = params.get('pointing', 'object')
+        if pointing not in ScienceFrame.POINTING_COLUMNS:
+            raise ValueError("pointing must be 'object' or 'unit'")
+
+        limit = _parse_int(params, 'limit', 100)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        after = _decode_cursor(params['cursor']) if params.get('cursor') else None
+
+        search = {
+            'filters': params.getlist('filter') or None,
+            'units': params.getlist('unit') or None,
+            'start': _parse_time(params.get('start'), 'start'),
+            'end': _parse_time(params.get('end'), 'end'),
+            'min_exptime': _parse_float(params, 'min_exptime'),
+            'max_exptime': _parse_float(params, 'max_exptime'),
+        }
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    start_time = time.perf_counter()
+    try:
+        rows, next_cursor = ScienceFrame.cone_search(
+            ra % 360.0, dec, radius, pointing=pointing, after=after, limit=limit, **search
+        )
+    except Exception as e:
+        logger.exception("Frame cone search failed")
+        return JsonResponse({'error': f'Search failed: {e}'}, status=500)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    results = []
+    for row in rows:
+        row['obstime'] = row['obstime'].isoformat() if row['obstime'] else None
+        row['night'] = row.pop('night__date').isoformat()
+        row['unit'] = row.pop('unit__name')
+        row['filter'] = row.pop('filter__name')
+        results.append(row)
+
+    return JsonResponse({
+        'count': len(results),
+        'results': results,
+        'next_cursor': _encode_cursor(next_cursor),
+        'query_ms': round(elapsed_ms, 2),
+    })
+
+
+@_login_required_json
+@require_POST
+def skymap_tiles(request):
+    """
+    Rank survey tiles by enclosed probability in an uploaded HEALPix skymap.
+
+    POST multipart (authenticated): skymap (flat or multi-order FITS file);
+    optional nside, level (credible level of the returned tiles, default
+    0.9) and limit. Only nsides whose tile membership was built with the
+    skymap_tiles command are served. Read-only: creating TOO targets is
+    done with the skymap_tiles command.
+    """
+    upload = request.FILES.get('skymap')
+    try:
+        if upload is None:
+            raise ValueError("A 'skymap' file upload is required")
+        nside = _parse_nside(request.POST, skymap.DEFAULT_NSIDE, MAX_SKYMAP_NSIDE)
+        level = _parse_float(request.POST, 'level', 0.9)
+        if not 0.0 < level <= 1.0:
+            raise ValueError("level must be within (0, 1]")
+        limit = _parse_int(request.POST, 'limit')
+        levels = tuple(sorted(set(skymap.CREDIBLE_LEVELS) | {level}))
+
+        start_time = time.perf_counter()
+        ranking = Tile.rank_by_skymap(upload, nside=nside, levels=levels, build_membership=False)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        logger.exception("Skymap tile ranking failed")
+        return JsonResponse({'error': f'Ranking failed: {e}'}, status=500)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    result = skymap.ranking_to_dict(ranking, level, limit=limit)
+    result['query_ms'] = round(elapsed_ms, 2)
+    return JsonResponse(result)
+
+
+@_login_required_json
+@require_http_methods(["GET", "POST"])
+def reference_coverage(request):
+    """
+    Pre-event reference frames per tile and filter (authenticated).
+
+    Tiles are given as repeated/comma-separated 'tile' parameters (ids or
+    T01234 names) or, with POST, as a 'skymap' upload whose credible-region
+    tiles (level, default 0.9; nside, which must have a cached tile
+    membership) are used. Optional: cutoff (ISO date/datetime, UTC; default
+    now) and filter (repeatable).
+    """
+    params = request.POST if request.method == 'POST' else request.GET
+    upload = request.FILES.get('skymap')
+    ranking = None
+    try:
+        cutoff = _parse_time(params.get('cutoff'), 'cutoff')
+        filters = params.getlist('filter') or None
+        start_time = time.perf_counter()
+
+        if upload is not None:
+            nside = _parse_nside(params, skymap.DEFAULT_NSIDE, MAX_SKYMAP_NSIDE)
+            level = _parse_float(params, 'level', 0.9)
+            if not 0.0 < level <= 1.0:
+                raise ValueError("level must be within (0, 1]")
+            ranking = skymap.ranking_to_dict(
+                Tile.rank_by_skymap(upload, nside=nside, levels=(level,), build_membership=False), level
+            )
+            tile_ids = [tile['tile_id'] for tile in ranking['tiles']]
+        else:
+            tile_ids = _parse_tile_ids(params.getlist('tile'))
+            if not tile_ids:
+                raise ValueError("Either 'tile' or a 'skymap' upload is required")
+
+        if len(tile_ids) > MAX_REFERENCE_TILES:
+            raise ValueError(f"At most {MAX_REFERENCE_TILES} tiles per request")
+
+        coverage = TileFilterSummary.reference_coverage(tile_ids, cutoff=cutoff, filters=filters)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        logger.exception("Reference coverage query failed")
+        return JsonResponse({'error': f'Query failed: {e}'}, status=500)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    probabilities = {tile['tile_id']: tile['probability'] for tile in ranking['tiles']} if ranking else {}
+    tiles = []
+    for tile_id in tile_ids:
+        filters_seen = coverage.get(tile_id, {})
+        for summary in filters_seen.values():
+            for key in ('first_obstime', 'last_obstime'):
+                summary[key] = summary[key].isoformat() if summary[key] else None
+        entry = {'tile_id': tile_id, 'name': f'T{tile_id:05d}', 'filters': filters_seen}
+        if tile_id in probabilities:
+            entry['probability'] = probabilities[tile_id]
+        tiles.append(entry)
+
+    return JsonResponse({
+        'cutoff': (cutoff.isoformat() if cutoff else None),
+        'tile_count': len(tiles),
+        'tiles_with_references': sum(1 for tile in tiles if tile['filters']),
+        'credible': ranking['credible'] if ranking else None,
+        'tiles': tiles,
+        'query_ms': round(elapsed_ms, 2),
+    })
+
+
+@require_GET
+def coverage_map(request):
+    """
+    Downsampled per-filter coverage map (read from the .npy maps only).
+
+    GET parameters: filter (omit to list the available filters); nside of
+    the returned map (power of two, default 32); kind ('exptime' = mean
+    seconds per pixel, 'count' = max frames, 'fraction' = covered fraction).
+    Values are in NESTED order.
+    """
+    params = request.GET
+    maps = FrameManager.coverage_maps()
+    filter_name = params.get('filter')
+    if not filter_name:
+        meta = maps.read_meta()
+        return JsonResponse({'nside': maps.nside, 'filters': meta.get('filters', {})})
+
+    try:
+        nside = _parse_nside(params, 32, min(MAX_COVERAGE_NSIDE, maps.nside))
+        kind = params.get('kind', 'exptime')
+        values = maps.downsample(filter_name, nside, kind=kind)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if values is None:
+        return JsonResponse({'error': f'No coverage map for filter {filter_name}'}, status=404)
+
+    return JsonResponse({
+        'filter': filter_name,
+        'nside': nside,
+        'ordering': 'NESTED',
+        'kind': kind,
+        'max': float(values.max()),
+        'values': [round(float(value), 3) for value in values],
+    })